@@ -1,3 +1,12 @@
 from advanced_analytics.profile_analytics import AdvancedProfileAnalytics
+from advanced_analytics.thermocline_engine import BatchThermoclineEngine
+from advanced_analytics.profile_qc import ProfileQC
+from advanced_analytics.climatology import ClimatologyEngine
+from advanced_analytics.standard_levels import StandardLevelInterpolator
+from advanced_analytics.parallel_executor import AnalyticsExecutor
+from advanced_analytics.water_mass_classifier import WaterMassClassifier
+from advanced_analytics.trend_service import TrendService
 
-__all__ = ['AdvancedProfileAnalytics']
\ No newline at end of file
+__all__ = ['AdvancedProfileAnalytics', 'BatchThermoclineEngine', 'ProfileQC', 'ClimatologyEngine',
+           'StandardLevelInterpolator', 'AnalyticsExecutor', 'WaterMassClassifier',
+           'TrendService']
@@ -0,0 +1,233 @@
+"""
+Depth-binned climatology and anomaly scoring
+
+Mean and standard deviation per (region, calendar month, depth bin) are
+folded from the stats cube (count / sum / sum of squares per cell) into
+dense numpy arrays. Scoring a result set is then a handful of array
+lookups: no per-row Python. Sparse cells fall back to the region's
+annual value for that depth bin, then to the all-region depth bin.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from database.stats_cube import DEPTH_BIN_EDGES, StatsCube
+from data_processing.region_classifier import REGION_NAMES, classify_frame
+
+MIN_CELL_COUNT = 30  # observations needed before a cell is trusted
+LEVELS = np.array(['region_month', 'region', 'global', 'none'], dtype=object)
+
+
+def depth_bin_index(pressure, edges=DEPTH_BIN_EDGES) -> np.ndarray:
+    """Bin index per pressure (-1 for NaN); same bins as the stats cube"""
+    pressure = np.asarray(pressure, dtype='float64')
+    index = np.searchsorted(np.asarray(edges, dtype='float64'), np.maximum(pressure, 0), side='right') - 1
+    return np.where(np.isnan(pressure), -1, index)
+
+
+@dataclass
+class ClimatologyTable:
+    """
+    Moments for one parameter.
+    Arrays are indexed [region, month - 1, depth bin]; regions follow REGION_NAMES.
+    """
+    parameter: str
+    n: np.ndarray
+    value_sum: np.ndarray
+    value_sum_sq: np.ndarray
+    regions: List[str]
+
+    @classmethod
+    def empty(cls, parameter: str, regions: List[str] = REGION_NAMES) -> 'ClimatologyTable':
+        shape = (len(regions), 12, len(DEPTH_BIN_EDGES))
+        return cls(parameter, np.zeros(shape), np.zeros(shape), np.zeros(shape), list(regions))
+
+    @classmethod
+    def from_cells(cls, parameter: str, cells: pd.DataFrame) -> 'ClimatologyTable':
+        """Fold stats cube cells (any number of years) into calendar months"""
+        table = cls.empty(parameter)
+        if cells.empty:
+            return table
+        table._accumulate(
+            cells['region'].to_numpy(),
+            pd.to_datetime(cells['month']).dt.month.to_numpy(),
+            depth_bin_index(cells['depth_bin']),
+            cells['n'].to_numpy(dtype='float64'),
+            cells['value_sum'].to_numpy(dtype='float64'),
+            cells['value_sum_sq'].to_numpy(dtype='float64')
+        )
+        return table
+
+    @classmethod
+    def from_frame(cls, parameter: str, df: pd.DataFrame) -> 'ClimatologyTable':
+        """Climatology of raw rows (used when the cube has not been built)"""
+        table = cls.empty(parameter)
+        if parameter not in df.columns or 'pressure' not in df.columns:
+            return table
+        values = pd.to_numeric(df[parameter], errors='coerce').to_numpy(dtype='float64')
+        ok = ~np.isnan(values)
+        table._accumulate(
+            _regions(df)[ok],
+            _months(df)[ok],
+            depth_bin_index(df['pressure'])[ok],
+            np.ones(ok.sum()),
+            values[ok],
+            values[ok] ** 2
+        )
+        return table
+
+    def _accumulate(self, regions, months, bins, n, s, ss):
+        r = pd.Categorical(regions, categories=self.regions).codes
+        m = np.asarray(months, dtype='float64')
+        keep = (r >= 0) & (m >= 1) & (bins >= 0)
+        index = (r[keep], m[keep].astype(int) - 1, bins[keep])
+        np.add.at(self.n, index, n[keep])
+        np.add.at(self.value_sum, index, s[keep])
+        np.add.at(self.value_sum_sq, index, ss[keep])
+
+    def moments(self, level: str):
+        """(count, mean, std) arrays at 'region_month', 'region' or 'global' level"""
+        axes = {'region_month': None, 'region': 1, 'global': (0, 1)}[level]
+        n, s, ss = self.n, self.value_sum, self.value_sum_sq
+        if axes is not None:
+            n, s, ss = n.sum(axis=axes), s.sum(axis=axes), ss.sum(axis=axes)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = s / n
+            variance = (ss - n * mean ** 2) / (n - 1)
+        std = np.sqrt(np.clip(np.where(n > 1, variance, np.nan), 0, None))
+        return n, mean, std
+
+    @property
+    def total_count(self) -> int:
+        return int(self.n.sum())
+
+
+class ClimatologyEngine:
+    """Loads climatology tables from the stats cube and scores rows against them"""
+
+    def __init__(self, stats_cube: Optional[StatsCube] = None, min_count: int = MIN_CELL_COUNT):
+        self.stats_cube = stats_cube
+        self.min_count = min_count
+        self._tables: Dict[str, Tuple[int, ClimatologyTable]] = {}   # parameter -> (watermark, table)
+
+    def table(self, parameter: str) -> Optional[ClimatologyTable]:
+        """
+        Table for a parameter (None when the cube is unavailable), cached
+        until the cube's watermark moves (rows folded in by a refresh)
+        """
+        if self.stats_cube is None:
+            return None
+        watermark = self.stats_cube.watermark()
+        if not watermark:
+            return None
+        cached = self._tables.get(parameter)
+        if cached is not None and cached[0] == watermark:
+            return cached[1]
+
+        table = ClimatologyTable.from_cells(parameter, self.stats_cube.cells(parameter))
+        if table.total_count == 0:
+            return None
+        self._tables[parameter] = (watermark, table)
+        return table
+
+    def resolve_table(self, parameter: str, df: pd.DataFrame,
+                      table: Optional[ClimatologyTable] = None) -> ClimatologyTable:
+        """Explicit table, else the stats cube table, else a climatology of df itself"""
+        return table or self.table(parameter) or ClimatologyTable.from_frame(parameter, df)
+
+    def refresh(self):
+        """Drop cached tables (also rebuilt automatically when the watermark moves)"""
+        self._tables.clear()
+
+    def score(self, df: pd.DataFrame, parameter: str = 'temperature',
+              table: Optional[ClimatologyTable] = None) -> pd.DataFrame:
+        """
+        Climatological mean/std and z-score for every row.
+
+        Args:
+            df: Rows with pressure, the parameter and latitude/longitude
+                (or ocean_region) and timestamp when available
+            parameter: Column to score
+            table: Climatology to use (default: from the stats cube,
+                else built from df itself)
+
+        Returns:
+            DataFrame aligned to df.index with climatology_mean,
+            climatology_std, z_score and climatology_level
+        """
+        result = pd.DataFrame(index=df.index, columns=[
+            'climatology_mean', 'climatology_std', 'z_score', 'climatology_level'
+        ])
+        if df.empty or parameter not in df.columns or 'pressure' not in df.columns:
+            return result
+
+        table = self.resolve_table(parameter, df, table)
+
+        r = pd.Categorical(_regions(df), categories=table.regions).codes
+        months = _months(df)
+        m = np.where(np.isnan(months), -1, months - 1).astype(int)
+        b = depth_bin_index(df['pressure'])
+
+        mean = np.full(len(df), np.nan)
+        std = np.full(len(df), np.nan)
+        level = np.full(len(df), len(LEVELS) - 1)
+        unresolved = b >= 0
+
+        # Most specific level first; rows move down a level while the cell is sparse
+        for i, name in enumerate(LEVELS[:-1]):
+            n_arr, mean_arr, std_arr = table.moments(name)
+            if name == 'region_month':
+                rows = unresolved & (r >= 0) & (m >= 0)
+                lookup = (r[rows], m[rows], b[rows])
+            elif name == 'region':
+                rows = unresolved & (r >= 0)
+                lookup = (r[rows], b[rows])
+            else:
+                rows = unresolved.copy()
+                lookup = (b[rows],)
+
+            idx = np.flatnonzero(rows)
+            enough = n_arr[lookup] >= self.min_count
+            idx, lookup = idx[enough], tuple(a[enough] for a in lookup)
+            mean[idx] = mean_arr[lookup]
+            std[idx] = std_arr[lookup]
+            level[idx] = i
+            unresolved[idx] = False
+
+        values = pd.to_numeric(df[parameter], errors='coerce').to_numpy(dtype='float64')
+        with np.errstate(invalid='ignore', divide='ignore'):
+            z = np.where(std > 0, (values - mean) / std, np.nan)
+
+        result['climatology_mean'] = mean
+        result['climatology_std'] = std
+        result['z_score'] = z
+        result['climatology_level'] = LEVELS[level]
+        return result
+
+    def anomalies(self, df: pd.DataFrame, parameter: str = 'temperature',
+                  threshold: float = 2.0, table: Optional[ClimatologyTable] = None) -> pd.DataFrame:
+        """Rows whose |z| exceeds threshold, with the scoring columns appended"""
+        scored = self.score(df, parameter, table=table)
+        if scored.empty:
+            return df.iloc[0:0].join(scored)
+        flagged = scored['z_score'].abs() > threshold
+        return df.loc[flagged].join(scored.loc[flagged])
+
+
+def _regions(df: pd.DataFrame) -> np.ndarray:
+    """Region per row (stored column or classified; unknown without coordinates)"""
+    if 'ocean_region' in df.columns or {'latitude', 'longitude'} <= set(df.columns):
+        if 'latitude' not in df.columns:
+            return df['ocean_region'].to_numpy(dtype=object)
+        return classify_frame(df).to_numpy(dtype=object)
+    return np.full(len(df), None, dtype=object)
+
+
+def _months(df: pd.DataFrame) -> np.ndarray:
+    """Calendar month per row as float (NaN when unknown)"""
+    if 'timestamp' not in df.columns:
+        return np.full(len(df), np.nan)
+    return pd.to_datetime(df['timestamp'], errors='coerce').dt.month.to_numpy(dtype='float64')
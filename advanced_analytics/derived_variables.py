@@ -0,0 +1,263 @@
+"""
+Derived seawater variables (TEOS-10) materialized per profile level
+
+- absolute_salinity (g/kg), conservative_temperature (°C),
+  sigma0 (potential density anomaly, kg/m³) and n_squared (N², 1/s²)
+- Uses the GSW toolbox when installed; otherwise EOS-80 approximations
+  (SA from the reference-composition ratio, CT ≈ θ, σθ from UNESCO 1981)
+- Computed once at ingest and stored on argo_profiles, so analytics read
+  the columns instead of recomputing density on every request
+"""
+
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from advanced_analytics.profile_batch import iter_profile_batches
+
+try:
+    import gsw
+    GSW_AVAILABLE = True
+except ImportError:
+    gsw = None
+    GSW_AVAILABLE = False
+
+DERIVED_COLUMNS = ['absolute_salinity', 'conservative_temperature', 'sigma0', 'n_squared']
+
+GRAVITY = 9.81        # m/s²
+RHO_0 = 1025.0        # kg/m³ (Boussinesq reference for the fallback N²)
+SA_PER_SP = 35.16504 / 35.0  # reference-composition salinity ratio
+
+
+def sigma_t(temperature, salinity):
+    """
+    Density anomaly at atmospheric pressure (UNESCO EOS-80), kg/m³ - 1000.
+    With potential temperature as input this is σθ.
+    """
+    T = np.asarray(temperature, dtype='float64')
+    S = np.asarray(salinity, dtype='float64')
+    rho_w = (999.842594 + 6.793952e-2 * T - 9.095290e-3 * T ** 2 + 1.001685e-4 * T ** 3
+             - 1.120083e-6 * T ** 4 + 6.536332e-9 * T ** 5)
+    A = 8.24493e-1 - 4.0899e-3 * T + 7.6438e-5 * T ** 2 - 8.2467e-7 * T ** 3 + 5.3875e-9 * T ** 4
+    B = -5.72466e-3 + 1.0227e-4 * T - 1.6546e-6 * T ** 2
+    C = 4.8314e-4
+    with np.errstate(invalid='ignore'):
+        return rho_w + A * S + B * np.abs(S) ** 1.5 + C * S ** 2 - 1000.0
+
+
+def potential_temperature(SP, t, p):
+    """Potential temperature referenced to 0 dbar (EOS-80, Bryden 1973)"""
+    S1 = np.asarray(SP, dtype='float64') - 35.0
+    T = np.asarray(t, dtype='float64')
+    P = np.asarray(p, dtype='float64') / 10.0  # dbar -> bar
+    return (T - P * (3.6504e-4 + 8.3198e-5 * T - 5.4065e-7 * T ** 2 + 4.0274e-9 * T ** 3)
+            - P * S1 * (1.7439e-5 - 2.9778e-7 * T)
+            - P ** 2 * (8.9309e-7 - 3.1628e-8 * T + 2.1987e-10 * T ** 2)
+            + 4.1057e-9 * S1 * P ** 2
+            - P ** 3 * (-1.6056e-10 + 5.0484e-12 * T))
+
+
+def absolute_salinity(SP, p, lon, lat):
+    """Absolute salinity (g/kg) from practical salinity"""
+    if GSW_AVAILABLE:
+        return gsw.SA_from_SP(SP, p, lon, lat)
+    return np.asarray(SP, dtype='float64') * SA_PER_SP
+
+
+def conservative_temperature(SA, t, p, SP=None):
+    """Conservative temperature (°C); θ is used when GSW is not installed"""
+    if GSW_AVAILABLE:
+        return gsw.CT_from_t(SA, t, p)
+    SP = SP if SP is not None else np.asarray(SA, dtype='float64') / SA_PER_SP
+    return potential_temperature(SP, t, p)
+
+
+def potential_density_anomaly(SA, CT, SP=None):
+    """σ0 (kg/m³ - 1000); EOS-80 σθ when GSW is not installed"""
+    if GSW_AVAILABLE:
+        return gsw.sigma0(SA, CT)
+    SP = SP if SP is not None else np.asarray(SA, dtype='float64') / SA_PER_SP
+    return sigma_t(CT, SP)
+
+
+def n_squared_profiles(SA: np.ndarray, CT: np.ndarray, p: np.ndarray,
+                       lat: np.ndarray, sigma: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Buoyancy frequency squared on padded (n_profiles, levels) arrays.
+    Column j holds N² across the step from level j-1 to j (column 0 is NaN).
+    """
+    n_profiles, width = p.shape
+    out = np.full((n_profiles, width), np.nan)
+    if width < 2:
+        return out
+
+    if GSW_AVAILABLE:
+        lat_2d = np.broadcast_to(np.asarray(lat, dtype='float64')[:, None], p.shape)
+        n2, _ = gsw.Nsquared(SA, CT, p, lat_2d, axis=1)
+        out[:, 1:] = n2
+        return out
+
+    # Boussinesq: N² = (g / ρ0) dσθ/dz, with 1 dbar ≈ 1 m
+    sigma = sigma if sigma is not None else potential_density_anomaly(SA, CT)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        dz = np.diff(p, axis=1)
+        out[:, 1:] = np.where(dz > 0, GRAVITY / RHO_0 * np.diff(sigma, axis=1) / dz, np.nan)
+    return out
+
+
+class DerivedVariableEngine:
+    """Compute and materialize derived variables for long-format profile rows"""
+
+    def __init__(self, chunk_profiles: int = 20000):
+        self.chunk_profiles = chunk_profiles
+
+    def compute(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Derived variables aligned to df.index (NaN where T/S/pressure are
+        missing or a pressure level is duplicated within a profile)
+        """
+        result = pd.DataFrame(np.nan, index=df.index, columns=DERIVED_COLUMNS)
+        if df.empty or not {'pressure', 'temperature', 'salinity'} <= set(df.columns):
+            return result
+
+        out = {col: np.full(len(df), np.nan) for col in DERIVED_COLUMNS}
+        rows = df.assign(_row=np.arange(len(df), dtype='float64'))
+
+        for batch in iter_profile_batches(
+            rows, columns=('temperature', 'salinity', '_row'),
+            required=('temperature', 'salinity'), chunk_profiles=self.chunk_profiles
+        ):
+            P = batch.pressure
+            SP = batch.values['salinity']
+            T = batch.values['temperature']
+            lat = _profile_coordinate(batch.keys, 'latitude')
+            lon = _profile_coordinate(batch.keys, 'longitude')
+
+            SA = absolute_salinity(SP, P, lon[:, None], lat[:, None])
+            CT = conservative_temperature(SA, T, P, SP=SP)
+            sigma = potential_density_anomaly(SA, CT, SP=SP)
+            n2 = n_squared_profiles(SA, CT, P, lat, sigma=sigma)
+
+            valid = batch.valid
+            target = batch.values['_row'][valid].astype(np.int64)
+            for col, values in zip(DERIVED_COLUMNS, (SA, CT, sigma, n2)):
+                out[col][target] = values[valid]
+
+        for col in DERIVED_COLUMNS:
+            result[col] = out[col]
+        return result
+
+    def attach(self, df: pd.DataFrame, compute=None) -> pd.DataFrame:
+        """
+        Return df with derived columns; precomputed (materialized) values
+        are kept and only missing ones are computed.
+
+        Args:
+            df: Long-format rows
+            compute: Alternative to self.compute returning the same
+                     index-aligned frame (e.g. the parallel executor)
+        """
+        inputs = ['pressure', 'temperature', 'salinity']
+        if not set(inputs) <= set(df.columns):
+            return df
+
+        present = [c for c in DERIVED_COLUMNS if c in df.columns]
+        if len(present) == len(DERIVED_COLUMNS):
+            computable = df[inputs].notna().all(axis=1)
+            if not (df[present].isna().all(axis=1) & computable).any():
+                return df
+
+        computed = (compute or self.compute)(df).reindex(df.index)
+        df = df.copy()
+        for col in DERIVED_COLUMNS:
+            df[col] = df[col].fillna(computed[col]) if col in df.columns else computed[col]
+        return df
+
+    def materialize(self, engine, float_ids: Optional[Iterable[str]] = None,
+                    chunk_floats: int = 200) -> int:
+        """
+        Backfill derived columns on argo_profiles (rows loaded by other paths).
+
+        Args:
+            engine: SQLAlchemy engine
+            float_ids: Restrict to these floats (default: floats with missing values)
+            chunk_floats: Floats per read/update round trip
+
+        Returns:
+            Number of rows updated
+        """
+        if float_ids is None:
+            with engine.begin() as conn:
+                # Rows loaded with NaN instead of NULL (NaN is not NULL to the filter below)
+                conn.execute(text(_NAN_TO_NULL_SQL))
+                float_ids = [
+                    row[0] for row in conn.execute(text(
+                        "SELECT DISTINCT float_id FROM argo_profiles "
+                        "WHERE sigma0 IS NULL AND salinity IS NOT NULL "
+                        "AND salinity <> 'NaN'::float8 AND float_id IS NOT NULL"
+                    ))
+                ]
+        float_ids = list(float_ids)
+
+        updated = 0
+        for start in range(0, len(float_ids), chunk_floats):
+            chunk = float_ids[start:start + chunk_floats]
+            with engine.begin() as conn:
+                df = pd.read_sql(
+                    text("""
+                        SELECT id, float_id, cycle_number, latitude, longitude,
+                               pressure, temperature, salinity
+                        FROM argo_profiles
+                        WHERE float_id = ANY(:float_ids)
+                    """),
+                    conn, params={'float_ids': chunk}
+                )
+                derived = self.compute(df).dropna(how='all')
+                if derived.empty:
+                    continue
+
+                records = _update_records(df.loc[derived.index, 'id'], derived)
+                conn.execute(
+                    text("""
+                        UPDATE argo_profiles SET
+                            absolute_salinity = :absolute_salinity,
+                            conservative_temperature = :conservative_temperature,
+                            sigma0 = :sigma0,
+                            n_squared = :n_squared
+                        WHERE id = :id
+                    """),
+                    records
+                )
+                updated += len(records)
+            print(f"   ▶ Derived variables: {start + len(chunk)}/{len(float_ids)} floats")
+
+        print(f"✅ Materialized derived variables for {updated} rows")
+        return updated
+
+
+_NAN_TO_NULL_SQL = (
+    "UPDATE argo_profiles SET "
+    + ", ".join(f"{c} = NULLIF({c}, 'NaN'::float8)" for c in DERIVED_COLUMNS)
+    + " WHERE "
+    + " OR ".join(f"{c} = 'NaN'::float8" for c in DERIVED_COLUMNS)
+)
+
+
+def _profile_coordinate(keys: pd.DataFrame, column: str) -> np.ndarray:
+    """Per-profile latitude/longitude (0 when unknown)"""
+    if column not in keys.columns:
+        return np.zeros(len(keys))
+    return pd.to_numeric(keys[column], errors='coerce').fillna(0.0).to_numpy(dtype='float64')
+
+
+def _update_records(ids: pd.Series, derived: pd.DataFrame) -> List[Dict]:
+    """executemany parameters with NaN mapped to NULL"""
+    frame = derived.astype(object).where(derived.notna(), None)
+    frame['id'] = ids.astype(int).to_numpy()
+    return frame.to_dict('records')
+
+
+# Shared instance for ingest and analytics
+derived_engine = DerivedVariableEngine()
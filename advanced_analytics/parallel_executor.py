@@ -0,0 +1,334 @@
+"""
+Process-pool executor for heavy per-profile analytics
+
+Long-format rows are partitioned by whole (float_id, cycle_number)
+profiles and each partition runs a registered task (thermocline, profile
+QC, mixed layer depth, derived variables, anomaly scoring) in a worker
+process; partial results are concatenated in partition order.
+
+- Each job keeps at most max_workers partitions in flight, so concurrent
+  requests interleave instead of one request filling the queue
+- A job past its timeout (or cancelled) drops its queued partitions. If
+  its partitions are the only work in flight in their pool, the pool is
+  recycled: the workers are terminated and a fresh pool serves new work.
+  When other jobs share the pool, the abandoned partitions run to
+  completion instead (other jobs' work is never killed). A job failing
+  with an ordinary task error leaves the pool alone
+- A pool that breaks (a worker died) is replaced; its partitions are
+  resubmitted once
+- Workers come from a forkserver (spawn where unavailable): the callers
+  are threaded (API threadpool, Streamlit sessions), and forking a
+  threaded process can deadlock the child on a lock held by another
+  thread (connection pool, logging, BLAS)
+- Small inputs run inline, where pickling would cost more than it saves
+"""
+
+import os
+import threading
+import time
+import multiprocessing
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from advanced_analytics.profile_batch import profile_keys
+from advanced_analytics.thermocline_engine import BatchThermoclineEngine, mixed_layer_depths
+from advanced_analytics.profile_qc import ProfileQC
+from advanced_analytics.derived_variables import derived_engine
+from advanced_analytics.climatology import ClimatologyEngine
+
+DEFAULT_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+DEFAULT_TIMEOUT = 120.0          # seconds per job
+PARTITION_PROFILES = 2000        # profiles per worker task
+MIN_PARALLEL_ROWS = 500000       # below this, run inline
+
+
+class AnalyticsError(Exception):
+    """Base class for executor failures"""
+
+
+class AnalyticsTimeout(AnalyticsError, TimeoutError):
+    """Job exceeded its time budget"""
+
+
+class AnalyticsCancelled(AnalyticsError):
+    """Job was cancelled"""
+
+
+# ----------------------------------------------------------------------
+# Tasks (module level so worker processes can unpickle them)
+# ----------------------------------------------------------------------
+
+def _thermocline_task(part: pd.DataFrame) -> pd.DataFrame:
+    return BatchThermoclineEngine().compute(part)
+
+
+def _profile_qc_task(part: pd.DataFrame) -> pd.DataFrame:
+    return ProfileQC().run(part)['profiles']
+
+
+def _mixed_layer_task(part: pd.DataFrame, threshold: float = 0.5,
+                      criterion: str = 'temperature') -> pd.DataFrame:
+    if criterion == 'density':
+        part = derived_engine.attach(part)
+    return mixed_layer_depths(part, threshold, criterion)
+
+
+def _derived_task(part: pd.DataFrame) -> pd.DataFrame:
+    return derived_engine.compute(part)
+
+
+def _anomaly_task(part: pd.DataFrame, parameter: str = 'temperature', table=None,
+                  min_count: int = 30) -> pd.DataFrame:
+    return ClimatologyEngine(min_count=min_count).score(part, parameter, table=table)
+
+
+TASKS: Dict[str, Callable[..., pd.DataFrame]] = {
+    'thermocline': _thermocline_task,
+    'profile_qc': _profile_qc_task,
+    'mixed_layer': _mixed_layer_task,
+    'derived': _derived_task,
+    'anomalies': _anomaly_task,
+}
+
+# Per-task time budgets (seconds); DEFAULT_TIMEOUT otherwise
+TASK_TIMEOUTS = {
+    'profile_qc': 60.0,
+    'mixed_layer': 60.0,
+}
+
+
+def run_task(task: str, df: pd.DataFrame, **kwargs) -> pd.DataFrame:
+    """Run a registered task in the current process"""
+    if task not in TASKS:
+        raise ValueError(f"Unknown analytics task: {task}")
+    return TASKS[task](df, **kwargs)
+
+
+def partition_profiles(df: pd.DataFrame, profiles_per_part: int = PARTITION_PROFILES) -> List[pd.DataFrame]:
+    """Split rows into frames of whole profiles (original index kept)"""
+    keys = profile_keys(df)
+    if df.empty or not keys:
+        return [df]
+
+    codes = df.groupby(keys, sort=True, dropna=False).ngroup().to_numpy()
+    part_ids = codes // profiles_per_part
+    n_parts = int(part_ids.max()) + 1 if len(part_ids) else 0
+    if n_parts <= 1:
+        return [df]
+
+    order = np.argsort(part_ids, kind='stable')
+    bounds = np.searchsorted(part_ids[order], np.arange(1, n_parts))
+    return [df.iloc[rows] for rows in np.split(order, bounds)]
+
+
+class AnalyticsExecutor:
+    """Runs analytics tasks over profile partitions in a process pool"""
+
+    def __init__(self, max_workers: Optional[int] = None,
+                 timeout: Optional[float] = None,
+                 profiles_per_part: int = PARTITION_PROFILES,
+                 min_parallel_rows: int = MIN_PARALLEL_ROWS):
+        self.max_workers = max_workers or int(os.getenv('ANALYTICS_WORKERS', DEFAULT_WORKERS))
+        self.timeout = timeout or float(os.getenv('ANALYTICS_TIMEOUT', DEFAULT_TIMEOUT))
+        self.profiles_per_part = profiles_per_part
+        self.min_parallel_rows = min_parallel_rows
+
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._inflight: Dict[ProcessPoolExecutor, int] = {}    # pool -> submitted, unsettled futures
+        self._lock = threading.Lock()
+        self._jobs: Dict[int, threading.Event] = {}
+        self._next_job = 0
+
+    def map(self, task: str, df: pd.DataFrame, timeout: Optional[float] = None,
+            cancel_event: Optional[threading.Event] = None, **kwargs) -> pd.DataFrame:
+        """
+        Run a task over all profiles in df and merge the partial results.
+
+        Args:
+            task: Name in TASKS
+            df: Long-format rows
+            timeout: Seconds for the whole job (default per task)
+            cancel_event: Set to cancel this job from another thread
+            **kwargs: Passed to the task function
+
+        Raises:
+            AnalyticsTimeout / AnalyticsCancelled
+        """
+        if task not in TASKS:
+            raise ValueError(f"Unknown analytics task: {task}")
+
+        parts = partition_profiles(df, self.profiles_per_part)
+        if self.max_workers <= 1 or len(parts) <= 1 or len(df) < self.min_parallel_rows:
+            return run_task(task, df, **kwargs)
+
+        budget = timeout or TASK_TIMEOUTS.get(task, self.timeout)
+        deadline = time.monotonic() + budget
+        cancel_event = cancel_event or threading.Event()
+        job_id = self._register(cancel_event)
+
+        results: List[Optional[pd.DataFrame]] = [None] * len(parts)
+        queued = deque(enumerate(parts))
+        running = {}     # future -> (partition index, pool it runs in)
+        retried = set()
+        abandoned = False
+        try:
+            while queued or running:
+                if queued and len(running) < self.max_workers:
+                    pool = self._get_pool()
+                while queued and len(running) < self.max_workers:
+                    index, part = queued.popleft()
+                    try:
+                        future = self._submit(pool, run_task, task, part, **kwargs)
+                    except (BrokenProcessPool, RuntimeError):
+                        # Pool broke or was retired since _get_pool(): use a fresh one
+                        self._retire_pool(pool, terminate=False)
+                        queued.appendleft((index, part))
+                        break
+                    running[future] = (index, pool)
+
+                if cancel_event.is_set():
+                    abandoned = True
+                    raise AnalyticsCancelled(f"{task} cancelled")
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    abandoned = True
+                    raise AnalyticsTimeout(
+                        f"{task} exceeded {budget:.0f}s "
+                        f"({len(parts) - len(queued) - len(running)}/{len(parts)} partitions done)"
+                    )
+
+                done, _ = wait(running, timeout=min(remaining, 0.5), return_when=FIRST_COMPLETED)
+                for future in done:
+                    index, future_pool = running.pop(future)
+                    self._settle(future_pool)
+                    try:
+                        results[index] = future.result()
+                    except BrokenProcessPool:
+                        # Pool recycled by another job (or a worker died): retry once
+                        self._retire_pool(future_pool, terminate=False)
+                        if index in retried:
+                            raise
+                        retried.add(index)
+                        queued.appendleft((index, parts[index]))
+        finally:
+            self._release(running, terminate=abandoned)
+            self._unregister(job_id)
+
+        frames = [frame for frame in results if frame is not None and not frame.empty]
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames) if _index_aligned(task) else pd.concat(frames, ignore_index=True)
+
+    def cancel_all(self):
+        """Cancel every running job (each stops at its next check)"""
+        with self._lock:
+            for event in self._jobs.values():
+                event.set()
+
+    @property
+    def active_jobs(self) -> int:
+        with self._lock:
+            return len(self._jobs)
+
+    def shutdown(self):
+        self.cancel_all()
+        self._reset_pool()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=_pool_context())
+                print(f"✅ Analytics process pool started ({self.max_workers} workers)")
+            return self._pool
+
+    def _submit(self, pool: ProcessPoolExecutor, fn: Callable, *args, **kwargs):
+        future = pool.submit(fn, *args, **kwargs)
+        with self._lock:
+            self._inflight[pool] = self._inflight.get(pool, 0) + 1
+        return future
+
+    def _settle(self, pool: ProcessPoolExecutor, count: int = 1):
+        with self._lock:
+            left = self._inflight.get(pool, 0) - count
+            if left > 0:
+                self._inflight[pool] = left
+            else:
+                self._inflight.pop(pool, None)
+
+    def _release(self, running: Dict, terminate: bool):
+        """
+        Give up a job's unfinished futures. Queued ones are cancelled; when
+        terminate is set and the job is the only user of a pool with
+        partitions still executing, that pool's workers are killed.
+        """
+        mine: Dict[ProcessPoolExecutor, int] = {}
+        executing = set()
+        for future, (_, pool) in running.items():
+            mine[pool] = mine.get(pool, 0) + 1
+            if not future.cancel() and not future.done():
+                executing.add(pool)
+
+        for pool, count in mine.items():
+            with self._lock:
+                sole_user = self._inflight.get(pool, 0) <= count
+            self._settle(pool, count)
+            if terminate and pool in executing and sole_user:
+                self._retire_pool(pool, terminate=True)
+
+    def _retire_pool(self, pool: ProcessPoolExecutor, terminate: bool):
+        """Replace pool with a fresh one on next use, optionally killing its workers"""
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+        if terminate:
+            # Running tasks cannot be cancelled; terminating the workers is
+            # the only way to stop them
+            if hasattr(pool, 'terminate_workers'):      # Python >= 3.14
+                pool.terminate_workers()
+            else:
+                # CPython 3.8-3.13 keep the workers in the private _processes
+                # (pid -> Process); covered by TestAnalyticsExecutor on 3.11
+                for process in list((getattr(pool, '_processes', None) or {}).values()):
+                    process.terminate()
+            print("⚠️ Analytics process pool recycled (abandoned partitions terminated)")
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def _reset_pool(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+    def _register(self, event: threading.Event) -> int:
+        with self._lock:
+            self._next_job += 1
+            self._jobs[self._next_job] = event
+            return self._next_job
+
+    def _unregister(self, job_id: int):
+        with self._lock:
+            self._jobs.pop(job_id, None)
+
+
+def _pool_context():
+    """forkserver (spawn where unavailable); see module docstring"""
+    method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    context = multiprocessing.get_context(method)
+    if method == 'forkserver':
+        # Import pandas, gsw and the task modules once in the server
+        context.set_forkserver_preload(['advanced_analytics.parallel_executor'])
+    return context
+
+
+def _index_aligned(task: str) -> bool:
+    """Tasks returning frames aligned to the input index (vs per-profile tables)"""
+    return task in ('derived', 'anomalies')
+
+
+# Shared pool for the MCP server / API
+analytics_executor = AnalyticsExecutor()
@@ -4,14 +4,25 @@ Advanced oceanographic profile analytics
 
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Tuple
-from scipy import stats
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
 from database.db_setup import DatabaseSetup
-from sqlalchemy import text
+from advanced_analytics.profile_batch import count_profiles
+from advanced_analytics.thermocline_engine import BatchThermoclineEngine, GRAVITY, THERMAL_EXPANSION
+from advanced_analytics.derived_variables import derived_engine
+from database.stats_cube import StatsCube
+from advanced_analytics.profile_qc import ProfileQC
+from advanced_analytics.climatology import ClimatologyEngine
+from advanced_analytics.parallel_executor import run_task
+from advanced_analytics.water_mass_classifier import indian_ocean_classifier, generic_classifier
+from advanced_analytics.trend_service import TrendService, trend_record
 
 class AdvancedProfileAnalytics:
     """Advanced analysis tools for ARGO profiles"""
     
+    # Optional AnalyticsExecutor (process pool); None runs everything in-process
+    executor = None
+    
     def identify_water_masses_advanced(self, df: pd.DataFrame) -> Dict:
         """
         Advanced water mass identification using T-S characteristics
@@ -33,105 +44,11 @@ class AdvancedProfileAnalytics:
                 'error': 'Temperature and salinity data required'
             }
         
-        df = df.sort_values('pressure').copy()
-        water_masses = []
-        
-        water_mass_criteria = {
-            'Indian Ocean Surface Water (IOSW)': {
-                'temp_range': (25, 30),
-                'sal_range': (33.0, 36.0),
-                'depth_range': (0, 100),
-                'characteristics': 'Warm, variable salinity surface layer'
-            },
-            'Arabian Sea High Salinity Water (ASHSW)': {
-                'temp_range': (20, 28),
-                'sal_range': (36.0, 37.5),
-                'depth_range': (50, 300),
-                'characteristics': 'High salinity due to excess evaporation'
-            },
-            'Bay of Bengal Low Salinity Water (BBLSW)': {
-                'temp_range': (25, 30),
-                'sal_range': (30.0, 34.5),
-                'depth_range': (0, 100),
-                'characteristics': 'Low salinity due to river discharge and precipitation'
-            },
-            'Indian Ocean Central Water (IOCW)': {
-                'temp_range': (10, 20),
-                'sal_range': (34.5, 35.5),
-                'depth_range': (100, 700),
-                'characteristics': 'Formed by mixing of surface and intermediate waters'
-            },
-            'Indonesian Throughflow Water (ITW)': {
-                'temp_range': (12, 18),
-                'sal_range': (34.3, 34.8),
-                'depth_range': (100, 500),
-                'characteristics': 'Low salinity Pacific water entering Indian Ocean'
-            },
-            'Antarctic Intermediate Water (AAIW)': {
-                'temp_range': (3, 8),
-                'sal_range': (33.8, 34.5),
-                'depth_range': (500, 1500),
-                'characteristics': 'Low salinity minimum layer from Southern Ocean'
-            },
-            'Indian Deep Water (IDW)': {
-                'temp_range': (1.5, 3),
-                'sal_range': (34.7, 34.8),
-                'depth_range': (1500, 3500),
-                'characteristics': 'Deep water mass filling Indian Ocean basins'
-            },
-            'Antarctic Bottom Water (AABW)': {
-                'temp_range': (-0.5, 2),
-                'sal_range': (34.65, 34.72),
-                'depth_range': (3500, 6000),
-                'characteristics': 'Cold, dense bottom water from Antarctica'
-            }
-        }
-        
-        # Identify water masses
-        for wm_name, criteria in water_mass_criteria.items():
-            temp_min, temp_max = criteria['temp_range']
-            sal_min, sal_max = criteria['sal_range']
-            depth_min, depth_max = criteria['depth_range']
-            
-            # Filter data
-            mask = (
-                (df['temperature'] >= temp_min) &
-                (df['temperature'] <= temp_max) &
-                (df['salinity'] >= sal_min) &
-                (df['salinity'] <= sal_max) &
-                (df['pressure'] >= depth_min) &
-                (df['pressure'] <= depth_max)
-            )
-            
-            if mask.any():
-                subset = df[mask]
-                
-                # Calculate core properties
-                core_depth = subset['pressure'].mean()
-                core_temp = subset['temperature'].mean()
-                core_sal = subset['salinity'].mean()
-                
-                # Calculate thickness
-                thickness = subset['pressure'].max() - subset['pressure'].min()
-                
-                # Calculate potential density (simplified)
-                potential_density = 1000 + 0.7 * core_sal - 0.2 * core_temp
-                
-                water_masses.append({
-                    'name': wm_name,
-                    'characteristics': criteria['characteristics'],
-                    'detected': True,
-                    'core_depth_m': float(core_depth),
-                    'depth_range_m': (float(subset['pressure'].min()), float(subset['pressure'].max())),
-                    'thickness_m': float(thickness),
-                    'core_temperature_C': float(core_temp),
-                    'core_salinity_PSU': float(core_sal),
-                    'temperature_range_C': (float(subset['temperature'].min()), float(subset['temperature'].max())),
-                    'salinity_range_PSU': (float(subset['salinity'].min()), float(subset['salinity'].max())),
-                    'potential_density_kgm3': float(potential_density),
-                    'measurements': int(mask.sum()),
-                    'percentage_of_profile': float(mask.sum() / len(df) * 100)
-                })
+        df = self._attach_derived(df.sort_values('pressure'))
+        # All T-S-depth envelopes evaluated in one pass (water_mass_classifier.py)
+        matches = indian_ocean_classifier.matches(df)
+        water_masses = indian_ocean_classifier.summarize(df, matches)
+        profiles = indian_ocean_classifier.profile_summary(df, matches)
         
         # Calculate water column structure
         stratification = self._calculate_stratification(df)
@@ -147,7 +64,11 @@ class AdvancedProfileAnalytics:
             'mixing_zones': mixing_zones,
             'profile_classification': self._classify_water_column(water_masses),
             'total_measurements': len(df),
-            'depth_coverage_m': float(df['pressure'].max())
+            'depth_coverage_m': float(df['pressure'].max()),
+            'profiles_analyzed': int(len(profiles)) if not profiles.empty else 1,
+            'dominant_water_mass_by_profile': (
+                profiles['dominant_water_mass'].value_counts().to_dict() if not profiles.empty else {}
+            )
         }
     
     def _calculate_stratification(self, df: pd.DataFrame) -> Dict:
@@ -156,8 +77,9 @@ class AdvancedProfileAnalytics:
         if len(df) < 5:
             return {'status': 'insufficient_data'}
         
-        # Calculate density (simplified)
-        df['density'] = 1000 + 0.7 * df['salinity'] - 0.2 * df['temperature']
+        # Potential density from materialized sigma0
+        df = derived_engine.attach(df)
+        df['density'] = 1000 + df['sigma0']
         
         # Stratification index (density difference per meter)
         surface_density = df[df['pressure'] <= 10]['density'].mean()
@@ -178,9 +100,13 @@ class AdvancedProfileAnalytics:
         else:
             classification = "well_mixed"
         
+        n_squared = df['n_squared'].dropna()
+        
         return {
             'stratification_index': float(stratification_index),
             'classification': classification,
+            'max_n_squared': float(n_squared.max()) if len(n_squared) else None,
+            'max_n_squared_depth_dbar': float(df.loc[n_squared.idxmax(), 'pressure']) if len(n_squared) else None,
             'surface_density': float(surface_density),
             'deep_density': float(deep_density),
             'density_range': float(density_diff)
@@ -284,6 +210,11 @@ class AdvancedProfileAnalytics:
     
     def __init__(self):
         self.db_setup = DatabaseSetup()
+        self.thermocline_engine = BatchThermoclineEngine()
+        self.profile_qc = ProfileQC()
+        self.stats_cube = StatsCube(self.db_setup.engine)
+        self.climatology = ClimatologyEngine(self.stats_cube)
+        self.trends = TrendService(self.stats_cube)
     
     
     def calculate_thermocline_advanced(self, df: pd.DataFrame) -> Dict:
@@ -303,6 +234,10 @@ class AdvancedProfileAnalytics:
                 'error': 'Insufficient data for thermocline calculation'
             }
         
+        # Rows from several floats/cycles: analyze each profile separately
+        if count_profiles(df) > 1:
+            return self.calculate_thermocline_batch(df)
+        
         df = df.sort_values('pressure').copy()
         df = df.dropna(subset=['pressure', 'temperature'])
         df = df.drop_duplicates(subset=['pressure'])
@@ -367,17 +302,14 @@ class AdvancedProfileAnalytics:
         # Permanent: typically below 100m in tropical/subtropical waters
         is_seasonal = thermocline_depth < 100
         
-        # Calculate stratification index (N² - Brunt-Väisälä frequency)
-        # Simplified calculation without salinity effects
-        g = 9.81  # gravity
-        rho_0 = 1025  # reference density (kg/m³)
-        
-        # Temperature contribution to density
-        alpha = 2e-4  # thermal expansion coefficient
-        dT_dz = -thermocline_strength  # negative because temp decreases with depth
-        
-        # Stratification (s⁻²)
-        N_squared = (g / rho_0) * alpha * dT_dz * 100  # multiply by 100 to convert per m
+        # Stratification (N², s⁻²): materialized TEOS-10 N² within ±25 dbar of
+        # the thermocline; temperature-only g * alpha * |dT/dz| without salinity
+        N_squared = GRAVITY * THERMAL_EXPANSION * thermocline_strength
+        if 'salinity' in df.columns:
+            df = derived_engine.attach(df)
+            near = df.loc[(df['pressure'] - thermocline_depth).abs() <= 25, 'n_squared'].dropna()
+            if len(near) > 0:
+                N_squared = near.mean()
         buoyancy_frequency = np.sqrt(max(N_squared, 0)) if N_squared > 0 else 0
         
         # Temperature characteristics at key depths
@@ -390,17 +322,11 @@ class AdvancedProfileAnalytics:
         thermocline_temp_mean = thermocline_layer['temperature'].mean() if len(thermocline_layer) > 0 else df.loc[max_grad_idx, 'temperature']
         deep_temp_mean = deep_layer['temperature'].mean() if len(deep_layer) > 0 else df['temperature'].iloc[-1]
         
-        # Calculate temperature inversion if present
-        has_inversion = False
-        inversion_depth = None
-        
-        # Check for temperature increase with depth (inversion)
-        for i in range(1, len(df) - 1):
-            if df.iloc[i]['temperature'] > df.iloc[i-1]['temperature']:
-                if df.iloc[i]['pressure'] > 50:  # Only consider below surface layer
-                    has_inversion = True
-                    inversion_depth = df.iloc[i]['pressure']
-                    break
+        # Temperature/density inversions and spikes (vectorized, all layers)
+        qc = self.profile_qc.check_profile(df)
+        inversion_layers = qc['temperature_inversions']
+        has_inversion = len(inversion_layers) > 0
+        inversion_depth = inversion_layers[0]['top_dbar'] if has_inversion else None
         
         # Classify thermocline strength
         strength_classification = self._classify_thermocline_strength(thermocline_strength)
@@ -447,6 +373,9 @@ class AdvancedProfileAnalytics:
             # Temperature inversion
             'has_temperature_inversion': has_inversion,
             'inversion_depth_dbar': float(inversion_depth) if inversion_depth else None,
+            'inversion_layers': inversion_layers,
+            'density_inversion_layers': qc['density_inversions'],
+            'spike_count': qc['spike_count'],
             
             # Data quality
             'data_points': len(df),
@@ -457,6 +386,95 @@ class AdvancedProfileAnalytics:
             'confidence': self._calculate_thermocline_confidence(df, thermocline_strength)
         }
     
+    def calculate_thermocline_batch(self, df: pd.DataFrame, group_by: Optional[str] = None,
+                                    sample_size: int = 20) -> Dict:
+        """
+        Thermocline per (float_id, cycle_number) profile, then aggregated
+        
+        Primary keys mirror calculate_thermocline_advanced (medians over
+        valid profiles). The full per-profile table is available from
+        BatchThermoclineEngine.compute().
+        
+        Args:
+            df: Long-format rows from many profiles
+            group_by: Optional column for regional aggregates (e.g. 'ocean_region')
+            sample_size: Number of per-profile records included in 'profile_sample'
+        """
+        engine = self.thermocline_engine
+        if 'salinity' in df.columns:
+            df = self._attach_derived(df)
+        profiles = self._map('thermocline', df)
+        
+        if profiles.empty or not profiles['valid'].any():
+            return {
+                'success': False,
+                'error': 'No profile with enough data points (minimum 10 per profile)',
+                'profiles_analyzed': int(len(profiles))
+            }
+        
+        summary = engine.aggregate(profiles, group_by=group_by)
+        qc_profiles = self._map('profile_qc', df)
+        valid = profiles[profiles['valid']]
+        median = valid.median(numeric_only=True)
+        
+        strength = float(median['thermocline_strength_deg_per_m'])
+        depth = float(median['thermocline_depth_dbar'])
+        n_squared = float(median['stratification_N_squared'])
+        mld = float(median['mixed_layer_depth_dbar'])
+        
+        return {
+            'success': True,
+            'method': 'batched_per_profile',
+            
+            # Primary characteristics (median over profiles)
+            'thermocline_depth_dbar': depth,
+            'thermocline_depth_m': depth,
+            'thermocline_strength_deg_per_m': strength,
+            'thermocline_strength_classification': self._classify_thermocline_strength(strength),
+            'thermocline_width_m': float(median['thermocline_width_m']),
+            'thermocline_depth_temp_criterion_dbar': float(median['thermocline_depth_temp_criterion_dbar']),
+            
+            # Mixed layer
+            'mixed_layer_depth_dbar': mld,
+            'mixed_layer_depth_m': mld,
+            'mixed_layer_temperature': float(median['surface_temp_celsius']),
+            
+            # Layer temperatures
+            'surface_temp_celsius': float(median['surface_temp_celsius']),
+            'thermocline_temp_celsius': float(median['thermocline_temp_celsius']),
+            'deep_temp_celsius': float(median['deep_temp_celsius']),
+            'temp_range_celsius': float(median['surface_temp_celsius'] - median['deep_temp_celsius']),
+            
+            # Classification
+            'thermocline_type': 'seasonal' if depth < 100 else 'permanent',
+            'is_seasonal': depth < 100,
+            
+            # Physical properties
+            'stratification_N_squared': n_squared,
+            'buoyancy_frequency_Hz': float(median['buoyancy_frequency_Hz']),
+            'stability': 'stable' if n_squared > 0 else 'unstable',
+            
+            # Inversions / spikes (profile QC)
+            'has_temperature_inversion': bool(qc_profiles['has_temperature_inversion'].any()),
+            'profiles_with_temperature_inversion': int(qc_profiles['has_temperature_inversion'].sum()),
+            'profiles_with_density_inversion': int(qc_profiles['has_density_inversion'].sum()),
+            'spike_count': int(qc_profiles['spike_count'].sum()),
+            
+            # Coverage
+            'profiles_analyzed': summary['profiles_analyzed'],
+            'valid_profiles': summary['valid_profiles'],
+            'data_points': int(len(df)),
+            'depth_coverage_m': float(profiles['max_pressure_dbar'].max()),
+            'confidence': 'high' if len(valid) >= 30 else 'medium' if len(valid) >= 5 else 'low',
+            
+            # Distributions and per-profile detail
+            'statistics': summary['metrics'],
+            'strength_classes': summary['strength_classes'],
+            'thermocline_types': summary['thermocline_types'],
+            'regional_summary': summary.get('regional', []),
+            'profile_sample': valid.head(sample_size).to_dict('records')
+        }
+    
     def _classify_thermocline_strength(self, gradient: float) -> str:
         """
         Classify thermocline strength based on temperature gradient
@@ -528,60 +546,75 @@ class AdvancedProfileAnalytics:
 
     
     
-    def calculate_mixed_layer_depth(self, df: pd.DataFrame, threshold: float = 0.5) -> float:
+    def calculate_mixed_layer_depth(self, df: pd.DataFrame, threshold: float = 0.5,
+                                    criterion: str = 'temperature') -> float:
         """
         Calculate Mixed Layer Depth (MLD)
-        Depth where temperature decreases by threshold from surface
+        criterion='temperature': depth where temperature decreases by threshold from surface
+        criterion='density': depth where sigma0 exceeds its surface value by threshold
+                             (kg/m³, 0.03 in de Boyer Montégut et al. 2004)
         """
         df = df.sort_values('pressure')
-        surface_temp = df['temperature'].iloc[0]
-        mld_mask = df['temperature'] < (surface_temp - threshold)
+        if criterion == 'density':
+            df = derived_engine.attach(df).dropna(subset=['sigma0'])
+            if df.empty:
+                return float('nan')
+            mld_mask = df['sigma0'] > (df['sigma0'].iloc[0] + threshold)
+        else:
+            surface_temp = df['temperature'].iloc[0]
+            mld_mask = df['temperature'] < (surface_temp - threshold)
         
         if mld_mask.any():
             return float(df[mld_mask]['pressure'].iloc[0])
         else:
             return float(df['pressure'].max())
     
-    def identify_water_masses(self, df: pd.DataFrame) -> List[Dict]:
+    def calculate_mixed_layer_depth_batch(self, df: pd.DataFrame, threshold: float = 0.5,
+                                          criterion: str = 'temperature',
+                                          sample_size: int = 20) -> Dict:
         """
-        Identify water masses using T-S characteristics
+        Mixed layer depth per (float_id, cycle_number) profile, then summarized
+        (same criteria as calculate_mixed_layer_depth)
         """
-        water_masses = []
-        
-        if 'salinity' not in df.columns:
-            return water_masses
+        if criterion == 'density' and 'salinity' in df.columns:
+            df = self._attach_derived(df)
+        profiles = self._map('mixed_layer', df, threshold=threshold, criterion=criterion)
         
-        df = df.sort_values('pressure')
+        if profiles.empty:
+            return {'success': False, 'error': 'No profiles with data for mixed layer depth'}
         
-        # Temperature-Salinity thresholds for common water masses
-        thresholds = {
-            'Tropical Surface Water': {'temp_min': 20, 'sal_min': 34.5, 'sal_max': 35.5},
-            'Central Water': {'temp_min': 10, 'temp_max': 20, 'sal_min': 34.2, 'sal_max': 35.5},
-            'Antarctic Intermediate Water': {'temp_max': 5, 'sal_min': 33.8, 'sal_max': 34.4},
-            'Deep Water': {'temp_max': 5, 'sal_min': 34.6}
+        mld = profiles['mixed_layer_depth_dbar']
+        return {
+            'success': True,
+            'method': 'batched_per_profile',
+            'criterion': criterion,
+            'mixed_layer_depth_dbar': float(mld.median()),
+            'statistics': {
+                'median': float(mld.median()),
+                'mean': float(mld.mean()),
+                'std': float(mld.std()) if len(mld) > 1 else 0.0,
+                'p10': float(mld.quantile(0.10)),
+                'p90': float(mld.quantile(0.90))
+            },
+            'profiles_analyzed': int(len(profiles)),
+            'profile_sample': profiles.head(sample_size).to_dict('records')
         }
+    
+    def identify_water_masses(self, df: pd.DataFrame) -> List[Dict]:
+        """
+        Identify water masses using T-S characteristics
+        """
+        if 'salinity' not in df.columns:
+            return []
         
-        for wm, criteria in thresholds.items():
-            mask = pd.Series([True] * len(df))
-            for key, val in criteria.items():
-                if key == 'temp_min':
-                    mask &= df['temperature'] >= val
-                elif key == 'temp_max':
-                    mask &= df['temperature'] <= val
-                elif key == 'sal_min':
-                    mask &= df['salinity'] >= val
-                elif key == 'sal_max':
-                    mask &= df['salinity'] <= val
-            
-            if mask.any():
-                subset = df[mask]
-                water_masses.append({
-                    'water_mass': wm,
-                    'depth_range': (float(subset['pressure'].min()), float(subset['pressure'].max())),
-                    'count': int(mask.sum())
-                })
-        
-        return water_masses
+        return [
+            {
+                'water_mass': wm['name'],
+                'depth_range': wm['depth_range_m'],
+                'count': wm['measurements']
+            }
+            for wm in generic_classifier.summarize(df)
+        ]
     
     def calculate_oxygen_statistics(self, df: pd.DataFrame) -> Dict:
         """Calculate dissolved oxygen statistics"""
@@ -604,69 +637,65 @@ class AdvancedProfileAnalytics:
     def detect_anomalies(self, df: pd.DataFrame, parameter: str = 'temperature',
                         threshold: float = 2.0) -> List[Dict]:
         """
-        Detect anomalies using statistical methods
-        threshold: number of standard deviations
+        Detect anomalies against the depth-binned climatology
+        threshold: number of standard deviations (per region, month and depth bin)
         """
-        df = df.copy()
-        
-        if parameter not in df.columns:
+        if parameter not in df.columns or 'pressure' not in df.columns:
             return []
         
-        data = df[parameter].dropna()
-        mean = data.mean()
-        std = data.std()
-        
-        df['is_anomaly'] = np.abs(df[parameter] - mean) > (threshold * std)
-        
-        anomalies = []
-        for idx, row in df[df['is_anomaly']].iterrows():
-            anomalies.append({
-                'depth': float(row['pressure']) if 'pressure' in row else None,
-                'value': float(row[parameter]),
-                'deviation_std': float((row[parameter] - mean) / std),
-                'timestamp': row['timestamp'] if 'timestamp' in row else None
-            })
-        
-        return anomalies
+        scored = self.score_anomalies(df, parameter)
+        is_anomaly = scored['z_score'].abs() > threshold
+        if not is_anomaly.any():
+            return []
+        flagged = df.loc[is_anomaly].join(scored.loc[is_anomaly])
+        
+        anomalies = pd.DataFrame({
+            'depth': flagged['pressure'].astype(float),
+            'value': flagged[parameter].astype(float),
+            'deviation_std': flagged['z_score'].astype(float),
+            'climatology_mean': flagged['climatology_mean'].astype(float),
+            'climatology_level': flagged['climatology_level'],
+            'timestamp': flagged['timestamp'] if 'timestamp' in flagged.columns else None
+        })
+        return anomalies.to_dict('records')
+    
+    def score_anomalies(self, df: pd.DataFrame, parameter: str = 'temperature') -> pd.DataFrame:
+        """Climatology z-scores for a whole result set (aligned to df.index)"""
+        table = self.climatology.resolve_table(parameter, df)
+        scored = self._map('anomalies', df, parameter=parameter, table=table,
+                           min_count=self.climatology.min_count)
+        return scored.reindex(df.index)
+    
+    def _map(self, task: str, df: pd.DataFrame, **kwargs) -> pd.DataFrame:
+        """Run a per-profile task through the executor (in-process when none is set)"""
+        if self.executor is None:
+            return run_task(task, df, **kwargs)
+        return self.executor.map(task, df, **kwargs)
+    
+    def _attach_derived(self, df: pd.DataFrame) -> pd.DataFrame:
+        """derived_engine.attach, computing missing values through the executor"""
+        return derived_engine.attach(df, compute=lambda rows: self._map('derived', rows))
     
     def regional_comparison(self, region1: str, region2: str,
                            parameter: str = 'temperature') -> Dict:
-        """Compare parameters between regions"""
-        session = self.db_setup.get_session()
-        
+        """Compare parameters between regions (answered from the stats cube)"""
         try:
             results = {}
             
             for region in [region1, region2]:
-                query = text(f"""
-                SELECT 
-                    AVG({parameter}) as avg_value,
-                    MIN({parameter}) as min_value,
-                    MAX({parameter}) as max_value,
-                    STDDEV({parameter}) as std_dev,
-                    COUNT(*) as count
-                FROM argo_profiles
-                WHERE ocean_region ILIKE '%{region}%'
-                  AND {parameter} IS NOT NULL
-                  AND temp_qc IN (1,2,3)
-                  AND sal_qc IN (1,2,3)
-                """)
-                
-                df = pd.read_sql(query, session.bind)
+                summary = self.stats_cube.overall_stats(parameter, region=region)
                 
-                if len(df) > 0 and df.iloc[0]['count'] > 0:
+                if summary and summary['count'] > 0:
                     results[region] = {
-                        'average': float(df.iloc[0]['avg_value']) if df.iloc[0]['avg_value'] is not None else None,
-                        'min': float(df.iloc[0]['min_value']) if df.iloc[0]['min_value'] is not None else None,
-                        'max': float(df.iloc[0]['max_value']) if df.iloc[0]['max_value'] is not None else None,
-                        'std_dev': float(df.iloc[0]['std_dev']) if df.iloc[0]['std_dev'] is not None else None,
-                        'measurements': int(df.iloc[0]['count'])
+                        'average': float(summary['mean']),
+                        'min': float(summary['min']),
+                        'max': float(summary['max']),
+                        'std_dev': float(summary['std']) if pd.notna(summary['std']) else None,
+                        'measurements': int(summary['count'])
                     }
                 else:
                     results[region] = None
             
-            session.close()
-            
             # Determine which is warmer/higher
             if results.get(region1) and results.get(region2):
                 diff = results[region1]['average'] - results[region2]['average']
@@ -694,7 +723,6 @@ class AdvancedProfileAnalytics:
                 }
                 
         except Exception as e:
-            session.close()
             return {
                 "success": False,
                 "error": str(e),
@@ -702,40 +730,38 @@ class AdvancedProfileAnalytics:
                 "region2": region2
             }
     
-    def trend_analysis(self, region: str, parameter: str, days: int = 90) -> Dict:
-        """Analyze trends over time"""
-        session = self.db_setup.get_session()
-        
-        query = text(f"""
-        SELECT DATE_TRUNC('week', timestamp) as week,
-               AVG({parameter}) as avg_value,
-               COUNT(*) as measurements
-        FROM argo_profiles
-        WHERE ocean_region ILIKE '%{region}%'
-          AND timestamp >= CURRENT_DATE - INTERVAL '{days} days'
-          AND {parameter} IS NOT NULL
-        GROUP BY DATE_TRUNC('week', timestamp)
-        ORDER BY week
-        """)
-        
-        df = pd.read_sql(query, session.bind)
-        session.close()
-        
-        if len(df) < 2:
+    def trend_analysis(self, region: str, parameter: str, days: Optional[int] = None) -> Dict:
+        """Deseasonalized trend of monthly means from the stats cube (days=None: whole record)"""
+        try:
+            return self.trends.trend(region, parameter, days)
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
+    def trend_analysis_multi(self, regions: Optional[List[str]] = None,
+                             parameters: Optional[List[str]] = None, days: Optional[int] = None,
+                             min_depth: Optional[float] = None, max_depth: Optional[float] = None) -> Dict:
+        """
+        Trends for every region x parameter in one pass.
+
+        Args:
+            regions: Region names / groups (None = every region in the cube)
+            parameters: Cube parameters (default temperature)
+            days: Look-back window (None = whole record)
+            min_depth / max_depth: Depth range
+        """
+        start = datetime.utcnow() - timedelta(days=days) if days else None
+        try:
+            result = self.trends.analyze(regions, parameters or ['temperature'], start=start,
+                                         min_depth=min_depth, max_depth=max_depth)
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
+        trends = [trend_record(row) for _, row in result.iterrows()
+                  if row['trend'] != 'insufficient data']
+        if not trends:
             return {"success": False, "message": "Insufficient data"}
-        
-        # Calculate trend
-        x = np.arange(len(df))
-        y = df['avg_value'].values
-        
-        slope, intercept, r_value, p_value, std_err = stats.linregress(x, y)
-        
-        return {
-            "region": region,
-            "parameter": parameter,
-            "trend": "increasing" if slope > 0 else "decreasing",
-            "slope": float(slope),
-            "r_squared": float(r_value ** 2),
-            "significant": p_value < 0.05,
-            "weeks_analyzed": len(df)
-        }
\ No newline at end of file
+
+        response = {"success": True, "trends": trends, "series_analyzed": len(trends)}
+        if len(trends) == 1:
+            response.update(trends[0])
+        return response
\ No newline at end of file
@@ -0,0 +1,215 @@
+"""
+Padded profile batches for vectorized per-profile analytics
+
+Rows are grouped by (float_id, cycle_number), sorted by pressure and laid
+out as 2-D arrays (n_profiles x max_levels) padded with NaN, so per-profile
+computations become NumPy operations along axis 1 instead of Python loops.
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+PROFILE_KEYS = ['float_id', 'cycle_number']
+
+# Per-profile metadata carried along (first row of each profile)
+META_COLUMNS = ['latitude', 'longitude', 'timestamp', 'ocean_region']
+
+
+@dataclass
+class ProfileBatch:
+    """NaN-padded 2-D arrays for a set of profiles"""
+    keys: pd.DataFrame                      # one row per profile (keys + metadata)
+    pressure: np.ndarray                    # (n_profiles, max_levels), ascending per row
+    values: Dict[str, np.ndarray] = field(default_factory=dict)
+    n_levels: np.ndarray = None             # valid levels per profile
+
+    @property
+    def n_profiles(self) -> int:
+        return self.pressure.shape[0]
+
+    @property
+    def max_levels(self) -> int:
+        return self.pressure.shape[1]
+
+    @property
+    def valid(self) -> np.ndarray:
+        """Boolean mask of real (non-padded) levels"""
+        return np.arange(self.max_levels)[None, :] < self.n_levels[:, None]
+
+    def last_valid(self, array: np.ndarray) -> np.ndarray:
+        """Value at the deepest valid level of each profile"""
+        idx = np.maximum(self.n_levels - 1, 0)
+        return array[np.arange(self.n_profiles), idx]
+
+    @classmethod
+    def from_dataframe(
+        cls,
+        df: pd.DataFrame,
+        columns: Sequence[str] = ('temperature',),
+        required: Optional[Sequence[str]] = None,
+        keys: Optional[Sequence[str]] = None,
+        max_levels: Optional[int] = None
+    ) -> 'ProfileBatch':
+        """
+        Build a batch from long-format rows.
+
+        Args:
+            df: Rows with pressure, value columns and profile key columns
+            columns: Value columns to pad
+            required: Columns that must be non-null for a level to be kept
+                      (defaults to all value columns)
+            keys: Profile key columns (default: available PROFILE_KEYS;
+                  a frame without keys is treated as one profile)
+            max_levels: Keep at most this many (shallowest) levels per profile
+        """
+        prepared, keys = _prepare(df, columns, required, keys)
+        return _build(prepared, columns, keys, max_levels)
+
+
+def profile_keys(df: pd.DataFrame) -> List[str]:
+    """Profile key columns present in the frame"""
+    return [key for key in PROFILE_KEYS if key in df.columns]
+
+
+def count_profiles(df: pd.DataFrame) -> int:
+    """Number of distinct profiles in long-format rows"""
+    keys = profile_keys(df)
+    if not keys or df.empty:
+        return 1 if not df.empty else 0
+    return int(df.groupby(keys, sort=False).ngroups)
+
+
+def iter_profile_batches(
+    df: pd.DataFrame,
+    columns: Sequence[str] = ('temperature',),
+    required: Optional[Sequence[str]] = None,
+    chunk_profiles: int = 20000,
+    max_levels: Optional[int] = None
+) -> Iterator[ProfileBatch]:
+    """
+    Yield batches of at most chunk_profiles profiles.
+    Sorting/grouping is done once; chunking bounds the padded-array memory.
+    """
+    prepared, keys = _prepare(df, columns, required, None)
+    if prepared.empty:
+        return
+
+    codes = prepared['_profile'].to_numpy()
+    n_profiles = int(codes[-1]) + 1
+    for start in range(0, n_profiles, chunk_profiles):
+        lo = np.searchsorted(codes, start, side='left')
+        hi = np.searchsorted(codes, start + chunk_profiles, side='left')
+        chunk = prepared.iloc[lo:hi].copy()
+        chunk['_profile'] -= start
+        yield _build(chunk, columns, keys, max_levels)
+
+
+def _prepare(df: pd.DataFrame, columns, required, keys):
+    """Drop unusable rows, sort by profile and pressure, assign profile codes"""
+    keys = list(keys) if keys is not None else profile_keys(df)
+    required = list(required) if required is not None else list(columns)
+
+    needed = ['pressure'] + [c for c in required if c in df.columns]
+    work = df.dropna(subset=needed)
+    if keys:
+        work = work.dropna(subset=keys)
+        # Integer profile codes (sorted by key) make the sort a numeric lexsort
+        codes = work.groupby(keys, sort=True).ngroup().to_numpy()
+    else:
+        codes = np.zeros(len(work), dtype=np.int64)
+
+    pressure = work['pressure'].to_numpy(dtype='float64')
+    if _is_profile_sorted(codes, pressure):
+        # Rows from SQL with ORDER BY float_id, cycle_number, pressure
+        order = np.arange(len(codes))
+    else:
+        # Two stable passes (pressure, then profile code) are much faster than
+        # np.lexsort on large frames; stability keeps the first duplicate level
+        order = np.argsort(pressure, kind='stable')
+        order = order[np.argsort(codes[order], kind='stable')]
+        codes, pressure = codes[order], pressure[order]
+
+    # Drop repeated pressure levels within a profile
+    keep = np.ones(len(order), dtype=bool)
+    keep[1:] = (np.diff(codes) != 0) | (np.diff(pressure) != 0)
+
+    work = work.iloc[order[keep]].assign(_profile=codes[keep])
+    return work.reset_index(drop=True), keys
+
+
+def _is_profile_sorted(codes: np.ndarray, pressure: np.ndarray) -> bool:
+    """True when rows are already ordered by profile, then pressure"""
+    if len(codes) < 2:
+        return True
+    code_step = np.diff(codes)
+    return bool((code_step >= 0).all() and ((code_step > 0) | (np.diff(pressure) >= 0)).all())
+
+
+def _build(work: pd.DataFrame, columns, keys, max_levels) -> ProfileBatch:
+    """Scatter sorted long rows into padded arrays"""
+    meta_cols = keys + [c for c in META_COLUMNS if c in work.columns]
+
+    if work.empty:
+        empty = np.empty((0, 0))
+        return ProfileBatch(
+            keys=pd.DataFrame(columns=meta_cols),
+            pressure=empty,
+            values={c: empty for c in columns},
+            n_levels=np.zeros(0, dtype=int)
+        )
+
+    codes = work['_profile'].to_numpy()
+    n_profiles = int(codes.max()) + 1
+
+    # Position of each row within its profile (rows are already sorted)
+    starts = np.r_[0, np.flatnonzero(np.diff(codes)) + 1]
+    counts = np.diff(np.r_[starts, len(codes)])
+    positions = np.arange(len(codes)) - np.repeat(starts, counts)
+
+    width = int(counts.max())
+    if max_levels is not None and width > max_levels:
+        keep = positions < max_levels
+        codes, positions = codes[keep], positions[keep]
+        work = work.loc[keep]
+        counts = np.minimum(counts, max_levels)
+        width = max_levels
+
+    def _pad(values: np.ndarray) -> np.ndarray:
+        out = np.full((n_profiles, width), np.nan)
+        out[codes, positions] = values
+        return out
+
+    pressure = _pad(work['pressure'].to_numpy(dtype='float64'))
+    values = {
+        col: _pad(work[col].to_numpy(dtype='float64'))
+        for col in columns if col in work.columns
+    }
+
+    first_rows = work.iloc[np.r_[0, np.flatnonzero(np.diff(codes)) + 1]]
+    keys_df = first_rows[meta_cols].reset_index(drop=True)
+
+    return ProfileBatch(keys=keys_df, pressure=pressure, values=values, n_levels=counts.astype(int))
+
+
+def nan_rolling_mean(array: np.ndarray, window: int = 3) -> np.ndarray:
+    """
+    Centered rolling mean along axis 1 ignoring NaN (min_periods=1),
+    equivalent to Series.rolling(window, center=True, min_periods=1).mean().
+    """
+    half = window // 2
+    padded = np.pad(array, ((0, 0), (half, half)), constant_values=np.nan)
+    valid = ~np.isnan(padded)
+    filled = np.where(valid, padded, 0.0)
+
+    csum = np.cumsum(np.pad(filled, ((0, 0), (1, 0))), axis=1)
+    ccount = np.cumsum(np.pad(valid.astype(int), ((0, 0), (1, 0))), axis=1)
+
+    sums = csum[:, window:] - csum[:, :-window]
+    counts = ccount[:, window:] - ccount[:, :-window]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        result = sums / counts
+    result[np.isnan(array)] = np.nan
+    return result
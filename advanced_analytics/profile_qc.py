@@ -0,0 +1,260 @@
+"""
+Vectorized profile QC: temperature inversions, density inversions, spikes
+
+Works on NaN-padded profile batches (see profile_batch.py), so one call
+checks every (float_id, cycle_number) profile with diff/mask operations.
+Thresholds follow the Argo real-time QC manual (spike test 9, density
+inversion test 14); inversions report every layer, not just the first.
+"""
+
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from advanced_analytics.profile_batch import ProfileBatch, iter_profile_batches
+from advanced_analytics.derived_variables import potential_temperature, sigma_t
+
+# Temperature increasing with depth below the surface layer
+INVERSION_MIN_PRESSURE = 50.0   # dbar
+INVERSION_MIN_DELTA = 0.0       # °C per step
+
+# Argo test 14: density decrease with depth larger than this is flagged
+DENSITY_INVERSION_THRESHOLD = 0.03  # kg/m³
+
+# Argo test 9: (threshold above 500 dbar, threshold below 500 dbar)
+SPIKE_THRESHOLDS = {
+    'temperature': (6.0, 2.0),
+    'salinity': (0.9, 0.3),
+}
+SPIKE_DEPTH_SPLIT = 500.0  # dbar
+
+LAYER_COLUMNS = ['top_dbar', 'bottom_dbar', 'thickness_dbar', 'magnitude', 'levels']
+
+
+def inversion_steps(values: np.ndarray, pressure: np.ndarray,
+                    min_delta: float = INVERSION_MIN_DELTA,
+                    min_pressure: float = INVERSION_MIN_PRESSURE,
+                    increasing: bool = True) -> np.ndarray:
+    """
+    Boolean mask (n_profiles, max_levels - 1) of inverted steps between
+    level j and j + 1. increasing=True flags values rising with depth
+    (temperature); False flags values falling with depth (density).
+    """
+    delta = np.diff(values, axis=1)
+    if not increasing:
+        delta = -delta
+    with np.errstate(invalid='ignore'):
+        return (delta > min_delta) & (pressure[:, 1:] > min_pressure)
+
+
+def spike_mask(values: np.ndarray, pressure: np.ndarray, shallow: float, deep: float,
+               depth_split: float = SPIKE_DEPTH_SPLIT) -> np.ndarray:
+    """
+    Argo spike test on interior levels:
+    |V2 - (V3 + V1)/2| - |(V3 - V1)/2| > threshold
+    """
+    mask = np.zeros(values.shape, dtype=bool)
+    if values.shape[1] < 3:
+        return mask
+
+    v1, v2, v3 = values[:, :-2], values[:, 1:-1], values[:, 2:]
+    test_value = np.abs(v2 - (v3 + v1) / 2) - np.abs((v3 - v1) / 2)
+    threshold = np.where(pressure[:, 1:-1] < depth_split, shallow, deep)
+    with np.errstate(invalid='ignore'):
+        mask[:, 1:-1] = test_value > threshold
+    return mask
+
+
+def step_layers(steps: np.ndarray, pressure: np.ndarray, values: np.ndarray) -> pd.DataFrame:
+    """
+    Group consecutive inverted steps into layers.
+
+    Returns one row per layer with the batch row index ('_profile'), the
+    pressure at the top/bottom of the layer and the value change across it.
+    """
+    n_profiles, n_steps = steps.shape
+    if n_profiles == 0 or n_steps == 0 or not steps.any():
+        return pd.DataFrame(columns=['_profile'] + LAYER_COLUMNS)
+
+    # A False column on each side keeps runs from crossing profile boundaries
+    padded = np.zeros((n_profiles, n_steps + 2), dtype=np.int8)
+    padded[:, 1:-1] = steps
+    edges = np.diff(padded, axis=1)
+    start_rows, start_steps = np.nonzero(edges == 1)
+    end_rows, end_steps = np.nonzero(edges == -1)  # one past the last step of the run
+
+    # Step j spans levels j -> j + 1
+    top = pressure[start_rows, start_steps]
+    bottom = pressure[end_rows, end_steps]
+    magnitude = np.abs(values[end_rows, end_steps] - values[start_rows, start_steps])
+
+    return pd.DataFrame({
+        '_profile': start_rows,
+        'top_dbar': top,
+        'bottom_dbar': bottom,
+        'thickness_dbar': bottom - top,
+        'magnitude': magnitude,
+        'levels': end_steps - start_steps + 1
+    })
+
+
+class ProfileQC:
+    """Batch inversion / density-inversion / spike checks"""
+
+    def __init__(self, min_inversion_pressure: float = INVERSION_MIN_PRESSURE,
+                 min_inversion_delta: float = INVERSION_MIN_DELTA,
+                 density_threshold: float = DENSITY_INVERSION_THRESHOLD,
+                 chunk_profiles: int = 20000):
+        self.min_inversion_pressure = min_inversion_pressure
+        self.min_inversion_delta = min_inversion_delta
+        self.density_threshold = density_threshold
+        self.chunk_profiles = chunk_profiles
+
+    def run(self, df: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+        """
+        QC every profile in long-format rows.
+
+        Returns dict of DataFrames:
+            profiles: one row per profile with counts and flags
+            temperature_inversions: one row per inversion layer
+            density_inversions: one row per density-inversion layer
+            spikes: one row per flagged level
+        """
+        empty = {
+            'profiles': pd.DataFrame(),
+            'temperature_inversions': pd.DataFrame(),
+            'density_inversions': pd.DataFrame(),
+            'spikes': pd.DataFrame()
+        }
+        if df.empty or 'pressure' not in df.columns or 'temperature' not in df.columns:
+            return empty
+
+        density_col = next((c for c in ('sigma0', 'density') if c in df.columns), None)
+        columns = ['temperature'] + [c for c in ('salinity', density_col) if c and c in df.columns]
+
+        parts = [
+            self._check_batch(batch, density_col)
+            for batch in iter_profile_batches(
+                df, columns=columns, required=('temperature',),
+                chunk_profiles=self.chunk_profiles
+            )
+        ]
+        if not parts:
+            return empty
+
+        return {
+            name: pd.concat([part[name] for part in parts], ignore_index=True)
+            for name in empty
+        }
+
+    def check_profile(self, df: pd.DataFrame) -> Dict:
+        """
+        QC summary for a single profile (all rows treated as one profile)
+        """
+        density_col = next((c for c in ('sigma0', 'density') if c in df.columns), None)
+        columns = ['temperature'] + [c for c in ('salinity', density_col) if c and c in df.columns]
+        batch = ProfileBatch.from_dataframe(df, columns=columns, required=('temperature',), keys=[])
+        if batch.n_profiles == 0:
+            return {'temperature_inversions': [], 'density_inversions': [], 'spike_count': 0}
+
+        result = self._check_batch(batch, density_col)
+        return {
+            'temperature_inversions': result['temperature_inversions'][LAYER_COLUMNS].to_dict('records'),
+            'density_inversions': result['density_inversions'][LAYER_COLUMNS].to_dict('records'),
+            'spike_count': int(len(result['spikes']))
+        }
+
+    def _check_batch(self, batch: ProfileBatch, density_col: Optional[str]) -> Dict[str, pd.DataFrame]:
+        """Run all checks on one padded batch"""
+        P = batch.pressure
+        T = batch.values['temperature']
+        S = batch.values.get('salinity')
+
+        # Temperature inversions
+        t_steps = inversion_steps(T, P, self.min_inversion_delta, self.min_inversion_pressure)
+        t_layers = step_layers(t_steps, P, T)
+
+        # Density inversions (materialized sigma0, else EOS-80 sigma-theta)
+        if density_col:
+            rho = batch.values[density_col]
+        elif S is not None:
+            rho = sigma_t(potential_temperature(S, T, P), S)
+        else:
+            rho = None
+
+        if rho is not None:
+            d_steps = inversion_steps(rho, P, self.density_threshold, min_pressure=-np.inf,
+                                      increasing=False)
+            d_layers = step_layers(d_steps, P, rho)
+        else:
+            d_steps = np.zeros((batch.n_profiles, max(batch.max_levels - 1, 0)), dtype=bool)
+            d_layers = step_layers(d_steps, P, T)
+
+        # Spikes per parameter
+        spike_frames = []
+        spike_counts = np.zeros(batch.n_profiles, dtype=int)
+        for parameter, (shallow, deep) in SPIKE_THRESHOLDS.items():
+            values = batch.values.get(parameter)
+            if values is None:
+                continue
+            mask = spike_mask(values, P, shallow, deep)
+            spike_counts += mask.sum(axis=1)
+            rows, levels = np.nonzero(mask)
+            spike_frames.append(pd.DataFrame({
+                '_profile': rows,
+                'parameter': parameter,
+                'pressure': P[rows, levels],
+                'value': values[rows, levels]
+            }))
+        spikes = pd.concat(spike_frames, ignore_index=True) if spike_frames else pd.DataFrame()
+
+        # Per-profile summary
+        profiles = batch.keys.copy()
+        profiles['n_levels'] = batch.n_levels
+        profiles['temperature_inversion_layers'] = np.bincount(
+            t_layers['_profile'].to_numpy(dtype=int), minlength=batch.n_profiles)
+        profiles['first_inversion_dbar'] = _first_layer_top(t_layers, batch.n_profiles)
+        profiles['max_inversion_magnitude'] = _max_per_profile(t_layers, 'magnitude', batch.n_profiles)
+        profiles['density_inversion_layers'] = np.bincount(
+            d_layers['_profile'].to_numpy(dtype=int), minlength=batch.n_profiles)
+        profiles['spike_count'] = spike_counts
+        profiles['has_temperature_inversion'] = profiles['temperature_inversion_layers'] > 0
+        profiles['has_density_inversion'] = profiles['density_inversion_layers'] > 0
+
+        return {
+            'profiles': profiles,
+            'temperature_inversions': _attach_keys(t_layers, batch.keys),
+            'density_inversions': _attach_keys(d_layers, batch.keys),
+            'spikes': _attach_keys(spikes, batch.keys)
+        }
+
+
+def _first_layer_top(layers: pd.DataFrame, n_profiles: int) -> np.ndarray:
+    """Top pressure of the shallowest layer per profile (NaN when none)"""
+    out = np.full(n_profiles, np.nan)
+    if len(layers):
+        # Layers are produced in (profile, depth) order: the first per profile is shallowest
+        first = layers.drop_duplicates('_profile')
+        out[first['_profile'].to_numpy(dtype=int)] = first['top_dbar'].to_numpy()
+    return out
+
+
+def _max_per_profile(layers: pd.DataFrame, column: str, n_profiles: int) -> np.ndarray:
+    """Per-profile maximum of a layer column (NaN when no layer)"""
+    out = np.full(n_profiles, np.nan)
+    if len(layers):
+        np.fmax.at(out, layers['_profile'].to_numpy(dtype=int), layers[column].to_numpy())
+    return out
+
+
+def _attach_keys(frame: pd.DataFrame, keys: pd.DataFrame) -> pd.DataFrame:
+    """Replace the batch row index with the profile key columns"""
+    if '_profile' not in frame.columns:
+        return frame
+    rows = frame['_profile'].to_numpy(dtype=int)
+    frame = frame.drop(columns=['_profile']).reset_index(drop=True)
+    if len(keys.columns) == 0:
+        return frame
+    meta = keys.iloc[rows].reset_index(drop=True)
+    return pd.concat([meta, frame], axis=1)
@@ -0,0 +1,220 @@
+"""
+Vertical interpolation of profiles onto standard pressure levels
+
+Each (float_id, cycle_number) profile is linearly interpolated onto a
+fixed set of levels, giving a regular (profiles x levels) matrix that
+section plots, Hovmöller diagrams and profile statistics can use directly
+instead of re-gridding scattered points. Interpolated rows are cached per
+profile, so overlapping queries only interpolate the new profiles.
+"""
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from advanced_analytics.profile_batch import META_COLUMNS, iter_profile_batches, profile_keys
+
+STANDARD_LEVELS = np.array([
+    5, 10, 20, 30, 50, 75, 100, 125, 150, 200, 250, 300, 400, 500,
+    600, 700, 800, 900, 1000, 1200, 1400, 1600, 1800, 2000
+], dtype='float64')
+
+# Levels are not filled across measurement gaps wider than this (dbar)
+MAX_GAP = 250.0
+
+
+def interpolate_to_levels(pressure: np.ndarray, values: np.ndarray,
+                          levels: np.ndarray = STANDARD_LEVELS,
+                          max_gap: Optional[float] = MAX_GAP) -> np.ndarray:
+    """
+    Linear interpolation of padded profiles onto levels.
+
+    Args:
+        pressure: (n_profiles, max_levels) ascending per row, NaN padded
+        values: Same shape as pressure
+        levels: Target pressures (dbar)
+        max_gap: Leave a level empty when its bracketing samples are
+                 further apart than this (None = no limit)
+
+    Returns:
+        (n_profiles, len(levels)) array, NaN outside each profile's range
+    """
+    n_profiles, width = pressure.shape
+    out = np.full((n_profiles, len(levels)), np.nan)
+    if n_profiles == 0 or width == 0:
+        return out
+
+    rows = np.arange(n_profiles)
+    n_valid = (~np.isnan(pressure)).sum(axis=1)
+    for k, level in enumerate(levels):
+        # Index of the first sample at or below the level (NaN padding compares False)
+        upper = (pressure < level).sum(axis=1)
+        # A level equal to the first sample (upper == 0) brackets itself
+        hi = np.minimum(upper, width - 1)
+        lo = np.maximum(hi - 1, 0)
+
+        p_lo, p_hi = pressure[rows, lo], pressure[rows, hi]
+        v_lo, v_hi = values[rows, lo], values[rows, hi]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            weight = np.where(p_hi > p_lo, (level - p_lo) / (p_hi - p_lo), 0.0)
+            result = v_lo + weight * (v_hi - v_lo)
+
+        inside = (upper < n_valid) & ((upper >= 1) | (pressure[:, 0] == level))
+        if max_gap is not None:
+            inside &= (p_hi - p_lo) <= max_gap
+        out[inside, k] = result[inside]
+    return out
+
+
+@dataclass
+class StandardLevelGrid:
+    """Interpolated values as (n_profiles, n_levels) matrices"""
+    profiles: pd.DataFrame                      # keys + metadata, one row per profile
+    levels: np.ndarray
+    values: Dict[str, np.ndarray] = field(default_factory=dict)
+
+    @property
+    def n_profiles(self) -> int:
+        return len(self.profiles)
+
+    def matrix(self, column: str) -> np.ndarray:
+        return self.values[column]
+
+    def mean_profile(self, column: str) -> np.ndarray:
+        """Mean across profiles at each level (NaN where no profile reaches)"""
+        matrix = self.values[column]
+        count = (~np.isnan(matrix)).sum(axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(count > 0, np.nansum(matrix, axis=0) / count, np.nan)
+
+    def occupied_levels(self, column: str) -> np.ndarray:
+        """Mask of levels with at least one value"""
+        return ~np.isnan(self.values[column]).all(axis=0)
+
+    def to_frame(self) -> pd.DataFrame:
+        """Long format: one row per (profile, level), empty rows dropped"""
+        n_levels = len(self.levels)
+        frame = self.profiles.iloc[np.repeat(np.arange(self.n_profiles), n_levels)].reset_index(drop=True)
+        frame['pressure'] = np.tile(self.levels, self.n_profiles)
+        for column, matrix in self.values.items():
+            frame[column] = matrix.ravel()
+        return frame.dropna(subset=list(self.values), how='all').reset_index(drop=True)
+
+
+class StandardLevelInterpolator:
+    """Per-profile interpolation onto standard levels with an LRU row cache"""
+
+    def __init__(self, levels: Sequence[float] = STANDARD_LEVELS,
+                 max_gap: Optional[float] = MAX_GAP, max_cached: int = 200000):
+        self.levels = np.asarray(levels, dtype='float64')
+        self.max_gap = max_gap
+        self.max_cached = max_cached
+        self._cache: 'OrderedDict[Tuple, Tuple]' = OrderedDict()
+        self._lock = threading.Lock()     # shared by all sessions' script threads
+        self.stats = {'hits': 0, 'misses': 0}
+
+    def grid(self, df: pd.DataFrame, columns: Sequence[str] = ('temperature',)) -> StandardLevelGrid:
+        """
+        Interpolate every profile in long-format rows.
+
+        Args:
+            df: Rows with pressure, value columns and float_id/cycle_number
+                (a frame without keys is treated as one profile)
+            columns: Value columns to interpolate
+
+        Returns:
+            StandardLevelGrid with one matrix per available column
+        """
+        columns = [c for c in columns if c in df.columns]
+        keys = profile_keys(df)
+        work = df.dropna(subset=['pressure'] + keys) if 'pressure' in df.columns else df.iloc[0:0]
+        meta = keys + [c for c in META_COLUMNS if c in work.columns]
+
+        if work.empty or not columns:
+            return StandardLevelGrid(pd.DataFrame(columns=meta), self.levels,
+                                     {c: np.empty((0, len(self.levels))) for c in columns})
+
+        if keys:
+            codes = work.groupby(keys, sort=True).ngroup().to_numpy()
+        else:
+            codes = np.zeros(len(work), dtype=np.int64)
+        n_profiles = int(codes.max()) + 1
+        first = np.unique(codes, return_index=True)[1]
+        profiles = work.iloc[first][meta].reset_index(drop=True)
+
+        values = {}
+        for column in columns:
+            if keys:
+                values[column] = self._cached_matrix(work, codes, profiles, keys, column)
+            else:
+                values[column] = self._interpolate(work, column, keys, profiles, n_profiles)
+        return StandardLevelGrid(profiles, self.levels, values)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def _cached_matrix(self, work, codes, profiles, keys, column) -> np.ndarray:
+        """Matrix for one column, interpolating only profiles not in the cache"""
+        n_profiles = len(profiles)
+        fingerprints = _fingerprints(work, codes, column, n_profiles)
+        profile_ids = list(profiles[keys].itertuples(index=False, name=None))
+
+        matrix = np.full((n_profiles, len(self.levels)), np.nan)
+        missing = []
+        with self._lock:
+            for i, (profile_id, fingerprint) in enumerate(zip(profile_ids, fingerprints)):
+                entry = self._cache.get((profile_id, column))
+                if entry is not None and entry[0] == fingerprint:
+                    matrix[i] = entry[1]
+                    self._cache.move_to_end((profile_id, column))
+                else:
+                    missing.append(i)
+            self.stats['hits'] += n_profiles - len(missing)
+            self.stats['misses'] += len(missing)
+
+        if missing:
+            subset = work[np.isin(codes, missing)]
+            computed = self._interpolate(subset, column, keys, profiles.iloc[missing], len(missing))
+            matrix[missing] = computed
+            with self._lock:
+                for row, i in zip(computed, missing):
+                    self._cache[(profile_ids[i], column)] = (fingerprints[i], row)
+                    self._cache.move_to_end((profile_ids[i], column))
+                while len(self._cache) > self.max_cached:
+                    self._cache.popitem(last=False)
+        return matrix
+
+    def _interpolate(self, rows, column, keys, profiles, n_profiles) -> np.ndarray:
+        """Interpolate rows for one column; output rows follow `profiles`"""
+        out = np.full((n_profiles, len(self.levels)), np.nan)
+        target = pd.MultiIndex.from_frame(profiles[keys]) if keys else None
+
+        for batch in iter_profile_batches(rows, columns=(column,), required=(column,)):
+            interpolated = interpolate_to_levels(batch.pressure, batch.values[column],
+                                                 self.levels, self.max_gap)
+            if keys:
+                position = target.get_indexer(pd.MultiIndex.from_frame(batch.keys[keys]))
+                out[position] = interpolated
+            else:
+                out[:len(interpolated)] = interpolated
+        return out
+
+
+def _fingerprints(work: pd.DataFrame, codes: np.ndarray, column: str, n_profiles: int):
+    """Cheap per-profile signature (row count, pressure sum, value sum)"""
+    pressure = work['pressure'].to_numpy(dtype='float64')
+    values = pd.to_numeric(work[column], errors='coerce').to_numpy(dtype='float64')
+    present = ~np.isnan(values)
+    counts = np.bincount(codes[present], minlength=n_profiles)
+    p_sum = np.bincount(codes[present], weights=pressure[present], minlength=n_profiles)
+    v_sum = np.bincount(codes[present], weights=values[present], minlength=n_profiles)
+    return list(zip(counts.tolist(), np.round(p_sum, 6).tolist(), np.round(v_sum, 6).tolist()))
+
+
+# Shared instance so plots and analytics reuse interpolated profiles
+standard_levels = StandardLevelInterpolator()
@@ -0,0 +1,240 @@
+"""
+Batched per-profile thermocline engine
+
+Computes gradient, thermocline depth/width, mixed layer depth and N² for
+every (float_id, cycle_number) profile at once on padded 2-D arrays.
+Same definitions as AdvancedProfileAnalytics.calculate_thermocline_advanced,
+applied per profile instead of to the pooled rows of many floats.
+"""
+
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from advanced_analytics.profile_batch import (
+    ProfileBatch, iter_profile_batches, nan_rolling_mean
+)
+
+GRAVITY = 9.81          # m/s²
+THERMAL_EXPANSION = 2e-4  # 1/°C, used when no density profile is available
+
+MIN_LEVELS = 10          # same minimum as the single-profile method
+MLD_THRESHOLD = 0.2      # °C from surface
+TEMP_CRITERION = 0.5     # °C from surface (alternative thermocline depth)
+
+STRENGTH_BINS = [0.05, 0.15, 0.30]
+STRENGTH_LABELS = np.array(['weak', 'moderate', 'strong', 'very_strong'])
+
+
+class BatchThermoclineEngine:
+    """Vectorized thermocline metrics for many profiles"""
+
+    def __init__(self, chunk_profiles: int = 20000, min_levels: int = MIN_LEVELS):
+        self.chunk_profiles = chunk_profiles
+        self.min_levels = min_levels
+
+    def compute(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Per-profile thermocline table.
+
+        Args:
+            df: Long-format rows with pressure, temperature and
+                float_id/cycle_number (rows without keys = one profile)
+
+        Returns:
+            DataFrame with one row per profile
+        """
+        if df.empty or 'pressure' not in df.columns or 'temperature' not in df.columns:
+            return pd.DataFrame()
+
+        # Materialized N² (derived_variables) replaces the temperature-only estimate
+        columns = ('temperature', 'n_squared') if 'n_squared' in df.columns else ('temperature',)
+        tables = [
+            self._compute_batch(batch)
+            for batch in iter_profile_batches(
+                df, columns=columns, required=('temperature',),
+                chunk_profiles=self.chunk_profiles
+            )
+        ]
+        if not tables:
+            return pd.DataFrame()
+        return pd.concat(tables, ignore_index=True) if len(tables) > 1 else tables[0]
+
+    def _compute_batch(self, batch: ProfileBatch) -> pd.DataFrame:
+        """Metrics for one padded batch"""
+        P = batch.pressure
+        T = batch.values['temperature']
+        n, width = P.shape
+        rows = np.arange(n)
+        level_idx = np.arange(width)[None, :]
+        valid = batch.valid
+        n_levels = batch.n_levels
+
+        # Gradient |dT/dp| where levels are > 1 dbar apart (0 otherwise, like the single-profile method)
+        dp = np.diff(P, axis=1)
+        dT = np.diff(T, axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            grad = np.where(dp > 1.0, np.abs(dT / dp), 0.0)
+        grad = np.concatenate([np.zeros((n, 1)), grad], axis=1)
+        grad[~valid] = np.nan
+
+        smooth = nan_rolling_mean(grad, window=3)
+        smooth = np.where(valid, np.nan_to_num(smooth, nan=0.0), np.nan)
+
+        # Maximum gradient, excluding two levels at the surface and bottom
+        middle = (level_idx >= 2) & (level_idx <= (n_levels[:, None] - 3))
+        search = np.where(middle, smooth, -np.inf)
+        thermo_idx = np.argmax(search, axis=1)
+        strength = smooth[rows, thermo_idx]
+        has_middle = middle.any(axis=1)
+        ok = (n_levels >= self.min_levels) & has_middle & (strength > 0)
+
+        depth = P[rows, thermo_idx]
+
+        # Width: pressure span where gradient > 50% of the maximum
+        in_zone = smooth > (0.5 * strength)[:, None]
+        zone_count = in_zone.sum(axis=1)
+        zone_min = np.where(in_zone, P, np.inf).min(axis=1)
+        zone_max = np.where(in_zone, P, -np.inf).max(axis=1)
+        width_m = np.where(zone_count > 1, zone_max - zone_min, 0.0)
+
+        # Surface-referenced criteria (first level exceeding the threshold)
+        surface_T = T[:, 0]
+        deviation = np.abs(T - surface_T[:, None])
+        max_pressure = batch.last_valid(P)
+        mld = _first_exceeding(deviation > MLD_THRESHOLD, P, max_pressure)
+        temp_criterion_depth = _first_exceeding(deviation > TEMP_CRITERION, P, depth)
+
+        # Stratification at the thermocline: mean derived N² within ±25 dbar,
+        # else the temperature-only estimate N² = g * alpha * |dT/dz|
+        n_squared = GRAVITY * THERMAL_EXPANSION * strength
+        if 'n_squared' in batch.values:
+            N2 = batch.values['n_squared']
+            near = valid & ~np.isnan(N2) & (np.abs(P - depth[:, None]) <= 25)
+            n_squared = _masked_mean(N2, near, fallback=n_squared)
+        buoyancy_frequency = np.sqrt(np.clip(n_squared, 0, None))
+
+        # Layer temperatures
+        surface_layer = valid & (P <= 10)
+        deep_layer = valid & (P >= 500)
+        surface_mean = _masked_mean(T, surface_layer, fallback=surface_T)
+        deep_mean = _masked_mean(T, deep_layer, fallback=batch.last_valid(T))
+        thermo_layer = valid & (np.abs(P - depth[:, None]) <= 25)
+        thermo_mean = _masked_mean(T, thermo_layer, fallback=T[rows, thermo_idx])
+
+        result = batch.keys.copy()
+        result['n_levels'] = n_levels
+        result['max_pressure_dbar'] = max_pressure
+        result['thermocline_depth_dbar'] = depth
+        result['thermocline_strength_deg_per_m'] = strength
+        result['thermocline_width_m'] = width_m
+        result['thermocline_depth_temp_criterion_dbar'] = temp_criterion_depth
+        result['mixed_layer_depth_dbar'] = mld
+        result['surface_temp_celsius'] = surface_mean
+        result['thermocline_temp_celsius'] = thermo_mean
+        result['deep_temp_celsius'] = deep_mean
+        result['stratification_N_squared'] = n_squared
+        result['buoyancy_frequency_Hz'] = buoyancy_frequency
+        result['thermocline_strength_classification'] = STRENGTH_LABELS[
+            np.digitize(np.nan_to_num(strength), STRENGTH_BINS)
+        ]
+        result['thermocline_type'] = np.where(depth < 100, 'seasonal', 'permanent')
+        result['valid'] = ok
+
+        # Invalid profiles keep their keys but no metrics
+        metric_cols = [
+            'thermocline_depth_dbar', 'thermocline_strength_deg_per_m', 'thermocline_width_m',
+            'thermocline_depth_temp_criterion_dbar', 'thermocline_temp_celsius',
+            'stratification_N_squared', 'buoyancy_frequency_Hz'
+        ]
+        result.loc[~ok, metric_cols] = np.nan
+        result.loc[~ok, ['thermocline_strength_classification', 'thermocline_type']] = None
+
+        return result
+
+    def aggregate(self, profiles: pd.DataFrame, group_by: Optional[str] = None) -> Dict:
+        """
+        Summary statistics over per-profile results.
+
+        Args:
+            profiles: Output of compute()
+            group_by: Optional column for regional aggregates (e.g. 'ocean_region')
+        """
+        valid = profiles[profiles['valid']] if 'valid' in profiles.columns else profiles
+        if valid.empty:
+            return {'profiles_analyzed': int(len(profiles)), 'valid_profiles': 0}
+
+        metrics = ['thermocline_depth_dbar', 'thermocline_strength_deg_per_m',
+                   'thermocline_width_m', 'mixed_layer_depth_dbar', 'stratification_N_squared']
+
+        summary = {
+            'profiles_analyzed': int(len(profiles)),
+            'valid_profiles': int(len(valid)),
+            'metrics': {
+                metric: {
+                    'median': float(valid[metric].median()),
+                    'mean': float(valid[metric].mean()),
+                    'std': float(valid[metric].std()) if len(valid) > 1 else 0.0,
+                    'p10': float(valid[metric].quantile(0.10)),
+                    'p90': float(valid[metric].quantile(0.90))
+                }
+                for metric in metrics
+            },
+            'strength_classes': valid['thermocline_strength_classification'].value_counts().to_dict(),
+            'thermocline_types': valid['thermocline_type'].value_counts().to_dict()
+        }
+
+        if group_by and group_by in valid.columns:
+            grouped = valid.groupby(group_by).agg(
+                profiles=('thermocline_depth_dbar', 'size'),
+                thermocline_depth_median=('thermocline_depth_dbar', 'median'),
+                thermocline_strength_median=('thermocline_strength_deg_per_m', 'median'),
+                mixed_layer_depth_median=('mixed_layer_depth_dbar', 'median'),
+                n_squared_median=('stratification_N_squared', 'median')
+            )
+            summary['regional'] = grouped.reset_index().to_dict('records')
+
+        return summary
+
+
+def mixed_layer_depths(df: pd.DataFrame, threshold: float = 0.5,
+                       criterion: str = 'temperature') -> pd.DataFrame:
+    """
+    Mixed layer depth per profile, same definition as
+    AdvancedProfileAnalytics.calculate_mixed_layer_depth.
+
+    criterion='temperature': first level colder than surface - threshold (°C)
+    criterion='density': first level with sigma0 above surface + threshold (kg/m³)
+    Profiles that never cross the threshold get their deepest pressure.
+    """
+    column = 'sigma0' if criterion == 'density' else 'temperature'
+    if df.empty or 'pressure' not in df.columns or column not in df.columns:
+        return pd.DataFrame()
+
+    tables = []
+    for batch in iter_profile_batches(df, columns=(column,), required=(column,)):
+        values = batch.values[column]
+        surface = values[:, :1]
+        with np.errstate(invalid='ignore'):
+            crossed = values > surface + threshold if criterion == 'density' else values < surface - threshold
+        table = batch.keys.copy()
+        table['mixed_layer_depth_dbar'] = _first_exceeding(crossed, batch.pressure,
+                                                           batch.last_valid(batch.pressure))
+        tables.append(table)
+    return pd.concat(tables, ignore_index=True) if tables else pd.DataFrame()
+
+
+def _first_exceeding(mask: np.ndarray, pressure: np.ndarray, fallback: np.ndarray) -> np.ndarray:
+    """Pressure of the first True level per row (fallback when none)"""
+    has_any = mask.any(axis=1)
+    first = np.argmax(mask, axis=1)
+    return np.where(has_any, pressure[np.arange(len(first)), first], fallback)
+
+
+def _masked_mean(values: np.ndarray, mask: np.ndarray, fallback: np.ndarray) -> np.ndarray:
+    """Row mean over masked levels (fallback when no level matches)"""
+    counts = mask.sum(axis=1)
+    sums = np.where(mask, values, 0.0).sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(counts > 0, sums / counts, fallback)
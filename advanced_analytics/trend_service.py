@@ -0,0 +1,384 @@
+"""
+Trend estimation over monthly series from the stats cube
+
+Monthly values per (region, parameter) are folded from cube cells into a
+(series x months) matrix, so every estimator runs on all series at once.
+Cells are pooled as anomalies from their own (region, depth bin, calendar
+month) climatology with fixed weights, so a shift in where or how deep
+floats sampled does not show up as a trend.
+
+
+- Harmonic regression (annual + semi-annual cycle) removes the seasonal
+  signal; its linear term is the OLS trend
+- Sen's slope and the Mann-Kendall test on the deseasonalized series
+- Moving-block bootstrap of the regression residuals for confidence
+  intervals (blocks keep month-to-month autocorrelation)
+"""
+
+import warnings
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from database.stats_cube import StatsCube
+from data_processing.region_classifier import REGION_GROUPS
+
+MIN_MONTHS = 6                # fewer months with data: no trend reported
+SEASONAL_MIN_MONTHS = 24      # months needed before fitting the seasonal cycle
+N_HARMONICS = 2               # annual + semi-annual
+N_BOOTSTRAP = 1000
+BLOCK_MONTHS = 12
+BOOTSTRAP_CHUNK = 100         # replicates per vectorized batch
+ALPHA = 0.05
+
+
+def monthly_matrix(cells: pd.DataFrame, series: Dict[str, List[str]]) -> pd.DataFrame:
+    """
+    Pooled monthly values from cube cells, one row per series.
+
+    Summing value_sum / n across depth bins and member regions would weight
+    each month by where samples happened to fall. Instead each cell's
+    monthly mean is taken as an anomaly from that cell's calendar-month
+    climatology, anomalies are averaged with fixed per-cell weights (the
+    cell's record-wide count), and the series' fixed-weight climatology is
+    added back so levels and the seasonal cycle stay in physical units.
+
+    Args:
+        cells: Cube rows (region, month, depth_bin, n, value_sum) for one parameter
+        series: Series label -> cube regions pooled into it
+
+    Returns:
+        DataFrame indexed by series label with one column per month
+        (continuous monthly range, NaN for months without data)
+    """
+    membership = pd.DataFrame(
+        [(label, region) for label, regions in series.items() for region in regions],
+        columns=['series', 'region']
+    )
+    pooled = cells.merge(membership, on='region')
+    if pooled.empty:
+        return pd.DataFrame(index=pd.Index(list(series), name='series'))
+
+    pooled['month'] = pd.to_datetime(pooled['month']).dt.to_period('M')
+    pooled['calendar'] = pooled['month'].dt.month
+    cell = ['series', 'region'] + (['depth_bin'] if 'depth_bin' in pooled.columns else [])
+
+    monthly = pooled.groupby(cell + ['month', 'calendar'])[['n', 'value_sum']].sum().reset_index()
+    monthly = monthly[monthly['n'] > 0]
+    monthly['mean'] = monthly['value_sum'] / monthly['n']
+    climatology = monthly.groupby(cell + ['calendar'])[['n', 'value_sum']].sum()
+    climatology['clim'] = climatology['value_sum'] / climatology['n']
+    weights = monthly.groupby(cell)['n'].sum().rename('weight')
+
+    monthly = monthly.join(climatology['clim'], on=cell + ['calendar']).join(weights, on=cell)
+    monthly['weighted_anomaly'] = (monthly['mean'] - monthly['clim']) * monthly['weight']
+    anomaly = monthly.groupby(['series', 'month'])[['weighted_anomaly', 'weight']].sum()
+    anomaly = anomaly['weighted_anomaly'] / anomaly['weight']
+
+    baseline = climatology[['clim']].reset_index().join(weights, on=cell)
+    baseline['weighted_clim'] = baseline['clim'] * baseline['weight']
+    baseline = baseline.groupby(['series', 'calendar'])[['weighted_clim', 'weight']].sum()
+    baseline = baseline['weighted_clim'] / baseline['weight']
+
+    values = anomaly.reset_index(name='anomaly')
+    values['calendar'] = values['month'].dt.month
+    values = values.join(baseline.rename('baseline'), on=['series', 'calendar'])
+    means = (values['anomaly'] + values['baseline']).set_axis(
+        pd.MultiIndex.from_frame(values[['series', 'month']])).unstack('month')
+    months = pd.period_range(means.columns.min(), means.columns.max(), freq='M')
+    return means.reindex(index=list(series), columns=months)
+
+
+def estimate_trends(values: np.ndarray, months: pd.PeriodIndex,
+                    n_bootstrap: int = N_BOOTSTRAP, block_months: int = BLOCK_MONTHS,
+                    seed: Optional[int] = 0) -> pd.DataFrame:
+    """
+    Deseasonalized trends for every row of a (series x months) matrix.
+
+    Slopes are per month. Series with at least SEASONAL_MIN_MONTHS months
+    of data get the harmonic seasonal terms; shorter ones a plain line.
+
+    Returns:
+        DataFrame (one row per series) with months_analyzed, deseasonalized,
+        ols_slope, ols_stderr, sen_slope, ci_low, ci_high, mk_tau,
+        mk_p_value, r_squared, seasonal_amplitude
+    """
+    Y = np.asarray(values, dtype='float64')
+    n_series, n_months = Y.shape
+    mask = ~np.isnan(Y)
+    n_valid = mask.sum(axis=1)
+    t = np.arange(n_months, dtype='float64')
+    t_centered = t - t.mean() if n_months else t
+
+    X = _design(t_centered, months.month.to_numpy() if n_months else np.array([]))
+    seasonal = n_valid >= SEASONAL_MIN_MONTHS
+    columns = np.ones((n_series, X.shape[1]))
+    columns[~seasonal, 2:] = 0
+
+    fit = _weighted_fit(Y, mask, X, columns)
+    coef, hat = fit['coef'], fit['hat']
+
+    # Deseasonalized series: data minus the harmonic terms
+    harmonic = np.einsum('sp,mp->sm', coef[:, 2:], X[:, 2:])
+    deseasonalized = np.where(mask, Y - harmonic, np.nan)
+
+    sen, tau, mk_p = _sen_mann_kendall(deseasonalized, t)
+    ci_low, ci_high = _block_bootstrap(coef[:, 1], hat[:, 1, :], fit['residuals'], mask,
+                                       n_bootstrap, block_months, seed)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        trend_line = coef[:, [0]] + coef[:, [1]] * t_centered
+        resid = np.where(mask, deseasonalized - trend_line, 0.0)
+        level = np.nansum(deseasonalized, axis=1, keepdims=True) / n_valid[:, None]
+        centered = np.where(mask, deseasonalized - level, 0.0)
+        r_squared = 1 - (resid ** 2).sum(axis=1) / (centered ** 2).sum(axis=1)
+        dof = n_valid - columns.sum(axis=1)
+        sigma2 = (fit['residuals'] ** 2).sum(axis=1) / dof
+        stderr = np.sqrt(sigma2 * fit['inverse'][:, 1, 1])
+
+    amplitude = np.hypot(coef[:, 2], coef[:, 3]) if X.shape[1] > 2 else np.zeros(n_series)
+
+    result = pd.DataFrame({
+        'months_analyzed': n_valid,
+        'deseasonalized': seasonal,
+        'ols_slope': coef[:, 1],
+        'ols_stderr': np.where(dof > 0, stderr, np.nan),
+        'sen_slope': sen,
+        'ci_low': ci_low,
+        'ci_high': ci_high,
+        'mk_tau': tau,
+        'mk_p_value': mk_p,
+        'r_squared': r_squared,
+        'seasonal_amplitude': np.where(seasonal, amplitude, np.nan),
+    })
+    too_short = n_valid < MIN_MONTHS
+    result.loc[too_short, result.columns[2:]] = np.nan
+    return result
+
+
+def _design(t: np.ndarray, calendar_month: np.ndarray) -> np.ndarray:
+    """[1, t, cos/sin of the annual harmonics] on calendar month phase"""
+    phase = 2 * np.pi * (calendar_month - 1) / 12
+    columns = [np.ones_like(t), t]
+    for k in range(1, N_HARMONICS + 1):
+        columns += [np.cos(k * phase), np.sin(k * phase)]
+    return np.column_stack(columns)
+
+
+def _weighted_fit(Y: np.ndarray, mask: np.ndarray, X: np.ndarray, columns: np.ndarray) -> Dict:
+    """
+    Least squares for all series at once (missing months get zero weight).
+    hat[s] maps series s's values to its coefficients, so bootstrap refits
+    are matrix products.
+    """
+    W = mask.astype('float64')
+    Xs = X[None, :, :] * columns[:, None, :]                         # (s, m, p)
+    XtWX = np.einsum('smp,sm,smq->spq', Xs, W, Xs)
+    inverse = np.linalg.pinv(XtWX)
+    hat = inverse @ np.transpose(Xs * W[:, :, None], (0, 2, 1))      # (s, p, m)
+    coef = np.einsum('spm,sm->sp', hat, np.where(mask, Y, 0.0))
+    fitted = np.einsum('smp,sp->sm', Xs, coef)
+    residuals = np.where(mask, Y - fitted, 0.0)
+    return {'coef': coef, 'hat': hat, 'inverse': inverse, 'residuals': residuals}
+
+
+def _sen_mann_kendall(D: np.ndarray, t: np.ndarray):
+    """Sen's slope, Kendall tau and Mann-Kendall p-value per series (all pairs i < j)"""
+    n_series, n_months = D.shape
+    if n_months < 2:
+        nan = np.full(n_series, np.nan)
+        return nan, nan, nan
+
+    i, j = np.triu_indices(n_months, k=1)
+    diffs = D[:, j] - D[:, i]                                        # (s, pairs)
+    slopes = diffs / (t[j] - t[i])
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)   # all-NaN series
+        sen = np.nanmedian(slopes, axis=1)
+
+    n = (~np.isnan(D)).sum(axis=1).astype('float64')
+    s_stat = np.nansum(np.sign(diffs), axis=1)
+    pairs = n * (n - 1) / 2
+    variance = n * (n - 1) * (2 * n + 5) / 18
+    with np.errstate(invalid='ignore', divide='ignore'):
+        tau = s_stat / pairs
+        z = (s_stat - np.sign(s_stat)) / np.sqrt(variance)
+    p_value = 2 * stats.norm.sf(np.abs(z))
+    return sen, tau, p_value
+
+
+def _block_bootstrap(slope: np.ndarray, hat_slope: np.ndarray, residuals: np.ndarray,
+                     mask: np.ndarray, n_bootstrap: int, block_months: int,
+                     seed: Optional[int]):
+    """
+    Percentile CI of the OLS slope under moving-block residual resampling.
+    Blocks are drawn from each series' observed months (gaps closed up).
+    """
+    n_series, n_months = residuals.shape
+    if n_bootstrap <= 0 or n_months == 0:
+        nan = np.full(n_series, np.nan)
+        return nan, nan
+
+    # Observed months first, in time order
+    order = np.argsort(~mask, axis=1, kind='stable')
+    n_valid = mask.sum(axis=1)
+    compact_resid = np.take_along_axis(residuals, order, axis=1)
+    compact_hat = np.take_along_axis(hat_slope, order, axis=1)
+    compact_hat[np.arange(n_months)[None, :] >= n_valid[:, None]] = 0.0
+
+    block = max(1, min(block_months, n_months))
+    n_blocks = -(-n_months // block)
+    max_start = np.maximum(n_valid - block + 1, 1)[None, :, None]
+    offsets = np.arange(block)
+
+    rng = np.random.default_rng(seed)
+    replicates = []
+    for start in range(0, n_bootstrap, BOOTSTRAP_CHUNK):
+        size = min(BOOTSTRAP_CHUNK, n_bootstrap - start)
+        starts = np.floor(rng.random((size, n_series, n_blocks)) * max_start).astype(int)
+        index = (starts[..., None] + offsets).reshape(size, n_series, -1)[:, :, :n_months]
+        index = np.minimum(index, np.maximum(n_valid - 1, 0)[None, :, None])
+        drawn = np.take_along_axis(np.broadcast_to(compact_resid, (size, n_series, n_months)), index, axis=2)
+        replicates.append(slope + np.einsum('sm,bsm->bs', compact_hat, drawn))
+
+    replicates = np.concatenate(replicates)
+    low, high = np.percentile(replicates, [100 * ALPHA / 2, 100 * (1 - ALPHA / 2)], axis=0)
+    return low, high
+
+
+class TrendService:
+    """Deseasonalized trends for many regions and parameters from the stats cube"""
+
+    def __init__(self, stats_cube: Optional[StatsCube] = None,
+                 n_bootstrap: int = N_BOOTSTRAP, block_months: int = BLOCK_MONTHS,
+                 seed: Optional[int] = 0):
+        self.stats_cube = stats_cube
+        self.n_bootstrap = n_bootstrap
+        self.block_months = block_months
+        self.seed = seed
+
+    def analyze(self, regions: Union[str, Sequence[str], None] = None,
+                parameters: Union[str, Sequence[str]] = ('temperature',),
+                start: Optional[datetime] = None, end: Optional[datetime] = None,
+                min_depth: Optional[float] = None, max_depth: Optional[float] = None) -> pd.DataFrame:
+        """
+        Trends for every (region, parameter) pair: one cube read per parameter.
+
+        Args:
+            regions: Region names, substrings (e.g. 'bengal') or groups
+                     ('indian ocean'); None = each cube region separately
+            parameters: Cube parameters
+            start / end: Period (default: whole record)
+            min_depth / max_depth: Depth range (cube bins)
+
+        Returns:
+            DataFrame with region, parameter, first_month, last_month and the
+            estimate_trends columns plus per-year/per-decade slopes and labels
+        """
+        if self.stats_cube is None:
+            raise RuntimeError("Trend service has no stats cube")
+        regions = [regions] if isinstance(regions, str) else regions
+        parameters = [parameters] if isinstance(parameters, str) else list(parameters)
+
+        cells = {
+            parameter: self.stats_cube.cells(parameter, start=start, end=end,
+                                             min_depth=min_depth, max_depth=max_depth)
+            for parameter in parameters
+        }
+        return self.analyze_cells(cells, regions)
+
+    def analyze_cells(self, cells: Dict[str, pd.DataFrame],
+                      regions: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """Trends from already loaded cube cells ({parameter: cells})"""
+        frames = []
+        for parameter, parameter_cells in cells.items():
+            available = sorted(parameter_cells['region'].dropna().unique()) if not parameter_cells.empty else []
+            series = resolve_series(regions, available)
+            if not series:
+                continue
+            matrix = monthly_matrix(parameter_cells, series)
+            if matrix.shape[1] == 0:
+                continue
+
+            trends = estimate_trends(matrix.to_numpy(), matrix.columns,
+                                     self.n_bootstrap, self.block_months, self.seed)
+            observed = matrix.notna()
+            trends.insert(0, 'region', matrix.index)
+            trends.insert(1, 'parameter', parameter)
+            trends.insert(2, 'first_month', [
+                str(matrix.columns[row.argmax()]) if row.any() else None for row in observed.to_numpy()
+            ])
+            trends.insert(3, 'last_month', [
+                str(matrix.columns[len(row) - 1 - row[::-1].argmax()]) if row.any() else None
+                for row in observed.to_numpy()
+            ])
+            frames.append(trends)
+
+        if not frames:
+            return pd.DataFrame()
+        result = pd.concat(frames, ignore_index=True)
+        result['slope_per_year'] = result['sen_slope'] * 12
+        result['slope_per_decade'] = result['sen_slope'] * 120
+        result['significant'] = (result['mk_p_value'] < ALPHA) & \
+            ((result['ci_low'] > 0) | (result['ci_high'] < 0))
+        result['trend'] = np.where(
+            result['sen_slope'].isna(), 'insufficient data',
+            np.where(result['sen_slope'] > 0, 'increasing', 'decreasing')
+        )
+        return result
+
+    def trend(self, region: str, parameter: str, days: Optional[int] = None) -> Dict:
+        """Single-series trend as a dict (None days = whole record)"""
+        start = datetime.utcnow() - timedelta(days=days) if days else None
+        result = self.analyze([region], [parameter], start=start)
+        if result.empty or result.iloc[0]['trend'] == 'insufficient data':
+            return {"success": False, "message": "Insufficient data"}
+        return trend_record(result.iloc[0])
+
+
+def resolve_series(regions: Optional[Sequence[str]], available: Sequence[str]) -> Dict[str, List[str]]:
+    """
+    Series label -> cube regions to pool.
+    Groups pool their member regions; other names match as substrings.
+    """
+    if regions is None:
+        return {region: [region] for region in available}
+
+    series = {}
+    for name in regions:
+        key = name.strip().lower()
+        if key in REGION_GROUPS:
+            members = [region for region in REGION_GROUPS[key] if region in available]
+            label = name.strip().title()
+        else:
+            members = [region for region in available if key in region.lower()]
+            label = members[0] if len(members) == 1 else name.strip()
+        if members:
+            series[label] = members
+    return series
+
+
+def trend_record(row: pd.Series) -> Dict:
+    """JSON-friendly dict for one result row (keeps the old trend_analysis keys)"""
+    def number(value):
+        return None if pd.isna(value) else float(value)
+
+    return {
+        "region": row['region'],
+        "parameter": row['parameter'],
+        "trend": row['trend'],
+        "slope": number(row['sen_slope']),
+        "slope_per_decade": number(row['slope_per_decade']),
+        "ci_per_decade": (number(row['ci_low'] * 120), number(row['ci_high'] * 120)),
+        "ols_slope": number(row['ols_slope']),
+        "mk_p_value": number(row['mk_p_value']),
+        "r_squared": number(row['r_squared']),
+        "significant": bool(row['significant']),
+        "deseasonalized": bool(row['deseasonalized']),
+        "seasonal_amplitude": number(row['seasonal_amplitude']),
+        "months_analyzed": int(row['months_analyzed']),
+        "period": (row['first_month'], row['last_month'])
+    }
@@ -0,0 +1,206 @@
+"""
+Rule-table water mass classification
+
+Each water mass is a temperature / salinity / pressure envelope. All
+envelopes are checked in one broadcast pass: rows (n, 3) against rule
+bounds (k, 3) give an (n, k) match matrix. Labels take the first matching
+rule in table order; summaries use the full matrix, so overlapping
+envelopes are reported the same way the per-mass masks were.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from advanced_analytics.profile_batch import profile_keys
+
+Range = Tuple[Optional[float], Optional[float]]
+
+FEATURES = ['temperature', 'salinity', 'pressure']
+CHUNK_ROWS = 1_000_000  # bounds the (rows x rules x 3) comparison array
+
+
+@dataclass
+class WaterMassRule:
+    """T-S-depth envelope (None = open bound, limits inclusive)"""
+    name: str
+    temp_range: Range = (None, None)
+    sal_range: Range = (None, None)
+    depth_range: Range = (None, None)
+    characteristics: str = ''
+
+
+# Indian Ocean water masses (identify_water_masses_advanced)
+INDIAN_OCEAN_RULES = [
+    WaterMassRule('Indian Ocean Surface Water (IOSW)', (25, 30), (33.0, 36.0), (0, 100),
+                  'Warm, variable salinity surface layer'),
+    WaterMassRule('Arabian Sea High Salinity Water (ASHSW)', (20, 28), (36.0, 37.5), (50, 300),
+                  'High salinity due to excess evaporation'),
+    WaterMassRule('Bay of Bengal Low Salinity Water (BBLSW)', (25, 30), (30.0, 34.5), (0, 100),
+                  'Low salinity due to river discharge and precipitation'),
+    WaterMassRule('Indian Ocean Central Water (IOCW)', (10, 20), (34.5, 35.5), (100, 700),
+                  'Formed by mixing of surface and intermediate waters'),
+    WaterMassRule('Indonesian Throughflow Water (ITW)', (12, 18), (34.3, 34.8), (100, 500),
+                  'Low salinity Pacific water entering Indian Ocean'),
+    WaterMassRule('Antarctic Intermediate Water (AAIW)', (3, 8), (33.8, 34.5), (500, 1500),
+                  'Low salinity minimum layer from Southern Ocean'),
+    WaterMassRule('Indian Deep Water (IDW)', (1.5, 3), (34.7, 34.8), (1500, 3500),
+                  'Deep water mass filling Indian Ocean basins'),
+    WaterMassRule('Antarctic Bottom Water (AABW)', (-0.5, 2), (34.65, 34.72), (3500, 6000),
+                  'Cold, dense bottom water from Antarctica'),
+]
+
+# Generic T-S classes (identify_water_masses)
+GENERIC_RULES = [
+    WaterMassRule('Tropical Surface Water', temp_range=(20, None), sal_range=(34.5, 35.5)),
+    WaterMassRule('Central Water', temp_range=(10, 20), sal_range=(34.2, 35.5)),
+    WaterMassRule('Antarctic Intermediate Water', temp_range=(None, 5), sal_range=(33.8, 34.4)),
+    WaterMassRule('Deep Water', temp_range=(None, 5), sal_range=(34.6, None)),
+]
+
+
+class WaterMassClassifier:
+    """Vectorized classifier over a rule table"""
+
+    def __init__(self, rules: Sequence[WaterMassRule]):
+        self.rules = list(rules)
+        self.names = [rule.name for rule in self.rules]
+        bounds = np.array([
+            [rule.temp_range, rule.sal_range, rule.depth_range] for rule in self.rules
+        ], dtype='float64')  # (k, 3, 2); None -> NaN
+        self.lower = np.where(np.isnan(bounds[:, :, 0]), -np.inf, bounds[:, :, 0])
+        self.upper = np.where(np.isnan(bounds[:, :, 1]), np.inf, bounds[:, :, 1])
+
+    @classmethod
+    def from_dict(cls, criteria: Dict[str, Dict]) -> 'WaterMassClassifier':
+        """
+        Build from {'name': {'temp_range': (lo, hi), 'sal_range': ...,
+        'depth_range': ..., 'characteristics': ...}} (e.g. loaded from JSON)
+        """
+        return cls([
+            WaterMassRule(
+                name,
+                tuple(spec.get('temp_range', (None, None))),
+                tuple(spec.get('sal_range', (None, None))),
+                tuple(spec.get('depth_range', (None, None))),
+                spec.get('characteristics', '')
+            )
+            for name, spec in criteria.items()
+        ])
+
+    def matches(self, df: pd.DataFrame) -> np.ndarray:
+        """Boolean (n_rows, n_rules) matrix; rows with NaN T/S/P match nothing"""
+        X = _features(df)
+        out = np.empty((len(X), len(self.rules)), dtype=bool)
+        for start in range(0, len(X), CHUNK_ROWS):
+            chunk = X[start:start + CHUNK_ROWS, None, :]   # (m, 1, 3)
+            with np.errstate(invalid='ignore'):
+                inside = (chunk >= self.lower) & (chunk <= self.upper)
+            out[start:start + CHUNK_ROWS] = inside.all(axis=2)
+        return out
+
+    def label_codes(self, matches: np.ndarray) -> np.ndarray:
+        """Index of the first matching rule per row (-1 = unclassified)"""
+        if matches.shape[1] == 0:
+            return np.full(len(matches), -1)
+        return np.where(matches.any(axis=1), matches.argmax(axis=1), -1)
+
+    def classify(self, df: pd.DataFrame) -> pd.Series:
+        """Water mass label per row (categorical, NaN when unclassified)"""
+        codes = self.label_codes(self.matches(df))
+        return pd.Series(pd.Categorical.from_codes(codes, categories=self.names), index=df.index,
+                         name='water_mass')
+
+    def summarize(self, df: pd.DataFrame, matches: Optional[np.ndarray] = None) -> List[Dict]:
+        """
+        Per water mass statistics over all matching rows (overlaps allowed).
+        Same keys as identify_water_masses_advanced; density from sigma0 when present.
+        """
+        matches = self.matches(df) if matches is None else matches
+        counts = matches.sum(axis=0)
+        if not counts.any():
+            return []
+
+        T = df['temperature'].to_numpy(dtype='float64')
+        S = df['salinity'].to_numpy(dtype='float64')
+        P = df['pressure'].to_numpy(dtype='float64')
+        sigma = df['sigma0'].to_numpy(dtype='float64') if 'sigma0' in df.columns else None
+
+        # Sums for every rule at once (matched rows have finite T/S/P)
+        M = matches.astype('float64')
+        means = {
+            name: (M.T @ np.nan_to_num(values)) / np.maximum(counts, 1)
+            for name, values in (('temperature', T), ('salinity', S), ('pressure', P))
+        }
+
+        results = []
+        for k in np.flatnonzero(counts):
+            rows = matches[:, k]
+            p, t, s = P[rows], T[rows], S[rows]
+            density = np.nanmean(sigma[rows]) if sigma is not None and np.isfinite(sigma[rows]).any() else np.nan
+            results.append({
+                'name': self.names[k],
+                'characteristics': self.rules[k].characteristics,
+                'detected': True,
+                'core_depth_m': float(means['pressure'][k]),
+                'depth_range_m': (float(p.min()), float(p.max())),
+                'thickness_m': float(p.max() - p.min()),
+                'core_temperature_C': float(means['temperature'][k]),
+                'core_salinity_PSU': float(means['salinity'][k]),
+                'temperature_range_C': (float(t.min()), float(t.max())),
+                'salinity_range_PSU': (float(s.min()), float(s.max())),
+                'potential_density_kgm3': float(1000 + density),
+                'measurements': int(counts[k]),
+                'percentage_of_profile': float(counts[k] / len(df) * 100)
+            })
+        return results
+
+    def profile_summary(self, df: pd.DataFrame, matches: Optional[np.ndarray] = None) -> pd.DataFrame:
+        """
+        One row per (float_id, cycle_number) profile: levels per water mass
+        (first-match labels) and the dominant water mass
+        """
+        keys = profile_keys(df)
+        if df.empty or not keys:
+            return pd.DataFrame()
+
+        matches = self.matches(df) if matches is None else matches
+        labels = self.label_codes(matches)
+        grouped = df.groupby(keys, sort=True)
+        codes = grouped.ngroup().to_numpy(dtype='float64')
+        keyed = codes >= 0          # rows with a null key belong to no group (NaN code)
+        if not keyed.any():
+            return pd.DataFrame()
+        codes = np.where(keyed, codes, -1).astype(np.int64)
+        n_profiles = int(codes.max()) + 1
+        n_rules = len(self.rules)
+
+        labelled = (labels >= 0) & keyed
+        table = np.bincount(codes[labelled] * n_rules + labels[labelled],
+                            minlength=n_profiles * n_rules).reshape(n_profiles, n_rules)
+
+        summary = grouped.size().reset_index(name='levels')
+        for k, name in enumerate(self.names):
+            summary[name] = table[:, k]
+        summary['classified_levels'] = table.sum(axis=1)
+        summary['dominant_water_mass'] = np.where(
+            summary['classified_levels'] > 0, np.array(self.names, dtype=object)[table.argmax(axis=1)], None
+        )
+        return summary
+
+
+def _features(df: pd.DataFrame) -> np.ndarray:
+    """(n, 3) array of temperature, salinity, pressure (NaN when a column is missing)"""
+    columns = [
+        pd.to_numeric(df[c], errors='coerce').to_numpy(dtype='float64') if c in df.columns
+        else np.full(len(df), np.nan)
+        for c in FEATURES
+    ]
+    return np.column_stack(columns) if columns else np.empty((len(df), 0))
+
+
+# Shared classifiers
+indian_ocean_classifier = WaterMassClassifier(INDIAN_OCEAN_RULES)
+generic_classifier = WaterMassClassifier(GENERIC_RULES)
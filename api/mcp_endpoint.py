@@ -4,6 +4,7 @@ Allows external systems to use FloatChat tools
 """
 
 from fastapi import FastAPI, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from typing import Any, Dict
 import sys
@@ -54,7 +55,9 @@ async def list_tools():
 async def execute_tool(request: ToolRequest):
     """Execute an MCP tool"""
     try:
-        result = mcp_server.execute_tool(request.tool_name, **request.parameters)
+        result = await run_in_threadpool(
+            mcp_server.execute_tool, request.tool_name, **request.parameters
+        )
         
         if "error" in result:
             return ToolResponse(success=False, data=result, error=result["error"])
@@ -67,17 +70,21 @@ async def execute_tool(request: ToolRequest):
 @app.post("/query")
 async def query_argo_data(query: str, limit: int = 1000):
     """Direct query endpoint"""
-    return mcp_server.execute_tool("query_argo_data", query=query, limit=limit)
+    return await run_in_threadpool(
+        mcp_server.execute_tool, "query_argo_data", query=query, limit=limit
+    )
 
 @app.post("/sql-generate")
 async def generate_sql(question: str, context: str = ""):
     """Generate SQL from natural language"""
-    return mcp_server.execute_tool("generate_sql", question=question, context=context)
+    return await run_in_threadpool(
+        mcp_server.execute_tool, "generate_sql", question=question, context=context
+    )
 
 @app.get("/schema")
 async def get_schema():
     """Get database schema"""
-    return mcp_server.execute_tool("get_database_schema")
+    return await run_in_threadpool(mcp_server.execute_tool, "get_database_schema")
 
 if __name__ == "__main__":
     import uvicorn
@@ -3,22 +3,35 @@ Enhanced API routes with caching and batch operations
 """
 
 from fastapi import APIRouter, Query, HTTPException, BackgroundTasks
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta
 import pandas as pd
-from sqlalchemy import text
-import asyncio
 
 from database.db_setup import DatabaseSetup
 from rag_engine.query_processor import QueryProcessor
+from rag_engine.async_query_processor import AsyncQueryProcessor
 from advanced_analytics.profile_analytics import AdvancedProfileAnalytics
+from data_processing.result_serializer import dataframe_to_records, dumps_bytes
 
-router = APIRouter(prefix="/api/v1", tags=["FloatChat API"])
+class FastJSONResponse(JSONResponse):
+    """JSON response encoded with the shared (orjson) result serializer"""
+    
+    def render(self, content: Any) -> bytes:
+        return dumps_bytes(content)
+
+router = APIRouter(
+    prefix="/api/v1",
+    tags=["FloatChat API"],
+    default_response_class=FastJSONResponse
+)
 
 # Initialize components
 db_setup = DatabaseSetup()
 query_processor = QueryProcessor()
+async_query_processor = AsyncQueryProcessor(query_processor)
 analytics = AdvancedProfileAnalytics()
 
 # In-memory cache (simple implementation)
@@ -75,19 +88,26 @@ async def query_data(request: QueryRequest):
     
     # Execute query
     try:
-        result = query_processor.process_query(request.query)
+        result = await async_query_processor.process_query(request.query, max_rows=request.limit)
         
         if result['success']:
+            records = await run_in_threadpool(dataframe_to_records, result['results'])
+            
             # Cache result
             query_cache[request.query] = {
-                'result': result['results'].to_dict('records')[:request.limit],
+                'result': records,
                 'timestamp': datetime.now()
             }
             
             return {
                 "success": True,
-                "data": result['results'].to_dict('records')[:request.limit],
+                "data": records,
                 "record_count": len(result['results']),
+                "total_matching_records": result.get('total_matching_records', len(result['results'])),
+                "truncated": result.get('truncated', False),
+                "sampled": result.get('sampled', False),
+                "routed_to_cube": result.get('routed_to_cube', False),
+                "cube_caveat": result.get('cube_caveat'),
                 "execution_time": result.get('execution_time', 0),
                 "cached": False
             }
@@ -104,16 +124,12 @@ async def batch_query(request: BatchQueryRequest, background_tasks: BackgroundTa
     results = []
     
     if request.parallel:
-        # Execute in parallel
-        tasks = [
-            query_processor.process_query(q)
-            for q in request.queries
-        ]
-        results = await asyncio.gather(*tasks)
+        # Execute concurrently (bounded by the processor's semaphore)
+        results = await async_query_processor.process_batch(request.queries)
     else:
         # Execute sequentially
         for query in request.queries:
-            result = query_processor.process_query(query)
+            result = await async_query_processor.process_query(query)
             results.append(result)
     
     return {
@@ -133,10 +149,8 @@ async def batch_query(request: BatchQueryRequest, background_tasks: BackgroundTa
 @router.get("/floats/{float_id}")
 async def get_float_info(float_id: str):
     """Get information about a specific float"""
-    session = db_setup.get_session()
-    
     try:
-        query = text(f"""
+        query = """
             SELECT 
                 float_id,
                 COUNT(*) as total_measurements,
@@ -152,12 +166,11 @@ async def get_float_info(float_id: str):
                 MAX(salinity) as max_sal,
                 AVG(salinity) as avg_sal
             FROM argo_profiles
-            WHERE float_id = '{float_id}'
+            WHERE float_id = :float_id
             GROUP BY float_id
-        """)
+        """
         
-        result = session.execute(query).fetchone()
-        session.close()
+        result = await async_query_processor.fetch_one(query, {'float_id': float_id})
         
         if result:
             return {
@@ -187,19 +200,16 @@ async def get_float_info(float_id: str):
 @router.get("/regions")
 async def get_regions():
     """Get available ocean regions"""
-    session = db_setup.get_session()
-    
     try:
-        query = text("""
+        query = """
             SELECT DISTINCT ocean_region, COUNT(*) as measurements
             FROM argo_profiles
             WHERE ocean_region IS NOT NULL
             GROUP BY ocean_region
             ORDER BY measurements DESC
-        """)
+        """
         
-        results = session.execute(query).fetchall()
-        session.close()
+        results = await async_query_processor.fetch_all(query)
         
         return {
             "regions": [
@@ -218,10 +228,12 @@ async def get_regions():
 async def analyze_thermocline(query: str):
     """Analyze thermocline for query results"""
     try:
-        result = query_processor.process_query(query)
+        result = await async_query_processor.process_query(query)
         
         if result['success']:
-            thermocline = analytics.calculate_thermocline_advanced(result['results'])
+            thermocline = await run_in_threadpool(
+                analytics.calculate_thermocline_advanced, result['results']
+            )
             return {
                 "success": True,
                 "thermocline": thermocline,
@@ -237,10 +249,12 @@ async def analyze_thermocline(query: str):
 async def identify_water_masses(query: str):
     """Identify water masses in query results"""
     try:
-        result = query_processor.process_query(query)
+        result = await async_query_processor.process_query(query)
         
         if result['success']:
-            water_masses = analytics.identify_water_masses(result['results'])
+            water_masses = await run_in_threadpool(
+                analytics.identify_water_masses, result['results']
+            )
             return {
                 "success": True,
                 "water_masses": water_masses,
@@ -253,10 +267,10 @@ async def identify_water_masses(query: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/analytics/trends")
-async def analyze_trends(region: str, parameter: str, days: int = 90):
-    """Analyze trends in a region"""
+async def analyze_trends(region: str, parameter: str, days: Optional[int] = None):
+    """Analyze trends in a region (days=None: whole record)"""
     try:
-        trend = analytics.trend_analysis(region, parameter, days)
+        trend = await run_in_threadpool(analytics.trend_analysis, region, parameter, days)
         return {"success": True, "trend_analysis": trend}
     
     except Exception as e:
@@ -265,16 +279,11 @@ async def analyze_trends(region: str, parameter: str, days: int = 90):
 @router.get("/stats")
 async def database_statistics():
     """Get database statistics"""
-    session = db_setup.get_session()
-    
     try:
-        from database.models import ArgoProfile
-        
-        total_records = session.query(ArgoProfile).count()
-        unique_floats = session.query(ArgoProfile.float_id).distinct().count()
-        
-        query = text("""
+        query = """
             SELECT 
+                COUNT(*) as total_records,
+                COUNT(DISTINCT float_id) as unique_floats,
                 MIN(timestamp) as earliest,
                 MAX(timestamp) as latest,
                 COUNT(DISTINCT ocean_region) as regions,
@@ -282,22 +291,21 @@ async def database_statistics():
                 AVG(temperature) as avg_temp,
                 AVG(salinity) as avg_sal
             FROM argo_profiles
-        """)
+        """
         
-        result = session.execute(query).fetchone()
-        session.close()
+        result = await async_query_processor.fetch_one(query)
         
         return {
-            "total_records": total_records,
-            "unique_floats": unique_floats,
+            "total_records": result[0],
+            "unique_floats": result[1],
             "date_range": {
-                "earliest": result[0].isoformat() if result[0] else None,
-                "latest": result[1].isoformat() if result[1] else None
+                "earliest": result[2].isoformat() if result[2] else None,
+                "latest": result[3].isoformat() if result[3] else None
             },
-            "regions_covered": result[2],
-            "cycles": result[3],
-            "average_temperature": float(result[4]),
-            "average_salinity": float(result[5])
+            "regions_covered": result[4],
+            "cycles": result[5],
+            "average_temperature": float(result[6]),
+            "average_salinity": float(result[7])
         }
     
     except Exception as e:
@@ -307,7 +315,7 @@ async def database_statistics():
 async def export_data(query: str, format_type: str = "csv"):
     """Export query results in various formats"""
     try:
-        result = query_processor.process_query(query)
+        result = await async_query_processor.process_query(query)
         
         if not result['success']:
             raise HTTPException(status_code=400, detail=result['error'])
@@ -317,20 +325,20 @@ async def export_data(query: str, format_type: str = "csv"):
         if format_type == "csv":
             return {
                 "format": "csv",
-                "data": df.to_csv(index=False),
+                "data": await run_in_threadpool(df.to_csv, index=False),
                 "records": len(df)
             }
         
         elif format_type == "json":
             return {
                 "format": "json",
-                "data": df.to_json(orient='records'),
+                "data": await run_in_threadpool(df.to_json, orient='records'),
                 "records": len(df)
             }
         
         elif format_type == "parquet":
             # Would require pyarrow
-            parquet_bytes = df.to_parquet(index=False)
+            parquet_bytes = await run_in_threadpool(df.to_parquet, index=False)
             return {
                 "format": "parquet",
                 "data": parquet_bytes.hex(),
@@ -2,6 +2,10 @@ import pandas as pd
 from sqlalchemy.orm import Session
 from database.db_setup import DatabaseSetup
 from database.models import ArgoProfile
+from advanced_analytics.derived_variables import derived_engine
+from database.stats_cube import StatsCube
+from database.statistics_service import StatisticsService
+from data_processing.region_classifier import classify
 from tqdm import tqdm
 
 class DataLoader:
@@ -23,6 +27,10 @@ class DataLoader:
         if 'timestamp' in df.columns:
             df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ns', errors='coerce')
         
+        # Region, density and stratification computed once here, not per request
+        df['ocean_region'] = classify(df['latitude'], df['longitude'])
+        df = derived_engine.attach(df)
+        
         session = self.db_setup.get_session()
         
         try:
@@ -30,17 +38,21 @@ class DataLoader:
             for i in tqdm(range(0, total_rows, batch_size), desc="Loading batches"):
                 batch = df.iloc[i:i+batch_size]
                 
-                # Create ArgoProfile objects
-                profiles = [
-                    ArgoProfile(**row.to_dict()) 
-                    for _, row in batch.iterrows()
-                ]
+                # Create ArgoProfile objects (NaN/NaT stored as NULL: NaN sorts
+                # above every number and poisons AVG/MAX in PostgreSQL)
+                records = batch.astype(object).where(batch.notna(), None).to_dict('records')
+                profiles = [ArgoProfile(**record) for record in records]
                 
                 session.bulk_save_objects(profiles)
                 session.commit()
             
             print(f"✅ Successfully loaded {total_rows} records")
             
+            # Fold the new rows into the aggregate cube and dashboard summaries
+            stats_cube = StatsCube(self.db_setup.engine)
+            stats_cube.refresh()
+            StatisticsService(self.db_setup.engine, stats_cube).refresh()
+            
         except Exception as e:
             session.rollback()
             print(f"❌ Error loading data: {e}")
@@ -2,6 +2,7 @@ import pandas as pd
 from sqlalchemy import func
 from database.db_setup import DatabaseSetup
 from database.models import ArgoProfile, ProfileSummary
+from data_processing.region_classifier import classify_point
 
 class ProfileSummarizer:
     """Generate natural language summaries of profiles"""
@@ -83,16 +84,7 @@ class ProfileSummarizer:
     
     def _get_region(self, lat: float, lon: float) -> str:
         """Determine ocean region based on coordinates"""
-        if 5 <= lat <= 30 and 40 <= lon <= 100:
-            return "Arabian Sea"
-        elif -10 <= lat <= 25 and 60 <= lon <= 100:
-            return "Bay of Bengal"
-        elif -30 <= lat <= 30 and 30 <= lon <= 120:
-            return "Indian Ocean"
-        elif -60 <= lat <= -30 and 20 <= lon <= 180:
-            return "Southern Ocean"
-        else:
-            return "Ocean"
+        return classify_point(lat, lon)
 
 # Usage
 if __name__ == "__main__":
@@ -0,0 +1,233 @@
+"""
+Ocean region classification (single source of truth)
+
+Regions are polygons in (longitude, latitude), checked in priority order
+with a vectorized even-odd point-in-polygon test. The result is stored on
+argo_profiles.ocean_region at ingest, so queries filter with an indexed
+equality predicate instead of re-deriving lat/lon boxes.
+
+These labels differ from the boxes upload_to_neon used before: 'Southern
+Ocean' is only south of 50°S (was 60°S-30°S), and 'Red Sea' (12°N-30°N,
+32°E-44°E) takes points the old 40°E-80°E 'Arabian Sea' box included.
+Queries naming the Southern Ocean use the 'southern ocean' group, which
+keeps the old band.
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+DEFAULT_REGION = 'Other Regions'
+
+Polygon = Sequence[Tuple[float, float]]  # [(lon, lat), ...]
+
+
+def box(lat_min: float, lat_max: float, lon_min: float, lon_max: float) -> List[Tuple[float, float]]:
+    """Rectangle as a polygon"""
+    return [(lon_min, lat_min), (lon_max, lat_min), (lon_max, lat_max), (lon_min, lat_max)]
+
+
+@dataclass
+class Region:
+    """Named region made of one or more polygons"""
+    name: str
+    polygons: List[Polygon]
+    keywords: List[str] = field(default_factory=list)
+
+    def __post_init__(self):
+        self._vertices = [np.asarray(p, dtype='float64') for p in self.polygons]
+        self._bounds = [(v[:, 0].min(), v[:, 0].max(), v[:, 1].min(), v[:, 1].max())
+                        for v in self._vertices]
+
+    @property
+    def lat_range(self) -> Tuple[float, float]:
+        return (min(b[2] for b in self._bounds), max(b[3] for b in self._bounds))
+
+    @property
+    def lon_range(self) -> Tuple[float, float]:
+        return (min(b[0] for b in self._bounds), max(b[1] for b in self._bounds))
+
+    def contains(self, lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+        """Vectorized membership test"""
+        inside = np.zeros(lat.shape, dtype=bool)
+        for vertices, (x0, x1, y0, y1) in zip(self._vertices, self._bounds):
+            candidates = (lon >= x0) & (lon <= x1) & (lat >= y0) & (lat <= y1)
+            if not candidates.any():
+                continue
+            if len(vertices) == 4 and _is_axis_aligned(vertices):
+                inside |= candidates  # rectangle: bounds test is exact (edges inclusive)
+            else:
+                idx = np.flatnonzero(candidates)
+                inside[idx] |= points_in_polygon(lat[idx], lon[idx], vertices)
+        return inside
+
+
+# Priority order: first match wins (smaller seas before the basins around them)
+REGIONS: List[Region] = [
+    Region('Red Sea', [box(12, 30, 32, 44)], ['red sea']),
+    Region('Arabian Sea', [box(5, 30, 40, 80)], ['arabian sea', 'arabian']),
+    Region('Bay of Bengal', [box(5, 25, 80, 100)], ['bay of bengal', 'bengal']),
+    Region('Equatorial Indian Ocean', [box(-10, 5, 40, 100)], ['equatorial indian', 'equatorial']),
+    Region('Southern Indian Ocean', [box(-50, -10, 20, 120)], ['southern indian', 'south indian']),
+    Region('Southern Ocean', [box(-90, -50, -180, 180)], ['southern ocean', 'antarctic']),
+    Region('Equatorial Pacific Ocean', [box(-10, 10, 100, 180), box(-10, 10, -180, -70)],
+           ['equatorial pacific']),
+    Region('North Pacific Ocean', [box(10, 65, 100, 180), box(10, 65, -180, -100)],
+           ['north pacific']),
+    Region('South Pacific Ocean', [box(-50, -10, 120, 180), box(-50, -10, -180, -70)],
+           ['south pacific']),
+    Region('Equatorial Atlantic Ocean', [box(-10, 10, -70, 20)], ['equatorial atlantic']),
+    Region('North Atlantic Ocean', [box(10, 65, -100, 20)], ['north atlantic']),
+    Region('South Atlantic Ocean', [box(-50, -10, -70, 20)], ['south atlantic']),
+]
+
+REGION_NAMES = [region.name for region in REGIONS] + [DEFAULT_REGION]
+
+# Broad basin names used in queries ("indian ocean") -> member regions
+REGION_GROUPS: Dict[str, List[str]] = {
+    'indian ocean': ['Red Sea', 'Arabian Sea', 'Bay of Bengal',
+                     'Equatorial Indian Ocean', 'Southern Indian Ocean'],
+    'pacific': ['Equatorial Pacific Ocean', 'North Pacific Ocean', 'South Pacific Ocean'],
+    'atlantic': ['Equatorial Atlantic Ocean', 'North Atlantic Ocean', 'South Atlantic Ocean'],
+    'southern ocean': ['Southern Ocean', 'Southern Indian Ocean', 'South Pacific Ocean',
+                       'South Atlantic Ocean'],
+}
+
+# Groups that mean a latitude band rather than whole member regions (SQL filters only)
+GROUP_MAX_LATITUDE: Dict[str, float] = {
+    'southern ocean': -30.0,    # south of 30°S, as before the stored region column
+}
+
+
+def points_in_polygon(lat: np.ndarray, lon: np.ndarray, vertices: np.ndarray) -> np.ndarray:
+    """Even-odd ray casting; loops over edges, vectorized over points"""
+    x = np.asarray(lon, dtype='float64')
+    y = np.asarray(lat, dtype='float64')
+    inside = np.zeros(x.shape, dtype=bool)
+
+    xs, ys = vertices[:, 0], vertices[:, 1]
+    xs_next, ys_next = np.roll(xs, -1), np.roll(ys, -1)
+    for x1, y1, x2, y2 in zip(xs, ys, xs_next, ys_next):
+        crosses = (y1 > y) != (y2 > y)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            x_cross = x1 + (y - y1) * (x2 - x1) / (y2 - y1)
+        inside ^= crosses & (x < x_cross)
+    return inside
+
+
+def classify(lat, lon) -> np.ndarray:
+    """
+    Region name for every (lat, lon) pair.
+
+    Args:
+        lat, lon: Array-likes of equal length (NaN -> DEFAULT_REGION)
+
+    Returns:
+        Object array of region names
+    """
+    lat = np.asarray(lat, dtype='float64')
+    lon = np.asarray(lon, dtype='float64')
+    lon = np.where(lon > 180, lon - 360, lon)  # accept 0..360 longitudes
+
+    result = np.full(lat.shape, DEFAULT_REGION, dtype=object)
+    unassigned = ~(np.isnan(lat) | np.isnan(lon))
+    for region in REGIONS:
+        if not unassigned.any():
+            break
+        idx = np.flatnonzero(unassigned)
+        hit = region.contains(lat[idx], lon[idx])
+        result[idx[hit]] = region.name
+        unassigned[idx[hit]] = False
+    return result
+
+
+def classify_point(lat: float, lon: float) -> str:
+    """Region name for a single coordinate"""
+    return str(classify([lat], [lon])[0])
+
+
+def classify_frame(df: pd.DataFrame) -> pd.Series:
+    """Region per row; uses a stored ocean_region column when present"""
+    if 'ocean_region' in df.columns and df['ocean_region'].notna().all():
+        return df['ocean_region']
+    regions = pd.Series(classify(df['latitude'], df['longitude']), index=df.index)
+    if 'ocean_region' in df.columns:
+        regions = df['ocean_region'].fillna(regions)
+    return regions
+
+
+def find_region(query: str) -> Optional[Region]:
+    """Region named in a natural-language query (longest keyword wins)"""
+    query = query.lower()
+    matches = [
+        (len(keyword), region)
+        for region in REGIONS
+        for keyword in region.keywords
+        if keyword in query
+    ]
+    return max(matches, key=lambda m: m[0])[1] if matches else None
+
+
+def region_sql_filter(query: str, column: str = 'ocean_region') -> Optional[str]:
+    """
+    Equality / IN predicate on the stored region column for a query.
+    A group applies when no region is named, or when the region matched
+    is the group's own name ('southern ocean').
+    """
+    query = query.lower()
+    region = find_region(query)
+    for group, members in REGION_GROUPS.items():
+        if group in query and (region is None or group in region.keywords):
+            names = ', '.join(f"'{name}'" for name in members)
+            predicate = f"{column} IN ({names})"
+            if group in GROUP_MAX_LATITUDE:
+                predicate = f"({predicate} AND latitude <= {GROUP_MAX_LATITUDE[group]:g})"
+            return predicate
+    return f"{column} = '{region.name}'" if region else None
+
+
+def backfill_regions(engine, chunk_size: int = 5000) -> int:
+    """
+    Set ocean_region on existing rows.
+    Classification depends only on the position, so distinct (lat, lon)
+    pairs are classified and written back with one UPDATE per pair.
+    """
+    with engine.connect() as conn:
+        positions = pd.read_sql(
+            text("""
+                SELECT DISTINCT latitude, longitude
+                FROM argo_profiles
+                WHERE ocean_region IS NULL
+            """),
+            conn
+        )
+
+    if positions.empty:
+        print("✅ ocean_region already populated")
+        return 0
+
+    positions['ocean_region'] = classify(positions['latitude'], positions['longitude'])
+    records = positions.to_dict('records')
+
+    for start in range(0, len(records), chunk_size):
+        with engine.begin() as conn:
+            conn.execute(
+                text("""
+                    UPDATE argo_profiles SET ocean_region = :ocean_region
+                    WHERE latitude = :latitude AND longitude = :longitude
+                      AND ocean_region IS NULL
+                """),
+                records[start:start + chunk_size]
+            )
+        print(f"   ▶ Regions: {min(start + chunk_size, len(records))}/{len(records)} positions")
+
+    print(f"✅ Classified {len(records)} distinct positions")
+    return len(records)
+
+
+def _is_axis_aligned(vertices: np.ndarray) -> bool:
+    """True for rectangles built with box()"""
+    return len(np.unique(vertices[:, 0])) == 2 and len(np.unique(vertices[:, 1])) == 2
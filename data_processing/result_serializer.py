@@ -0,0 +1,119 @@
+"""
+Result serialization shared by the MCP server and the FastAPI service.
+
+Converts query DataFrames column by column (NumPy-level conversions instead
+of per-value Python checks) and encodes with orjson when available.
+Handles Decimal, Timestamp/datetime64 and NaN/NaT in bulk.
+"""
+
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+def _convert_column(series: pd.Series) -> list:
+    """Convert one column to a JSON-ready Python list (NaN/NaT -> None)"""
+    mask = series.isna().to_numpy()
+    has_missing = mask.any()
+
+    if pd.api.types.is_datetime64_any_dtype(series.dtype):
+        if getattr(series.dt, 'tz', None) is not None:
+            series = series.dt.tz_convert('UTC').dt.tz_localize(None)
+        values = np.datetime_as_string(series.to_numpy(dtype='datetime64[s]'), unit='s').astype(object)
+
+    elif pd.api.types.is_bool_dtype(series.dtype) or pd.api.types.is_integer_dtype(series.dtype):
+        if not has_missing:
+            return series.to_numpy().tolist()
+        values = series.to_numpy(dtype=object)
+
+    elif pd.api.types.is_float_dtype(series.dtype):
+        if not has_missing:
+            return series.to_numpy(dtype='float64').tolist()
+        values = series.to_numpy(dtype='float64').astype(object)
+
+    else:
+        values = series.to_numpy(dtype=object)
+        first_valid = series.first_valid_index()
+        if first_valid is not None:
+            sample = series.at[first_valid]
+            if isinstance(sample, Decimal):
+                values = series.astype('float64').to_numpy().astype(object)
+            elif isinstance(sample, (pd.Timestamp, datetime, date)):
+                values = pd.to_datetime(series).dt.strftime('%Y-%m-%dT%H:%M:%S').to_numpy(dtype=object)
+            elif isinstance(sample, bytes):
+                values = series.str.decode('utf-8', errors='replace').to_numpy(dtype=object)
+
+    if has_missing:
+        values = values.copy()
+        values[mask] = None
+    return values.tolist()
+
+
+def dataframe_to_columns(df: pd.DataFrame) -> Dict[str, list]:
+    """
+    Column-oriented JSON-ready dict: {column: [values...]}.
+    pd.DataFrame(result) rebuilds the same frame on the client side.
+    """
+    return {str(col): _convert_column(df[col]) for col in df.columns}
+
+
+def dataframe_to_records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Record-oriented JSON-ready list (same output as to_dict('records'), but clean types)"""
+    columns = dataframe_to_columns(df)
+    names = list(columns.keys())
+    return [dict(zip(names, row)) for row in zip(*columns.values())]
+
+
+def _default(obj: Any) -> Any:
+    """Fallback encoder for types orjson/json do not handle natively"""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, pd.Timestamp):
+        return None if pd.isna(obj) else obj.isoformat()
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, pd.DataFrame):
+        return dataframe_to_columns(obj)
+    if isinstance(obj, pd.Series):
+        return _convert_column(obj)
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, (set, tuple)):
+        return list(obj)
+    if obj is pd.NaT:
+        return None
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps_bytes(obj: Any, indent: bool = False) -> bytes:
+    """Serialize to JSON bytes (orjson when available; NaN -> null)"""
+    if ORJSON_AVAILABLE:
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=_default, option=option)
+    return json.dumps(obj, default=_default, indent=2 if indent else None).encode('utf-8')
+
+
+def dumps(obj: Any, indent: bool = False) -> str:
+    """Serialize to a JSON string"""
+    return dumps_bytes(obj, indent=indent).decode('utf-8')
+
+
+def loads(data) -> Any:
+    """Parse JSON produced by dumps()"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
@@ -1,5 +1,6 @@
 import os
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
 from database.models import Base
@@ -40,6 +41,9 @@ class DatabaseSetup:
         
         self.engine = create_engine(self.database_url, echo=False)
         self.SessionLocal = sessionmaker(bind=self.engine)
+        
+        # Async engine is created on first use (FastAPI service only)
+        self._async_engine = None
     
     def create_tables(self):
         """Create all tables in the database"""
@@ -55,6 +59,38 @@ class DatabaseSetup:
         """Get database session"""
         return self.SessionLocal()
     
+    def get_async_engine(self):
+        """
+        Get (lazily created) SQLAlchemy async engine backed by asyncpg.
+        
+        Used by the FastAPI service so database I/O does not block the
+        event loop. The sync engine above stays in use for Streamlit/scripts.
+        """
+        if self._async_engine is None:
+            from sqlalchemy.ext.asyncio import create_async_engine
+            
+            url = make_url(self.database_url)
+            connect_args = {}
+            
+            # asyncpg does not understand libpq query options (sslmode etc.)
+            sslmode = url.query.get('sslmode')
+            if sslmode and sslmode != 'disable':
+                connect_args['ssl'] = 'require'
+            url = url.difference_update_query(['sslmode', 'channel_binding'])
+            url = url.set(drivername='postgresql+asyncpg')
+            
+            self._async_engine = create_async_engine(
+                url,
+                echo=False,
+                pool_size=10,
+                max_overflow=20,
+                pool_pre_ping=True,
+                connect_args=connect_args
+            )
+            print("✅ Async database engine created (asyncpg)")
+        
+        return self._async_engine
+    
     def test_connection(self):
         """Test database connection"""
         try:
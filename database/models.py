@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Float, String, DateTime, Text, Index
+from sqlalchemy import Column, Integer, BigInteger, Float, String, DateTime, Text, Index
 from sqlalchemy.ext.declarative import declarative_base
 from datetime import datetime
 
@@ -23,6 +23,15 @@ class ArgoProfile(Base):
     chlorophyll = Column(Float, nullable=True)
     ph = Column(Float, nullable=True)
     
+    # Region from data_processing/region_classifier.py (set at ingest)
+    ocean_region = Column(String(50), nullable=True)
+    
+    # Derived at ingest (TEOS-10, see advanced_analytics/derived_variables.py)
+    absolute_salinity = Column(Float, nullable=True)         # g/kg
+    conservative_temperature = Column(Float, nullable=True)  # °C
+    sigma0 = Column(Float, nullable=True)                    # kg/m³ - 1000
+    n_squared = Column(Float, nullable=True)                 # 1/s², step from level above
+    
     # Quality flags
     temp_qc = Column(Integer, nullable=True)
     sal_qc = Column(Integer, nullable=True)
@@ -38,6 +47,7 @@ class ArgoProfile(Base):
         Index('idx_timestamp', 'timestamp'),
         Index('idx_float_id', 'float_id'),
         Index('idx_spatial_temporal', 'latitude', 'longitude', 'timestamp'),
+        Index('idx_ocean_region', 'ocean_region', 'timestamp'),
         {'schema': 'public'}
     )
 
@@ -75,6 +85,105 @@ class QueryLog(Base):
     execution_time = Column(Float)
     timestamp = Column(DateTime, default=datetime.utcnow)
     success = Column(Integer, default=1)
+    
+    # Pre-execution cost guard (EXPLAIN) decision
+    guard_action = Column(String(20))  # allow, rewrite, route, reject
+    estimated_rows = Column(BigInteger)
+    estimated_cost = Column(Float)
+
+
+class StatsCubeCell(Base):
+    """Pre-aggregated statistics: region x month x depth bin x parameter"""
+    __tablename__ = 'stats_cube'
+    __table_args__ = {'schema': 'public'}
+    
+    region = Column(String(50), primary_key=True)
+    month = Column(DateTime, primary_key=True)
+    depth_bin = Column(Integer, primary_key=True)  # lower bound (dbar)
+    parameter = Column(String(30), primary_key=True)
+    
+    # Additive moments (mean/std are derived on read)
+    n = Column(BigInteger, nullable=False)
+    value_sum = Column(Float)
+    value_sum_sq = Column(Float)
+    value_min = Column(Float)
+    value_max = Column(Float)
+
+
+class StatsCubeFloat(Base):
+    """Floats seen per region and month (distinct counts are not additive)"""
+    __tablename__ = 'stats_cube_floats'
+    __table_args__ = {'schema': 'public'}
+    
+    region = Column(String(50), primary_key=True)
+    month = Column(DateTime, primary_key=True)
+    float_id = Column(String(50), primary_key=True)
+
+
+class CubeWatermark(Base):
+    """Last argo_profiles.id folded into an aggregate table"""
+    __tablename__ = 'cube_watermarks'
+    __table_args__ = {'schema': 'public'}
+    
+    name = Column(String(50), primary_key=True)
+    last_id = Column(BigInteger, nullable=False, default=0)
+    refreshed_at = Column(DateTime, default=datetime.utcnow)
+
+
+class StatsTotals(Base):
+    """Table-wide record count, extents and parameter availability"""
+    __tablename__ = 'stats_totals'
+    __table_args__ = {'schema': 'public'}
+    
+    name = Column(String(50), primary_key=True)  # source table
+    total_records = Column(BigInteger, nullable=False, default=0)
+    earliest_date = Column(DateTime)
+    latest_date = Column(DateTime)
+    min_lat = Column(Float)
+    max_lat = Column(Float)
+    min_lon = Column(Float)
+    max_lon = Column(Float)
+    min_depth = Column(Float)
+    max_depth = Column(Float)
+    
+    # Non-null value counts
+    has_temperature = Column(BigInteger, default=0)
+    has_salinity = Column(BigInteger, default=0)
+    has_oxygen = Column(BigInteger, default=0)
+    has_chlorophyll = Column(BigInteger, default=0)
+    has_ph = Column(BigInteger, default=0)
+
+
+class StatsQuality(Base):
+    """Record count per temperature QC flag"""
+    __tablename__ = 'stats_quality'
+    __table_args__ = {'schema': 'public'}
+    
+    temp_qc = Column(Integer, primary_key=True)  # -1 = no flag
+    count = Column(BigInteger, nullable=False, default=0)
+
+
+class StatsFloat(Base):
+    """Per-float measurement count, time span and position sums"""
+    __tablename__ = 'stats_floats'
+    __table_args__ = {'schema': 'public'}
+    
+    float_id = Column(String(50), primary_key=True)
+    measurements = Column(BigInteger, nullable=False, default=0)
+    first_measurement = Column(DateTime)
+    last_measurement = Column(DateTime)
+    lat_sum = Column(Float)
+    lon_sum = Column(Float)
+    position_count = Column(BigInteger, default=0)
+
+
+class StatsFloatCycle(Base):
+    """Cycles seen per float (distinct counts are not additive)"""
+    __tablename__ = 'stats_float_cycles'
+    __table_args__ = {'schema': 'public'}
+    
+    float_id = Column(String(50), primary_key=True)
+    cycle_number = Column(Integer, primary_key=True)
 
 
 class SavedQuery(Base):
@@ -0,0 +1,182 @@
+"""
+Spatial query support for radius/nearest searches
+- Bounding-box pre-filter (uses the existing B-tree idx_lat_lon)
+- Optional GiST index via PostGIS or earthdistance, detected at runtime
+"""
+
+import math
+from typing import Dict, Tuple
+
+from sqlalchemy import text
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE_LAT = math.pi * EARTH_RADIUS_KM / 180.0  # ~111.19 km
+
+# Backend names (EnhancedSQLGenerator.spatial_backend)
+BACKEND_BBOX = 'bbox'
+BACKEND_EARTHDISTANCE = 'earthdistance'
+BACKEND_POSTGIS = 'postgis'
+
+# Expression indexes created by create_spatial_index()
+SPATIAL_INDEXES = {
+    BACKEND_POSTGIS: (
+        'idx_argo_geog',
+        "CREATE INDEX IF NOT EXISTS idx_argo_geog ON public.argo_profiles "
+        "USING gist ((ST_SetSRID(ST_MakePoint(longitude, latitude), 4326)::geography))"
+    ),
+    BACKEND_EARTHDISTANCE: (
+        'idx_argo_earth',
+        "CREATE INDEX IF NOT EXISTS idx_argo_earth ON public.argo_profiles "
+        "USING gist (ll_to_earth(latitude, longitude))"
+    ),
+}
+
+EXTENSIONS = {
+    BACKEND_POSTGIS: ['postgis'],
+    BACKEND_EARTHDISTANCE: ['cube', 'earthdistance'],
+}
+
+
+def bounding_box(lat: float, lon: float, radius_km: float) -> Dict:
+    """
+    Lat/lon box that fully contains the circle of radius_km around (lat, lon).
+
+    Returns dict with lat_min/lat_max and lon_min/lon_max. lon bounds are None
+    when the box touches a pole or spans all longitudes; wraps_dateline is set
+    when the longitude range crosses ±180°.
+    """
+    dlat = radius_km / KM_PER_DEGREE_LAT
+    lat_min = max(lat - dlat, -90.0)
+    lat_max = min(lat + dlat, 90.0)
+
+    box = {'lat_min': lat_min, 'lat_max': lat_max,
+           'lon_min': None, 'lon_max': None, 'wraps_dateline': False}
+
+    # Longitude degrees shrink with latitude: use the box edge closest to a pole
+    max_abs_lat = max(abs(lat_min), abs(lat_max))
+    if max_abs_lat >= 89.9:
+        return box
+
+    dlon = radius_km / (KM_PER_DEGREE_LAT * math.cos(math.radians(max_abs_lat)))
+    if dlon >= 180.0:
+        return box
+
+    lon_min = lon - dlon
+    lon_max = lon + dlon
+    if lon_min < -180.0:
+        lon_min += 360.0
+        box['wraps_dateline'] = True
+    elif lon_max > 180.0:
+        lon_max -= 360.0
+        box['wraps_dateline'] = True
+
+    box['lon_min'] = lon_min
+    box['lon_max'] = lon_max
+    return box
+
+
+def bounding_box_predicate(lat: float, lon: float, radius_km: float) -> str:
+    """SQL predicate for the bounding box (index-usable on latitude/longitude)"""
+    box = bounding_box(lat, lon, radius_km)
+    parts = [f"latitude BETWEEN {box['lat_min']:.6f} AND {box['lat_max']:.6f}"]
+
+    if box['lon_min'] is not None:
+        if box['wraps_dateline']:
+            parts.append(f"(longitude >= {box['lon_min']:.6f} OR longitude <= {box['lon_max']:.6f})")
+        else:
+            parts.append(f"longitude BETWEEN {box['lon_min']:.6f} AND {box['lon_max']:.6f}")
+
+    return "\n      AND ".join(parts)
+
+
+def haversine_sql(lat: float, lon: float) -> str:
+    """Haversine distance (km) from a fixed point; asin form is stable for small distances"""
+    return (
+        f"2 * {EARTH_RADIUS_KM} * asin(LEAST(1.0, sqrt(\n"
+        f"            power(sin(radians(latitude - ({lat})) / 2), 2) +\n"
+        f"            cos(radians({lat})) * cos(radians(latitude)) *\n"
+        f"            power(sin(radians(longitude - ({lon})) / 2), 2)\n"
+        f"        )))"
+    )
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Haversine distance in km (NumPy-compatible)"""
+    import numpy as np
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.minimum(1.0, np.sqrt(a)))
+
+
+def detect_spatial_backend(engine) -> str:
+    """
+    Pick the best available spatial backend.
+    Uses PostGIS/earthdistance only when the extension AND its GiST index exist.
+    """
+    try:
+        with engine.connect() as conn:
+            extensions = {
+                row[0] for row in conn.execute(text(
+                    "SELECT extname FROM pg_extension WHERE extname IN ('postgis', 'cube', 'earthdistance')"
+                ))
+            }
+            indexes = {
+                row[0] for row in conn.execute(text(
+                    "SELECT indexname FROM pg_indexes WHERE tablename = 'argo_profiles'"
+                ))
+            }
+    except Exception as e:
+        print(f"⚠️ Spatial backend detection failed, using bounding box: {e}")
+        return BACKEND_BBOX
+
+    for backend in (BACKEND_POSTGIS, BACKEND_EARTHDISTANCE):
+        index_name, _ = SPATIAL_INDEXES[backend]
+        if set(EXTENSIONS[backend]) <= extensions and index_name in indexes:
+            print(f"✅ Spatial backend: {backend} ({index_name})")
+            return backend
+
+    return BACKEND_BBOX
+
+
+def create_spatial_index(engine, backend: str = BACKEND_EARTHDISTANCE) -> bool:
+    """Enable the extension(s) and build the GiST expression index"""
+    if backend not in SPATIAL_INDEXES:
+        raise ValueError(f"Unknown spatial backend: {backend}")
+
+    _, index_sql = SPATIAL_INDEXES[backend]
+    try:
+        with engine.begin() as conn:
+            for extension in EXTENSIONS[backend]:
+                conn.execute(text(f"CREATE EXTENSION IF NOT EXISTS {extension}"))
+            conn.execute(text(index_sql))
+        print(f"✅ Spatial index ready ({backend})")
+        return True
+    except Exception as e:
+        print(f"❌ Could not create {backend} spatial index: {e}")
+        return False
+
+
+def spatial_filter_sql(lat: float, lon: float, radius_km: float,
+                       backend: str = BACKEND_BBOX) -> Tuple[str, str]:
+    """
+    Return (distance_expression_km, where_predicate) for the given backend.
+    The predicate is index-usable; the distance expression refines exactly.
+    """
+    radius_m = radius_km * 1000.0
+
+    if backend == BACKEND_POSTGIS:
+        point = "ST_SetSRID(ST_MakePoint(longitude, latitude), 4326)::geography"
+        center = f"ST_SetSRID(ST_MakePoint({lon}, {lat}), 4326)::geography"
+        return (
+            f"ST_Distance({point}, {center}) / 1000.0",
+            f"ST_DWithin({point}, {center}, {radius_m})"
+        )
+
+    if backend == BACKEND_EARTHDISTANCE:
+        center = f"ll_to_earth({lat}, {lon})"
+        return (
+            f"earth_distance({center}, ll_to_earth(latitude, longitude)) / 1000.0",
+            f"earth_box({center}, {radius_m}) @> ll_to_earth(latitude, longitude)"
+        )
+
+    return haversine_sql(lat, lon), bounding_box_predicate(lat, lon, radius_km)
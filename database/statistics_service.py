@@ -0,0 +1,464 @@
+"""
+Dashboard statistics from incrementally maintained summary tables
+
+The database dashboard used to run six full-table aggregates (record
+counts, COUNT(DISTINCT float_id), the regional CASE, quality flags,
+parameter availability, top floats) on every Streamlit rerun. Those now
+come from small summary tables folded forward from argo_profiles with an
+id watermark, like the stats cube:
+
+- stats_totals        record count, extents, non-null counts (additive / LEAST / GREATEST)
+- stats_quality       records per temp_qc flag
+- stats_floats        per-float measurements, time span and position sums
+- stats_float_cycles  (float_id, cycle_number) presence for distinct counts
+
+Regional and monthly panels come from the stats cube. Any panel whose
+summary is not built yet falls back to its full-scan query. Panels are
+queried concurrently and handed out as each one arrives. Results are
+cached process-wide (shared by every session) for CACHE_TTL seconds; after
+that, an unchanged watermark keeps the cached panels, and refresh()
+invalidates them.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, Optional, Tuple
+
+import pandas as pd
+from sqlalchemy import text
+
+from database.stats_cube import StatsCube
+
+STATS_NAME = 'dashboard_stats'      # cube_watermarks row
+TOTALS_NAME = 'argo_profiles'       # stats_totals row
+CACHE_TTL = 300                     # seconds before the watermark is re-checked
+TOP_FLOATS = 10
+
+QUALITY_LABELS = {
+    1: 'Good (QC=1)',
+    2: 'Probably Good (QC=2)',
+    3: 'Questionable (QC=3)',
+    4: 'Bad (QC=4)',
+    9: 'Missing (QC=9)',
+}
+
+# Statistics panels in dashboard order
+PANELS = ['overall', 'regional', 'temporal', 'quality', 'parameters', 'top_floats']
+
+# Process-wide cache: engine url -> {'stats', 'computed_at', 'version'}
+_cache: Dict[str, Dict] = {}
+_cache_lock = threading.Lock()
+
+# Panel queries run concurrently, each on its own pooled connection
+# (SQLAlchemy's default pool holds 5 + 10 overflow connections)
+_executor = ThreadPoolExecutor(max_workers=len(PANELS), thread_name_prefix='dashboard-stats')
+
+
+class StatisticsService:
+    """Maintain the dashboard summary tables and serve cached statistics"""
+
+    def __init__(self, engine=None, stats_cube: Optional[StatsCube] = None, ttl: float = CACHE_TTL):
+        if engine is None:
+            from database.db_setup import DatabaseSetup
+            engine = DatabaseSetup().engine
+        self.engine = engine
+        self.stats_cube = stats_cube or StatsCube(engine)
+        self.ttl = ttl
+        self._key = str(engine.url)
+
+    # ------------------------------------------------------------------
+    # Refresh
+    # ------------------------------------------------------------------
+
+    def refresh(self, full: bool = False) -> Dict:
+        """
+        Fold rows added since the last refresh into the summary tables.
+
+        Args:
+            full: Rebuild from scratch (use after updates/deletes)
+
+        Returns:
+            Dict with success, rows_added and the new watermark
+        """
+        try:
+            with self.engine.begin() as conn:
+                if full:
+                    for table in ('stats_totals', 'stats_quality', 'stats_floats', 'stats_float_cycles'):
+                        conn.execute(text(f"DELETE FROM {table}"))
+                    last_id = 0
+                else:
+                    last_id = conn.execute(
+                        text("SELECT last_id FROM cube_watermarks WHERE name = :name"),
+                        {'name': STATS_NAME}
+                    ).scalar() or 0
+
+                max_id = conn.execute(text("SELECT COALESCE(MAX(id), 0) FROM argo_profiles")).scalar()
+                if max_id <= last_id:
+                    return {'success': True, 'rows_added': 0, 'watermark': int(last_id)}
+
+                params = {'last_id': int(last_id), 'max_id': int(max_id), 'name': TOTALS_NAME}
+                for statement in (TOTALS_UPSERT, QUALITY_UPSERT, FLOATS_UPSERT, CYCLES_INSERT):
+                    conn.execute(text(statement), params)
+                conn.execute(
+                    text("""
+                        INSERT INTO cube_watermarks (name, last_id, refreshed_at)
+                        VALUES (:name, :max_id, :now)
+                        ON CONFLICT (name) DO UPDATE
+                        SET last_id = EXCLUDED.last_id, refreshed_at = EXCLUDED.refreshed_at
+                    """),
+                    {'name': STATS_NAME, 'max_id': int(max_id), 'now': datetime.utcnow()}
+                )
+
+            self.invalidate()
+            print(f"✅ Dashboard statistics refreshed (rows {last_id + 1}-{max_id})")
+            return {'success': True, 'rows_added': int(max_id - last_id), 'watermark': int(max_id)}
+
+        except Exception as e:
+            print(f"❌ Dashboard statistics refresh failed: {e}")
+            return {'success': False, 'error': str(e)}
+
+    def is_ready(self) -> bool:
+        """True once the summary tables have been built at least once"""
+        try:
+            with self.engine.connect() as conn:
+                return bool(conn.execute(
+                    text("SELECT last_id > 0 FROM cube_watermarks WHERE name = :name"),
+                    {'name': STATS_NAME}
+                ).scalar())
+        except Exception:
+            return False
+
+    # ------------------------------------------------------------------
+    # Cached statistics
+    # ------------------------------------------------------------------
+
+    def get_statistics(self, force: bool = False) -> Dict[str, pd.DataFrame]:
+        """
+        Dashboard panels (overall, regional, temporal, quality, parameters,
+        top_floats) as DataFrames, from the process-wide cache when fresh.
+
+        Args:
+            force: Recompute even if the cache is fresh
+
+        Returns:
+            Dict of DataFrames (copies, safe to modify; empty for failed panels)
+        """
+        return dict(self.iter_statistics(force))
+
+    def iter_statistics(self, force: bool = False) -> Iterator[Tuple[str, pd.DataFrame]]:
+        """
+        Yield (panel, DataFrame) as panels become available: all at once from
+        the cache, otherwise in completion order of concurrent queries (one
+        pooled connection each). A failed panel yields an empty frame and the
+        set is not cached.
+        """
+        cached = None if force else self._cached()
+        if cached is not None:
+            yield from cached.items()
+            return
+
+        version = self._safe_version()
+        readiness = [_executor.submit(self.is_ready), _executor.submit(self.stats_cube.is_ready)]
+        summaries, cube = (future.result() for future in readiness)
+        futures = {_executor.submit(self.panel, name, summaries, cube): name for name in PANELS}
+
+        stats, failed = {}, False
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                frame = future.result()
+            except Exception as e:
+                print(f"❌ Dashboard panel '{name}' failed: {e}")
+                frame, failed = pd.DataFrame(), True
+            stats[name] = frame
+            yield name, frame.copy()
+
+        if not failed:
+            with _cache_lock:
+                _cache[self._key] = {'stats': stats, 'computed_at': time.monotonic(), 'version': version}
+
+    def invalidate(self):
+        """Drop cached statistics (next read recomputes)"""
+        with _cache_lock:
+            _cache.pop(self._key, None)
+
+    def _cached(self) -> Optional[Dict[str, pd.DataFrame]]:
+        """
+        Copies of the cached panels when within TTL, or past it with
+        unchanged watermarks (which restarts the TTL); else None
+        """
+        with _cache_lock:
+            entry = _cache.get(self._key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry['computed_at'] >= self.ttl:
+            if entry['version'] is None or self._safe_version() != entry['version']:
+                return None
+            entry['computed_at'] = time.monotonic()
+        return _copy(entry['stats'])
+
+    def _safe_version(self) -> Optional[Tuple]:
+        """Watermarks of the summary tables and the cube (None when not built or unreachable)"""
+        try:
+            with self.engine.connect() as conn:
+                rows = conn.execute(text(
+                    "SELECT name, last_id FROM cube_watermarks ORDER BY name"
+                )).fetchall()
+            return tuple(map(tuple, rows)) or None
+        except Exception:
+            return None
+
+    # ------------------------------------------------------------------
+    # Panels
+    # ------------------------------------------------------------------
+
+    def panel(self, name: str, summaries: bool, cube: bool) -> pd.DataFrame:
+        """
+        One dashboard panel.
+
+        Args:
+            name: Entry of PANELS
+            summaries: Summary tables are built (else full scan)
+            cube: Stats cube is built (regional / temporal, else full scan)
+        """
+        if name in ('regional', 'temporal'):
+            if cube:
+                try:
+                    return self._cube_regional() if name == 'regional' else self._cube_temporal()
+                except Exception as e:
+                    print(f"⚠️ Stats cube unavailable, using full scans: {e}")
+            return self._read(FULL_SCAN_QUERIES[name])
+
+        queries = SUMMARY_QUERIES if summaries else FULL_SCAN_QUERIES
+        frame = self._read(queries[name], {'name': TOTALS_NAME, 'limit': TOP_FLOATS})
+        if name == 'quality':
+            frame = _label_quality(frame)
+        return frame
+
+    def _read(self, query: str, params: Optional[Dict] = None) -> pd.DataFrame:
+        with self.engine.connect() as conn:
+            return pd.read_sql(text(query), conn, params=params or {})
+
+    def _cube_regional(self) -> pd.DataFrame:
+        """Records, floats and mean T/S per region from the stats cube"""
+        # 'pressure' is on every row, so its count is the record count
+        regional_df = self.stats_cube.region_stats('pressure')[['region', 'count']]
+        regional_df = regional_df.rename(columns={'count': 'record_count'})
+        regional_df = regional_df.merge(self.stats_cube.float_counts('region'), on='region', how='left')
+        for parameter, column in [('temperature', 'avg_temp'), ('salinity', 'avg_salinity')]:
+            means = self.stats_cube.region_stats(parameter)[['region', 'mean']]
+            regional_df = regional_df.merge(means.rename(columns={'mean': column}), on='region', how='left')
+        regional_df['float_count'] = regional_df['float_count'].fillna(0).astype(int)
+        return regional_df.sort_values('record_count', ascending=False).reset_index(drop=True)
+
+    def _cube_temporal(self) -> pd.DataFrame:
+        """Monthly records and active floats over the last 12 months"""
+        start = datetime.utcnow() - timedelta(days=365)
+        temporal_df = self.stats_cube.monthly_series('pressure', start=start)[['month', 'count']]
+        temporal_df = temporal_df.rename(columns={'count': 'measurements'})
+        active = self.stats_cube.float_counts('month', start=start)
+        return temporal_df.merge(active.rename(columns={'float_count': 'active_floats'}),
+                                 on='month', how='left')
+
+
+def _label_quality(frame: pd.DataFrame) -> pd.DataFrame:
+    """temp_qc counts -> quality label counts (the dashboard's CASE)"""
+    if 'temp_qc' not in frame.columns:
+        return frame
+    labels = frame['temp_qc'].map(QUALITY_LABELS).fillna('Unknown')
+    counts = frame['count'].groupby(labels).sum()
+    return (counts.rename_axis('quality').reset_index(name='count')
+            .sort_values('count', ascending=False).reset_index(drop=True))
+
+
+def _copy(stats: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
+    return {name: frame.copy() for name, frame in stats.items()}
+
+
+# ----------------------------------------------------------------------
+# Summary table maintenance (rows in the :last_id < id <= :max_id window)
+# ----------------------------------------------------------------------
+
+_WINDOW = "FROM argo_profiles WHERE id > :last_id AND id <= :max_id"
+
+# pandas loads store NaN, not NULL; PostgreSQL counts NaN, sorts it above
+# every number (MAX) and propagates it through SUM/AVG. Float columns are
+# read through NULLIF, matching the stats cube's NaN filter.
+_POSITION = "latitude <> 'NaN'::float8 AND longitude <> 'NaN'::float8"
+
+
+def _valid(column: str) -> str:
+    return f"NULLIF({column}, 'NaN'::float8)"
+
+
+TOTALS_UPSERT = f"""
+    INSERT INTO stats_totals
+        (name, total_records, earliest_date, latest_date, min_lat, max_lat, min_lon, max_lon,
+         min_depth, max_depth, has_temperature, has_salinity, has_oxygen, has_chlorophyll, has_ph)
+    SELECT :name, COUNT(*), MIN(timestamp), MAX(timestamp),
+           MIN({_valid('latitude')}), MAX({_valid('latitude')}),
+           MIN({_valid('longitude')}), MAX({_valid('longitude')}),
+           MIN({_valid('pressure')}), MAX({_valid('pressure')}),
+           COUNT({_valid('temperature')}), COUNT({_valid('salinity')}),
+           COUNT({_valid('dissolved_oxygen')}), COUNT({_valid('chlorophyll')}), COUNT({_valid('ph')})
+    {_WINDOW}
+    HAVING COUNT(*) > 0
+    ON CONFLICT (name) DO UPDATE SET
+        total_records = stats_totals.total_records + EXCLUDED.total_records,
+        earliest_date = LEAST(stats_totals.earliest_date, EXCLUDED.earliest_date),
+        latest_date = GREATEST(stats_totals.latest_date, EXCLUDED.latest_date),
+        min_lat = LEAST(stats_totals.min_lat, EXCLUDED.min_lat),
+        max_lat = GREATEST(stats_totals.max_lat, EXCLUDED.max_lat),
+        min_lon = LEAST(stats_totals.min_lon, EXCLUDED.min_lon),
+        max_lon = GREATEST(stats_totals.max_lon, EXCLUDED.max_lon),
+        min_depth = LEAST(stats_totals.min_depth, EXCLUDED.min_depth),
+        max_depth = GREATEST(stats_totals.max_depth, EXCLUDED.max_depth),
+        has_temperature = stats_totals.has_temperature + EXCLUDED.has_temperature,
+        has_salinity = stats_totals.has_salinity + EXCLUDED.has_salinity,
+        has_oxygen = stats_totals.has_oxygen + EXCLUDED.has_oxygen,
+        has_chlorophyll = stats_totals.has_chlorophyll + EXCLUDED.has_chlorophyll,
+        has_ph = stats_totals.has_ph + EXCLUDED.has_ph
+"""
+
+QUALITY_UPSERT = f"""
+    INSERT INTO stats_quality (temp_qc, count)
+    SELECT COALESCE(temp_qc, -1), COUNT(*)
+    {_WINDOW}
+    GROUP BY COALESCE(temp_qc, -1)
+    ON CONFLICT (temp_qc) DO UPDATE SET count = stats_quality.count + EXCLUDED.count
+"""
+
+FLOATS_UPSERT = f"""
+    INSERT INTO stats_floats
+        (float_id, measurements, first_measurement, last_measurement, lat_sum, lon_sum, position_count)
+    SELECT float_id, COUNT(*), MIN(timestamp), MAX(timestamp),
+           COALESCE(SUM(latitude) FILTER (WHERE {_POSITION}), 0),
+           COALESCE(SUM(longitude) FILTER (WHERE {_POSITION}), 0),
+           COUNT(*) FILTER (WHERE {_POSITION})
+    {_WINDOW} AND float_id IS NOT NULL
+    GROUP BY float_id
+    ON CONFLICT (float_id) DO UPDATE SET
+        measurements = stats_floats.measurements + EXCLUDED.measurements,
+        first_measurement = LEAST(stats_floats.first_measurement, EXCLUDED.first_measurement),
+        last_measurement = GREATEST(stats_floats.last_measurement, EXCLUDED.last_measurement),
+        lat_sum = stats_floats.lat_sum + EXCLUDED.lat_sum,
+        lon_sum = stats_floats.lon_sum + EXCLUDED.lon_sum,
+        position_count = stats_floats.position_count + EXCLUDED.position_count
+"""
+
+CYCLES_INSERT = f"""
+    INSERT INTO stats_float_cycles (float_id, cycle_number)
+    SELECT DISTINCT float_id, cycle_number
+    {_WINDOW} AND float_id IS NOT NULL AND cycle_number IS NOT NULL
+    ON CONFLICT DO NOTHING
+"""
+
+# ----------------------------------------------------------------------
+# Panel queries
+# ----------------------------------------------------------------------
+
+SUMMARY_QUERIES = {
+    'overall': """
+        SELECT t.total_records,
+               (SELECT COUNT(*) FROM stats_floats) AS unique_floats,
+               (SELECT COUNT(DISTINCT cycle_number) FROM stats_float_cycles) AS total_cycles,
+               t.earliest_date, t.latest_date,
+               t.min_lat, t.max_lat, t.min_lon, t.max_lon,
+               t.min_depth, t.max_depth
+        FROM stats_totals t
+        WHERE t.name = :name
+    """,
+    'quality': "SELECT temp_qc, count FROM stats_quality",
+    'parameters': """
+        SELECT total_records AS total, has_temperature, has_salinity,
+               has_oxygen, has_chlorophyll, has_ph
+        FROM stats_totals
+        WHERE name = :name
+    """,
+    'top_floats': """
+        WITH top AS (
+            SELECT * FROM stats_floats ORDER BY measurements DESC LIMIT :limit
+        )
+        SELECT top.float_id,
+               top.measurements,
+               (SELECT COUNT(*) FROM stats_float_cycles c WHERE c.float_id = top.float_id) AS cycles,
+               top.first_measurement,
+               top.last_measurement,
+               top.lat_sum / NULLIF(top.position_count, 0) AS avg_lat,
+               top.lon_sum / NULLIF(top.position_count, 0) AS avg_lon
+        FROM top
+        ORDER BY top.measurements DESC
+    """,
+}
+
+# Full-table fallbacks (before the first refresh)
+FULL_SCAN_QUERIES = {
+    'overall': f"""
+        SELECT
+            COUNT(*) as total_records,
+            COUNT(DISTINCT float_id) as unique_floats,
+            COUNT(DISTINCT cycle_number) as total_cycles,
+            MIN(timestamp) as earliest_date,
+            MAX(timestamp) as latest_date,
+            MIN({_valid('latitude')}) as min_lat,
+            MAX({_valid('latitude')}) as max_lat,
+            MIN({_valid('longitude')}) as min_lon,
+            MAX({_valid('longitude')}) as max_lon,
+            MIN({_valid('pressure')}) as min_depth,
+            MAX({_valid('pressure')}) as max_depth
+        FROM argo_profiles;
+    """,
+    'regional': f"""
+        SELECT
+            COALESCE(ocean_region, 'Other Regions') as region,
+            COUNT(*) as record_count,
+            COUNT(DISTINCT float_id) as float_count,
+            AVG({_valid('temperature')}) as avg_temp,
+            AVG({_valid('salinity')}) as avg_salinity
+        FROM argo_profiles
+        WHERE temperature <> 'NaN'::float8 AND salinity <> 'NaN'::float8
+        GROUP BY region
+        ORDER BY record_count DESC;
+    """,
+    'temporal': """
+        SELECT
+            DATE_TRUNC('month', timestamp) as month,
+            COUNT(*) as measurements,
+            COUNT(DISTINCT float_id) as active_floats
+        FROM argo_profiles
+        WHERE timestamp >= CURRENT_DATE - INTERVAL '12 months'
+        GROUP BY month
+        ORDER BY month;
+    """,
+    'quality': """
+        SELECT COALESCE(temp_qc, -1) AS temp_qc, COUNT(*) as count
+        FROM argo_profiles
+        GROUP BY COALESCE(temp_qc, -1);
+    """,
+    'parameters': f"""
+        SELECT
+            COUNT(*) as total,
+            COUNT({_valid('temperature')}) as has_temperature,
+            COUNT({_valid('salinity')}) as has_salinity,
+            COUNT({_valid('dissolved_oxygen')}) as has_oxygen,
+            COUNT({_valid('chlorophyll')}) as has_chlorophyll,
+            COUNT({_valid('ph')}) as has_ph
+        FROM argo_profiles;
+    """,
+    'top_floats': f"""
+        SELECT
+            float_id,
+            COUNT(*) as measurements,
+            COUNT(DISTINCT cycle_number) as cycles,
+            MIN(timestamp) as first_measurement,
+            MAX(timestamp) as last_measurement,
+            AVG(latitude) FILTER (WHERE {_POSITION}) as avg_lat,
+            AVG(longitude) FILTER (WHERE {_POSITION}) as avg_lon
+        FROM argo_profiles
+        GROUP BY float_id
+        ORDER BY measurements DESC
+        LIMIT :limit;
+    """,
+}
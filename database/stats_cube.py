@@ -0,0 +1,274 @@
+"""
+Pre-aggregated statistics cube: region x month x depth bin x parameter
+
+Each cell stores count, sum, sum of squares, min and max, so means and
+standard deviations for any roll-up (regions, periods, depth ranges) are
+exact and come from a few thousand cube rows instead of a full table scan.
+Refreshed incrementally from argo_profiles using an id watermark.
+"""
+
+from datetime import datetime
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+CUBE_NAME = 'stats_cube'
+
+# Lower bounds of depth bins (dbar); the last bin is open-ended
+DEPTH_BIN_EDGES = [0, 10, 50, 100, 200, 500, 1000, 2000]
+
+# Parameter -> SQL value expression (QC filtering applied per parameter).
+# 'pressure' is present on every row, so its count is the record count.
+CUBE_PARAMETERS = {
+    'pressure': "pressure",
+    'temperature': "CASE WHEN COALESCE(temp_qc, 1) IN (1, 2, 3) THEN temperature END",
+    'salinity': "CASE WHEN COALESCE(sal_qc, 1) IN (1, 2, 3) THEN salinity END",
+    'dissolved_oxygen': "dissolved_oxygen",
+    'chlorophyll': "chlorophyll",
+    'ph': "ph",
+}
+
+# Region of a row (stored at ingest by data_processing/region_classifier.py)
+REGION_SQL = "COALESCE(ocean_region, 'Other Regions')"
+
+
+def depth_bin_sql(column: str = 'pressure') -> str:
+    """SQL expression mapping pressure to the lower bound of its depth bin"""
+    edges = ', '.join(str(edge) for edge in DEPTH_BIN_EDGES)
+    return f"(ARRAY[{edges}])[width_bucket(GREATEST({column}, 0), ARRAY[{edges}])]"
+
+
+def summarize_cells(cells: pd.DataFrame, by: Sequence[str] = ()) -> pd.DataFrame:
+    """
+    Combine cube cells into count/mean/std/min/max per group.
+
+    Args:
+        cells: Cube rows (n, value_sum, value_sum_sq, value_min, value_max)
+        by: Grouping columns (empty = single overall row)
+    """
+    columns = ['n', 'value_sum', 'value_sum_sq']
+    if cells.empty:
+        return pd.DataFrame(columns=list(by) + ['count', 'mean', 'std', 'min', 'max'])
+
+    if by:
+        grouped = cells.groupby(list(by), sort=True)
+        totals = grouped[columns].sum()
+        totals['min'] = grouped['value_min'].min()
+        totals['max'] = grouped['value_max'].max()
+        totals = totals.reset_index()
+    else:
+        totals = pd.DataFrame([{
+            **cells[columns].sum().to_dict(),
+            'min': cells['value_min'].min(),
+            'max': cells['value_max'].max()
+        }])
+
+    n = totals['n'].astype('float64')
+    mean = totals['value_sum'] / n
+    with np.errstate(invalid='ignore', divide='ignore'):
+        variance = (totals['value_sum_sq'] - n * mean ** 2) / (n - 1)
+    totals['count'] = totals['n'].astype('int64')
+    totals['mean'] = mean
+    totals['std'] = np.sqrt(np.clip(variance.where(n > 1), 0, None))
+    return totals[list(by) + ['count', 'mean', 'std', 'min', 'max']]
+
+
+class StatsCube:
+    """Build, refresh and query the aggregate cube"""
+
+    def __init__(self, engine=None):
+        if engine is None:
+            from database.db_setup import DatabaseSetup
+            engine = DatabaseSetup().engine
+        self.engine = engine
+
+    # ------------------------------------------------------------------
+    # Refresh
+    # ------------------------------------------------------------------
+
+    def refresh(self, full: bool = False) -> Dict:
+        """
+        Fold rows added since the last refresh into the cube.
+
+        Args:
+            full: Rebuild from scratch (use after updates/deletes)
+
+        Returns:
+            Dict with success, rows_added and the new watermark
+        """
+        try:
+            with self.engine.begin() as conn:
+                if full:
+                    conn.execute(text("DELETE FROM stats_cube"))
+                    conn.execute(text("DELETE FROM stats_cube_floats"))
+                    last_id = 0
+                else:
+                    last_id = conn.execute(
+                        text("SELECT last_id FROM cube_watermarks WHERE name = :name"),
+                        {'name': CUBE_NAME}
+                    ).scalar() or 0
+
+                max_id = conn.execute(text("SELECT COALESCE(MAX(id), 0) FROM argo_profiles")).scalar()
+                if max_id <= last_id:
+                    return {'success': True, 'rows_added': 0, 'watermark': int(last_id)}
+
+                params = {'last_id': int(last_id), 'max_id': int(max_id)}
+                conn.execute(text(self._cells_upsert_sql()), params)
+                conn.execute(text(self._floats_upsert_sql()), params)
+                conn.execute(
+                    text("""
+                        INSERT INTO cube_watermarks (name, last_id, refreshed_at)
+                        VALUES (:name, :max_id, :now)
+                        ON CONFLICT (name) DO UPDATE
+                        SET last_id = EXCLUDED.last_id, refreshed_at = EXCLUDED.refreshed_at
+                    """),
+                    {'name': CUBE_NAME, 'max_id': int(max_id), 'now': datetime.utcnow()}
+                )
+
+            print(f"✅ Stats cube refreshed (rows {last_id + 1}-{max_id})")
+            return {'success': True, 'rows_added': int(max_id - last_id), 'watermark': int(max_id)}
+
+        except Exception as e:
+            print(f"❌ Stats cube refresh failed: {e}")
+            return {'success': False, 'error': str(e)}
+
+    def _source_sql(self) -> str:
+        """argo_profiles rows in the watermark window with cube dimensions"""
+        return f"""
+            SELECT {REGION_SQL} AS region,
+                   DATE_TRUNC('month', timestamp) AS month,
+                   {depth_bin_sql()} AS depth_bin,
+                   float_id,
+                   {', '.join(f'{expr} AS {name}' for name, expr in CUBE_PARAMETERS.items())}
+            FROM argo_profiles
+            WHERE id > :last_id AND id <= :max_id
+              AND timestamp IS NOT NULL
+        """
+
+    def _cells_upsert_sql(self) -> str:
+        unpivot = ',\n                    '.join(f"('{name}', src.{name})" for name in CUBE_PARAMETERS)
+        return f"""
+            INSERT INTO stats_cube
+                (region, month, depth_bin, parameter, n, value_sum, value_sum_sq, value_min, value_max)
+            SELECT src.region, src.month, src.depth_bin, v.parameter,
+                   COUNT(*), SUM(v.value), SUM(v.value * v.value), MIN(v.value), MAX(v.value)
+            FROM ({self._source_sql()}) AS src
+            CROSS JOIN LATERAL (VALUES
+                    {unpivot}
+            ) AS v(parameter, value)
+            WHERE v.value IS NOT NULL
+              AND v.value <> 'NaN'::float8  -- pandas loads store NaN, not NULL
+            GROUP BY src.region, src.month, src.depth_bin, v.parameter
+            ON CONFLICT (region, month, depth_bin, parameter) DO UPDATE SET
+                n = stats_cube.n + EXCLUDED.n,
+                value_sum = stats_cube.value_sum + EXCLUDED.value_sum,
+                value_sum_sq = stats_cube.value_sum_sq + EXCLUDED.value_sum_sq,
+                value_min = LEAST(stats_cube.value_min, EXCLUDED.value_min),
+                value_max = GREATEST(stats_cube.value_max, EXCLUDED.value_max)
+        """
+
+    def _floats_upsert_sql(self) -> str:
+        # Distinct floats are not additive, so (region, month, float) presence is kept
+        return f"""
+            INSERT INTO stats_cube_floats (region, month, float_id)
+            SELECT DISTINCT src.region, src.month, src.float_id
+            FROM ({self._source_sql()}) AS src
+            WHERE src.float_id IS NOT NULL
+            ON CONFLICT DO NOTHING
+        """
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def cells(self, parameter: str, region: Optional[str] = None,
+              start: Optional[datetime] = None, end: Optional[datetime] = None,
+              min_depth: Optional[float] = None, max_depth: Optional[float] = None) -> pd.DataFrame:
+        """
+        Cube rows for one parameter, optionally filtered.
+        region matches case-insensitively as a substring (e.g. 'bengal').
+        """
+        if parameter not in CUBE_PARAMETERS:
+            raise ValueError(f"Parameter not in stats cube: {parameter}")
+
+        conditions = ["parameter = :parameter"]
+        params = {'parameter': parameter}
+        if region:
+            conditions.append("region ILIKE :region")
+            params['region'] = f"%{region}%"
+        if start is not None:
+            conditions.append("month >= DATE_TRUNC('month', CAST(:start AS timestamp))")
+            params['start'] = start
+        if end is not None:
+            conditions.append("month <= :end")
+            params['end'] = end
+        if min_depth is not None:
+            conditions.append("depth_bin >= :min_bin")
+            params['min_bin'] = _bin_floor(min_depth)
+        if max_depth is not None:
+            conditions.append("depth_bin <= :max_depth")
+            params['max_depth'] = max_depth
+
+        query = text(f"""
+            SELECT region, month, depth_bin, n, value_sum, value_sum_sq, value_min, value_max
+            FROM stats_cube
+            WHERE {' AND '.join(conditions)}
+        """)
+        with self.engine.connect() as conn:
+            return pd.read_sql(query, conn, params=params)
+
+    def region_stats(self, parameter: str, region: Optional[str] = None, **filters) -> pd.DataFrame:
+        """count/mean/std/min/max per region"""
+        return summarize_cells(self.cells(parameter, region=region, **filters), by=['region'])
+
+    def overall_stats(self, parameter: str, region: Optional[str] = None, **filters) -> Optional[Dict]:
+        """count/mean/std/min/max over all matching cells (None when empty)"""
+        cells = self.cells(parameter, region=region, **filters)
+        if cells.empty:
+            return None
+        return summarize_cells(cells).iloc[0].to_dict()
+
+    def monthly_series(self, parameter: str, region: Optional[str] = None, **filters) -> pd.DataFrame:
+        """Monthly count/mean/std for a parameter"""
+        return summarize_cells(self.cells(parameter, region=region, **filters), by=['month'])
+
+    def float_counts(self, by: str = 'region', start: Optional[datetime] = None) -> pd.DataFrame:
+        """Distinct floats per region or per month"""
+        if by not in ('region', 'month'):
+            raise ValueError("by must be 'region' or 'month'")
+
+        where = "WHERE month >= DATE_TRUNC('month', CAST(:start AS timestamp))" if start is not None else ""
+        query = text(f"""
+            SELECT {by}, COUNT(DISTINCT float_id) AS float_count
+            FROM stats_cube_floats
+            {where}
+            GROUP BY {by}
+            ORDER BY {by}
+        """)
+        with self.engine.connect() as conn:
+            return pd.read_sql(query, conn, params={'start': start} if start is not None else {})
+
+    def is_ready(self) -> bool:
+        """True once the cube has been built at least once"""
+        return bool(self.watermark())
+
+    def watermark(self) -> Optional[int]:
+        """Last argo_profiles.id folded into the cube (None when not built or unreachable)"""
+        try:
+            with self.engine.connect() as conn:
+                last_id = conn.execute(
+                    text("SELECT last_id FROM cube_watermarks WHERE name = :name"),
+                    {'name': CUBE_NAME}
+                ).scalar()
+            return int(last_id) if last_id else None
+        except Exception:
+            return None
+
+
+def _bin_floor(depth: float) -> int:
+    """Lower bound of the bin containing depth"""
+    candidates = [edge for edge in DEPTH_BIN_EDGES if edge <= depth]
+    return candidates[-1] if candidates else DEPTH_BIN_EDGES[0]
+
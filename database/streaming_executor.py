@@ -0,0 +1,224 @@
+"""
+Streaming SQL executor
+Reads query results through a server-side cursor and builds the DataFrame
+chunk by chunk, stopping early once a row or byte budget is reached.
+"""
+
+import json
+import re
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+import pandas as pd
+from sqlalchemy import text
+
+# Default budgets (overridable per call)
+DEFAULT_CHUNK_ROWS = 2000
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024  # 64 MB of in-memory DataFrame
+
+_TRAILING_LIMIT = re.compile(
+    r'\s+LIMIT\s+\d+(\s+OFFSET\s+\d+)?\s*;?\s*$', re.IGNORECASE
+)
+_LIMIT_VALUE = re.compile(r'\bLIMIT\s+(\d+)', re.IGNORECASE)
+
+
+@dataclass
+class StreamedResult:
+    """Result of a streamed query"""
+    data: pd.DataFrame
+    rows_fetched: int = 0
+    bytes_used: int = 0
+    truncated: bool = False
+    total_matching_records: int = 0
+    total_is_estimate: bool = False
+    chunks: int = 0
+
+    def metadata(self) -> Dict:
+        """Metadata fields merged into query responses"""
+        return {
+            'rows_fetched': self.rows_fetched,
+            'bytes_used': self.bytes_used,
+            'truncated': self.truncated,
+            'total_matching_records': self.total_matching_records,
+            'total_is_estimate': self.total_is_estimate
+        }
+
+
+def normalize_chunk_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convert DB-API object columns to plain numeric/datetime dtypes.
+
+    NUMERIC columns (e.g. ROUND(...)::numeric) arrive as Decimal objects;
+    they are converted to float64 so downstream code (select_dtypes,
+    plotting, JSON serialization) sees regular NumPy columns.
+    """
+    for col in df.columns[df.dtypes == object]:
+        series = df[col]
+        first_valid = series.first_valid_index()
+        if first_valid is None:
+            continue
+        if isinstance(series.at[first_valid], Decimal):
+            df[col] = series.astype('float64')
+    return df
+
+
+def strip_trailing_limit(sql: str) -> str:
+    """Remove a trailing LIMIT/OFFSET clause (used for row estimates)"""
+    return _TRAILING_LIMIT.sub('', sql.strip().rstrip(';'))
+
+
+def get_sql_limit(sql: str) -> Optional[int]:
+    """Return the last LIMIT value in the query, if any"""
+    matches = _LIMIT_VALUE.findall(sql)
+    return int(matches[-1]) if matches else None
+
+
+def explain_plan(conn, sql: str) -> Dict:
+    """
+    Run EXPLAIN (FORMAT JSON) and return the top-level plan node.
+    Does not execute the query itself.
+    """
+    raw = conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql.strip().rstrip(';')}")).scalar()
+    if isinstance(raw, str):
+        raw = json.loads(raw)
+    return raw[0]['Plan']
+
+
+class ResultFrameBuilder:
+    """
+    Accumulates result chunks under row/byte budgets.
+    Shared by the sync executor and the async (FastAPI) path.
+    """
+
+    def __init__(self, columns: List[str], max_rows: Optional[int], max_bytes: int):
+        self.columns = columns
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.frames: List[pd.DataFrame] = []
+        self.rows_fetched = 0
+        self.bytes_used = 0
+        self.truncated = False
+
+    def add(self, rows) -> bool:
+        """Add a chunk of rows; returns False once a budget is exhausted"""
+        chunk = normalize_chunk_dtypes(pd.DataFrame(rows, columns=self.columns))
+
+        if self.max_rows is not None and self.rows_fetched + len(chunk) > self.max_rows:
+            chunk = chunk.iloc[:self.max_rows - self.rows_fetched]
+            self.truncated = True
+
+        chunk_bytes = int(chunk.memory_usage(deep=True, index=False).sum())
+        if self.bytes_used + chunk_bytes > self.max_bytes:
+            # Keep the rows that still fit in the budget
+            bytes_per_row = max(chunk_bytes / max(len(chunk), 1), 1)
+            fit = int((self.max_bytes - self.bytes_used) / bytes_per_row)
+            chunk = chunk.iloc[:max(fit, 0)]
+            chunk_bytes = int(chunk.memory_usage(deep=True, index=False).sum())
+            self.truncated = True
+
+        if len(chunk):
+            self.frames.append(chunk)
+            self.rows_fetched += len(chunk)
+            self.bytes_used += chunk_bytes
+
+        return not self.truncated
+
+    def build(self) -> pd.DataFrame:
+        """Concatenate accumulated chunks"""
+        if not self.frames:
+            return pd.DataFrame(columns=self.columns)
+        if len(self.frames) == 1:
+            return self.frames[0]
+        # Chunks with all-NULL columns come back as object dtype
+        df = pd.concat(self.frames, ignore_index=True)
+        return normalize_chunk_dtypes(df.infer_objects())
+
+    def needs_estimate(self, sql: str) -> bool:
+        """True when more rows may match than were fetched"""
+        sql_limit = get_sql_limit(sql)
+        return self.truncated or (sql_limit is not None and self.rows_fetched >= sql_limit)
+
+    def to_result(self, estimate: Optional[int] = None) -> StreamedResult:
+        """Build final StreamedResult (estimate = planner row estimate, if any)"""
+        total = self.rows_fetched
+        total_is_estimate = False
+        if estimate is not None and estimate > self.rows_fetched:
+            total = estimate
+            total_is_estimate = True
+
+        if self.truncated:
+            print(f"⚠️ Result truncated at {self.rows_fetched:,} rows "
+                  f"({self.bytes_used / 1024 / 1024:.1f} MB); ~{total:,} matching")
+
+        return StreamedResult(
+            data=self.build(),
+            rows_fetched=self.rows_fetched,
+            bytes_used=self.bytes_used,
+            truncated=self.truncated,
+            total_matching_records=total,
+            total_is_estimate=total_is_estimate,
+            chunks=len(self.frames)
+        )
+
+
+def estimate_rows(conn, sql: str) -> Optional[int]:
+    """Planner estimate of matching rows (query without its LIMIT)"""
+    try:
+        plan = explain_plan(conn, strip_trailing_limit(sql))
+        return int(plan.get('Plan Rows', 0))
+    except Exception as e:
+        print(f"⚠️ Row estimate failed: {e}")
+        return None
+
+
+class StreamingQueryExecutor:
+    """
+    Executes SELECT queries with a server-side cursor.
+
+    - stream_results/yield_per keep only one chunk in client memory
+    - each chunk is converted to a DataFrame immediately
+    - a byte budget stops wide/large results early
+    - when stopped early, total_matching_records comes from the planner estimate
+    """
+
+    def __init__(
+        self,
+        engine,
+        chunk_rows: int = DEFAULT_CHUNK_ROWS,
+        max_bytes: int = DEFAULT_MAX_BYTES
+    ):
+        self.engine = engine
+        self.chunk_rows = chunk_rows
+        self.max_bytes = max_bytes
+
+    def execute(
+        self,
+        sql: str,
+        max_rows: Optional[int] = None,
+        max_bytes: Optional[int] = None
+    ) -> StreamedResult:
+        """
+        Execute query and stream results into a DataFrame.
+
+        Args:
+            sql: SELECT statement
+            max_rows: Optional row budget (stop after this many rows)
+            max_bytes: Optional byte budget (defaults to executor setting)
+        """
+        with self.engine.connect() as conn:
+            conn = conn.execution_options(stream_results=True, yield_per=self.chunk_rows)
+            result = conn.execute(text(sql))
+            builder = ResultFrameBuilder(list(result.keys()), max_rows, max_bytes or self.max_bytes)
+
+            try:
+                for rows in result.partitions():
+                    if not builder.add(rows):
+                        break
+            finally:
+                # Closes the server-side cursor when stopping early
+                result.close()
+
+            estimate = estimate_rows(conn, sql) if builder.needs_estimate(sql) else None
+
+        return builder.to_result(estimate)
@@ -16,6 +16,9 @@ from database.db_setup import DatabaseSetup
 from database.models import ArgoProfile
 from vector_store.vector_db import FAISSVectorStore
 from advanced_analytics.profile_analytics import AdvancedProfileAnalytics
+from advanced_analytics.parallel_executor import analytics_executor, AnalyticsError
+from advanced_analytics.profile_batch import count_profiles
+from data_processing.result_serializer import dataframe_to_columns, dataframe_to_records
 import pandas as pd
 from sqlalchemy import text
 from typing import Dict, Any, List
@@ -40,6 +43,8 @@ class ARGOMCPServer:
         self.vector_store = FAISSVectorStore()
         self.vector_store.load()
         self.analytics = AdvancedProfileAnalytics()
+        # Region-wide analytics run per profile partition in a process pool
+        self.analytics.executor = analytics_executor
         
         # Register all MCP tools
         self._register_tools()
@@ -70,6 +75,12 @@ class ARGOMCPServer:
                         "type": "integer",
                         "description": "Maximum number of results to return",
                         "default": 1000
+                    },
+                    "data_format": {
+                        "type": "string",
+                        "enum": ["records", "columns"],
+                        "description": "Shape of 'data': a list of row objects (records) or {column: [values]} (columns, smaller and faster for large results)",
+                        "default": "records"
                     }
                 },
                 "required": ["query"]
@@ -195,7 +206,7 @@ class ARGOMCPServer:
         # Tool 8: Temporal Trend Analysis
         self.protocol.register_tool(
             name="analyze_temporal_trends",
-            description="Analyze temporal trends in oceanographic parameters over time for a specific region.",
+            description="Analyze deseasonalized temporal trends (Sen's slope, Mann-Kendall significance, bootstrap confidence interval) of monthly means for one or more regions and parameters in a single call.",
             input_schema={
                 "type": "object",
                 "properties": {
@@ -203,17 +214,34 @@ class ARGOMCPServer:
                         "type": "string",
                         "description": "Ocean region name"
                     },
+                    "regions": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "Several regions or region groups (e.g. 'indian ocean'); omit both region and regions for every region"
+                    },
                     "parameter": {
                         "type": "string",
                         "description": "Parameter to analyze (temperature, salinity, etc.)"
                     },
+                    "parameters": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "Several parameters analyzed together"
+                    },
                     "days": {
                         "type": "integer",
-                        "description": "Number of days to analyze",
-                        "default": 90
+                        "description": "Number of days to analyze (default: whole record)"
+                    },
+                    "min_depth": {
+                        "type": "number",
+                        "description": "Minimum depth (dbar)"
+                    },
+                    "max_depth": {
+                        "type": "number",
+                        "description": "Maximum depth (dbar)"
                     }
                 },
-                "required": ["region", "parameter"]
+                "required": []
             },
             handler=self._handle_temporal_trends
         )
@@ -241,57 +269,36 @@ class ARGOMCPServer:
         )
     
     # Tool Handlers
-    def _handle_query_argo_data(self, query: str, limit: int = 5000) -> Dict:
-        """Handle ARGO data query"""
-        import json
-        from decimal import Decimal
-        import pandas as pd
-        import numpy as np
-        
-        result = self.query_processor.process_query(query)
+    def _handle_query_argo_data(self, query: str, limit: int = 5000, data_format: str = 'records') -> Dict:
+        """Handle ARGO data query ('data' as records unless data_format='columns')"""
+        if data_format not in ('records', 'columns'):
+            return {"success": False, "error": f"Unknown data_format: {data_format} (use 'records' or 'columns')"}
+
+        # Stream at most `limit` rows; the total comes from the planner if truncated
+        result = self.query_processor.process_query(query, max_rows=limit)
         
         if result['success']:
-            full_df = result['results']
-            total_records = len(full_df)
-            df = full_df.head(limit)
+            df = result['results']
             returned_records = len(df)
+            total_records = max(result.get('total_matching_records', returned_records), returned_records)
             
-            # Convert DataFrame to dict, handling Decimal and Timestamp types
-            data_records = df.to_dict('records')
-            
-            # Convert non-JSON-serializable types to JSON-compatible types
-            def convert_to_json_serializable(obj):
-                """Recursively convert objects to JSON-serializable types"""
-                if isinstance(obj, list):
-                    return [convert_to_json_serializable(item) for item in obj]
-                elif isinstance(obj, dict):
-                    return {key: convert_to_json_serializable(value) for key, value in obj.items()}
-                elif isinstance(obj, Decimal):
-                    return float(obj)
-                elif isinstance(obj, (pd.Timestamp, pd.DatetimeIndex)):
-                    return obj.isoformat()
-                elif isinstance(obj, np.integer):
-                    return int(obj)
-                elif isinstance(obj, np.floating):
-                    return float(obj)
-                elif isinstance(obj, np.ndarray):
-                    return obj.tolist()
-                elif pd.isna(obj):
-                    return None
-                else:
-                    return obj
-            
-            data_records = convert_to_json_serializable(data_records)
+            # JSON-ready (Decimal/Timestamp/NaN converted in bulk)
+            data = dataframe_to_columns(df) if data_format == 'columns' else dataframe_to_records(df)
             
             return {
                 "success": True,
                 "record_count": returned_records,
                 "total_matching_records": total_records,
-                "limited": total_records > limit,
-                "data": data_records,
+                "limited": result.get('truncated', False) or total_records > returned_records,
+                "total_is_estimate": result.get('total_is_estimate', False),
+                "sampled": result.get('sampled', False),
+                "routed_to_cube": result.get('routed_to_cube', False),
+                "cube_caveat": result.get('cube_caveat'),
+                "data": data,
+                "data_format": data_format,
                 "sql": result['sql'],
                 "execution_time": result.get('execution_time', 0),
-                "message": f"Showing {returned_records} of {total_records} total matching records" if total_records > limit else f"All {total_records} matching records returned"
+                "message": f"Showing {returned_records} of {'~' if result.get('total_is_estimate') else ''}{total_records} total matching records" if total_records > returned_records else f"All {total_records} matching records returned"
             }
         else:
             return {"success": False, "error": result.get('error')}
@@ -468,14 +475,14 @@ class ARGOMCPServer:
                     lon_min, lon_max = float(lon_match.group(1)), float(lon_match.group(2))
                     
                     sql = f"""
-                    SELECT pressure, temperature, salinity, latitude, longitude, timestamp
+                    SELECT float_id, cycle_number, pressure, temperature, salinity, latitude, longitude, timestamp
                     FROM argo_profiles
                     WHERE latitude BETWEEN {lat_min} AND {lat_max}
                       AND longitude BETWEEN {lon_min} AND {lon_max}
                       AND pressure IS NOT NULL
                       AND temperature IS NOT NULL
                       AND temp_qc IN (1, 2, 3)
-                    ORDER BY pressure ASC
+                    ORDER BY float_id, cycle_number, pressure ASC
                     LIMIT 10000;
                     """
                     
@@ -490,14 +497,13 @@ class ARGOMCPServer:
                 elif 'bengal' in query.lower():
                     # Direct SQL for Bay of Bengal
                     sql = """
-                    SELECT pressure, temperature, salinity, latitude, longitude, timestamp
+                    SELECT float_id, cycle_number, pressure, temperature, salinity, latitude, longitude, timestamp
                     FROM argo_profiles
-                    WHERE latitude BETWEEN 5 AND 22
-                      AND longitude BETWEEN 80 AND 95
+                    WHERE ocean_region = 'Bay of Bengal'
                       AND pressure IS NOT NULL
                       AND temperature IS NOT NULL
                       AND temp_qc IN (1, 2, 3)
-                    ORDER BY pressure ASC
+                    ORDER BY float_id, cycle_number, pressure ASC
                     LIMIT 10000;
                     """
                     
@@ -512,14 +518,13 @@ class ARGOMCPServer:
                 elif 'arabian' in query.lower():
                     # Direct SQL for Arabian Sea
                     sql = """
-                    SELECT pressure, temperature, salinity, latitude, longitude, timestamp
+                    SELECT float_id, cycle_number, pressure, temperature, salinity, latitude, longitude, timestamp
                     FROM argo_profiles
-                    WHERE latitude BETWEEN 8 AND 24
-                      AND longitude BETWEEN 50 AND 78
+                    WHERE ocean_region = 'Arabian Sea'
                       AND pressure IS NOT NULL
                       AND temperature IS NOT NULL
                       AND temp_qc IN (1, 2, 3)
-                    ORDER BY pressure ASC
+                    ORDER BY float_id, cycle_number, pressure ASC
                     LIMIT 10000;
                     """
                     
@@ -548,7 +553,8 @@ class ARGOMCPServer:
         if len(df) < 10:
             return {"success": False, "error": f"Insufficient data points ({len(df)}) for thermocline calculation. Need at least 10 measurements."}
         
-        # Calculate thermocline using the advanced method
+        # Calculate thermocline using the advanced method (per profile when
+        # rows come from several floats/cycles)
         try:
             thermocline = self.analytics.calculate_thermocline_advanced(df)
             
@@ -564,6 +570,7 @@ class ARGOMCPServer:
                 "success": True,
                 "thermocline": thermocline,
                 "record_count": len(df),
+                "profile_count": thermocline.get('profiles_analyzed', 1),
                 "region": region_name
             }
         except Exception as e:
@@ -642,7 +649,10 @@ class ARGOMCPServer:
             }
         
         # Use the advanced method for more detailed water mass identification
-        water_masses = self.analytics.identify_water_masses_advanced(df)
+        try:
+            water_masses = self.analytics.identify_water_masses_advanced(df)
+        except AnalyticsError as e:
+            return {"success": False, "error": f"Water mass identification stopped: {e}"}
         
         # Check if identification was successful
         if not water_masses.get('success', True):
@@ -662,9 +672,14 @@ class ARGOMCPServer:
         """Handle regional comparison"""
         return self.analytics.regional_comparison(region1, region2, parameter)
     
-    def _handle_temporal_trends(self, region: str, parameter: str, days: int = 90) -> Dict:
-        """Handle temporal trend analysis"""
-        return self.analytics.trend_analysis(region, parameter, days)
+    def _handle_temporal_trends(self, region: str = None, parameter: str = "temperature",
+                                days: int = None, regions: List[str] = None,
+                                parameters: List[str] = None, min_depth: float = None,
+                                max_depth: float = None) -> Dict:
+        """Handle temporal trend analysis (all region x parameter pairs in one pass)"""
+        regions = regions or ([region] if region else None)
+        parameters = parameters or [parameter]
+        return self.analytics.trend_analysis_multi(regions, parameters, days, min_depth, max_depth)
     
     def _handle_calculate_mld(self, query: str, threshold: float = 0.5) -> Dict:
         """Handle mixed layer depth calculation"""
@@ -674,6 +689,24 @@ class ARGOMCPServer:
             return {"success": False, "error": result.get('error')}
         
         df = result['results']
+        
+        # Many profiles: MLD per profile (in parallel), reported as the median
+        if count_profiles(df) > 1:
+            try:
+                batch = self.analytics.calculate_mixed_layer_depth_batch(df, threshold)
+            except AnalyticsError as e:
+                return {"success": False, "error": f"Mixed layer depth calculation stopped: {e}"}
+            if not batch['success']:
+                return batch
+            return {
+                "success": True,
+                "mixed_layer_depth": batch['mixed_layer_depth_dbar'],
+                "statistics": batch['statistics'],
+                "profile_count": batch['profiles_analyzed'],
+                "threshold": threshold,
+                "unit": "dbar"
+            }
+        
         mld = self.analytics.calculate_mixed_layer_depth(df, threshold)
         
         return {
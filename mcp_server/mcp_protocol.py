@@ -6,7 +6,7 @@ Follows MCP specification for tool-based AI interactions
 from typing import Dict, List, Any, Optional
 from dataclasses import dataclass, asdict
 from enum import Enum
-import json
+from data_processing.result_serializer import dumps
 
 
 class MCPMessageType(Enum):
@@ -107,7 +107,7 @@ class MCPProtocol:
             return MCPToolResult(
                 content=[{
                     "type": "text",
-                    "text": json.dumps(result, indent=2) if isinstance(result, dict) else str(result)
+                    "text": dumps(result) if isinstance(result, dict) else str(result)
                 }],
                 isError=False
             )
@@ -14,6 +14,7 @@ from rag_engine.response_generator import ResponseGenerator
 import pandas as pd
 import time
 import json
+from data_processing.result_serializer import loads
 
 
 class MCPQueryProcessor:
@@ -237,7 +238,8 @@ class MCPQueryProcessor:
             if tool_name == 'query_argo_data':
                 result = self.mcp_server.call_tool('query_argo_data', {
                     'query': query,
-                    'limit': 5000  # Increased from 1000 to 5000 records
+                    'limit': 5000,  # Increased from 1000 to 5000 records
+                    'data_format': 'columns'    # read back with pd.DataFrame(data)
                 })
             
             elif tool_name == 'get_database_schema':
@@ -264,12 +266,11 @@ class MCPQueryProcessor:
             
             elif tool_name == 'analyze_temporal_trends':
                 # Extract region and parameter
-                region = self._extract_region(query)
-                parameter = self._extract_parameter(query)
+                # Every region named in the query, analyzed together
+                regions = self._extract_regions(query) or [self._extract_region(query)]
                 result = self.mcp_server.call_tool('analyze_temporal_trends', {
-                    'region': region,
-                    'parameter': parameter,
-                    'days': 90
+                    'regions': regions,
+                    'parameters': [self._extract_parameter(query)]
                 })
             
             elif tool_name == 'calculate_mixed_layer_depth':
@@ -323,7 +324,7 @@ class MCPQueryProcessor:
             if content and not tool_result.get('isError'):
                 try:
                     text = content[0].get('text', '')
-                    data_dict = json.loads(text)
+                    data_dict = loads(text)
                     
                     if data_dict.get('success') and data_dict.get('data'):
                         main_data = pd.DataFrame(data_dict['data'])
@@ -41,13 +41,7 @@ Parameter: {parameter}
 """,
             'temporal_trend': """
 **Temporal Trend Analysis:**
-Region: {region}
-Parameter: {parameter}
-Period: {weeks_analyzed} weeks
-
-Trend: {trend} (slope: {slope:.4f})
-Statistical Significance: {'Yes' if significant else 'No'}
-R²: {r_squared:.3f}
+{trend_lines}
 """,
             'bgc_analysis': """
 **Bio-Geo-Chemical Parameters:**
@@ -104,9 +98,9 @@ Depth Range: {depth_min:.1f} to {depth_max:.1f} dbar
         # Add temporal trend data
         if 'analyze_temporal_trends' in tool_results:
             trend_data = self._extract_tool_data(tool_results['analyze_temporal_trends'])
-            if trend_data:
+            if trend_data and trend_data.get('success') is not False:
                 enhanced += "\n\n" + self.enhancement_templates['temporal_trend'].format(
-                    **trend_data
+                    trend_lines=self._format_trends(trend_data)
                 )
         
         # Add profile analysis
@@ -149,6 +143,24 @@ Depth Range: {depth_min:.1f} to {depth_max:.1f} dbar
         except:
             return None
     
+    def _format_trends(self, trend_data: Dict) -> str:
+        """One line per region/parameter trend"""
+        trends = trend_data.get('trends') or [trend_data]
+        lines = []
+        for trend in trends:
+            if trend.get('slope_per_decade') is None:
+                continue
+            ci_low, ci_high = trend.get('ci_per_decade') or (None, None)
+            ci = f", 95% CI {ci_low:+.3f} to {ci_high:+.3f}" if ci_low is not None and ci_high is not None else ""
+            period = trend.get('period') or ('?', '?')
+            lines.append(
+                f"- {trend['region']} {trend['parameter']}: {trend['trend']} "
+                f"({trend['slope_per_decade']:+.3f} per decade{ci}; "
+                f"{'significant' if trend.get('significant') else 'not significant'}, "
+                f"{trend['months_analyzed']} months {period[0]} to {period[1]})"
+            )
+        return "\n".join(lines) if lines else "No trend could be estimated."
+
     def _format_water_masses(self, water_masses_data: Dict) -> str:
         """Format water mass list"""
         # Handle both list format and dict format
@@ -0,0 +1,211 @@
+"""
+Async RAG pipeline for the FastAPI service.
+
+Runs the same steps as QueryProcessor without blocking the event loop:
+- FAISS search and embedding generation are offloaded to worker threads
+- SQL generation awaits the AsyncGroq client
+- SQL execution uses the SQLAlchemy async engine (asyncpg)
+"""
+
+import asyncio
+import time
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+from sqlalchemy import text
+
+from rag_engine.query_processor import QueryProcessor
+from database.streaming_executor import ResultFrameBuilder, StreamedResult, estimate_rows
+from rag_engine.query_cost_guard import GuardDecision, ROUTE
+
+
+class AsyncQueryProcessor:
+    """
+    Async counterpart of QueryProcessor.
+    Shares the vector store, embedding model and SQL generator of a sync
+    processor so models are loaded only once per worker.
+    """
+
+    def __init__(self, query_processor: Optional[QueryProcessor] = None):
+        self.processor = query_processor or QueryProcessor()
+        self.engine = self.processor.db_setup.get_async_engine()
+
+    async def process_query(
+        self,
+        user_query: str,
+        top_k: int = 3,
+        max_rows: Optional[int] = None,
+        max_bytes: Optional[int] = None
+    ) -> Dict:
+        """
+        Complete RAG pipeline (async).
+
+        Args:
+            user_query: Natural language question from user
+            top_k: Number of similar profiles to retrieve
+            max_rows: Stop reading results after this many rows
+            max_bytes: In-memory byte budget for the result DataFrame
+
+        Returns:
+            Same dictionary shape as QueryProcessor.process_query
+        """
+        start_time = time.time()
+
+        # Step 1: Vector search (CPU-bound, run in thread pool)
+        query_embedding = await asyncio.to_thread(
+            self.processor.embedding_generator.generate_embedding, user_query
+        )
+        similar_profiles = await asyncio.to_thread(
+            self.processor.vector_store.search, query_embedding, top_k
+        )
+        context = self.processor._format_context(similar_profiles)
+
+        # Step 2: Generate SQL
+        sql_query = await self.processor.sql_generator.agenerate_sql(user_query, context)
+
+        if not sql_query or not self.processor.sql_generator.validate_sql(sql_query):
+            return {
+                'success': False,
+                'error': 'Could not generate valid SQL query',
+                'query': user_query
+            }
+
+        # Step 3: Planner cost check (EXPLAIN) before execution
+        decision = await self.check_cost(sql_query)
+        if not decision.allowed:
+            self.processor._log_query_async(user_query, decision, 0, time.time() - start_time, False)
+            return {
+                'success': False,
+                'error': decision.reason,
+                'query': user_query,
+                'sql': sql_query,
+                'guard_action': decision.action
+            }
+        sql_query = decision.sql
+
+        # Step 4: Execute SQL
+        streamed, error = await self.execute_sql_streaming(sql_query, max_rows, max_bytes)
+
+        if error:
+            self.processor._log_query_async(user_query, decision, 0, time.time() - start_time, False)
+            return {
+                'success': False,
+                'error': error,
+                'query': user_query,
+                'sql': sql_query
+            }
+
+        results_df = streamed.data
+        execution_time = time.time() - start_time
+        print(f"✅ Async query completed in {execution_time:.2f}s ({len(results_df)} records)")
+        self.processor._log_query_async(user_query, decision, len(results_df), execution_time, True)
+
+        return {
+            'success': True,
+            'query': user_query,
+            'sql': sql_query,
+            'results': results_df,
+            'result_count': len(results_df),
+            'total_matching_records': streamed.total_matching_records,
+            'total_is_estimate': streamed.total_is_estimate,
+            'truncated': streamed.truncated,
+            'guard_action': decision.action,
+            'sampled': decision.sampled,
+            'routed_to_cube': decision.action == ROUTE,
+            'cube_caveat': decision.caveat,
+            'similar_profiles': similar_profiles,
+            'execution_time': execution_time
+        }
+
+    async def check_cost(self, sql_query: str) -> GuardDecision:
+        """
+        Run the EXPLAIN-based cost guard on the async engine
+        (the sync processor's guard, with its stats cube router)
+        """
+        try:
+            async with self.engine.connect() as conn:
+                return await conn.run_sync(self.processor.cost_guard.evaluate, sql_query)
+        except Exception as e:
+            print(f"⚠️ Cost guard unavailable: {e}")
+            return GuardDecision('allow', sql_query, reason='guard error')
+
+    async def execute_sql(self, sql_query: str) -> Tuple[pd.DataFrame, Optional[str]]:
+        """
+        Execute SQL query on the async engine and return results as DataFrame.
+
+        Returns:
+            Tuple of (DataFrame, error_message)
+        """
+        streamed, error = await self.execute_sql_streaming(sql_query)
+        return streamed.data, error
+
+    async def execute_sql_streaming(
+        self,
+        sql_query: str,
+        max_rows: Optional[int] = None,
+        max_bytes: Optional[int] = None
+    ) -> Tuple[StreamedResult, Optional[str]]:
+        """
+        Stream results through a server-side cursor under row/byte budgets
+        (async counterpart of StreamingQueryExecutor.execute).
+
+        Returns:
+            Tuple of (StreamedResult, error_message)
+        """
+        executor = self.processor.executor
+
+        try:
+            async with self.engine.connect() as conn:
+                result = await conn.stream(
+                    text(sql_query),
+                    execution_options={'yield_per': executor.chunk_rows}
+                )
+                builder = ResultFrameBuilder(
+                    list(result.keys()), max_rows, max_bytes or executor.max_bytes
+                )
+
+                try:
+                    async for rows in result.partitions():
+                        if not builder.add(rows):
+                            break
+                finally:
+                    await result.close()
+
+                estimate = None
+                if builder.needs_estimate(sql_query):
+                    estimate = await conn.run_sync(estimate_rows, sql_query)
+
+            return builder.to_result(estimate), None
+
+        except Exception as e:
+            error_msg = f"SQL execution error: {str(e)}"
+            print(f"❌ {error_msg}")
+            return StreamedResult(data=pd.DataFrame()), error_msg
+
+    async def fetch_all(self, sql_query: str, params: Optional[Dict] = None) -> List:
+        """Run a parameterized query and return all rows"""
+        async with self.engine.connect() as conn:
+            result = await conn.execute(text(sql_query), params or {})
+            return result.fetchall()
+
+    async def fetch_one(self, sql_query: str, params: Optional[Dict] = None):
+        """Run a parameterized query and return the first row (or None)"""
+        async with self.engine.connect() as conn:
+            result = await conn.execute(text(sql_query), params or {})
+            return result.fetchone()
+
+    async def process_batch(self, queries: List[str], max_concurrency: int = 8) -> List[Dict]:
+        """
+        Process several queries concurrently.
+        A semaphore bounds concurrent LLM/database calls per worker.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def _run(query: str) -> Dict:
+            async with semaphore:
+                try:
+                    return await self.process_query(query)
+                except Exception as e:
+                    return {'success': False, 'error': str(e), 'query': query}
+
+        return await asyncio.gather(*[_run(q) for q in queries])
@@ -0,0 +1,233 @@
+"""
+Route expensive aggregates to the stats cube
+Router for QueryCostGuard: rewrites simple region/month/depth AVG, COUNT,
+MIN and MAX queries on argo_profiles into the equivalent roll-up over
+stats_cube, which answers from a few thousand pre-aggregated rows.
+
+Only a narrow, fully understood SQL shape is routed; anything else
+(joins, subqueries, OR, DISTINCT, expressions, other filters) returns
+None and the guard falls back to its other actions. Cube values follow
+the cube's rules: temperature/salinity with QC flags 1-3 only, NaN
+excluded, rows as of the last cube refresh. Those differences are spelled
+out by StatsCubeRouter.caveat() and returned with the routed result.
+"""
+
+import re
+from typing import Dict, List, Optional, Tuple
+
+from database.stats_cube import CUBE_PARAMETERS, DEPTH_BIN_EDGES
+
+_QUERY = re.compile(
+    r"^\s*SELECT\s+(?P<select>.+?)\s+FROM\s+(?:public\.)?argo_profiles"
+    r"(?:\s+WHERE\s+(?P<where>.+?))?"
+    r"(?:\s+GROUP\s+BY\s+(?P<group>.+?))?"
+    r"(?:\s+ORDER\s+BY\s+(?P<order>.+?))?"
+    r"(?:\s+LIMIT\s+(?P<limit>\d+))?\s*;?\s*$",
+    re.IGNORECASE | re.DOTALL
+)
+_UNSUPPORTED = re.compile(r"\b(JOIN|UNION|HAVING|WITH|DISTINCT|OR|OVER|TABLESAMPLE)\b", re.IGNORECASE)
+_ITEM = re.compile(r"^(?P<expr>.+?)(?:\s+AS\s+(?P<alias>[a-z_]\w*))?$", re.IGNORECASE | re.DOTALL)
+_AGGREGATE = re.compile(r"^(?P<func>AVG|COUNT|MIN|MAX)\(\s*(?P<arg>\*|[a-z_]\w*)\s*\)$", re.IGNORECASE)
+_ORDER_ITEM = re.compile(r"^(?P<expr>.+?)(?:\s+(?P<direction>ASC|DESC))?$", re.IGNORECASE | re.DOTALL)
+
+# Parameters whose cube values are QC-filtered
+QC_FILTERED = [name for name, expr in CUBE_PARAMETERS.items() if '_qc' in expr]
+
+# Grouping expression (lowercase, no spaces) -> cube column, default output name
+_KEYS = {
+    'ocean_region': ('region', 'ocean_region'),
+    "date_trunc('month',timestamp)": ('month', 'date_trunc'),
+}
+
+# Filters that map exactly onto cube cells
+_REGION_EQ = re.compile(r"^ocean_region\s*=\s*('[^']*')$", re.IGNORECASE)
+_REGION_IN = re.compile(r"^ocean_region\s+IN\s*\(\s*('[^']*'(?:\s*,\s*'[^']*')*)\s*\)$", re.IGNORECASE)
+_MONTH_BOUND = re.compile(r"^timestamp\s*(>=|<)\s*'(\d{4}-\d{2}-01)(?:[ T]00:00(?::00)?)?'$", re.IGNORECASE)
+_DEPTH_BOUND = re.compile(r"^pressure\s*(>=|<)\s*(\d+)(?:\.0+)?$", re.IGNORECASE)
+
+
+class StatsCubeRouter:
+    """QueryCostGuard router: argo_profiles roll-ups -> stats_cube"""
+
+    def __init__(self, stats_cube):
+        self.stats_cube = stats_cube
+
+    def __call__(self, sql: str, plan: Dict) -> Optional[str]:
+        routed = route_to_cube(sql)
+        if routed is None or not self.stats_cube.is_ready():
+            return None
+        return routed
+
+    def caveat(self, sql: str) -> Optional[str]:
+        """How the routed answer to sql differs from running it on argo_profiles"""
+        routed = _route(sql)
+        if routed is None:
+            return None
+        return cube_caveat(routed[1], self.stats_cube.watermark(),
+                           counts_rows=bool(re.search(r"COUNT\(\s*\*\s*\)", sql, re.IGNORECASE)))
+
+
+def cube_caveat(parameters, watermark: Optional[int], counts_rows: bool = False) -> str:
+    """User-facing note for a result answered from the stats cube"""
+    notes = [f"Answered from the pre-aggregated stats cube (rows up to id {watermark or 0:,}; "
+             f"rows loaded since its last refresh are not included)."]
+    filtered = [p for p in QC_FILTERED if p in parameters]
+    if filtered:
+        verb = 'uses' if len(filtered) == 1 else 'use'
+        notes.append(f"{' and '.join(filtered).capitalize()} {verb} QC flags 1-3 only.")
+    notes.append("NaN values are excluded.")
+    if counts_rows:
+        notes.append("COUNT(*) counts rows with a pressure value.")
+    return " ".join(notes)
+
+
+def route_to_cube(sql: str) -> Optional[str]:
+    """Equivalent stats_cube query, or None when the SQL shape is not supported"""
+    routed = _route(sql)
+    return routed[0] if routed else None
+
+
+def _route(sql: str) -> Optional[Tuple[str, set]]:
+    """(stats_cube query, parameters it reads) or None"""
+    match = _QUERY.match(sql)
+    if match is None or _UNSUPPORTED.search(sql) or len(re.findall(r"\bSELECT\b", sql, re.IGNORECASE)) != 1:
+        return None
+
+    # SELECT list: grouping keys and aggregates only
+    select, parameters = [], set()
+    for item in _split(match['select']):
+        parsed = _parse_item(item)
+        if parsed is None:
+            return None
+        select.append(parsed)
+        if parsed[0] == 'agg':
+            parameters.add(parsed[3])
+    if not parameters:
+        return None
+
+    keys = [entry for entry in select if entry[0] == 'key']
+    aliases = {entry[2].lower(): entry for entry in select}
+
+    # GROUP BY must list exactly the selected keys
+    grouped = set()
+    if match['group']:
+        for term in _split(match['group']):
+            entry = _resolve(term, select, aliases)
+            if entry is None or entry[0] != 'key':
+                return None
+            grouped.add(entry[1])
+    if grouped != {entry[1] for entry in keys}:
+        return None
+
+    conditions = [f"parameter IN ({', '.join(repr(p) for p in sorted(parameters))})"]
+    if match['where']:
+        for condition in re.split(r"\s+AND\s+", match['where'].strip(), flags=re.IGNORECASE):
+            translated = _translate_condition(condition.strip())
+            if translated is None:
+                return None
+            conditions.append(translated)
+
+    routed = (
+        f"SELECT {', '.join(f'{expr} AS {alias}' for _, expr, alias, *_ in select)}\n"
+        f"FROM stats_cube\n"
+        f"WHERE {' AND '.join(conditions)}"
+    )
+    if keys:
+        routed += f"\nGROUP BY {', '.join(entry[1] for entry in keys)}"
+
+    if match['order']:
+        order = []
+        for term in _split(match['order']):
+            parts = _ORDER_ITEM.match(term.strip())
+            entry = _resolve(parts['expr'], select, aliases)
+            if entry is None:
+                return None
+            order.append(f"{entry[2]} {parts['direction'] or 'ASC'}".rstrip())
+        routed += f"\nORDER BY {', '.join(order)}"
+
+    if match['limit']:
+        routed += f"\nLIMIT {match['limit']}"
+    return routed, parameters
+
+
+def _parse_item(item: str) -> Optional[Tuple]:
+    """('key', cube expr, alias) or ('agg', cube expr, alias, parameter)"""
+    parts = _ITEM.match(item.strip())
+    expr, alias = parts['expr'].strip(), parts['alias']
+
+    key = _KEYS.get(re.sub(r"\s+", "", expr).lower())
+    if key is not None:
+        return ('key', key[0], alias or key[1])
+
+    aggregate = _AGGREGATE.match(expr)
+    if aggregate is None:
+        return None
+    func, arg = aggregate['func'].upper(), aggregate['arg'].lower()
+    if arg == '*':
+        if func != 'COUNT':
+            return None
+        arg = 'pressure'    # on every row: its count is the record count
+    if arg not in CUBE_PARAMETERS:
+        return None
+    return ('agg', _cube_aggregate(func, arg), alias or func.lower(), arg)
+
+
+def _cube_aggregate(func: str, parameter: str) -> str:
+    """Roll-up of cube cells for one parameter"""
+    only = f"FILTER (WHERE parameter = '{parameter}')"
+    if func == 'AVG':
+        return f"SUM(value_sum) {only} / NULLIF(SUM(n) {only}, 0)"
+    if func == 'COUNT':
+        return f"COALESCE(SUM(n) {only}, 0)"
+    return f"{func}(value_{func.lower()}) {only}"
+
+
+def _resolve(term: str, select: List[Tuple], aliases: Dict[str, Tuple]) -> Optional[Tuple]:
+    """SELECT entry referenced by position, alias or expression"""
+    term = term.strip()
+    if term.isdigit():
+        position = int(term)
+        return select[position - 1] if 1 <= position <= len(select) else None
+    if term.lower() in aliases:
+        return aliases[term.lower()]
+    parsed = _parse_item(term)
+    if parsed is None:
+        return None
+    for entry in select:
+        if entry[:2] == parsed[:2]:
+            return entry
+    return None
+
+
+def _translate_condition(condition: str) -> Optional[str]:
+    """WHERE term on argo_profiles -> exact term on cube cells"""
+    match = _REGION_EQ.match(condition)
+    if match:
+        return f"region = {match[1]}"
+    match = _REGION_IN.match(condition)
+    if match:
+        return f"region IN ({match[1]})"
+    match = _MONTH_BOUND.match(condition)
+    if match:
+        return f"month {match[1]} '{match[2]}'"
+    match = _DEPTH_BOUND.match(condition)
+    if match and int(match[2]) in DEPTH_BIN_EDGES:
+        return f"depth_bin {match[1]} {match[2]}"
+    return None
+
+
+def _split(text: str) -> List[str]:
+    """Split on commas outside parentheses and quotes"""
+    parts, depth, quoted, start = [], 0, False, 0
+    for i, char in enumerate(text):
+        if char == "'":
+            quoted = not quoted
+        elif not quoted and char == '(':
+            depth += 1
+        elif not quoted and char == ')':
+            depth -= 1
+        elif not quoted and depth == 0 and char == ',':
+            parts.append(text[start:i])
+            start = i + 1
+    parts.append(text[start:])
+    return [part.strip() for part in parts]
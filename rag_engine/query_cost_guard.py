@@ -0,0 +1,195 @@
+"""
+Pre-execution query cost guard
+Runs EXPLAIN (FORMAT JSON) on generated SQL and decides, from the planner's
+estimated rows and cost, whether to allow, rewrite, route or reject it.
+"""
+
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from database.streaming_executor import explain_plan, get_sql_limit
+
+logger = logging.getLogger(__name__)
+
+# Guard actions (stored in query_logs.guard_action)
+ALLOW = 'allow'
+REWRITE = 'rewrite'
+ROUTE = 'route'
+REJECT = 'reject'
+
+_AGGREGATE_PATTERN = re.compile(r'\b(GROUP\s+BY|COUNT\s*\(|AVG\s*\(|SUM\s*\(|MIN\s*\(|MAX\s*\(|STDDEV)', re.IGNORECASE)
+_MAIN_TABLE = re.compile(
+    r'\bFROM\s+(?:public\.)?argo_profiles\b'
+    r'(\s+(?:AS\s+)?(?!WHERE\b|ORDER\b|GROUP\b|LIMIT\b|JOIN\b|INNER\b|LEFT\b|RIGHT\b|CROSS\b|'
+    r'TABLESAMPLE\b|HAVING\b|UNION\b|ON\b|OFFSET\b)[a-z_]\w*)?',
+    re.IGNORECASE
+)
+_LIMIT_CLAUSE = re.compile(r'\bLIMIT\s+\d+', re.IGNORECASE)
+
+
+@dataclass
+class GuardDecision:
+    """Outcome of a cost check"""
+    action: str
+    sql: str
+    estimated_rows: Optional[int] = None
+    estimated_cost: Optional[float] = None
+    reason: str = ""
+    steps: List[str] = field(default_factory=list)
+    sampled: bool = False   # TABLESAMPLE added: rows are a sample of the matches
+    caveat: Optional[str] = None    # ROUTE: how the routed answer differs from the original SQL
+
+    @property
+    def allowed(self) -> bool:
+        return self.action != REJECT
+
+
+class QueryCostGuard:
+    """
+    Planner-based guard for LLM-generated SQL.
+
+    Thresholds are in PostgreSQL planner cost units (Total Cost of the
+    top plan node) and estimated rows (Plan Rows):
+    - within max_cost/max_rows: allow unchanged
+    - aggregate queries: try registered routers (pre-aggregated tables)
+    - row queries: tighten LIMIT, then add TABLESAMPLE on argo_profiles
+    - still above reject_cost: reject
+    """
+
+    def __init__(
+        self,
+        engine,
+        max_cost: float = 150_000,
+        max_rows: int = 100_000,
+        reject_cost: float = 2_000_000,
+        rewrite_limit: int = 1000,
+        sample_percent: float = 10.0
+    ):
+        self.engine = engine
+        self.max_cost = max_cost
+        self.max_rows = max_rows
+        self.reject_cost = reject_cost
+        self.rewrite_limit = rewrite_limit
+        self.sample_percent = sample_percent
+
+        # Routers: callable(sql, plan) -> Optional[str] (SQL against a pre-aggregated table)
+        self.routers: List[Callable[[str, Dict], Optional[str]]] = []
+
+    def register_router(self, router: Callable[[str, Dict], Optional[str]]):
+        """Register a router that can answer expensive aggregates from a summary table"""
+        self.routers.append(router)
+
+    def check(self, sql: str) -> GuardDecision:
+        """Run the cost check on a new connection"""
+        with self.engine.connect() as conn:
+            return self.evaluate(conn, sql)
+
+    def evaluate(self, conn, sql: str) -> GuardDecision:
+        """
+        Run the cost check on an existing connection.
+        Signature matches AsyncConnection.run_sync(fn, *args).
+        """
+        plan = self._explain(conn, sql)
+        if plan is None:
+            # Planner unavailable: do not block the query
+            return GuardDecision(ALLOW, sql, reason='explain unavailable')
+
+        rows, cost = self._plan_estimates(plan)
+        if self._within_budget(rows, cost):
+            return GuardDecision(ALLOW, sql, rows, cost)
+
+        steps = [f"estimated {rows:,} rows, cost {cost:,.0f}"]
+
+        # Aggregates: answer from a pre-aggregated table when possible
+        if _AGGREGATE_PATTERN.search(sql):
+            for router in self.routers:
+                try:
+                    routed_sql = router(sql, plan)
+                except Exception as e:
+                    logger.warning(f"⚠️ Query router failed: {e}")
+                    routed_sql = None
+                if routed_sql:
+                    caveat = router.caveat(sql) if hasattr(router, 'caveat') else None
+                    routed_plan = self._explain(conn, routed_sql)
+                    routed_rows, routed_cost = self._plan_estimates(routed_plan) if routed_plan else (None, None)
+                    steps.append("routed to pre-aggregated table")
+                    return GuardDecision(ROUTE, routed_sql, routed_rows, routed_cost,
+                                         reason='aggregate routed', steps=steps, caveat=caveat)
+
+            if cost <= self.reject_cost:
+                # Aggregates return few rows; a full scan within the hard limit is acceptable
+                return GuardDecision(ALLOW, sql, rows, cost, reason='aggregate within hard limit', steps=steps)
+
+            return GuardDecision(REJECT, sql, rows, cost, steps=steps,
+                                 reason=f"Query too expensive (estimated cost {cost:,.0f}). "
+                                        f"Add a region, depth or date filter.")
+
+        # Row queries: tighter LIMIT first
+        rewritten = self._tighten_limit(sql)
+        if rewritten != sql.strip().rstrip(';'):
+            steps.append(f"LIMIT tightened to {self.rewrite_limit}")
+            plan = self._explain(conn, rewritten) or plan
+            rows, cost = self._plan_estimates(plan)
+            if self._within_budget(rows, cost):
+                return GuardDecision(REWRITE, rewritten, rows, cost, reason='limit tightened', steps=steps)
+
+        # Then sample the main table (block sampling keeps the scan proportional)
+        is_sampled = False
+        sampled = self._add_sampling(rewritten)
+        if sampled != rewritten:
+            sampled_plan = self._explain(conn, sampled)
+            if sampled_plan is not None:
+                steps.append(f"TABLESAMPLE SYSTEM ({self.sample_percent:g})")
+                rewritten, is_sampled = sampled, True
+                rows, cost = self._plan_estimates(sampled_plan)
+
+        if cost <= self.reject_cost:
+            if rewritten == sql.strip().rstrip(';'):
+                # Nothing to rewrite; over budget but within the hard limit
+                return GuardDecision(ALLOW, sql, rows, cost, reason='no rewrite applicable', steps=steps)
+            return GuardDecision(REWRITE, rewritten, rows, cost, reason='rewritten to reduce cost',
+                                 steps=steps, sampled=is_sampled)
+
+        return GuardDecision(REJECT, sql, rows, cost, steps=steps,
+                             reason=f"Query too expensive (estimated cost {cost:,.0f}). "
+                                    f"Add a region, depth or date filter.")
+
+    def _explain(self, conn, sql: str) -> Optional[Dict]:
+        """EXPLAIN without executing; None if the planner rejects the SQL"""
+        try:
+            return explain_plan(conn, sql)
+        except Exception as e:
+            logger.warning(f"⚠️ EXPLAIN failed: {e}")
+            return None
+
+    def _plan_estimates(self, plan: Dict):
+        """(estimated rows, total cost) of the top plan node"""
+        return int(plan.get('Plan Rows', 0)), float(plan.get('Total Cost', 0.0))
+
+    def _within_budget(self, rows: int, cost: float) -> bool:
+        return cost <= self.max_cost and rows <= self.max_rows
+
+    def _tighten_limit(self, sql: str) -> str:
+        """Lower (or add) the final LIMIT"""
+        sql = sql.strip().rstrip(';')
+        current = get_sql_limit(sql)
+        if current is None:
+            return f"{sql}\nLIMIT {self.rewrite_limit}"
+        if current > self.rewrite_limit:
+            matches = list(_LIMIT_CLAUSE.finditer(sql))
+            last = matches[-1]
+            return f"{sql[:last.start()]}LIMIT {self.rewrite_limit}{sql[last.end():]}"
+        return sql
+
+    def _add_sampling(self, sql: str) -> str:
+        """Add TABLESAMPLE SYSTEM to a single FROM argo_profiles clause"""
+        matches = list(_MAIN_TABLE.finditer(sql))
+        if len(matches) != 1 or 'TABLESAMPLE' in sql.upper():
+            return sql
+        match = matches[0]
+        return (
+            f"{sql[:match.end()]} TABLESAMPLE SYSTEM ({self.sample_percent:g})"
+            f"{sql[match.end():]}"
+        )
@@ -7,7 +7,13 @@ from vector_store.vector_db import FAISSVectorStore
 from vector_store.embeddings import EmbeddingGenerator
 # from rag_engine.sql_generator import SQLGenerator
 from rag_engine.sql_generator import EnhancedSQLGenerator
+from database.streaming_executor import StreamingQueryExecutor, StreamedResult
+from rag_engine.query_cost_guard import QueryCostGuard, GuardDecision, ROUTE
+from rag_engine.cube_router import StatsCubeRouter
+from database.stats_cube import StatsCube
+from database.spatial_index import detect_spatial_backend
 import pandas as pd
+import threading
 import time
 
 class QueryProcessor:
@@ -16,15 +22,27 @@ class QueryProcessor:
     Orchestrates: Vector search → SQL generation → Database query → Response
     """
     
-    def __init__(self):
+    def __init__(self, max_result_bytes: Optional[int] = None):
         self.db_setup = DatabaseSetup()
         self.vector_store = FAISSVectorStore()
         self.vector_store.load()
         self.embedding_generator = EmbeddingGenerator()
         # self.sql_generator = SQLGenerator()
         self.sql_generator = EnhancedSQLGenerator()
+        self.executor = StreamingQueryExecutor(self.db_setup.engine)
+        if max_result_bytes:
+            self.executor.max_bytes = max_result_bytes
+        self.cost_guard = QueryCostGuard(self.db_setup.engine)
+        self.cost_guard.register_router(StatsCubeRouter(StatsCube(self.db_setup.engine)))
+        self.sql_generator.spatial_backend = detect_spatial_backend(self.db_setup.engine)
     
-    def process_query(self, user_query: str, top_k: int = 3) -> Dict:
+    def process_query(
+        self,
+        user_query: str,
+        top_k: int = 3,
+        max_rows: Optional[int] = None,
+        max_bytes: Optional[int] = None
+    ) -> Dict:
         """
         Complete RAG pipeline for processing user queries.
         
@@ -38,6 +56,8 @@ class QueryProcessor:
         Args:
             user_query: Natural language question from user
             top_k: Number of similar profiles to retrieve
+            max_rows: Stop reading results after this many rows
+            max_bytes: In-memory byte budget for the result DataFrame
             
         Returns:
             Dictionary with query results, metadata, and SQL
@@ -68,11 +88,25 @@ class QueryProcessor:
                 'query': user_query
             }
         
-        # Step 3: Execute SQL
-        print("\n💾 Step 3: Executing database query...")
-        results_df, error = self._execute_sql(sql_query)
+        # Step 3: Planner cost check (EXPLAIN) before execution
+        decision = self._check_cost(sql_query)
+        if not decision.allowed:
+            self._log_query_async(user_query, decision, 0, time.time() - start_time, False)
+            return {
+                'success': False,
+                'error': decision.reason,
+                'query': user_query,
+                'sql': sql_query,
+                'guard_action': decision.action
+            }
+        sql_query = decision.sql
+        
+        # Step 4: Execute SQL
+        print("\n💾 Step 4: Executing database query...")
+        streamed, error = self._execute_sql_streaming(sql_query, max_rows, max_bytes)
         
         if error:
+            self._log_query_async(user_query, decision, 0, time.time() - start_time, False)
             return {
                 'success': False,
                 'error': error,
@@ -80,10 +114,12 @@ class QueryProcessor:
                 'sql': sql_query
             }
         
-        # Step 4: Prepare response
+        # Step 5: Prepare response
+        results_df = streamed.data
         execution_time = time.time() - start_time
         print(f"\n✅ Query completed in {execution_time:.2f} seconds")
         print(f"📈 Retrieved {len(results_df)} records")
+        self._log_query_async(user_query, decision, len(results_df), execution_time, True)
         
         return {
             'success': True,
@@ -91,6 +127,13 @@ class QueryProcessor:
             'sql': sql_query,
             'results': results_df,
             'result_count': len(results_df),
+            'total_matching_records': streamed.total_matching_records,
+            'total_is_estimate': streamed.total_is_estimate,
+            'truncated': streamed.truncated,
+            'guard_action': decision.action,
+            'sampled': decision.sampled,
+            'routed_to_cube': decision.action == ROUTE,
+            'cube_caveat': decision.caveat,
             'similar_profiles': similar_profiles,
             'execution_time': execution_time
         }
@@ -111,31 +154,76 @@ class QueryProcessor:
         Returns:
             Tuple of (DataFrame, error_message)
         """
-        session = self.db_setup.get_session()
+        streamed, error = self._execute_sql_streaming(sql_query)
+        return streamed.data, error
+    
+    def _execute_sql_streaming(
+        self,
+        sql_query: str,
+        max_rows: Optional[int] = None,
+        max_bytes: Optional[int] = None
+    ) -> Tuple[StreamedResult, Optional[str]]:
+        """
+        Execute SQL with a server-side cursor under row/byte budgets.
         
+        Returns:
+            Tuple of (StreamedResult, error_message)
+        """
         try:
-            # Execute query
-            result = session.execute(text(sql_query))
-            
-            # Convert to DataFrame
-            rows = result.fetchall()
-            if len(rows) == 0:
-                return pd.DataFrame(), None
-            
-            # Get column names
-            columns = result.keys()
-            df = pd.DataFrame(rows, columns=columns)
-            
-            return df, None
+            return self.executor.execute(sql_query, max_rows=max_rows, max_bytes=max_bytes), None
             
         except Exception as e:
             error_msg = f"SQL execution error: {str(e)}"
             print(f"❌ {error_msg}")
-            return pd.DataFrame(), error_msg
-            
+            return StreamedResult(data=pd.DataFrame()), error_msg
+    
+    def _check_cost(self, sql_query: str) -> GuardDecision:
+        """Run the EXPLAIN-based cost guard (never blocks on guard failure)"""
+        try:
+            decision = self.cost_guard.check(sql_query)
+        except Exception as e:
+            print(f"⚠️ Cost guard unavailable: {e}")
+            return GuardDecision('allow', sql_query, reason='guard error')
+        
+        if decision.action != 'allow':
+            print(f"🛡️ Cost guard: {decision.action} ({'; '.join(decision.steps)})")
+        return decision
+    
+    def log_query(self, user_query: str, sql_query: str, result_count: int,
+                  execution_time: float, success: bool,
+                  decision: Optional[GuardDecision] = None):
+        """Log query to database for analytics"""
+        from database.models import QueryLog
+        
+        session = self.db_setup.get_session()
+        
+        try:
+            log = QueryLog(
+                user_query=user_query,
+                generated_sql=sql_query,
+                result_count=result_count,
+                execution_time=execution_time,
+                success=1 if success else 0,
+                guard_action=decision.action if decision else None,
+                estimated_rows=decision.estimated_rows if decision else None,
+                estimated_cost=decision.estimated_cost if decision else None
+            )
+            session.add(log)
+            session.commit()
+        except Exception as e:
+            print(f"Failed to log query: {e}")
         finally:
             session.close()
     
+    def _log_query_async(self, user_query: str, decision: GuardDecision, result_count: int,
+                         execution_time: float, success: bool):
+        """Write the query log in a background thread (keeps it off the response path)"""
+        threading.Thread(
+            target=self.log_query,
+            args=(user_query, decision.sql, result_count, execution_time, success, decision),
+            daemon=True
+        ).start()
+    
     def get_statistics(self, df: pd.DataFrame) -> Dict:
         """Calculate summary statistics from query results"""
         if df.empty:
@@ -200,28 +288,6 @@ def get_query_suggestions(self, user_query: str) -> List[str]:
     
     return suggestions[:3]
 
-def log_query(self, user_query: str, sql_query: str, result_count: int, 
-              execution_time: float, success: bool):
-    """Log query to database for analytics"""
-    from database.models import QueryLog
-    
-    session = self.db_setup.get_session()
-    
-    try:
-        log = QueryLog(
-            user_query=user_query,
-            generated_sql=sql_query,
-            result_count=result_count,
-            execution_time=execution_time,
-            success=1 if success else 0
-        )
-        session.add(log)
-        session.commit()
-    except Exception as e:
-        print(f"Failed to log query: {e}")
-    finally:
-        session.close()    
-
 # Usage example
 if __name__ == "__main__":
     processor = QueryProcessor()
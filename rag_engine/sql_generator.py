@@ -10,9 +10,11 @@ Handles complex oceanographic queries with spatial, temporal, and parameter filt
 import os
 import re
 from typing import Dict, Optional, List, Tuple
-from groq import Groq
+from groq import Groq, AsyncGroq
 from langchain_core.prompts import PromptTemplate
 from dotenv import load_dotenv
+from database.spatial_index import spatial_filter_sql, BACKEND_BBOX
+from data_processing.region_classifier import REGION_GROUPS, find_region, region_sql_filter
 import logging
 
 load_dotenv()
@@ -68,17 +70,22 @@ class EnhancedSQLGenerator:
     ├─ idx_timestamp (timestamp) - Temporal queries
     ├─ idx_float_id (float_id) - Float-specific queries
     ├─ idx_spatial_temporal (latitude, longitude, timestamp) - Combined
+    ├─ idx_ocean_region (ocean_region, timestamp) - Named-region queries
     
-    OCEAN REGIONS (Auto-classified):
+    OCEAN REGIONS (ocean_region VARCHAR, classified at ingest):
     Region Name                 | Lat Range    | Lon Range
     ─────────────────────────────────────────────────────────
+    Red Sea                    | 12°N to 30°N | 32°E to 44°E
     Arabian Sea                | 5°N to 30°N  | 40°E to 80°E
     Bay of Bengal              | 5°N to 25°N  | 80°E to 100°E
     Equatorial Indian Ocean    | 10°S to 5°N  | 40°E to 100°E
     Southern Indian Ocean      | 50°S to 10°S | 20°E to 120°E
-    Red Sea                    | 12°N to 30°N | 32°E to 44°E
-    Andaman Sea                | 5°N to 20°N  | 92°E to 100°E
-    """
+    Southern Ocean             | south of 50°S (the region label; see below for queries)
+    Equatorial / North / South Pacific Ocean, Equatorial / North / South Atlantic Ocean
+    Anything else              | 'Other Regions'
+    Red Sea is its own region: 'Arabian Sea' no longer includes 32°E-44°E north of
+    12°N; use ocean_region IN ('Arabian Sea', 'Red Sea') for the old 40°E-80°E box.
+        """
     
     # Enhanced query patterns with oceanographic context
     QUERY_PATTERNS = {
@@ -119,10 +126,15 @@ class EnhancedSQLGenerator:
     def __init__(self):
         """Initialize SQL generator with Groq"""
         self.client = Groq(api_key=os.getenv('GROQ_API_KEY'))
+        self.async_client = AsyncGroq(api_key=os.getenv('GROQ_API_KEY'))
         self.model = "llama-3.3-70b-versatile"
         
         self.prompt_template = self._create_enhanced_prompt()
         
+        # Spatial backend for radius queries (bbox, earthdistance or postgis);
+        # QueryProcessor sets this from detect_spatial_backend() at startup
+        self.spatial_backend = BACKEND_BBOX
+        
         # Query cache for optimization
         self.query_cache = {}
         
@@ -173,9 +185,12 @@ CRITICAL SQL GENERATION RULES:
    - ALWAYS filter by QC unless explicitly asked not to
 
 3. SPATIAL QUERIES:
-   - Use: latitude BETWEEN x AND y AND longitude BETWEEN x AND y
-   - Arabian Sea: lat 5-30, lon 40-80
-   - Bay of Bengal: lat 5-25, lon 80-100
+   - Named regions: filter on the indexed column, e.g. WHERE ocean_region = 'Arabian Sea'
+   - Region filter for this query: {region_filter}
+   - "Indian Ocean" (whole basin): ocean_region IN ('Red Sea', 'Arabian Sea', 'Bay of Bengal', 'Equatorial Indian Ocean', 'Southern Indian Ocean')
+   - "Southern Ocean" (south of 30°S): (ocean_region IN ('Southern Ocean', 'Southern Indian Ocean', 'South Pacific Ocean', 'South Atlantic Ocean') AND latitude <= -30)
+   - Per-region grouping: GROUP BY ocean_region (never rebuild regions with CASE on lat/lon)
+   - Explicit coordinates: latitude BETWEEN x AND y AND longitude BETWEEN x AND y
    - Use ST_Distance for radius queries (future enhancement)
 
 4. TEMPORAL QUERIES:
@@ -236,8 +251,7 @@ EXAMPLE QUERIES:
 -- Recent Arabian Sea data with good QC
 SELECT latitude, longitude, timestamp, pressure, temperature, salinity
 FROM argo_profiles
-WHERE latitude BETWEEN 5 AND 30
-  AND longitude BETWEEN 40 AND 80
+WHERE ocean_region = 'Arabian Sea'
   AND timestamp >= CURRENT_DATE - INTERVAL '30 days'
   AND temp_qc IN (1,2,3)
   AND sal_qc IN (1,2,3)
@@ -246,11 +260,7 @@ LIMIT 1000;
 
 -- Temperature statistics by region and month
 SELECT 
-    CASE 
-        WHEN latitude BETWEEN 5 AND 30 AND longitude BETWEEN 40 AND 80 THEN 'Arabian Sea'
-        WHEN latitude BETWEEN 5 AND 25 AND longitude BETWEEN 80 AND 100 THEN 'Bay of Bengal'
-        ELSE 'Other'
-    END as region,
+    ocean_region as region,
     DATE_TRUNC('month', timestamp) as month,
     COUNT(*) as measurements,
     ROUND(AVG(temperature)::numeric, 2) as avg_temp,
@@ -260,7 +270,7 @@ SELECT
 FROM argo_profiles
 WHERE temp_qc IN (1,2,3)
   AND timestamp >= CURRENT_DATE - INTERVAL '6 months'
-GROUP BY region, month
+GROUP BY ocean_region, month
 ORDER BY month DESC, region
 LIMIT 1000;
 
@@ -299,7 +309,7 @@ RESPOND WITH ONLY THE SQL QUERY (ONE STATEMENT, NO EXPLANATIONS):"""
         return PromptTemplate(
             input_variables=[
                 "schema", "user_query", "context", "query_type",
-                "region", "parameters", "time_period"
+                "region", "region_filter", "parameters", "time_period"
             ],
             template=template
         )
@@ -311,6 +321,14 @@ RESPOND WITH ONLY THE SQL QUERY (ONE STATEMENT, NO EXPLANATIONS):"""
     ) -> Optional[str]:
         """
         Generate SQL with enhanced analysis and caching
+        
+        Args:
+            user_query: Natural language question
+            context: Retrieved context from vector store
+            force_regenerate: Skip cache and regenerate
+            
+        Returns:
+            PostgreSQL query string or None if generation fails
         """
         self.stats['total_queries'] += 1
         
@@ -325,111 +343,130 @@ RESPOND WITH ONLY THE SQL QUERY (ONE STATEMENT, NO EXPLANATIONS):"""
             # Analyze query intent
             analysis = self._analyze_query(user_query)
             
-            # ADD THIS: Check for spatial/nearest queries
-            if analysis['type'] == 'nearest' or any(kw in user_query.lower() for kw in ['nearest', 'closest', 'within']):
-                lat, lon = self._extract_coordinates_from_query(user_query)
-                if lat is not None and lon is not None:
-                    radius_km = self._extract_radius_from_query(user_query)
-                    sql_query = self._generate_spatial_query(lat, lon, radius_km)
-                    
-                    if self.validate_sql(sql_query):
-                        self.query_cache[cache_key] = sql_query
-                        logger.info(f"✅ Generated spatial SQL: {sql_query[:80]}...")
-                        return sql_query
-            
-            # ... rest of the method remains EXACTLY THE SAME
-            # Format prompt with analysis
-            formatted_prompt = self.prompt_template.format(
-                schema=self.COMPLETE_SCHEMA,
-                user_query=user_query,
-                context=context or "No similar profiles found",
-                query_type=analysis['type'],
-                region=analysis['region'],
-                parameters=', '.join(analysis['parameters']),
-                time_period=analysis['time_period']
-            )
-            
-            # ... rest remains same
-    
-    # def generate_sql(
-    #     self,
-    #     user_query: str,
-    #     context: str = "",
-    #     force_regenerate: bool = False
-    # ) -> Optional[str]:
-    #     """
-    #     Generate SQL with enhanced analysis and caching
-        
-    #     Args:
-    #         user_query: Natural language question
-    #         context: Retrieved context from vector store
-    #         force_regenerate: Skip cache and regenerate
+            # Spatial/nearest queries are generated without the LLM
+            spatial_sql = self._try_spatial_query(user_query, analysis, cache_key)
+            if spatial_sql:
+                return spatial_sql
             
-    #     Returns:
-    #         PostgreSQL query string or None if generation fails
-    #     """
-    #     self.stats['total_queries'] += 1
-        
-    #     # Check cache
-    #     cache_key = f"{user_query}:{context}"
-    #     if not force_regenerate and cache_key in self.query_cache:
-    #         self.stats['cache_hits'] += 1
-    #         logger.info("✅ Cache hit for query")
-    #         return self.query_cache[cache_key]
-        
-    #     try:
-    #         # Analyze query intent
-    #         analysis = self._analyze_query(user_query)
-            
-    #         # Format prompt with analysis
-    #         formatted_prompt = self.prompt_template.format(
-    #             schema=self.COMPLETE_SCHEMA,
-    #             user_query=user_query,
-    #             context=context or "No similar profiles found",
-    #             query_type=analysis['type'],
-    #             region=analysis['region'],
-    #             parameters=', '.join(analysis['parameters']),
-    #             time_period=analysis['time_period']
-    #         )
+            formatted_prompt = self._format_prompt(user_query, context, analysis)
             
             # Generate SQL
             logger.info(f"🔧 Generating SQL for: {user_query[:50]}...")
-            
             completion = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "user",
-                        "content": formatted_prompt
-                    }
-                ],
-                temperature=0.0,
-                max_completion_tokens=1024,
-                top_p=1,
-                stream=False,
-                stop=None
+                **self._completion_params(formatted_prompt)
+            )
+            return self._finalize_sql(
+                completion.choices[0].message.content, analysis, cache_key
             )
-            sql = self._clean_sql(completion.choices[0].message.content)
             
-            # Validate and optimize
-            if not self.validate_sql(sql):
-                logger.error("❌ Generated SQL failed validation")
-                self.stats['failed_queries'] += 1
-                return None
+        except Exception as e:
+            logger.error(f"❌ SQL generation error: {e}")
+            self.stats['failed_queries'] += 1
+            return None
+    
+    async def agenerate_sql(
+        self,
+        user_query: str,
+        context: str = "",
+        force_regenerate: bool = False
+    ) -> Optional[str]:
+        """
+        Async variant of generate_sql using the AsyncGroq client.
+        Same analysis, caching and validation; only the LLM call is awaited.
+        """
+        self.stats['total_queries'] += 1
+        
+        cache_key = f"{user_query}:{context}"
+        if not force_regenerate and cache_key in self.query_cache:
+            self.stats['cache_hits'] += 1
+            logger.info("✅ Cache hit for query")
+            return self.query_cache[cache_key]
+        
+        try:
+            analysis = self._analyze_query(user_query)
             
-            sql = self._optimize_query(sql, analysis)
+            spatial_sql = self._try_spatial_query(user_query, analysis, cache_key)
+            if spatial_sql:
+                return spatial_sql
             
-            # Cache result
-            self.query_cache[cache_key] = sql
+            formatted_prompt = self._format_prompt(user_query, context, analysis)
             
-            logger.info(f"✅ Generated SQL: {sql[:80]}...")
-            return sql
+            logger.info(f"🔧 Generating SQL (async) for: {user_query[:50]}...")
+            completion = await self.async_client.chat.completions.create(
+                **self._completion_params(formatted_prompt)
+            )
+            return self._finalize_sql(
+                completion.choices[0].message.content, analysis, cache_key
+            )
             
         except Exception as e:
             logger.error(f"❌ SQL generation error: {e}")
             self.stats['failed_queries'] += 1
             return None
     
+    def _try_spatial_query(self, user_query: str, analysis: Dict, cache_key: str) -> Optional[str]:
+        """Build SQL directly for nearest/within queries that carry coordinates"""
+        if analysis['type'] == 'nearest' or any(kw in user_query.lower() for kw in ['nearest', 'closest', 'within']):
+            lat, lon = self._extract_coordinates_from_query(user_query)
+            if lat is not None and lon is not None:
+                radius_km = self._extract_radius_from_query(user_query)
+                sql_query = self._generate_spatial_query(lat, lon, radius_km)
+                
+                if self.validate_sql(sql_query):
+                    self.query_cache[cache_key] = sql_query
+                    logger.info(f"✅ Generated spatial SQL: {sql_query[:80]}...")
+                    return sql_query
+        
+        return None
+    
+    def _format_prompt(self, user_query: str, context: str, analysis: Dict) -> str:
+        """Format prompt with query analysis"""
+        return self.prompt_template.format(
+            schema=self.COMPLETE_SCHEMA,
+            user_query=user_query,
+            context=context or "No similar profiles found",
+            query_type=analysis['type'],
+            region=analysis['region'],
+            region_filter=analysis.get('region_filter', 'None (no named region)'),
+            parameters=', '.join(analysis['parameters']),
+            time_period=analysis['time_period']
+        )
+    
+    def _completion_params(self, formatted_prompt: str) -> Dict:
+        """Chat completion parameters shared by sync and async clients"""
+        return dict(
+            model=self.model,
+            messages=[
+                {
+                    "role": "user",
+                    "content": formatted_prompt
+                }
+            ],
+            temperature=0.0,
+            max_completion_tokens=1024,
+            top_p=1,
+            stream=False,
+            stop=None
+        )
+    
+    def _finalize_sql(self, raw_sql: str, analysis: Dict, cache_key: str) -> Optional[str]:
+        """Clean, validate, optimize and cache LLM output"""
+        sql = self._clean_sql(raw_sql)
+        
+        # Validate and optimize
+        if not self.validate_sql(sql):
+            logger.error("❌ Generated SQL failed validation")
+            self.stats['failed_queries'] += 1
+            return None
+        
+        sql = self._optimize_query(sql, analysis)
+        
+        # Cache result
+        self.query_cache[cache_key] = sql
+        
+        logger.info(f"✅ Generated SQL: {sql[:80]}...")
+        return sql
+    
     def _analyze_query(self, query: str) -> Dict:
         """
         Analyze query intent and extract key information
@@ -457,23 +494,16 @@ RESPOND WITH ONLY THE SQL QUERY (ONE STATEMENT, NO EXPLANATIONS):"""
                 analysis['type'] = qtype
                 break
         
-        # Detect region
-        regions = {
-            'arabian sea': ('Arabian Sea', (5, 30), (40, 80)),
-            'bay of bengal': ('Bay of Bengal', (5, 25), (80, 100)),
-            'bengal': ('Bay of Bengal', (5, 25), (80, 100)),
-            'arabian': ('Arabian Sea', (5, 30), (40, 80)),
-            'equatorial': ('Equatorial Indian Ocean', (-10, 5), (40, 100)),
-            'southern ocean': ('Southern Indian Ocean', (-50, -10), (20, 120)),
-            'indian ocean': ('Indian Ocean', (-50, 30), (20, 120)),
-        }
-        
-        for keyword, (name, lat_range, lon_range) in regions.items():
-            if keyword in query_lower:
-                analysis['region'] = name
-                analysis['lat_range'] = lat_range
-                analysis['lon_range'] = lon_range
-                break
+        # Detect region (same names as the stored ocean_region column)
+        region = find_region(query_lower)
+        basin = next((name for name in REGION_GROUPS if name in query_lower), None)
+        if region:
+            analysis['region'] = region.name
+            analysis['lat_range'] = region.lat_range
+            analysis['lon_range'] = region.lon_range
+        elif basin:
+            analysis['region'] = basin.title()
+        analysis['region_filter'] = region_sql_filter(query_lower) or 'None (no named region)'
         
         # Detect parameters
         param_keywords = {
@@ -715,37 +745,39 @@ RESPOND WITH ONLY THE SQL QUERY (ONE STATEMENT, NO EXPLANATIONS):"""
         radius_km: float = 50.0
     ) -> str:
         """
-        Generate spatial query using Haversine formula
-        (Works without PostGIS extension)
+        Generate radius/nearest query.
+        
+        Default path: lat/lon bounding box derived from the radius (uses
+        idx_lat_lon), then exact Haversine refinement computed once per
+        candidate row. Uses PostGIS/earthdistance GiST indexes when
+        detected (see database/spatial_index.py).
         """
+        distance_expr, spatial_predicate = spatial_filter_sql(
+            lat, lon, radius_km, self.spatial_backend
+        )
         
-        # Haversine formula for distance calculation
         sql = f"""
 SELECT 
     float_id,
+    cycle_number,
     latitude,
     longitude,
     timestamp,
     temperature,
     salinity,
     pressure,
-    ROUND(
-        (6371 * acos(
-            cos(radians({lat})) * cos(radians(latitude)) * 
-            cos(radians(longitude) - radians({lon})) + 
-            sin(radians({lat})) * sin(radians(latitude))
-        ))::numeric, 2
-    ) AS distance_km
-FROM argo_profiles
-WHERE temp_qc IN (1, 2, 3)
-  AND sal_qc IN (1, 2, 3)
-  AND (
-    6371 * acos(
-        cos(radians({lat})) * cos(radians(latitude)) * 
-        cos(radians(longitude) - radians({lon})) + 
-        sin(radians({lat})) * sin(radians(latitude))
-    )
-  ) <= {radius_km}
+    ROUND(distance_km::numeric, 2) AS distance_km
+FROM (
+    SELECT 
+        float_id, cycle_number, latitude, longitude, timestamp,
+        temperature, salinity, pressure,
+        {distance_expr} AS distance_km
+    FROM argo_profiles
+    WHERE {spatial_predicate}
+      AND temp_qc IN (1, 2, 3)
+      AND sal_qc IN (1, 2, 3)
+) AS candidates
+WHERE distance_km <= {radius_km}
 ORDER BY distance_km ASC
 LIMIT 1000;
 """
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Benchmark result serialization (legacy per-value conversion vs columnar)
+Usage: python scripts/benchmark_serialization.py [rows ...]
+"""
+
+import sys
+import json
+import time
+from decimal import Decimal
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+import pandas as pd
+
+from data_processing.result_serializer import (
+    dataframe_to_columns, dataframe_to_records, dumps, ORJSON_AVAILABLE
+)
+
+
+def make_frame(n_rows: int) -> pd.DataFrame:
+    """Synthetic query result with Decimal, Timestamp and NaN values"""
+    rng = np.random.default_rng(42)
+    temperature = rng.normal(20, 5, n_rows)
+    temperature[rng.random(n_rows) < 0.05] = np.nan
+    oxygen = np.full(n_rows, np.nan)
+
+    return pd.DataFrame({
+        'float_id': [f"b'29{i % 500:05d} '" for i in range(n_rows)],
+        'cycle_number': rng.integers(1, 300, n_rows),
+        'latitude': rng.uniform(-40, 25, n_rows),
+        'longitude': rng.uniform(40, 100, n_rows),
+        'timestamp': pd.date_range('2023-01-01', periods=n_rows, freq='min'),
+        'pressure': rng.uniform(0, 2000, n_rows),
+        'temperature': temperature,
+        'salinity': rng.normal(35, 0.5, n_rows),
+        'dissolved_oxygen': oxygen,
+        'avg_temp': [Decimal(f"{t:.3f}") for t in rng.normal(20, 5, n_rows)],
+    })
+
+
+def legacy_serialize(df: pd.DataFrame) -> str:
+    """Previous approach: to_dict('records') + recursive per-value conversion"""
+    def convert(obj):
+        if isinstance(obj, list):
+            return [convert(item) for item in obj]
+        elif isinstance(obj, dict):
+            return {key: convert(value) for key, value in obj.items()}
+        elif isinstance(obj, Decimal):
+            return float(obj)
+        elif isinstance(obj, (pd.Timestamp, pd.DatetimeIndex)):
+            return obj.isoformat()
+        elif isinstance(obj, np.integer):
+            return int(obj)
+        elif isinstance(obj, np.floating):
+            return float(obj)
+        elif isinstance(obj, np.ndarray):
+            return obj.tolist()
+        elif pd.isna(obj):
+            return None
+        return obj
+
+    return json.dumps({'data': convert(df.to_dict('records'))}, indent=2)
+
+
+def time_it(func, *args, repeat: int = 3) -> float:
+    """Best-of-N wall time in milliseconds"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [5000, 50000]
+
+    print("=" * 70)
+    print(f"📊 Result serialization benchmark (orjson: {'yes' if ORJSON_AVAILABLE else 'no'})")
+    print("=" * 70)
+
+    for n_rows in sizes:
+        df = make_frame(n_rows)
+
+        legacy_ms = time_it(legacy_serialize, df)
+        records_ms = time_it(lambda d: dumps({'data': dataframe_to_records(d)}), df)
+        columns_ms = time_it(lambda d: dumps({'data': dataframe_to_columns(d)}), df)
+
+        legacy_size = len(legacy_serialize(df))
+        columns_size = len(dumps({'data': dataframe_to_columns(df)}))
+
+        print(f"\n{n_rows:,} rows:")
+        print(f"   legacy records + json   : {legacy_ms:9.1f} ms  ({legacy_size / 1024:,.0f} KB)")
+        print(f"   columnar -> records     : {records_ms:9.1f} ms  ({legacy_ms / records_ms:5.1f}x)")
+        print(f"   columnar (column JSON)  : {columns_ms:9.1f} ms  ({legacy_ms / columns_ms:5.1f}x, {columns_size / 1024:,.0f} KB)")
+
+
+if __name__ == "__main__":
+    main()
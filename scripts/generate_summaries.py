@@ -16,6 +16,7 @@ sys.path.append(str(Path(__file__).parent.parent))
 
 from database.db_setup import DatabaseSetup
 from database.models import ArgoProfile, ProfileSummary
+from data_processing.region_classifier import classify_point
 from vector_store.embeddings import EmbeddingGenerator
 from vector_store.vector_db import FAISSVectorStore
 from sqlalchemy import text
@@ -88,37 +89,7 @@ class ProfileSummarizer:
     
     def _determine_region(self, lat: float, lon: float) -> str:
         """Determine ocean region based on coordinates"""
-        # Indian Ocean regions
-        if 40 <= lon <= 100:
-            if 5 <= lat <= 30:
-                if 40 <= lon <= 80:
-                    return "Arabian Sea"
-                elif 80 <= lon <= 100:
-                    return "Bay of Bengal"
-            elif -10 <= lat <= 5:
-                return "Equatorial Indian Ocean"
-            elif -50 <= lat <= -10:
-                return "Southern Indian Ocean"
-        
-        # Pacific Ocean
-        if 100 <= lon <= 180 or -180 <= lon <= -70:
-            if -10 <= lat <= 10:
-                return "Equatorial Pacific Ocean"
-            elif 10 <= lat <= 50:
-                return "North Pacific Ocean"
-            elif -50 <= lat <= -10:
-                return "South Pacific Ocean"
-        
-        # Atlantic Ocean
-        if -70 <= lon <= 20:
-            if -10 <= lat <= 10:
-                return "Equatorial Atlantic Ocean"
-            elif 10 <= lat <= 50:
-                return "North Atlantic Ocean"
-            elif -50 <= lat <= -10:
-                return "South Atlantic Ocean"
-        
-        return "Ocean"
+        return classify_point(lat, lon)
     
     def generate_all_summaries(self):
         """Generate summaries for all unique profiles in database"""
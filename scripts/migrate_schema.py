@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Apply incremental schema changes to an existing Neon database
+Safe to run multiple times (IF NOT EXISTS everywhere)
+"""
+
+import sys
+import argparse
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from database.db_setup import DatabaseSetup
+from database.spatial_index import create_spatial_index
+from advanced_analytics.derived_variables import derived_engine
+from database.stats_cube import StatsCube
+from database.statistics_service import StatisticsService
+from data_processing.region_classifier import backfill_regions
+from sqlalchemy import text
+
+# Column additions on existing tables
+MIGRATIONS = [
+    # Query cost guard decisions
+    "ALTER TABLE public.query_logs ADD COLUMN IF NOT EXISTS guard_action VARCHAR(20)",
+    "ALTER TABLE public.query_logs ADD COLUMN IF NOT EXISTS estimated_rows BIGINT",
+    "ALTER TABLE public.query_logs ADD COLUMN IF NOT EXISTS estimated_cost DOUBLE PRECISION",
+    # Derived seawater variables (filled at ingest / --derived backfill)
+    "ALTER TABLE public.argo_profiles ADD COLUMN IF NOT EXISTS absolute_salinity DOUBLE PRECISION",
+    "ALTER TABLE public.argo_profiles ADD COLUMN IF NOT EXISTS conservative_temperature DOUBLE PRECISION",
+    "ALTER TABLE public.argo_profiles ADD COLUMN IF NOT EXISTS sigma0 DOUBLE PRECISION",
+    "ALTER TABLE public.argo_profiles ADD COLUMN IF NOT EXISTS n_squared DOUBLE PRECISION",
+    # Precomputed ocean region (filled at ingest / --regions backfill)
+    "ALTER TABLE public.argo_profiles ADD COLUMN IF NOT EXISTS ocean_region VARCHAR(50)",
+    "CREATE INDEX IF NOT EXISTS idx_ocean_region ON public.argo_profiles (ocean_region, timestamp)",
+]
+
+
+def migrate(spatial_backend: str = None, derived: bool = False, cube: bool = False,
+            regions: bool = False):
+    """Run all migrations"""
+    print("=" * 70)
+    print("🔧 Migrating database schema")
+    print("=" * 70)
+
+    db_setup = DatabaseSetup()
+
+    # New tables first (existing tables are left untouched)
+    db_setup.create_tables()
+
+    with db_setup.engine.begin() as conn:
+        for statement in MIGRATIONS:
+            print(f"   ▶ {statement}")
+            conn.execute(text(statement))
+
+    # Optional GiST index for radius queries (needs extension privileges)
+    if spatial_backend:
+        create_spatial_index(db_setup.engine, spatial_backend)
+
+    # Backfill ocean_region (before the cube, which groups by it)
+    if regions:
+        backfill_regions(db_setup.engine)
+
+    # Backfill derived variables for rows loaded before ingest computed them
+    if derived:
+        derived_engine.materialize(db_setup.engine)
+
+    # Build the region/month/depth/parameter statistics cube and the
+    # dashboard summary tables from scratch
+    if cube:
+        stats_cube = StatsCube(db_setup.engine)
+        stats_cube.refresh(full=True)
+        StatisticsService(db_setup.engine, stats_cube).refresh(full=True)
+
+    print("\n✅ Schema migration complete!")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migrate FloatChat schema")
+    parser.add_argument(
+        "--spatial", choices=["earthdistance", "postgis"],
+        help="Also enable a spatial extension and build its GiST index"
+    )
+    parser.add_argument(
+        "--derived", action="store_true",
+        help="Backfill absolute salinity, conservative temperature, sigma0 and N²"
+    )
+    parser.add_argument(
+        "--cube", action="store_true",
+        help="Rebuild the pre-aggregated statistics cube and dashboard summary tables"
+    )
+    parser.add_argument(
+        "--regions", action="store_true",
+        help="Backfill ocean_region for rows loaded without it"
+    )
+    args = parser.parse_args()
+    migrate(args.spatial, args.derived, args.cube, args.regions)
@@ -9,7 +9,10 @@ st.set_page_config(
 )
 
 import sys
+import time
+from functools import cached_property
 from pathlib import Path
+from typing import Callable
 import pandas as pd
 from datetime import datetime, timedelta
 import plotly.graph_objects as go
@@ -28,6 +31,8 @@ from streamlit_app.components.map_view import MapView
 from streamlit_app.components.profile_viewer import ProfileViewer
 from streamlit_app.components.sidebar import Sidebar
 from streamlit_app.utils.session_state import SessionStateManager
+from streamlit_app.utils.figure_cache import figure_cache
+from streamlit_app.utils.result_profile import result_profiler
 from rag_engine.query_processor import QueryProcessor
 from database.db_setup import DatabaseSetup
 from database.models import ArgoProfile, QueryLog
@@ -487,6 +492,32 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
+# Top-level views: label, renderer, run as a fragment. Widgets inside a
+# fragment rerun only that view; views whose components add sidebar
+# widgets (map view, profile viewer) cannot be fragments, so those wrap
+# their sidebar-free sub-views instead.
+APP_VIEWS = [
+    ("💬 Intelligent Chat", '_render_chat_tab', False),
+    ("📊 Data Dashboard", '_render_dashboard_tab', True),
+    ("🗺️ Maps & Locations", '_render_combined_maps_tab', False),
+    ("📊 Analysis & Visualizations", '_render_combined_analysis_tab', False),
+    ("📥 Export & Reports", '_render_export_tab', True),
+]
+
+STATUS_TTL = 60     # seconds between record counts for the status badge
+
+
+def run_fragment(render: Callable, *args):
+    """
+    Run render as a Streamlit fragment (falls back to a plain call on
+    versions without fragments)
+    """
+    fragment = getattr(st, 'fragment', None) or getattr(st, 'experimental_fragment', None)
+    if fragment is None:
+        return render(*args)
+    return fragment(render)(*args)
+
+
 class ProductionFloatChatApp:
     """
     Production-grade FloatChat Application with:
@@ -542,14 +573,10 @@ class ProductionFloatChatApp:
             st.stop()
         
         # Initialize components - MCP ENABLED
+        # (view components are created on first use, see properties below)
         try:
             self.mcp_processor = mcp_query_processor  # MCP Query Processor
             self.sidebar = Sidebar()
-            self.mcp_chat_interface = MCPChatInterface()  # MCP Chat Interface
-            self.data_dashboard = DataDashboard()  # Data Dashboard
-            self.map_view = MapView()
-            self.profile_viewer = ProfileViewer()
-            self.advanced_viz = AdvancedVizPanel()  # Advanced Visualizations
         except Exception as e:
             st.error(f"🔴 Component initialization error: {e}")
             st.stop()
@@ -559,6 +586,34 @@ class ProductionFloatChatApp:
         
         print("✅ FloatChat initialized with MCP support")
     
+    @cached_property
+    def mcp_chat_interface(self):
+        return self._create_component(MCPChatInterface)  # MCP Chat Interface
+    
+    @cached_property
+    def data_dashboard(self):
+        return self._create_component(DataDashboard)
+    
+    @cached_property
+    def map_view(self):
+        return self._create_component(MapView)
+    
+    @cached_property
+    def profile_viewer(self):
+        return self._create_component(ProfileViewer)
+    
+    @cached_property
+    def advanced_viz(self):
+        return self._create_component(AdvancedVizPanel)  # Advanced Visualizations
+    
+    def _create_component(self, factory: Callable):
+        """Instantiate a view component, stopping the run on failure"""
+        try:
+            return factory()
+        except Exception as e:
+            st.error(f"🔴 Component initialization error: {e}")
+            st.stop()
+    
     def _render_advanced_viz_tab(self):
         """Advanced visualization tab - QUERY AWARE"""
         st.subheader("🔬 Advanced Oceanographic Visualizations")
@@ -617,30 +672,23 @@ class ProductionFloatChatApp:
         self.sidebar.render()
         
         
-        tab1, tab2, tab3, tab4, tab5 = st.tabs([
-            "💬 Intelligent Chat",
-            "📊 Data Dashboard",
-            "🗺️ Maps & Locations",
-            "📊 Analysis & Visualizations",
-            "📥 Export & Reports"
-        ])
-        
-        with tab1:
-            self._render_chat_tab()
-        
-        with tab2:
-            self._render_dashboard_tab()
-        
-        with tab3:
-            # Combined Maps tab with toggle
-            self._render_combined_maps_tab()
-        
-        with tab4:
-            # Combined Analysis tab with multiple options
-            self._render_combined_analysis_tab()
+        # View selector: unlike st.tabs, which runs every tab body on each
+        # rerun, only the selected view is computed
+        labels = [label for label, _, _ in APP_VIEWS]
+        active = st.radio(
+            "View",
+            labels,
+            horizontal=True,
+            key="active_view",
+            label_visibility="collapsed"
+        )
+        _, renderer, as_fragment = APP_VIEWS[labels.index(active)]
         
-        with tab5:
-            self._render_export_tab()
+        with st.spinner(f"Loading {active}..."):
+            if as_fragment:
+                run_fragment(getattr(self, renderer))
+            else:
+                getattr(self, renderer)()
 
 
 
@@ -652,9 +700,14 @@ class ProductionFloatChatApp:
     def _render_status_indicator(self):
         """Show system status"""
         try:
-            session = self.db_setup.get_session()
-            count = session.query(ArgoProfile).count()
-            session.close()
+            # Full-table count, refreshed at most every STATUS_TTL seconds
+            cached = st.session_state.get('status_count')
+            if cached is None or time.monotonic() - cached[1] > STATUS_TTL:
+                session = self.db_setup.get_session()
+                cached = (session.query(ArgoProfile).count(), time.monotonic())
+                session.close()
+                st.session_state.status_count = cached
+            count = cached[0]
             
             status_html = f"""
             <div style="text-align: right; padding-top: 1rem;">
@@ -687,8 +740,9 @@ class ProductionFloatChatApp:
                 # Render query-specific dashboard
                 self._render_query_dashboard(df, query_text)
                 
-                # Option to see full database dashboard
-                with st.expander("📊 View Full Database Dashboard", expanded=False):
+                # Option to see full database dashboard (an expander would
+                # still run its body while collapsed)
+                if st.toggle("📊 View Full Database Dashboard", key="show_full_dashboard"):
                     try:
                         self.data_dashboard.render()
                     except Exception as e:
@@ -703,10 +757,50 @@ class ProductionFloatChatApp:
             st.error(f"Error rendering dashboard: {e}")
             st.info("Please check your database connection and try again.")
     
+    def _locations_figure(self, df: pd.DataFrame) -> go.Figure:
+        """Query result locations on a globe"""
+        import plotly.express as px
+        fig = px.scatter_geo(
+            df,
+            lat='latitude',
+            lon='longitude',
+            color='temperature' if 'temperature' in df.columns else None,
+            title=f"Data Locations ({len(df)} points)",
+            projection="natural earth"
+        )
+        fig.update_layout(height=400, margin=dict(l=0, r=0, t=40, b=0))
+        return fig
+    
+    def _temperature_figure(self, df: pd.DataFrame) -> go.Figure:
+        """Temperature against pressure for every query row"""
+        fig = go.Figure()
+        fig.add_trace(go.Scatter(
+            x=df['temperature'],
+            y=df['pressure'],
+            mode='markers',
+            marker=dict(
+                size=8,
+                color=df['temperature'],
+                colorscale='RdYlBu_r',
+                showscale=True,
+                colorbar=dict(title="Temp (°C)")
+            ),
+            name='Temperature'
+        ))
+        fig.update_layout(
+            height=400,
+            xaxis_title="Temperature (°C)",
+            yaxis_title="Pressure (dbar)",
+            yaxis=dict(autorange="reversed"),
+            title=f"Temperature vs Depth ({len(df)} points)"
+        )
+        return fig
+    
     def _render_query_dashboard(self, df: pd.DataFrame, query_text: str):
         """Render dashboard based on query results"""
         
         st.markdown("### 📊 Query Results Overview")
+        overall = result_profiler.profile(df).overall
         
         # Key metrics
         col1, col2, col3, col4 = st.columns(4)
@@ -716,27 +810,25 @@ class ProductionFloatChatApp:
         
         with col2:
             if 'float_id' in df.columns:
-                st.metric("🎈 Unique Floats", df['float_id'].nunique())
+                st.metric("🎈 Unique Floats", overall['unique_floats'])
             else:
                 st.metric("📋 Columns", len(df.columns))
         
         with col3:
-            if 'temperature' in df.columns:
-                temp_range = f"{df['temperature'].min():.2f}°C - {df['temperature'].max():.2f}°C"
+            if overall['min_temp'] is not None:
+                temp_range = f"{overall['min_temp']:.2f}°C - {overall['max_temp']:.2f}°C"
                 st.metric("🌡️ Temperature", temp_range)
-            elif 'pressure' in df.columns:
-                st.metric("📏 Max Depth", f"{df['pressure'].max():.1f} dbar")
+            elif overall['max_depth'] is not None:
+                st.metric("📏 Max Depth", f"{overall['max_depth']:.1f} dbar")
             else:
                 st.metric("📊 Data Shape", f"{df.shape[0]} × {df.shape[1]}")
         
         with col4:
-            if 'timestamp' in df.columns:
-                try:
-                    df['timestamp'] = pd.to_datetime(df['timestamp'])
-                    date_range = f"{df['timestamp'].min().strftime('%Y-%m-%d')} to {df['timestamp'].max().strftime('%Y-%m-%d')}"
-                    st.metric("📅 Date Range", date_range[:20])
-                except:
-                    st.metric("📅 Has Timestamp", "Yes")
+            if overall['earliest_date'] is not None:
+                date_range = f"{overall['earliest_date']:%Y-%m-%d} to {overall['latest_date']:%Y-%m-%d}"
+                st.metric("📅 Date Range", date_range[:20])
+            elif 'timestamp' in df.columns:
+                st.metric("📅 Has Timestamp", "Yes")
             else:
                 st.metric("📅 Timestamp", "N/A")
         
@@ -749,16 +841,7 @@ class ProductionFloatChatApp:
             # Geographic distribution if available
             if 'latitude' in df.columns and 'longitude' in df.columns:
                 st.markdown("#### 🗺️ Geographic Distribution")
-                import plotly.express as px
-                fig = px.scatter_geo(
-                    df,
-                    lat='latitude',
-                    lon='longitude',
-                    color='temperature' if 'temperature' in df.columns else None,
-                    title=f"Data Locations ({len(df)} points)",
-                    projection="natural earth"
-                )
-                fig.update_layout(height=400, margin=dict(l=0, r=0, t=40, b=0))
+                fig = figure_cache.figure('overview/locations', df, lambda: self._locations_figure(df))
                 st.plotly_chart(fig, use_container_width=True)
             else:
                 st.markdown("#### 📊 Data Distribution")
@@ -768,27 +851,7 @@ class ProductionFloatChatApp:
             # Temperature/Pressure profile if available
             if 'temperature' in df.columns and 'pressure' in df.columns:
                 st.markdown("#### 🌡️ Temperature Profile")
-                fig = go.Figure()
-                fig.add_trace(go.Scatter(
-                    x=df['temperature'],
-                    y=df['pressure'],
-                    mode='markers',
-                    marker=dict(
-                        size=8,
-                        color=df['temperature'],
-                        colorscale='RdYlBu_r',
-                        showscale=True,
-                        colorbar=dict(title="Temp (°C)")
-                    ),
-                    name='Temperature'
-                ))
-                fig.update_layout(
-                    height=400,
-                    xaxis_title="Temperature (°C)",
-                    yaxis_title="Pressure (dbar)",
-                    yaxis=dict(autorange="reversed"),
-                    title=f"Temperature vs Depth ({len(df)} points)"
-                )
+                fig = figure_cache.figure('overview/temperature', df, lambda: self._temperature_figure(df))
                 st.plotly_chart(fig, use_container_width=True)
             elif 'salinity' in df.columns:
                 st.markdown("#### 🧂 Salinity Distribution")
@@ -1007,6 +1070,11 @@ class ProductionFloatChatApp:
                 st.metric("🔧 Complexity", complexity.upper())
             with col4:
                 st.metric("✅ Status", "SUCCESS", delta="Good")
+            
+            if result.get('sampled'):
+                st.caption("⚠️ Query was too expensive to run in full; results are a random sample of the matching rows.")
+            if result.get('routed_to_cube'):
+                st.caption(f"⚠️ {result.get('cube_caveat') or 'Answered from the pre-aggregated stats cube.'}")
     
     def _render_map_tab(self):
         """Enhanced map visualization"""
@@ -1237,6 +1305,7 @@ class ProductionFloatChatApp:
             results = st.session_state.last_query_results
             if results['success'] and not results['results'].empty:
                 df = results['results']
+                profile = result_profiler.profile(df)
                 
                 # Show query context
                 query_text = results.get('query', '')
@@ -1252,22 +1321,22 @@ class ProductionFloatChatApp:
                 # Time series analysis
                 if has_temporal:
                     st.markdown("### 📅 Temporal Analysis")
-                    self._render_temporal_analysis(df)
+                    self._render_temporal_analysis(profile)
                     st.markdown("---")
                 
                 # Statistical analysis (always available)
                 st.markdown("### 📊 Statistical Summary")
-                self._render_statistical_analysis(df)
+                self._render_statistical_analysis(profile)
                 st.markdown("---")
                 
                 # Regional analysis
                 if has_regional:
                     st.markdown("### 🗺️ Regional Distribution")
-                    self._render_regional_analysis(df)
-                elif has_geographic:
+                    self._render_regional_analysis(profile)
+                elif has_geographic and profile.overall['min_lat'] is not None:
                     st.markdown("### 🗺️ Geographic Distribution")
-                    st.write(f"**Latitude Range:** {df['latitude'].min():.2f}° to {df['latitude'].max():.2f}°")
-                    st.write(f"**Longitude Range:** {df['longitude'].min():.2f}° to {df['longitude'].max():.2f}°")
+                    st.write(f"**Latitude Range:** {profile.overall['min_lat']:.2f}° to {profile.overall['max_lat']:.2f}°")
+                    st.write(f"**Longitude Range:** {profile.overall['min_lon']:.2f}° to {profile.overall['max_lon']:.2f}°")
                 
                 # Data quality indicators
                 st.markdown("---")
@@ -1275,13 +1344,11 @@ class ProductionFloatChatApp:
                 col1, col2, col3 = st.columns(3)
                 
                 with col1:
-                    completeness = (1 - df.isnull().sum().sum() / (len(df) * len(df.columns))) * 100
-                    st.metric("Data Completeness", f"{completeness:.1f}%")
+                    st.metric("Data Completeness", f"{profile.completeness:.1f}%")
                 
                 with col2:
-                    if 'qc_flag' in df.columns:
-                        good_quality = (df['qc_flag'] == 1).sum() / len(df) * 100
-                        st.metric("Good Quality Data", f"{good_quality:.1f}%")
+                    if profile.good_quality is not None:
+                        st.metric("Good Quality Data", f"{profile.good_quality:.1f}%")
                     else:
                         st.metric("QC Flags", "N/A")
                 
@@ -1293,18 +1360,18 @@ class ProductionFloatChatApp:
         else:
             self._render_empty_state("analytics")
     
-    def _render_temporal_analysis(self, df: pd.DataFrame):
+    def _render_temporal_analysis(self, profile):
         """Temporal trends analysis"""
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
-        df['year_month'] = df['timestamp'].dt.to_period('M').astype(str)
+        temporal = profile.panels['temporal']
+        if temporal.empty:
+            st.info("No valid timestamps in these results.")
+            return
         
         # Measurements over time
-        temporal = df.groupby('year_month').size().reset_index(name='count')
-        
         fig = go.Figure()
         fig.add_trace(go.Scatter(
-            x=temporal['year_month'],
-            y=temporal['count'],
+            x=temporal['month'].dt.strftime('%Y-%m'),
+            y=temporal['measurements'],
             mode='lines+markers',
             name='Measurements',
             line=dict(color='#3b82f6', width=3),
@@ -1321,19 +1388,12 @@ class ProductionFloatChatApp:
         
         st.plotly_chart(fig, use_container_width=True)
     
-    def _render_statistical_analysis(self, df: pd.DataFrame):
+    def _render_statistical_analysis(self, profile):
         """Statistical summary - enhanced with context"""
-        numeric_cols = df.select_dtypes(include=['float64', 'int64']).columns
+        stats_df = profile.columns
         
-        if len(numeric_cols) > 0:
+        if not stats_df.empty:
             # Show detailed statistics with higher precision
-            stats_df = df[numeric_cols].describe().T
-            
-            # Add additional statistics
-            stats_df['range'] = stats_df['max'] - stats_df['min']
-            stats_df['median'] = df[numeric_cols].median()
-            
-            # Format with appropriate precision
             st.markdown("#### 📊 Detailed Statistics")
             st.dataframe(
                 stats_df.style.format("{:.4f}"),  # Higher precision
@@ -1342,21 +1402,22 @@ class ProductionFloatChatApp:
             
             # Show column-wise insights
             st.markdown("#### 🔍 Key Insights")
+            numeric_cols = stats_df.index
             cols = st.columns(min(3, len(numeric_cols)))
             
             for idx, col in enumerate(numeric_cols[:3]):
                 with cols[idx]:
                     st.markdown(f"**{col.replace('_', ' ').title()}**")
-                    st.write(f"Min: {df[col].min():.4f}")
-                    st.write(f"Max: {df[col].max():.4f}")
-                    st.write(f"Mean: {df[col].mean():.4f}")
-                    st.write(f"Std: {df[col].std():.4f}")
+                    st.write(f"Min: {stats_df.at[col, 'min']:.4f}")
+                    st.write(f"Max: {stats_df.at[col, 'max']:.4f}")
+                    st.write(f"Mean: {stats_df.at[col, 'mean']:.4f}")
+                    st.write(f"Std: {stats_df.at[col, 'std']:.4f}")
         else:
             st.info("No numeric columns available for statistical analysis.")
     
-    def _render_regional_analysis(self, df: pd.DataFrame):
+    def _render_regional_analysis(self, profile):
         """Regional distribution analysis"""
-        region_counts = df['ocean_region'].value_counts()
+        region_counts = profile.region_counts
         
         fig = go.Figure(data=[
             go.Bar(
@@ -1485,7 +1546,7 @@ class ProductionFloatChatApp:
                 if "Plotly" in map_type:
                     self._render_map_tab()
                 else:
-                    self._render_leaflet_map_tab()
+                    run_fragment(self._render_leaflet_map_tab)
             else:
                 st.info("🔍 No data to display. Run a query in the Chat tab first.")
         else:
@@ -1532,9 +1593,9 @@ class ProductionFloatChatApp:
             if "Profile" in analysis_type:
                 self._render_profile_tab()
             elif "Advanced" in analysis_type:
-                self._render_advanced_viz_tab()
+                run_fragment(self._render_advanced_viz_tab)
             else:
-                self._render_analytics_tab()
+                run_fragment(self._render_analytics_tab)
         else:
             self._render_empty_state("analysis")
     
@@ -1848,6 +1909,10 @@ class ProductionFloatChatApp:
     
     def _generate_summary_report(self, df: pd.DataFrame) -> str:
         """Generate markdown summary report"""
+        profile = result_profiler.profile(df)
+        overall = profile.overall
+        stat = profile.column
+        
         report = f"""# ARGO Float Data Analysis Report
 Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
 
@@ -1856,21 +1921,21 @@ Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
 ## 📊 Dataset Overview
 
 - **Total Records**: {len(df):,}
-- **Unique Floats**: {df['float_id'].nunique() if 'float_id' in df.columns else 'N/A'}
+- **Unique Floats**: {overall['unique_floats'] if 'float_id' in df.columns else 'N/A'}
 """
         
         # Add date range only if timestamp exists
         if 'timestamp' in df.columns:
-            report += f"- **Date Range**: {df['timestamp'].min()} to {df['timestamp'].max()}\n"
+            report += f"- **Date Range**: {overall['earliest_date']} to {overall['latest_date']}\n"
         
         report += "\n---\n\n"
         
         # Add geographic coverage only if lat/lon exist
-        if 'latitude' in df.columns and 'longitude' in df.columns:
+        if overall['min_lat'] is not None and overall['min_lon'] is not None:
             report += f"""## 🗺️ Geographic Coverage
 
-- **Latitude Range**: {df['latitude'].min():.2f}°N to {df['latitude'].max():.2f}°N
-- **Longitude Range**: {df['longitude'].min():.2f}°E to {df['longitude'].max():.2f}°E
+- **Latitude Range**: {overall['min_lat']:.2f}°N to {overall['max_lat']:.2f}°N
+- **Longitude Range**: {overall['min_lon']:.2f}°E to {overall['max_lon']:.2f}°E
 """
         else:
             report += "## 📊 Data Summary\n\n"
@@ -1879,59 +1944,55 @@ Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
             report += f"**Available Columns**: {', '.join(df.columns.tolist())}\n"
 
         
-        if 'ocean_region' in df.columns:
+        if not profile.region_counts.empty:
             report += f"\n### Regional Distribution\n\n"
-            for region, count in df['ocean_region'].value_counts().items():
+            for region, count in profile.region_counts.items():
                 report += f"- **{region}**: {count:,} measurements ({count/len(df)*100:.1f}%)\n"
         
         report += f"\n---\n\n## 🌡️ Temperature Analysis\n\n"
-        if 'temperature' in df.columns:
+        if stat('temperature', 'count'):
             report += f"""
-- **Range**: {df['temperature'].min():.2f}°C to {df['temperature'].max():.2f}°C
-- **Mean**: {df['temperature'].mean():.2f}°C
-- **Median**: {df['temperature'].median():.2f}°C
-- **Std Dev**: {df['temperature'].std():.2f}°C
+- **Range**: {stat('temperature', 'min'):.2f}°C to {stat('temperature', 'max'):.2f}°C
+- **Mean**: {stat('temperature', 'mean'):.2f}°C
+- **Median**: {stat('temperature', 'median'):.2f}°C
+- **Std Dev**: {stat('temperature', 'std') or 0:.2f}°C
 """
         
         report += f"\n---\n\n## 💧 Salinity Analysis\n\n"
-        if 'salinity' in df.columns:
+        if stat('salinity', 'count'):
             report += f"""
-- **Range**: {df['salinity'].min():.2f} to {df['salinity'].max():.2f} PSU
-- **Mean**: {df['salinity'].mean():.2f} PSU
-- **Median**: {df['salinity'].median():.2f} PSU
-- **Std Dev**: {df['salinity'].std():.2f} PSU
+- **Range**: {stat('salinity', 'min'):.2f} to {stat('salinity', 'max'):.2f} PSU
+- **Mean**: {stat('salinity', 'mean'):.2f} PSU
+- **Median**: {stat('salinity', 'median'):.2f} PSU
+- **Std Dev**: {stat('salinity', 'std') or 0:.2f} PSU
 """
         
         report += f"\n---\n\n## 📏 Depth Analysis\n\n"
-        if 'pressure' in df.columns:
+        if stat('pressure', 'count'):
             report += f"""
-- **Maximum Depth**: {df['pressure'].max():.0f} dbar
-- **Mean Depth**: {df['pressure'].mean():.0f} dbar
-- **Median Depth**: {df['pressure'].median():.0f} dbar
+- **Maximum Depth**: {stat('pressure', 'max'):.0f} dbar
+- **Mean Depth**: {stat('pressure', 'mean'):.0f} dbar
+- **Median Depth**: {stat('pressure', 'median'):.0f} dbar
 """
         
-        if any(col in df.columns for col in ['dissolved_oxygen', 'chlorophyll', 'ph']):
+        bgc = [
+            ('dissolved_oxygen', 'Dissolved Oxygen', ' μmol/kg', 2),
+            ('chlorophyll', 'Chlorophyll', ' mg/m³', 3),
+            ('ph', 'pH', '', 2),
+        ]
+        if any(column in df.columns for column, _, _, _ in bgc):
             report += f"\n---\n\n## 🧪 BGC Parameters\n\n"
             
-            if 'dissolved_oxygen' in df.columns:
-                report += f"### Dissolved Oxygen\n"
-                report += f"- Range: {df['dissolved_oxygen'].min():.2f} to {df['dissolved_oxygen'].max():.2f} μmol/kg\n"
-                report += f"- Mean: {df['dissolved_oxygen'].mean():.2f} μmol/kg\n\n"
-            
-            if 'chlorophyll' in df.columns:
-                report += f"### Chlorophyll\n"
-                report += f"- Range: {df['chlorophyll'].min():.3f} to {df['chlorophyll'].max():.3f} mg/m³\n"
-                report += f"- Mean: {df['chlorophyll'].mean():.3f} mg/m³\n\n"
-            
-            if 'ph' in df.columns:
-                report += f"### pH\n"
-                report += f"- Range: {df['ph'].min():.2f} to {df['ph'].max():.2f}\n"
-                report += f"- Mean: {df['ph'].mean():.2f}\n\n"
+            for column, label, unit, decimals in bgc:
+                if stat(column, 'count'):
+                    report += f"### {label}\n"
+                    report += f"- Range: {stat(column, 'min'):.{decimals}f} to {stat(column, 'max'):.{decimals}f}{unit}\n"
+                    report += f"- Mean: {stat(column, 'mean'):.{decimals}f}{unit}\n\n"
         
         report += f"\n---\n\n## ℹ️ Data Quality\n\n"
-        report += f"- **Data Mode**: {df['data_mode'].value_counts().to_dict() if 'data_mode' in df.columns else 'N/A'}\n"
-        report += f"- **Missing Values**: {df.isnull().sum().sum()} cells\n"
-        report += f"- **Completeness**: {(1 - df.isnull().sum().sum() / (len(df) * len(df.columns))) * 100:.1f}%\n"
+        report += f"- **Data Mode**: {profile.data_mode_counts if 'data_mode' in df.columns else 'N/A'}\n"
+        report += f"- **Missing Values**: {profile.missing_cells} cells\n"
+        report += f"- **Completeness**: {profile.completeness:.1f}%\n"
         
         report += f"\n---\n\n*Report generated by FloatChat Pro - ARGO Data Analysis Platform*\n"
         
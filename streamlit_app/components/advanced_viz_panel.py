@@ -6,6 +6,7 @@ Provides access to specialized oceanographic plots
 import streamlit as st
 import pandas as pd
 from visualization.advanced_plots import advanced_plots
+from streamlit_app.utils.figure_cache import figure_cache
 
 
 class AdvancedVizPanel:
@@ -57,20 +58,20 @@ class AdvancedVizPanel:
         try:
             if viz_type == "Section Plot":
                 parameter = st.selectbox("Parameter", available_params)
-                fig = self.plotter.create_section_plot(df, parameter)
+                fig = self._plot(df, 'section_plot', parameter=parameter)
                 st.plotly_chart(fig, use_container_width=True)
             
             elif viz_type == "Hovmöller Diagram":
                 if 'timestamp' in df.columns:
                     parameter = st.selectbox("Parameter", available_params)
-                    fig = self.plotter.create_hovmoller_diagram(df, parameter)
+                    fig = self._plot(df, 'hovmoller_diagram', parameter=parameter)
                     st.plotly_chart(fig, use_container_width=True)
                 else:
                     st.warning("⏰ Timestamp data required for Hovmöller diagram. This visualization needs time-series data.")
             
             elif viz_type == "T-S Density Plot":
                 if 'temperature' in df.columns and 'salinity' in df.columns:
-                    fig = self.plotter.create_ts_density_plot(df)
+                    fig = self._plot(df, 'ts_density_plot')
                     st.plotly_chart(fig, use_container_width=True)
                 else:
                     st.warning("🌡️ Temperature and salinity data required for T-S plot")
@@ -83,7 +84,7 @@ class AdvancedVizPanel:
                     param2 = st.selectbox("Y-axis Parameter", available_params, key='pp_y')
                 
                 if param1 != param2:
-                    fig = self.plotter.create_property_property_plot(df, param1, param2)
+                    fig = self._plot(df, 'property_property_plot', param1=param1, param2=param2)
                     st.plotly_chart(fig, use_container_width=True)
                 else:
                     st.info("Please select different parameters for X and Y axes")
@@ -100,8 +101,8 @@ class AdvancedVizPanel:
                     group_options = [col for col in ['float_id', 'timestamp', 'cycle_number'] if col in df.columns]
                     if group_options:
                         group_by = st.selectbox("Group By", group_options)
-                        fig = self.plotter.create_multi_profile_comparison(
-                            df, group_by, selected_params
+                        fig = self._plot(
+                            df, 'multi_profile_comparison', group_by=group_by, parameters=selected_params
                         )
                         st.plotly_chart(fig, use_container_width=True)
                     else:
@@ -115,7 +116,7 @@ class AdvancedVizPanel:
                 else:
                     parameter = st.selectbox("Parameter", available_params)
                     bins = st.slider("Number of Depth Bins", 5, 50, 20)
-                    fig = self.plotter.create_depth_histogram(df, parameter, bins)
+                    fig = self._plot(df, 'depth_histogram', parameter=parameter, depth_bins=bins)
                     st.plotly_chart(fig, use_container_width=True)
             
             elif viz_type == "Spatial Interpolation":
@@ -128,7 +129,10 @@ class AdvancedVizPanel:
                             float(df['pressure'].max()),
                             10.0
                         )
-                        fig = self.plotter.create_spatial_interpolation(df, parameter, depth)
+                        method = st.radio("Interpolation", ["linear", "cubic"], horizontal=True)
+                        fig = self._plot(
+                            df, 'spatial_interpolation', parameter=parameter, depth_level=depth, method=method
+                        )
                         st.plotly_chart(fig, use_container_width=True)
                     else:
                         st.warning("⚠️ Pressure/depth data required for spatial interpolation")
@@ -138,7 +142,7 @@ class AdvancedVizPanel:
             elif viz_type == "Anomaly Plot":
                 parameter = st.selectbox("Parameter", available_params)
                 baseline = st.radio("Baseline", ["mean", "median"])
-                fig = self.plotter.create_anomaly_plot(df, parameter, baseline)
+                fig = self._plot(df, 'anomaly_plot', parameter=parameter, baseline=baseline)
                 st.plotly_chart(fig, use_container_width=True)
         
         except KeyError as e:
@@ -153,6 +157,14 @@ class AdvancedVizPanel:
         # Add interpretation guide
         self._render_interpretation_guide(viz_type)
     
+    def _plot(self, df: pd.DataFrame, name: str, **kwargs):
+        """advanced_plots.create_<name>(df, **kwargs), cached across reruns"""
+        return figure_cache.figure(
+            f'advanced/{name}', df,
+            lambda: getattr(self.plotter, f'create_{name}')(df, **kwargs),
+            **kwargs
+        )
+    
     def _render_interpretation_guide(self, viz_type: str):
         """Render interpretation guide for visualization"""
         
@@ -70,6 +70,11 @@ class ChatInterface:
                         with col3:
                             st.metric("SQL Generated", "✅")
                         
+                        if result.get('sampled'):
+                            st.caption("⚠️ Query was too expensive to run in full; results are a random sample of the matching rows.")
+                        if result.get('routed_to_cube'):
+                            st.caption(f"⚠️ {result.get('cube_caveat') or 'Answered from the pre-aggregated stats cube.'}")
+                        
                         # Show SQL query
                         with st.expander("🔧 View Generated SQL"):
                             st.code(result['sql'], language='sql')
@@ -7,9 +7,20 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from datetime import datetime, timedelta
 from database.db_setup import DatabaseSetup
-from sqlalchemy import text
+from database.stats_cube import StatsCube
+from database.statistics_service import StatisticsService
+from streamlit_app.utils.figure_cache import figure_cache
+from streamlit_app.utils.result_profile import result_profiler
+
+# Dashboard tabs: label, renderer, statistics panels it needs
+DASHBOARD_SECTIONS = [
+    ("🗺️ Regional Distribution", '_render_regional_distribution', ['regional']),
+    ("📈 Temporal Coverage", '_render_temporal_coverage', ['temporal']),
+    ("🔬 Data Quality", '_render_data_quality', ['quality']),
+    ("🌊 Parameter Availability", '_render_parameter_availability', ['parameters']),
+    ("🏆 Top Floats", '_render_top_floats', ['top_floats', 'overall']),
+]
 
 
 class DataDashboard:
@@ -17,6 +28,8 @@ class DataDashboard:
     
     def __init__(self):
         self.db_setup = DatabaseSetup()
+        self.stats_cube = StatsCube(self.db_setup.engine)
+        self.statistics = StatisticsService(self.db_setup.engine, self.stats_cube)
     
     def render(self):
         """Render the complete dashboard"""
@@ -51,7 +64,7 @@ class DataDashboard:
             """, unsafe_allow_html=True)
             
             # Generate statistics from query results
-            stats = self._get_dataframe_statistics(df)
+            panels = self._get_dataframe_statistics(df).items()
         else:
             # USE DATABASE STATISTICS (fallback)
             st.markdown("""
@@ -69,273 +82,48 @@ class DataDashboard:
                 </div>
             """, unsafe_allow_html=True)
             
-            # Load data statistics from database
-            with st.spinner("Loading dashboard data..."):
-                stats = self._get_database_statistics()
-        
-        # Top-level metrics
-        self._render_top_metrics(stats, using_query_data)
+            # Database statistics, panel by panel as the queries complete
+            panels = self.statistics.iter_statistics()
         
+        self._render_sections(panels, using_query_data)
+    
+    def _render_sections(self, panels, using_query_data=False):
+        """
+        Render metrics and tabs from (panel, data) pairs, filling each
+        section as soon as the statistics it needs have arrived
+        """
+        metrics_slot = st.empty()
         st.markdown("---")
         
         # Main dashboard content in tabs
-        tab1, tab2, tab3, tab4, tab5 = st.tabs([
-            "🗺️ Regional Distribution",
-            "📈 Temporal Coverage",
-            "🔬 Data Quality",
-            "🌊 Parameter Availability",
-            "🏆 Top Floats"
-        ])
-        
-        with tab1:
-            self._render_regional_distribution(stats)
-        
-        with tab2:
-            self._render_temporal_coverage(stats)
-        
-        with tab3:
-            self._render_data_quality(stats)
-        
-        with tab4:
-            self._render_parameter_availability(stats)
-        
-        with tab5:
-            self._render_top_floats(stats)
-    
-    def _get_dataframe_statistics(self, df: pd.DataFrame):
-        """Generate statistics from a DataFrame (query results)"""
-        
-        stats = {
-            'overall': {
-                'total_records': len(df),
-                'unique_floats': df['float_id'].nunique() if 'float_id' in df.columns else 0,
-                'total_cycles': df['cycle_number'].nunique() if 'cycle_number' in df.columns else 0,
-                'earliest_date': df['timestamp'].min() if 'timestamp' in df.columns else None,
-                'latest_date': df['timestamp'].max() if 'timestamp' in df.columns else None,
-                'min_lat': df['latitude'].min() if 'latitude' in df.columns else None,
-                'max_lat': df['latitude'].max() if 'latitude' in df.columns else None,
-                'min_lon': df['longitude'].min() if 'longitude' in df.columns else None,
-                'max_lon': df['longitude'].max() if 'longitude' in df.columns else None,
-                'min_depth': df['pressure'].min() if 'pressure' in df.columns else None,
-                'max_depth': df['pressure'].max() if 'pressure' in df.columns else None,
-                'num_columns': len(df.columns),
-                'min_temp': df['temperature'].min() if 'temperature' in df.columns else None,
-                'max_temp': df['temperature'].max() if 'temperature' in df.columns else None,
-            }
-        }
-        
-        # Regional distribution
-        if all(col in df.columns for col in ['latitude', 'longitude', 'temperature', 'salinity']):
-            def classify_region(row):
-                lat, lon = row['latitude'], row['longitude']
-                if 5 <= lat <= 30 and 40 <= lon <= 80:
-                    return 'Arabian Sea'
-                elif -50 <= lat <= -10 and 20 <= lon <= 120:
-                    return 'Southern Indian Ocean'
-                elif 5 <= lat <= 25 and 80 <= lon <= 100:
-                    return 'Bay of Bengal'
-                elif -10 <= lat <= 5 and 40 <= lon <= 100:
-                    return 'Equatorial Indian Ocean'
-                else:
-                    return 'Other Regions'
-            
-            df_with_region = df.copy()
-            df_with_region['region'] = df_with_region.apply(classify_region, axis=1)
-            
-            regional_stats = df_with_region.groupby('region').agg({
-                'float_id': lambda x: x.nunique() if 'float_id' in df.columns else len(x),
-                'temperature': 'mean',
-                'salinity': 'mean'
-            }).reset_index()
-            regional_stats.columns = ['region', 'float_count', 'avg_temp', 'avg_salinity']
-            regional_stats['record_count'] = df_with_region.groupby('region').size().values
-            
-            stats['regional'] = regional_stats
-        else:
-            stats['regional'] = pd.DataFrame()
-        
-        # Temporal distribution
-        if 'timestamp' in df.columns:
-            df_temp = df.copy()
-            df_temp['timestamp'] = pd.to_datetime(df_temp['timestamp'])
-            df_temp['year_month'] = df_temp['timestamp'].dt.to_period('M').astype(str)
+        tabs = st.tabs([label for label, _, _ in DASHBOARD_SECTIONS])
+        slots = []
+        for tab in tabs:
+            with tab:
+                slot = st.empty()
+                slot.info("⏳ Loading...")
+                slots.append(slot)
+        
+        stats = {}
+        pending = list(range(len(DASHBOARD_SECTIONS)))
+        for name, data in panels:
+            stats[name] = data
             
-            temporal_stats = df_temp.groupby('year_month').agg({
-                'float_id': 'nunique' if 'float_id' in df.columns else 'count'
-            }).reset_index()
-            temporal_stats.columns = ['year_month', 'float_count']
-            temporal_stats['record_count'] = df_temp.groupby('year_month').size().values
+            # Top-level metrics
+            if name == 'overall':
+                with metrics_slot.container():
+                    self._render_top_metrics(stats, using_query_data)
             
-            stats['temporal'] = temporal_stats
-        else:
-            stats['temporal'] = pd.DataFrame()
-        
-        # Quality distribution
-        if 'qc_flag' in df.columns:
-            quality_stats = df.groupby('qc_flag').size().reset_index()
-            quality_stats.columns = ['qc_flag', 'record_count']
-            stats['quality'] = quality_stats
-        else:
-            stats['quality'] = pd.DataFrame()
-        
-        # Parameter availability
-        param_stats = []
-        params = ['temperature', 'salinity', 'pressure', 'dissolved_oxygen', 'ph', 'chlorophyll']
-        for param in params:
-            if param in df.columns:
-                available = df[param].notna().sum()
-                param_stats.append({
-                    'parameter': param,
-                    'available_count': available,
-                    'coverage_percent': (available / len(df)) * 100
-                })
-        stats['parameters'] = pd.DataFrame(param_stats)
-        
-        # Top floats
-        if 'float_id' in df.columns:
-            top_floats = df.groupby('float_id').agg({
-                'timestamp': lambda x: pd.to_datetime(x).max() if 'timestamp' in df.columns else None,
-                'pressure': 'max' if 'pressure' in df.columns else 'count'
-            }).reset_index()
-            top_floats.columns = ['float_id', 'last_profile', 'max_depth']
-            top_floats['profile_count'] = df.groupby('float_id').size().values
-            top_floats = top_floats.sort_values('profile_count', ascending=False).head(10)
-            stats['top_floats'] = top_floats
-        else:
-            stats['top_floats'] = pd.DataFrame()
-        
-        return stats
+            for index in list(pending):
+                _, renderer, needs = DASHBOARD_SECTIONS[index]
+                if all(panel in stats for panel in needs):
+                    with slots[index].container():
+                        getattr(self, renderer)(stats)
+                    pending.remove(index)
     
-    def _get_database_statistics(self):
-        """Fetch comprehensive database statistics"""
-        session = self.db_setup.get_session()
-        
-        try:
-            # Overall statistics
-            overall_query = text("""
-                SELECT 
-                    COUNT(*) as total_records,
-                    COUNT(DISTINCT float_id) as unique_floats,
-                    COUNT(DISTINCT cycle_number) as total_cycles,
-                    MIN(timestamp) as earliest_date,
-                    MAX(timestamp) as latest_date,
-                    MIN(latitude) as min_lat,
-                    MAX(latitude) as max_lat,
-                    MIN(longitude) as min_lon,
-                    MAX(longitude) as max_lon,
-                    MIN(pressure) as min_depth,
-                    MAX(pressure) as max_depth
-                FROM argo_profiles;
-            """)
-            
-            overall_df = pd.read_sql(overall_query, session.bind)
-            
-            # Regional distribution
-            regional_query = text("""
-                SELECT 
-                    CASE 
-                        WHEN latitude BETWEEN 5 AND 30 AND longitude BETWEEN 40 AND 80 
-                            THEN 'Arabian Sea'
-                        WHEN latitude BETWEEN -50 AND -10 AND longitude BETWEEN 20 AND 120 
-                            THEN 'Southern Indian Ocean'
-                        WHEN latitude BETWEEN 5 AND 25 AND longitude BETWEEN 80 AND 100 
-                            THEN 'Bay of Bengal'
-                        WHEN latitude BETWEEN -10 AND 5 AND longitude BETWEEN 40 AND 100 
-                            THEN 'Equatorial Indian Ocean'
-                        ELSE 'Other Regions'
-                    END as region,
-                    COUNT(*) as record_count,
-                    COUNT(DISTINCT float_id) as float_count,
-                    AVG(temperature) as avg_temp,
-                    AVG(salinity) as avg_salinity
-                FROM argo_profiles
-                WHERE temperature IS NOT NULL AND salinity IS NOT NULL
-                GROUP BY region
-                ORDER BY record_count DESC;
-            """)
-            
-            regional_df = pd.read_sql(regional_query, session.bind)
-            
-            # Temporal distribution (monthly)
-            temporal_query = text("""
-                SELECT 
-                    DATE_TRUNC('month', timestamp) as month,
-                    COUNT(*) as measurements,
-                    COUNT(DISTINCT float_id) as active_floats
-                FROM argo_profiles
-                WHERE timestamp >= CURRENT_DATE - INTERVAL '12 months'
-                GROUP BY month
-                ORDER BY month;
-            """)
-            
-            temporal_df = pd.read_sql(temporal_query, session.bind)
-            
-            # Data quality distribution
-            quality_query = text("""
-                SELECT 
-                    CASE 
-                        WHEN temp_qc = 1 THEN 'Good (QC=1)'
-                        WHEN temp_qc = 2 THEN 'Probably Good (QC=2)'
-                        WHEN temp_qc = 3 THEN 'Questionable (QC=3)'
-                        WHEN temp_qc = 4 THEN 'Bad (QC=4)'
-                        WHEN temp_qc = 9 THEN 'Missing (QC=9)'
-                        ELSE 'Unknown'
-                    END as quality,
-                    COUNT(*) as count
-                FROM argo_profiles
-                GROUP BY quality
-                ORDER BY count DESC;
-            """)
-            
-            quality_df = pd.read_sql(quality_query, session.bind)
-            
-            # Parameter availability
-            param_query = text("""
-                SELECT 
-                    COUNT(*) as total,
-                    SUM(CASE WHEN temperature IS NOT NULL THEN 1 ELSE 0 END) as has_temperature,
-                    SUM(CASE WHEN salinity IS NOT NULL THEN 1 ELSE 0 END) as has_salinity,
-                    SUM(CASE WHEN dissolved_oxygen IS NOT NULL THEN 1 ELSE 0 END) as has_oxygen,
-                    SUM(CASE WHEN chlorophyll IS NOT NULL THEN 1 ELSE 0 END) as has_chlorophyll,
-                    SUM(CASE WHEN ph IS NOT NULL THEN 1 ELSE 0 END) as has_ph
-                FROM argo_profiles;
-            """)
-            
-            param_df = pd.read_sql(param_query, session.bind)
-            
-            # Top floats by measurements
-            top_floats_query = text("""
-                SELECT 
-                    float_id,
-                    COUNT(*) as measurements,
-                    COUNT(DISTINCT cycle_number) as cycles,
-                    MIN(timestamp) as first_measurement,
-                    MAX(timestamp) as last_measurement,
-                    AVG(latitude) as avg_lat,
-                    AVG(longitude) as avg_lon
-                FROM argo_profiles
-                GROUP BY float_id
-                ORDER BY measurements DESC
-                LIMIT 10;
-            """)
-            
-            top_floats_df = pd.read_sql(top_floats_query, session.bind)
-            
-            session.close()
-            
-            return {
-                'overall': overall_df,
-                'regional': regional_df,
-                'temporal': temporal_df,
-                'quality': quality_df,
-                'parameters': param_df,
-                'top_floats': top_floats_df
-            }
-            
-        except Exception as e:
-            session.close()
-            st.error(f"Error loading statistics: {e}")
-            return None
+    def _get_dataframe_statistics(self, df: pd.DataFrame):
+        """Generate statistics from a DataFrame (query results)"""
+        return result_profiler.profile(df).dashboard_stats()
     
     def _render_top_metrics(self, stats, using_query_data=False):
         """Render key metrics at the top"""
@@ -343,6 +131,12 @@ class DataDashboard:
             return
         
         overall = stats['overall']
+        if isinstance(overall, pd.DataFrame):
+            # Database statistics arrive as a one-row frame
+            if overall.empty:
+                st.warning("No summary statistics available")
+                return
+            overall = overall.iloc[0].to_dict()
         
         # Add banner if showing query results
         if using_query_data:
@@ -421,7 +215,7 @@ class DataDashboard:
                 <div class="custom-metric">
                     <div class="metric-icon">📋</div>
                     <div class="metric-label">Data Columns</div>
-                    <div class="metric-value">{overall['num_columns']}</div>
+                    <div class="metric-value">{overall.get('num_columns', 'N/A')}</div>
                 </div>
             """, unsafe_allow_html=True)
         
@@ -442,7 +236,7 @@ class DataDashboard:
         col4, col5, col6 = st.columns(3)
         
         with col4:
-            if overall['min_temp'] is not None and overall['max_temp'] is not None:
+            if overall.get('min_temp') is not None and overall.get('max_temp') is not None:
                 temp_value = f"{overall['min_temp']:.2f}°C - {overall['max_temp']:.2f}°C"
             else:
                 temp_value = "N/A"
@@ -496,28 +290,34 @@ class DataDashboard:
         
         with col1:
             # Pie chart of records
-            fig_pie = px.pie(
-                regional_df,
-                values='record_count',
-                names='region',
-                title='Measurement Distribution',
-                color_discrete_sequence=px.colors.qualitative.Set3
-            )
-            fig_pie.update_traces(textposition='inside', textinfo='percent+label')
-            st.plotly_chart(fig_pie, use_container_width=True)
+            def build_pie():
+                fig_pie = px.pie(
+                    regional_df,
+                    values='record_count',
+                    names='region',
+                    title='Measurement Distribution',
+                    color_discrete_sequence=px.colors.qualitative.Set3
+                )
+                fig_pie.update_traces(textposition='inside', textinfo='percent+label')
+                return fig_pie
+            st.plotly_chart(figure_cache.figure('dashboard/regional_pie', regional_df, build_pie),
+                            use_container_width=True)
         
         with col2:
             # Bar chart of float counts
-            fig_bar = px.bar(
-                regional_df,
-                x='region',
-                y='float_count',
-                title='Active Floats per Region',
-                color='float_count',
-                color_continuous_scale='Blues'
-            )
-            fig_bar.update_layout(showlegend=False)
-            st.plotly_chart(fig_bar, use_container_width=True)
+            def build_bar():
+                fig_bar = px.bar(
+                    regional_df,
+                    x='region',
+                    y='float_count',
+                    title='Active Floats per Region',
+                    color='float_count',
+                    color_continuous_scale='Blues'
+                )
+                fig_bar.update_layout(showlegend=False)
+                return fig_bar
+            st.plotly_chart(figure_cache.figure('dashboard/regional_bar', regional_df, build_bar),
+                            use_container_width=True)
         
         # Detailed table
         st.markdown("### 📊 Regional Statistics")
@@ -543,6 +343,32 @@ class DataDashboard:
         temporal_df['month'] = pd.to_datetime(temporal_df['month'])
         
         # Line chart for measurements over time
+        st.plotly_chart(figure_cache.figure('dashboard/monthly_measurements', temporal_df,
+                                            lambda: self._monthly_measurements_figure(temporal_df)),
+                        use_container_width=True)
+        
+        # Active floats over time
+        st.plotly_chart(figure_cache.figure('dashboard/monthly_floats', temporal_df,
+                                            lambda: self._monthly_floats_figure(temporal_df)),
+                        use_container_width=True)
+        
+        # Summary stats
+        col1, col2, col3 = st.columns(3)
+        
+        with col1:
+            avg_measurements = temporal_df['measurements'].mean()
+            st.metric("📊 Avg Monthly Measurements", f"{avg_measurements:,.0f}")
+        
+        with col2:
+            total_recent = temporal_df['measurements'].sum()
+            st.metric("📦 Last 12 Months Total", f"{total_recent:,}")
+        
+        with col3:
+            avg_floats = temporal_df['active_floats'].mean()
+            st.metric("🎈 Avg Active Floats/Month", f"{avg_floats:.0f}")
+    
+    def _monthly_measurements_figure(self, temporal_df):
+        """Monthly measurement counts (line)"""
         fig_line = go.Figure()
         
         fig_line.add_trace(go.Scatter(
@@ -563,9 +389,10 @@ class DataDashboard:
             height=400
         )
         
-        st.plotly_chart(fig_line, use_container_width=True)
-        
-        # Active floats over time
+        return fig_line
+    
+    def _monthly_floats_figure(self, temporal_df):
+        """Active floats per month (bars)"""
         fig_floats = go.Figure()
         
         fig_floats.add_trace(go.Bar(
@@ -582,22 +409,7 @@ class DataDashboard:
             height=400
         )
         
-        st.plotly_chart(fig_floats, use_container_width=True)
-        
-        # Summary stats
-        col1, col2, col3 = st.columns(3)
-        
-        with col1:
-            avg_measurements = temporal_df['measurements'].mean()
-            st.metric("📊 Avg Monthly Measurements", f"{avg_measurements:,.0f}")
-        
-        with col2:
-            total_recent = temporal_df['measurements'].sum()
-            st.metric("📦 Last 12 Months Total", f"{total_recent:,}")
-        
-        with col3:
-            avg_floats = temporal_df['active_floats'].mean()
-            st.metric("🎈 Avg Active Floats/Month", f"{avg_floats:.0f}")
+        return fig_floats
     
     def _render_data_quality(self, stats):
         """Render data quality metrics"""
@@ -613,14 +425,14 @@ class DataDashboard:
         
         with col1:
             # Donut chart for quality distribution
-            fig_donut = px.pie(
+            fig_donut = figure_cache.figure('dashboard/quality', quality_df, lambda: px.pie(
                 quality_df,
                 values='count',
                 names='quality',
                 title='Quality Flag Distribution',
                 hole=0.4,
                 color_discrete_sequence=px.colors.qualitative.Pastel
-            )
+            ))
             st.plotly_chart(fig_donut, use_container_width=True)
         
         with col2:
@@ -675,21 +487,24 @@ class DataDashboard:
         ])
         
         # Horizontal bar chart
-        fig_bar = px.bar(
-            param_availability,
-            y='Parameter',
-            x='Percentage',
-            orientation='h',
-            title='Parameter Coverage (%)',
-            color='Percentage',
-            color_continuous_scale='Greens',
-            text='Percentage'
-        )
-        
-        fig_bar.update_traces(texttemplate='%{text:.1f}%', textposition='outside')
-        fig_bar.update_layout(showlegend=False, height=400)
+        def build_bar():
+            fig_bar = px.bar(
+                param_availability,
+                y='Parameter',
+                x='Percentage',
+                orientation='h',
+                title='Parameter Coverage (%)',
+                color='Percentage',
+                color_continuous_scale='Greens',
+                text='Percentage'
+            )
+            
+            fig_bar.update_traces(texttemplate='%{text:.1f}%', textposition='outside')
+            fig_bar.update_layout(showlegend=False, height=400)
+            return fig_bar
         
-        st.plotly_chart(fig_bar, use_container_width=True)
+        st.plotly_chart(figure_cache.figure('dashboard/parameters', param_availability, build_bar),
+                        use_container_width=True)
         
         # Detailed table
         st.markdown("### 📋 Parameter Details")
@@ -728,20 +543,23 @@ class DataDashboard:
         top_floats_df = stats['top_floats']
         
         # Bar chart of measurements
-        fig_top = px.bar(
-            top_floats_df,
-            x='float_id',
-            y='measurements',
-            title='Top 10 Floats by Measurements',
-            color='measurements',
-            color_continuous_scale='Viridis',
-            text='measurements'
-        )
-        
-        fig_top.update_traces(texttemplate='%{text:,}', textposition='outside')
-        fig_top.update_layout(showlegend=False, xaxis_title='Float ID', yaxis_title='Total Measurements')
+        def build_top():
+            fig_top = px.bar(
+                top_floats_df,
+                x='float_id',
+                y='measurements',
+                title='Top 10 Floats by Measurements',
+                color='measurements',
+                color_continuous_scale='Viridis',
+                text='measurements'
+            )
+            
+            fig_top.update_traces(texttemplate='%{text:,}', textposition='outside')
+            fig_top.update_layout(showlegend=False, xaxis_title='Float ID', yaxis_title='Total Measurements')
+            return fig_top
         
-        st.plotly_chart(fig_top, use_container_width=True)
+        st.plotly_chart(figure_cache.figure('dashboard/top_floats', top_floats_df, build_top),
+                        use_container_width=True)
         
         # Detailed table
         st.markdown("### 📊 Float Details")
@@ -759,7 +577,8 @@ class DataDashboard:
         
         # Float activity summary
         total_top_measurements = top_floats_df['measurements'].sum()
-        total_database = stats['overall'].iloc[0]['total_records']
+        overall = stats['overall']
+        total_database = overall.iloc[0]['total_records'] if isinstance(overall, pd.DataFrame) else overall['total_records']
         top_percentage = (total_top_measurements / total_database * 100) if total_database > 0 else 0
         
         st.info(f"💡 **Insight:** The top 10 floats account for **{top_percentage:.1f}%** of all measurements!")
@@ -1,6 +1,7 @@
 import streamlit as st
 import pandas as pd
 from visualization.map_plots import MapVisualizer
+from streamlit_app.utils.figure_cache import figure_cache
 
 class MapView:
     """Map visualization component for Streamlit"""
@@ -29,6 +30,7 @@ class MapView:
             ["Float Locations", "Density Heatmap", "Time Animation"]
         )
         
+        color_by = None
         if map_type == "Float Locations":
             # Color by parameter
             color_options = [col for col in df.columns 
@@ -39,34 +41,45 @@ class MapView:
                 color_by = st.sidebar.selectbox("Color By", color_options)
             else:
                 color_by = 'temperature'
-            
+        elif map_type == "Time Animation" and 'timestamp' not in df.columns:
+            st.warning("Timestamp column not available for animation")
+        
+        fig = figure_cache.figure('map', df, lambda: self._build_map(df, map_type, color_by),
+                                  map_type=map_type, color_by=color_by)
+        
+        # Display map
+        st.plotly_chart(fig, use_container_width=True)
+        meta = fig.layout.meta
+        if isinstance(meta, dict) and meta.get('reduction'):
+            st.caption(f"🗺️ {meta['reduction']}")
+        
+        # Add geographic statistics
+        self._display_geo_stats(df)
+    
+    def _build_map(self, df: pd.DataFrame, map_type: str, color_by: str):
+        """Build the selected map; the reduction summary rides along in layout.meta"""
+        if map_type == "Float Locations":
             fig = self.visualizer.create_float_trajectory_map(
                 df,
                 color_by=color_by,
                 title=f"ARGO Float Locations (colored by {color_by})"
             )
-            
         elif map_type == "Density Heatmap":
             fig = self.visualizer.create_density_heatmap(
                 df,
                 title="ARGO Float Data Density"
             )
-            
-        else:  # Time Animation
-            if 'timestamp' in df.columns:
-                fig = self.visualizer.create_time_animated_map(
-                    df,
-                    title="ARGO Float Trajectories Over Time"
-                )
-            else:
-                st.warning("Timestamp column not available for animation")
-                fig = self.visualizer.create_float_trajectory_map(df)
-        
-        # Display map
-        st.plotly_chart(fig, use_container_width=True)
+        elif 'timestamp' in df.columns:  # Time Animation
+            fig = self.visualizer.create_time_animated_map(
+                df,
+                title="ARGO Float Trajectories Over Time"
+            )
+        else:
+            fig = self.visualizer.create_float_trajectory_map(df)
         
-        # Add geographic statistics
-        self._display_geo_stats(df)
+        if self.visualizer.last_reduction is not None:
+            fig.update_layout(meta={'reduction': self.visualizer.last_reduction.summary})
+        return fig
     
     def _display_geo_stats(self, df: pd.DataFrame):
         """Display geographic statistics"""
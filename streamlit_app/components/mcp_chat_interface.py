@@ -12,6 +12,7 @@ from streamlit_app.components.smart_suggestions import SmartSuggestionGenerator
 from rag_engine.intent_classifier import intent_classifier
 import pandas as pd
 import json
+from data_processing.result_serializer import loads
 
 
 class MCPChatInterface:
@@ -315,7 +316,7 @@ class MCPChatInterface:
         
         try:
             text = content[0].get('text', '')
-            data_dict = json.loads(text)
+            data_dict = loads(text)
             
             if data_dict.get('success') and data_dict.get('data'):
                 return pd.DataFrame(data_dict['data'])
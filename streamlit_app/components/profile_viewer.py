@@ -1,6 +1,7 @@
 import streamlit as st
 import pandas as pd
 from visualization.profile_plots import ProfilePlotter
+from streamlit_app.utils.figure_cache import figure_cache
 
 class ProfileViewer:
     """Profile visualization component"""
@@ -38,10 +39,14 @@ class ProfileViewer:
                     )
                     float_ids = selected_floats if selected_floats else None
             
-            fig = self.plotter.create_temperature_profile(
-                df,
-                float_ids=float_ids,
-                title="Temperature-Depth Profile"
+            fig = figure_cache.figure(
+                'profile/temperature', df,
+                lambda: self.plotter.create_temperature_profile(
+                    df,
+                    float_ids=float_ids,
+                    title="Temperature-Depth Profile"
+                ),
+                float_ids=float_ids
             )
             
         elif plot_type == "T-S Diagram":
@@ -49,9 +54,12 @@ class ProfileViewer:
                 st.warning("⚠️ Salinity data required for T-S diagram")
                 return
             
-            fig = self.plotter.create_ts_diagram(
-                df,
-                title="Temperature-Salinity Diagram"
+            fig = figure_cache.figure(
+                'profile/ts', df,
+                lambda: self.plotter.create_ts_diagram(
+                    df,
+                    title="Temperature-Salinity Diagram"
+                )
             )
             
         elif plot_type == "Multi-Parameter":
@@ -66,10 +74,14 @@ class ProfileViewer:
             )
             
             if selected_params:
-                fig = self.plotter.create_multi_parameter_profile(
-                    df,
-                    parameters=selected_params,
-                    title="Multi-Parameter Profile"
+                fig = figure_cache.figure(
+                    'profile/multi_parameter', df,
+                    lambda: self.plotter.create_multi_parameter_profile(
+                        df,
+                        parameters=selected_params,
+                        title="Multi-Parameter Profile"
+                    ),
+                    parameters=selected_params
                 )
             else:
                 st.warning("Please select at least one parameter")
@@ -86,10 +98,14 @@ class ProfileViewer:
             else:
                 group_by = 'float_id' if 'float_id' in df.columns else list(df.columns)[0]
             
-            fig = self.plotter.create_profile_comparison(
-                df,
-                group_by=group_by,
-                title=f"Profile Comparison by {group_by}"
+            fig = figure_cache.figure(
+                'profile/comparison', df,
+                lambda: self.plotter.create_profile_comparison(
+                    df,
+                    group_by=group_by,
+                    title=f"Profile Comparison by {group_by}"
+                ),
+                group_by=group_by
             )
         
         # Display plot
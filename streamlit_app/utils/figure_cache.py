@@ -0,0 +1,114 @@
+"""
+Figure cache shared across Streamlit reruns
+
+Every widget interaction reruns the whole script, so tabs used to rebuild
+their Plotly figures (reductions, interpolation, traces) from the same
+session DataFrames. Figures are cached here as serialized JSON keyed by
+(result-set fingerprint, plot kind, plot parameters), with LRU eviction
+on entry count and total size. Serialized copies also mean a caller that
+tweaks a returned figure cannot alter the cached one.
+"""
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Tuple
+
+import pandas as pd
+import plotly.graph_objects as go
+import plotly.io as pio
+
+MAX_ENTRIES = 64
+MAX_BYTES = 256 * 1024 * 1024     # serialized JSON across all entries
+
+
+class FigureCache:
+    """LRU cache of figure JSON keyed by data fingerprint, kind and parameters"""
+
+    def __init__(self, max_entries: int = MAX_ENTRIES, max_bytes: int = MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._figures: 'OrderedDict[Tuple[str, str, str], str]' = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()       # Streamlit sessions run on separate threads
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+    def figure(self, kind: str, data: Any, build: Callable[[], go.Figure], **params) -> go.Figure:
+        """
+        Cached figure, built with build() on a miss.
+
+        Args:
+            kind: Plot identifier (e.g. 'map/trajectory')
+            data: DataFrame (or other JSON-able input) the figure is drawn from
+            build: Zero-argument callable returning the figure
+            **params: Everything else the figure depends on (widget values)
+
+        Returns:
+            A fresh go.Figure (safe to modify)
+        """
+        key = (self.fingerprint(data), kind, json.dumps(params, sort_keys=True, default=str))
+        with self._lock:
+            payload = self._figures.get(key)
+            if payload is not None:
+                self._figures.move_to_end(key)
+                self.stats['hits'] += 1
+        if payload is not None:
+            return pio.from_json(payload)
+
+        fig = build()
+        payload = fig.to_json()
+        with self._lock:
+            self.stats['misses'] += 1
+            self._store(key, payload)
+        return fig
+
+    def fingerprint(self, data: Any) -> str:
+        """
+        Content hash of a DataFrame or JSON-able value. Frames are hashed on
+        every call (vectorized, ~0.1 s per million rows): tabs edit session
+        frames in place, so identity is not a safe key.
+        """
+        if not isinstance(data, pd.DataFrame):
+            return _digest(json.dumps(data, sort_keys=True, default=str).encode())
+
+        signature = (tuple(map(str, data.columns)), tuple(map(str, data.dtypes)), len(data))
+        try:
+            hashed = pd.util.hash_pandas_object(data, index=False).to_numpy()
+        except TypeError:     # unhashable cells (lists, dicts)
+            hashed = pd.util.hash_pandas_object(data.astype(str), index=False).to_numpy()
+        return _digest(repr(signature).encode(), hashed.tobytes())
+
+    def clear(self):
+        with self._lock:
+            self._figures.clear()
+            self._bytes = 0
+
+    def info(self) -> Dict:
+        """Entry count, total size and hit statistics"""
+        with self._lock:
+            return {'entries': len(self._figures), 'bytes': self._bytes, **self.stats}
+
+    def _store(self, key: Tuple, payload: str):
+        if len(payload) > self.max_bytes:
+            return
+        previous = self._figures.pop(key, None)
+        if previous is not None:
+            self._bytes -= len(previous)
+        self._figures[key] = payload
+        self._bytes += len(payload)
+        while len(self._figures) > self.max_entries or self._bytes > self.max_bytes:
+            _, evicted = self._figures.popitem(last=False)
+            self._bytes -= len(evicted)
+            self.stats['evictions'] += 1
+
+
+def _digest(*chunks: bytes) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    for chunk in chunks:
+        h.update(chunk)
+    return h.hexdigest()
+
+
+# Shared by all sessions in the process (keys are content hashes)
+figure_cache = FigureCache()
@@ -0,0 +1,239 @@
+"""
+Query result profiling shared by the dashboard, analytics tab and report
+
+The query dashboard, the analytics tab and the summary report each
+recomputed their aggregates from the result frame (row-wise region
+classification, per-parameter loops, repeated min/max/nunique calls) on
+every rerun. A result set is profiled here once: column statistics and
+null counts in single vectorized passes, and each grouped panel in one
+groupby. Profiles are memoized by result-set fingerprint.
+
+Dashboard panels use the same schema as database.statistics_service, so
+the dashboard renders query results and database statistics alike.
+"""
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from data_processing.region_classifier import classify_frame
+from database.statistics_service import QUALITY_LABELS, TOP_FLOATS
+from streamlit_app.utils.figure_cache import figure_cache
+from visualization.binning import as_datetime64
+
+MAX_PROFILES = 8
+
+# stats_totals availability column -> result column
+PARAMETER_COLUMNS = {
+    'has_temperature': 'temperature',
+    'has_salinity': 'salinity',
+    'has_oxygen': 'dissolved_oxygen',
+    'has_chlorophyll': 'chlorophyll',
+    'has_ph': 'ph',
+}
+
+
+@dataclass
+class ResultProfile:
+    """Aggregates of one query result"""
+    overall: Dict[str, Any]
+    columns: pd.DataFrame                       # describe() of numeric columns, plus median and range
+    panels: Dict[str, pd.DataFrame] = field(default_factory=dict)   # dashboard panels
+    region_counts: pd.Series = field(default_factory=lambda: pd.Series(dtype='int64'))
+    data_mode_counts: Dict[str, int] = field(default_factory=dict)
+    missing_cells: int = 0
+    completeness: float = 100.0                 # percent of non-null cells
+    good_quality: Optional[float] = None        # percent of rows with QC flag 1
+
+    def column(self, name: str, stat: str) -> Optional[float]:
+        """One statistic of a numeric column (None when absent or empty)"""
+        if name not in self.columns.index:
+            return None
+        return _scalar(self.columns.at[name, stat])
+
+    def dashboard_stats(self) -> Dict[str, Any]:
+        """Panels for DataDashboard (copies; renderers modify them)"""
+        stats = {name: frame.copy() for name, frame in self.panels.items()}
+        stats['overall'] = dict(self.overall)
+        return stats
+
+
+class ResultProfiler:
+    """Profiles query results, memoized by content fingerprint"""
+
+    def __init__(self, max_cached: int = MAX_PROFILES):
+        self.max_cached = max_cached
+        self._profiles: 'OrderedDict[str, ResultProfile]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0}
+
+    def profile(self, df: pd.DataFrame) -> ResultProfile:
+        """Profile of df (shared; treat as read-only)"""
+        key = figure_cache.fingerprint(df)
+        with self._lock:
+            profile = self._profiles.get(key)
+            if profile is not None:
+                self._profiles.move_to_end(key)
+                self.stats['hits'] += 1
+                return profile
+
+        profile = build_profile(df)
+        with self._lock:
+            self.stats['misses'] += 1
+            self._profiles[key] = profile
+            while len(self._profiles) > self.max_cached:
+                self._profiles.popitem(last=False)
+        return profile
+
+    def clear(self):
+        with self._lock:
+            self._profiles.clear()
+
+
+def build_profile(df: pd.DataFrame) -> ResultProfile:
+    """Compute every aggregate of a result frame"""
+    numeric = df.select_dtypes(include='number')
+    columns = numeric.describe().T if not numeric.empty else pd.DataFrame()
+    if not columns.empty:
+        columns['median'] = columns['50%']
+        columns['range'] = columns['max'] - columns['min']
+
+    non_null = df.notna().sum()
+    cells = df.shape[0] * df.shape[1]
+    missing = int(cells - non_null.sum())
+    times = _timestamps(df)
+    valid_times = times[~np.isnat(times)] if times is not None else np.array([], dtype='datetime64[ns]')
+
+    overall = {
+        'total_records': len(df),
+        'unique_floats': int(df['float_id'].nunique()) if 'float_id' in df.columns else 0,
+        'total_cycles': int(df['cycle_number'].nunique()) if 'cycle_number' in df.columns else 0,
+        'earliest_date': _scalar(valid_times.min()) if len(valid_times) else None,
+        'latest_date': _scalar(valid_times.max()) if len(valid_times) else None,
+        'num_columns': len(df.columns),
+    }
+    for key, name, stat in [('min_lat', 'latitude', 'min'), ('max_lat', 'latitude', 'max'),
+                            ('min_lon', 'longitude', 'min'), ('max_lon', 'longitude', 'max'),
+                            ('min_depth', 'pressure', 'min'), ('max_depth', 'pressure', 'max'),
+                            ('min_temp', 'temperature', 'min'), ('max_temp', 'temperature', 'max')]:
+        overall[key] = _scalar(columns.at[name, stat]) if name in columns.index else None
+
+    profile = ResultProfile(
+        overall=overall,
+        columns=columns,
+        missing_cells=missing,
+        completeness=(1 - missing / cells) * 100 if cells else 100.0,
+    )
+    if 'ocean_region' in df.columns:
+        profile.region_counts = df['ocean_region'].value_counts()
+    if 'data_mode' in df.columns:
+        profile.data_mode_counts = {str(k): int(v) for k, v in df['data_mode'].value_counts().items()}
+
+    qc_column = _qc_column(df)
+    if qc_column is not None and len(df):
+        profile.good_quality = float((df[qc_column] == 1).mean() * 100)
+
+    profile.panels = {
+        'regional': _regional(df),
+        'temporal': _temporal(df, times),
+        'quality': _quality(df, qc_column),
+        'parameters': pd.DataFrame([{
+            'total': len(df),
+            **{key: int(non_null.get(column, 0)) for key, column in PARAMETER_COLUMNS.items()},
+        }]),
+        'top_floats': _top_floats(df, times),
+    }
+    return profile
+
+
+def _regional(df: pd.DataFrame) -> pd.DataFrame:
+    """Records, floats and mean T/S per region in one groupby"""
+    if 'latitude' not in df.columns or 'longitude' not in df.columns:
+        return pd.DataFrame()
+    frame = pd.DataFrame({
+        'region': classify_frame(df).to_numpy(),
+        'float_id': df['float_id'].to_numpy() if 'float_id' in df.columns else np.nan,
+        'temperature': df['temperature'].to_numpy() if 'temperature' in df.columns else np.nan,
+        'salinity': df['salinity'].to_numpy() if 'salinity' in df.columns else np.nan,
+    })
+    regional = frame.groupby('region', sort=False).agg(
+        record_count=('region', 'size'),
+        float_count=('float_id', 'nunique'),
+        avg_temp=('temperature', 'mean'),
+        avg_salinity=('salinity', 'mean'),
+    ).reset_index()
+    return regional.sort_values('record_count', ascending=False).reset_index(drop=True)
+
+
+def _temporal(df: pd.DataFrame, times: Optional[np.ndarray]) -> pd.DataFrame:
+    """Records and active floats per calendar month"""
+    if times is None:
+        return pd.DataFrame()
+    frame = pd.DataFrame({
+        'month': times.astype('datetime64[M]').astype('datetime64[ns]'),
+        'float_id': df['float_id'].to_numpy() if 'float_id' in df.columns else np.nan,
+    })
+    return frame.groupby('month').agg(
+        measurements=('month', 'size'),
+        active_floats=('float_id', 'nunique'),
+    ).reset_index()
+
+
+def _quality(df: pd.DataFrame, qc_column: Optional[str]) -> pd.DataFrame:
+    """Record count per QC label"""
+    if qc_column is None:
+        return pd.DataFrame()
+    labels = df[qc_column].map(QUALITY_LABELS).fillna('Unknown')
+    counts = labels.value_counts()
+    return counts.rename_axis('quality').reset_index(name='count')
+
+
+def _top_floats(df: pd.DataFrame, times: Optional[np.ndarray]) -> pd.DataFrame:
+    """Floats with the most measurements, with cycles, time span and mean position"""
+    if 'float_id' not in df.columns:
+        return pd.DataFrame()
+    frame = pd.DataFrame({
+        'float_id': df['float_id'].to_numpy(),
+        'cycle_number': df['cycle_number'].to_numpy() if 'cycle_number' in df.columns else np.nan,
+        'timestamp': times if times is not None else np.datetime64('NaT', 'ns'),
+        'latitude': df['latitude'].to_numpy() if 'latitude' in df.columns else np.nan,
+        'longitude': df['longitude'].to_numpy() if 'longitude' in df.columns else np.nan,
+    })
+    floats = frame.groupby('float_id').agg(
+        measurements=('float_id', 'size'),
+        cycles=('cycle_number', 'nunique'),
+        first_measurement=('timestamp', 'min'),
+        last_measurement=('timestamp', 'max'),
+        avg_lat=('latitude', 'mean'),
+        avg_lon=('longitude', 'mean'),
+    )
+    return floats.nlargest(TOP_FLOATS, 'measurements').reset_index()
+
+
+def _timestamps(df: pd.DataFrame) -> Optional[np.ndarray]:
+    """Naive datetime64[ns] timestamps (None without a timestamp column)"""
+    return as_datetime64(df['timestamp']) if 'timestamp' in df.columns else None
+
+
+def _qc_column(df: pd.DataFrame) -> Optional[str]:
+    for column in ('temp_qc', 'qc_flag'):
+        if column in df.columns:
+            return column
+    return None
+
+
+def _scalar(value: Any) -> Any:
+    """NumPy scalar -> Python / pandas value, missing -> None"""
+    if value is None or pd.isna(value):
+        return None
+    if isinstance(value, np.datetime64):
+        return pd.Timestamp(value)
+    return value.item() if isinstance(value, np.generic) else value
+
+
+# Shared by all sessions in the process (keys are content hashes)
+result_profiler = ResultProfiler()
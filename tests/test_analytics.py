@@ -0,0 +1,407 @@
+import unittest
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import numpy as np
+import pandas as pd
+
+from advanced_analytics.profile_analytics import AdvancedProfileAnalytics
+from advanced_analytics.thermocline_engine import BatchThermoclineEngine
+from advanced_analytics.profile_batch import ProfileBatch, count_profiles
+from advanced_analytics.profile_qc import ProfileQC
+from advanced_analytics.derived_variables import DerivedVariableEngine, sigma_t
+from advanced_analytics.climatology import ClimatologyEngine, ClimatologyTable
+from advanced_analytics.standard_levels import StandardLevelInterpolator, interpolate_to_levels
+from advanced_analytics.water_mass_classifier import WaterMassClassifier, WaterMassRule
+from advanced_analytics.trend_service import TrendService, estimate_trends
+from advanced_analytics.parallel_executor import (
+    AnalyticsExecutor, AnalyticsTimeout, partition_profiles, run_task
+)
+
+
+def synthetic_profiles(n_profiles=6, n_levels=60, seed=0):
+    """Long-format rows for several floats with a sigmoid thermocline"""
+    rng = np.random.default_rng(seed)
+    pressure = np.sort(rng.uniform(0, 1500, (n_profiles, n_levels)), axis=1)
+    depth = rng.uniform(60, 160, (n_profiles, 1))
+    temperature = 28 - 18 / (1 + np.exp(-(pressure - depth) / 20)) - pressure * 0.002
+    return pd.DataFrame({
+        'float_id': np.repeat([f"290{i // 3}" for i in range(n_profiles)], n_levels),
+        'cycle_number': np.repeat(np.arange(n_profiles) % 3, n_levels),
+        'pressure': pressure.ravel(),
+        'temperature': temperature.ravel(),
+        'latitude': np.repeat(rng.uniform(-20, 20, n_profiles), n_levels),
+        'longitude': 70.0
+    })
+
+
+class TestBatchThermocline(unittest.TestCase):
+    """Batched per-profile thermocline (no database required)"""
+
+    def setUp(self):
+        self.df = synthetic_profiles()
+        # Skip DatabaseSetup; only the pure calculation methods are used
+        self.analytics = AdvancedProfileAnalytics.__new__(AdvancedProfileAnalytics)
+        self.analytics.thermocline_engine = BatchThermoclineEngine()
+        self.analytics.profile_qc = ProfileQC()
+
+    def test_padded_batch_layout(self):
+        """Rows are split per profile and sorted by pressure"""
+        shuffled = self.df.sample(frac=1.0, random_state=1)
+        batch = ProfileBatch.from_dataframe(shuffled)
+
+        self.assertEqual(batch.n_profiles, 6)
+        self.assertTrue(np.all(batch.n_levels == 60))
+        self.assertTrue(np.all(np.diff(batch.pressure, axis=1) > 0))
+
+    def test_matches_single_profile_method(self):
+        """Each profile gets the same result as the single-profile method"""
+        profiles = self.analytics.thermocline_engine.compute(self.df)
+        self.assertEqual(len(profiles), count_profiles(self.df))
+
+        for (float_id, cycle), rows in self.df.groupby(['float_id', 'cycle_number']):
+            single = self.analytics.calculate_thermocline_advanced(rows.drop(columns=['float_id']))
+            batched = profiles[(profiles['float_id'] == float_id) &
+                               (profiles['cycle_number'] == cycle)].iloc[0]
+            for key in ['thermocline_depth_dbar', 'thermocline_strength_deg_per_m',
+                        'thermocline_width_m', 'deep_temp_celsius']:
+                self.assertAlmostEqual(single[key], batched[key], places=9)
+
+    def test_multi_profile_input_is_not_pooled(self):
+        """Many-profile frames are analyzed per profile, then summarized"""
+        result = self.analytics.calculate_thermocline_advanced(self.df)
+
+        self.assertTrue(result['success'])
+        self.assertEqual(result['method'], 'batched_per_profile')
+        self.assertEqual(result['profiles_analyzed'], 6)
+        self.assertGreater(result['thermocline_depth_dbar'], 50)
+        self.assertLess(result['thermocline_depth_dbar'], 170)
+
+
+class TestProfileQC(unittest.TestCase):
+    """Vectorized inversion / spike checks"""
+
+    def setUp(self):
+        self.df = synthetic_profiles()
+        self.df['salinity'] = 35.0
+        self.qc = ProfileQC()
+
+    def test_sigma_t_check_value(self):
+        """UNESCO EOS-80 check value (S=35, T=25, p=0)"""
+        self.assertAlmostEqual(sigma_t(25.0, 35.0), 23.343, places=3)
+
+    def test_finds_every_inversion_layer(self):
+        """Two separate warm layers in one profile give two layers"""
+        pressure = np.arange(0, 400, 10.0)
+        temperature = 25 - pressure * 0.03
+        temperature[10:12] += 1.0   # 100-110 dbar
+        temperature[25] += 1.0      # 250 dbar
+        profile = pd.DataFrame({'pressure': pressure, 'temperature': temperature, 'salinity': 35.0})
+
+        layers = self.qc.check_profile(profile)['temperature_inversions']
+        self.assertEqual(len(layers), 2)
+        self.assertEqual(layers[0]['top_dbar'], 90.0)
+        self.assertEqual(layers[1]['top_dbar'], 240.0)
+        self.assertGreater(len(self.qc.check_profile(profile)['density_inversions']), 0)
+
+    def test_batch_flags_only_affected_profiles(self):
+        """Spikes and inversions are attributed to the right profile"""
+        df = self.df.copy()
+        target = (df['float_id'] == '2901') & (df['cycle_number'] == 1)
+        idx = df[target].index[30]
+        df.loc[idx, 'temperature'] += 8.0
+
+        result = self.qc.run(df)
+        profiles = result['profiles'].set_index(['float_id', 'cycle_number'])
+
+        self.assertEqual(len(profiles), 6)
+        self.assertEqual(profiles.loc[('2901', 1), 'spike_count'], 1)
+        self.assertEqual(int(profiles['spike_count'].sum()), 1)
+        self.assertTrue(profiles.loc[('2901', 1), 'has_temperature_inversion'])
+        self.assertEqual(int(profiles['temperature_inversion_layers'].sum()), 1)
+
+
+class TestDerivedVariables(unittest.TestCase):
+    """Equation-of-state layer (GSW when installed, EOS-80 otherwise)"""
+
+    def setUp(self):
+        self.df = synthetic_profiles()
+        self.df['salinity'] = 34.5 + self.df['pressure'] * 0.0005
+        self.engine = DerivedVariableEngine()
+
+    def test_stable_column_has_positive_n_squared(self):
+        """Rows come back aligned to the input index, even when shuffled"""
+        shuffled = self.df.sample(frac=1.0, random_state=2)
+        derived = self.engine.compute(shuffled)
+
+        self.assertTrue(derived.index.equals(shuffled.index))
+        combined = shuffled.join(derived).sort_values(['float_id', 'cycle_number', 'pressure'])
+        n2 = combined.groupby(['float_id', 'cycle_number'])['n_squared'].apply(lambda s: s.iloc[1:])
+        self.assertTrue((n2 > 0).all())
+        self.assertTrue(combined['sigma0'].between(20, 30).all())
+
+    def test_attach_keeps_materialized_values(self):
+        """Materialized columns are read, not recomputed"""
+        df = self.engine.attach(self.df)
+        df['sigma0'] = 99.0
+        self.assertTrue((self.engine.attach(df)['sigma0'] == 99.0).all())
+
+
+class TestClimatology(unittest.TestCase):
+    """Depth-binned climatology and anomaly z-scores"""
+
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        n = 4000
+        pressure = rng.uniform(0, 1500, n)
+        self.df = pd.DataFrame({
+            'pressure': pressure,
+            'temperature': np.where(pressure < 100, 28.0, 8.0) + rng.normal(0, 0.5, n),
+            'latitude': 15.0,
+            'longitude': 65.0,
+            'timestamp': pd.Timestamp('2024-06-15')
+        })
+        self.engine = ClimatologyEngine(min_count=10)
+
+    def test_surface_water_is_not_anomalous(self):
+        """Warm surface water is compared with its own depth bin"""
+        scored = self.engine.score(self.df, 'temperature')
+        self.assertTrue(scored.index.equals(self.df.index))
+        self.assertLess(float(scored['z_score'].abs().max()), 5)
+        self.assertTrue((scored['climatology_level'] == 'region_month').all())
+
+    def test_cube_cells_and_fallback_level(self):
+        """Cube cells fold into calendar months; sparse cells fall back"""
+        cells = pd.DataFrame({
+            'region': ['Arabian Sea', 'Arabian Sea'],
+            'month': pd.to_datetime(['2023-06-01', '2024-06-01']),
+            'depth_bin': [0, 0],
+            'n': [50, 50],
+            'value_sum': [50 * 28.0, 50 * 29.0],
+            'value_sum_sq': [50 * 28.0 ** 2 + 49, 50 * 29.0 ** 2 + 49]
+        })
+        table = ClimatologyTable.from_cells('temperature', cells)
+        rows = pd.DataFrame({'pressure': [5.0, 5.0], 'temperature': [28.5, 35.0],
+                             'ocean_region': ['Arabian Sea', 'Arabian Sea'],
+                             'timestamp': pd.to_datetime(['2025-06-03', '2025-01-03'])})
+
+        scored = self.engine.score(rows, 'temperature', table=table)
+        self.assertAlmostEqual(scored['climatology_mean'].iloc[0], 28.5)
+        self.assertEqual(list(scored['climatology_level']), ['region_month', 'region'])
+        self.assertEqual(len(self.engine.anomalies(rows, 'temperature', 2.0, table=table)), 1)
+
+    def test_cube_table_follows_watermark(self):
+        """Cached tables are rebuilt once the cube has folded in new rows"""
+        class Cube:
+            last_id, reads = 10, 0
+
+            def watermark(self):
+                return self.last_id
+
+            def cells(self, parameter):
+                self.reads += 1
+                return pd.DataFrame({'region': ['Arabian Sea'], 'month': pd.to_datetime(['2024-06-01']),
+                                     'depth_bin': [0], 'n': [50], 'value_sum': [50 * 28.0],
+                                     'value_sum_sq': [50 * 28.0 ** 2 + 49]})
+
+        cube = Cube()
+        engine = ClimatologyEngine(cube)
+        first = engine.table('temperature')
+        self.assertIs(engine.table('temperature'), first)
+        cube.last_id = 20
+        self.assertIsNot(engine.table('temperature'), first)
+        self.assertEqual(cube.reads, 2)
+
+
+class TestStandardLevels(unittest.TestCase):
+    """Per-profile interpolation onto standard levels"""
+
+    def test_linear_interpolation_and_range(self):
+        """Exact on linear profiles; no extrapolation past the deepest sample"""
+        pressure = np.array([[0.0, 10.0, 20.0, np.nan], [5.0, np.nan, np.nan, np.nan]])
+        values = np.array([[0.0, 1.0, 2.0, np.nan], [7.0, np.nan, np.nan, np.nan]])
+        out = interpolate_to_levels(pressure, values, np.array([5.0, 15.0, 25.0]))
+
+        np.testing.assert_allclose(out[0], [0.5, 1.5, np.nan])
+        np.testing.assert_allclose(out[1], [7.0, np.nan, np.nan])
+
+    def test_grid_is_cached_per_profile(self):
+        """A second call with one changed profile re-interpolates only that one"""
+        df = synthetic_profiles()
+        interpolator = StandardLevelInterpolator()
+        first = interpolator.grid(df)
+        self.assertEqual(first.matrix('temperature').shape, (6, len(interpolator.levels)))
+
+        df.loc[df['float_id'] == '2900', 'temperature'] += 1.0
+        df = df[~((df['float_id'] == '2900') & (df['cycle_number'] != 0))]
+        second = interpolator.grid(df)
+        self.assertEqual(interpolator.stats['misses'], 6 + 1)
+        np.testing.assert_allclose(second.matrix('temperature')[0], first.matrix('temperature')[0] + 1.0)
+
+    def test_shared_interpolator_thread_safe(self):
+        """Concurrent grids through one small cache (constant eviction) stay consistent"""
+        from concurrent.futures import ThreadPoolExecutor
+        df = synthetic_profiles()
+        expected = StandardLevelInterpolator().grid(df).matrix('temperature')
+        interpolator = StandardLevelInterpolator(max_cached=3)
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            grids = list(pool.map(lambda _: interpolator.grid(df).matrix('temperature'), range(32)))
+        for matrix in grids:
+            np.testing.assert_allclose(matrix, expected)
+        self.assertEqual(sum(interpolator.stats.values()), 32 * 6)
+        self.assertLessEqual(len(interpolator._cache), 3)
+
+
+class TestAnalyticsExecutor(unittest.TestCase):
+    """Process-pool execution over profile partitions"""
+
+    def setUp(self):
+        self.df = synthetic_profiles(n_profiles=12).sample(frac=1.0, random_state=4)
+        self.executor = AnalyticsExecutor(max_workers=2, profiles_per_part=5, min_parallel_rows=0)
+
+    def tearDown(self):
+        self.executor.shutdown()
+
+    def test_partitions_keep_whole_profiles(self):
+        parts = partition_profiles(self.df, profiles_per_part=5)
+        self.assertEqual(len(parts), 3)
+        self.assertEqual(sum(len(part) for part in parts), len(self.df))
+        self.assertEqual(sum(count_profiles(part) for part in parts), 12)
+
+    def test_parallel_matches_inline(self):
+        """Merged partition results equal the single-process result"""
+        inline = run_task('thermocline', self.df)
+        parallel = self.executor.map('thermocline', self.df)
+        pd.testing.assert_frame_equal(inline, parallel, check_dtype=False)
+
+        with self.assertRaises(AnalyticsTimeout):
+            self.executor.map('thermocline', self.df, timeout=1e-6)
+
+    def test_retired_pool_stops_running_work(self):
+        import time
+        from concurrent.futures.process import BrokenProcessPool
+        pool = self.executor._get_pool()
+        future = pool.submit(time.sleep, 60)
+        while not future.running():
+            time.sleep(0.01)
+        self.executor._retire_pool(pool, terminate=True)
+        with self.assertRaises(BrokenProcessPool):
+            future.result(timeout=10)
+        self.assertIsNot(self.executor._get_pool(), pool)
+        self.assertFalse(self.executor.map('thermocline', self.df).empty)
+
+    def test_abandoned_job_spares_shared_pool(self):
+        """A timed-out job only kills workers when no other job uses the pool"""
+        import time
+        from concurrent.futures.process import BrokenProcessPool
+        pool = self.executor._get_pool()
+        other = self.executor._submit(pool, time.sleep, 60)
+        mine = self.executor._submit(pool, time.sleep, 60)
+        while not (other.running() and mine.running()):
+            time.sleep(0.01)
+
+        self.executor._release({mine: (0, pool)}, terminate=True)
+        self.assertIs(self.executor._get_pool(), pool)
+        self.assertFalse(other.done())
+
+        self.executor._release({other: (0, pool)}, terminate=True)
+        with self.assertRaises(BrokenProcessPool):
+            other.result(timeout=10)
+        self.assertIsNot(self.executor._get_pool(), pool)
+
+
+class TestWaterMassClassifier(unittest.TestCase):
+    """Rule-table classification in one pass"""
+
+    def setUp(self):
+        self.classifier = WaterMassClassifier([
+            WaterMassRule('Warm', temp_range=(20, None), depth_range=(0, 200)),
+            WaterMassRule('Shallow', depth_range=(0, 100)),
+            WaterMassRule('Cold', temp_range=(None, 5)),
+        ])
+        self.df = pd.DataFrame({
+            'float_id': ['a', 'a', 'a', 'b', 'b'],
+            'cycle_number': [1, 1, 1, 1, 1],
+            'pressure': [10.0, 150.0, 1500.0, 50.0, np.nan],
+            'temperature': [28.0, 22.0, 3.0, 10.0, 28.0],
+            'salinity': [35.0, 35.0, 34.5, 34.0, 35.0],
+        })
+
+    def test_first_matching_rule_labels(self):
+        labels = self.classifier.classify(self.df)
+        self.assertEqual(labels.iloc[:4].tolist(), ['Warm', 'Warm', 'Cold', 'Shallow'])
+        self.assertTrue(pd.isna(labels.iloc[4]))
+
+    def test_summaries(self):
+        summary = {mass['name']: mass for mass in self.classifier.summarize(self.df)}
+        # Overlapping envelopes count a row for every mass it falls in
+        self.assertEqual(summary['Shallow']['measurements'], 2)
+        self.assertEqual(summary['Warm']['depth_range_m'], (10.0, 150.0))
+
+        profiles = self.classifier.profile_summary(self.df).set_index('float_id')
+        self.assertEqual(profiles.loc['a', 'dominant_water_mass'], 'Warm')
+        self.assertEqual(profiles.loc['b', 'classified_levels'], 1)
+
+    def test_profile_summary_skips_rows_without_key(self):
+        df = pd.concat([self.df, pd.DataFrame({
+            'float_id': [None], 'cycle_number': [1], 'pressure': [20.0],
+            'temperature': [25.0], 'salinity': [35.0],
+        })], ignore_index=True)
+        profiles = self.classifier.profile_summary(df)
+        self.assertEqual(profiles['float_id'].tolist(), ['a', 'b'])
+        self.assertEqual(profiles['levels'].sum(), 5)
+        self.assertTrue(self.classifier.profile_summary(df.iloc[[-1]]).empty)
+
+
+class TestTrendService(unittest.TestCase):
+    """Deseasonalized trends over monthly cube series"""
+
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        months = pd.date_range('2012-01-01', periods=96, freq='MS')
+        rows = []
+        for region, slope in (('Arabian Sea', 0.003), ('Bay of Bengal', 0.0)):
+            for i, month in enumerate(months):
+                value = 27 + slope * i + 2 * np.cos(2 * np.pi * (month.month - 1) / 12) + rng.normal(0, 0.2)
+                rows.append({'region': region, 'month': month, 'depth_bin': 0,
+                             'n': 40, 'value_sum': value * 40, 'value_sum_sq': value ** 2 * 40})
+        self.cells = pd.DataFrame(rows)
+
+    def test_recovers_trend_under_seasonal_cycle(self):
+        result = TrendService(n_bootstrap=200).analyze_cells(
+            {'temperature': self.cells}, ['arabian', 'bengal']
+        ).set_index('region')
+
+        arabian = result.loc['Arabian Sea']
+        self.assertTrue(arabian['deseasonalized'])
+        self.assertAlmostEqual(arabian['sen_slope'], 0.003, delta=0.0005)
+        self.assertLess(arabian['ci_low'], 0.003)
+        self.assertGreater(arabian['ci_high'], 0.003)
+        self.assertAlmostEqual(arabian['seasonal_amplitude'], 2.0, delta=0.1)
+        self.assertTrue(arabian['significant'])
+        self.assertFalse(result.loc['Bay of Bengal', 'significant'])
+
+    def test_depth_mix_shift_is_not_a_trend(self):
+        """Steady surface and deep water, with ever more shallow samples, give no trend"""
+        months = pd.date_range('2012-01-01', periods=96, freq='MS')
+        rows = []
+        for i, month in enumerate(months):
+            for depth_bin, value, n in ((0, 28.0, 10 + i), (1000, 5.0, 40)):
+                rows.append({'region': 'Arabian Sea', 'month': month, 'depth_bin': depth_bin,
+                             'n': n, 'value_sum': value * n, 'value_sum_sq': value ** 2 * n})
+        result = TrendService(n_bootstrap=50).analyze_cells(
+            {'temperature': pd.DataFrame(rows)}, ['arabian']
+        ).iloc[0]
+        self.assertAlmostEqual(result['sen_slope'], 0.0, delta=1e-9)
+        self.assertAlmostEqual(result['ols_slope'], 0.0, delta=1e-9)
+
+    def test_short_series_reported_as_insufficient(self):
+        values = np.array([[1.0, 2.0, np.nan, 4.0]])
+        result = estimate_trends(values, pd.period_range('2020-01', periods=4, freq='M'), n_bootstrap=10)
+        self.assertEqual(result.loc[0, 'months_analyzed'], 3)
+        self.assertTrue(np.isnan(result.loc[0, 'sen_slope']))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+import sys
+from decimal import Decimal
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import numpy as np
+import pandas as pd
+
+from data_processing.result_serializer import (
+    dataframe_to_columns, dataframe_to_records, dumps, loads
+)
+
+class TestResultSerializer(unittest.TestCase):
+    """Test shared MCP/API result serialization"""
+
+    def setUp(self):
+        self.df = pd.DataFrame({
+            'float_id': ["b'2902115 '", None],
+            'cycle_number': [1, 2],
+            'timestamp': pd.to_datetime(['2023-03-01 12:00:00', None]),
+            'temperature': [28.5, np.nan],
+            'avg_temp': [Decimal('25.125'), None],
+        })
+
+    def test_columns_handle_special_types(self):
+        """Decimal -> float, Timestamp -> ISO string, NaN/NaT -> None"""
+        columns = dataframe_to_columns(self.df)
+
+        self.assertEqual(columns['avg_temp'], [25.125, None])
+        self.assertEqual(columns['timestamp'], ['2023-03-01T12:00:00', None])
+        self.assertEqual(columns['temperature'], [28.5, None])
+        self.assertEqual(columns['cycle_number'], [1, 2])
+        self.assertEqual(columns['float_id'], ["b'2902115 '", None])
+
+    def test_round_trip(self):
+        """Column JSON rebuilds the same frame shape"""
+        payload = loads(dumps({'data': dataframe_to_columns(self.df)}))
+        rebuilt = pd.DataFrame(payload['data'])
+
+        self.assertEqual(list(rebuilt.columns), list(self.df.columns))
+        self.assertEqual(len(rebuilt), len(self.df))
+
+    def test_records_match_columns(self):
+        """Records orientation carries the same values"""
+        records = dataframe_to_records(self.df)
+        self.assertEqual(records[0]['avg_temp'], 25.125)
+        self.assertIsNone(records[1]['temperature'])
+
+    def test_numpy_scalars_in_nested_results(self):
+        """Analysis dicts with NumPy scalars serialize"""
+        text = dumps({'depth': np.float64(85.0), 'count': np.int64(3), 'ok': np.bool_(True)})
+        self.assertEqual(loads(text), {'depth': 85.0, 'count': 3, 'ok': True})
+
+if __name__ == '__main__':
+    unittest.main()
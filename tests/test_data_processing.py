@@ -4,6 +4,10 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent))
 
 from data_processing.netcdf_extractor import NetCDFExtractor
+from data_processing.region_classifier import (
+    Region, box, classify, classify_frame, region_sql_filter
+)
+import numpy as np
 import pandas as pd
 
 class TestDataProcessing(unittest.TestCase):
@@ -40,5 +44,47 @@ class TestDataProcessing(unittest.TestCase):
         
         print("✅ Data types test passed")
 
+class TestRegionClassifier(unittest.TestCase):
+    """Vectorized ocean region classification"""
+
+    def test_matches_dashboard_boxes(self):
+        """Dashboard's old CASE boxes agree at these points (Red Sea / Southern Ocean were redefined)"""
+        lat = np.array([15.0, 15.0, 0.0, -30.0, 60.0, np.nan])
+        lon = np.array([65.0, 90.0, 70.0, 70.0, 70.0, 70.0])
+        self.assertEqual(list(classify(lat, lon)), [
+            'Arabian Sea', 'Bay of Bengal', 'Equatorial Indian Ocean',
+            'Southern Indian Ocean', 'Other Regions', 'Other Regions'
+        ])
+
+    def test_dateline_and_polygons(self):
+        """Multi-polygon regions across the dateline; triangles are exact"""
+        self.assertEqual(list(classify([0.0, 0.0, 0.0], [175.0, -175.0, 185.0])),
+                         ['Equatorial Pacific Ocean'] * 3)
+
+        triangle = Region('Triangle', [[(0, 0), (10, 0), (0, 10)]])
+        inside = triangle.contains(np.array([2.0, 8.0]), np.array([2.0, 8.0]))
+        self.assertEqual(list(inside), [True, False])
+
+    def test_stored_column_and_sql_filter(self):
+        """Stored regions are reused; queries map to equality filters"""
+        df = pd.DataFrame({'latitude': [15.0, 15.0], 'longitude': [65.0, 90.0],
+                           'ocean_region': ['Arabian Sea', None]})
+        self.assertEqual(list(classify_frame(df)), ['Arabian Sea', 'Bay of Bengal'])
+        self.assertEqual(region_sql_filter('salinity in the Bay of Bengal'),
+                         "ocean_region = 'Bay of Bengal'")
+        self.assertTrue(region_sql_filter('Indian Ocean floats').startswith('ocean_region IN ('))
+
+    def test_southern_ocean_keeps_old_band(self):
+        """'Southern Ocean' queries cover 30°S southwards; the label itself is south of 50°S"""
+        self.assertEqual(list(classify([-40.0, -55.0], [70.0, 70.0])),
+                         ['Southern Indian Ocean', 'Southern Ocean'])
+        predicate = region_sql_filter('temperature in the southern ocean')
+        self.assertIn("'Southern Indian Ocean'", predicate)
+        self.assertTrue(predicate.endswith("AND latitude <= -30)"))
+        self.assertEqual(region_sql_filter('antarctic floats'), "ocean_region = 'Southern Ocean'")
+        self.assertEqual(region_sql_filter('southern indian ocean salinity'),
+                         "ocean_region = 'Southern Indian Ocean'")
+
+
 if __name__ == '__main__':
     unittest.main()
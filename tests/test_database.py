@@ -0,0 +1,230 @@
+import unittest
+import sys
+from decimal import Decimal
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from database.streaming_executor import (
+    ResultFrameBuilder, strip_trailing_limit, get_sql_limit
+)
+from database.spatial_index import bounding_box, haversine_km
+from database.stats_cube import summarize_cells
+from database.statistics_service import PANELS, StatisticsService, _label_quality
+from database import models, statistics_service
+import numpy as np
+import pandas as pd
+import re
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+
+class TestStreamingExecutor(unittest.TestCase):
+    """Test streaming result accumulation (no database required)"""
+
+    def setUp(self):
+        self.columns = ['float_id', 'pressure', 'avg_temp']
+        self.rows = [(f"F{i}", float(i), Decimal("25.5")) for i in range(100)]
+
+    def test_decimal_columns_become_float(self):
+        """NUMERIC values are converted to float64"""
+        builder = ResultFrameBuilder(self.columns, None, 10**9)
+        builder.add(self.rows[:50])
+        builder.add(self.rows[50:])
+        df = builder.build()
+
+        self.assertEqual(len(df), 100)
+        self.assertEqual(str(df['avg_temp'].dtype), 'float64')
+        self.assertFalse(builder.truncated)
+
+    def test_row_budget(self):
+        """Row budget stops accumulation"""
+        builder = ResultFrameBuilder(self.columns, 30, 10**9)
+        self.assertFalse(builder.add(self.rows[:50]))
+        self.assertTrue(builder.truncated)
+        self.assertEqual(len(builder.build()), 30)
+
+    def test_byte_budget(self):
+        """Byte budget keeps only rows that fit"""
+        builder = ResultFrameBuilder(self.columns, None, 2000)
+        builder.add(self.rows)
+        result = builder.to_result(estimate=5000)
+
+        self.assertTrue(result.truncated)
+        self.assertLess(result.rows_fetched, 100)
+        self.assertLessEqual(result.bytes_used, 2000)
+        self.assertEqual(result.total_matching_records, 5000)
+        self.assertTrue(result.total_is_estimate)
+
+    def test_limit_helpers(self):
+        """LIMIT parsing and stripping"""
+        sql = "SELECT * FROM argo_profiles WHERE pressure < 100 LIMIT 500;"
+        self.assertEqual(get_sql_limit(sql), 500)
+        self.assertEqual(
+            strip_trailing_limit(sql),
+            "SELECT * FROM argo_profiles WHERE pressure < 100"
+        )
+
+class TestSpatialBoundingBox(unittest.TestCase):
+    """Bounding box must contain every point within the radius"""
+
+    def _assert_contains_circle(self, lat, lon, radius_km):
+        box = bounding_box(lat, lon, radius_km)
+        bearings = np.linspace(0, 2 * np.pi, 360)
+        # Points on the circle (spherical destination formula)
+        d = radius_km / 6371.0
+        lat1, lon1 = np.radians(lat), np.radians(lon)
+        lat2 = np.arcsin(np.sin(lat1) * np.cos(d) + np.cos(lat1) * np.sin(d) * np.cos(bearings))
+        lon2 = lon1 + np.arctan2(np.sin(bearings) * np.sin(d) * np.cos(lat1),
+                                 np.cos(d) - np.sin(lat1) * np.sin(lat2))
+        lat2, lon2 = np.degrees(lat2), (np.degrees(lon2) + 540) % 360 - 180
+
+        np.testing.assert_allclose(haversine_km(lat, lon, lat2, lon2), radius_km, rtol=1e-6)
+        self.assertTrue(np.all(lat2 >= box['lat_min'] - 1e-9))
+        self.assertTrue(np.all(lat2 <= box['lat_max'] + 1e-9))
+        if box['lon_min'] is not None:
+            if box['wraps_dateline']:
+                inside = (lon2 >= box['lon_min'] - 1e-9) | (lon2 <= box['lon_max'] + 1e-9)
+            else:
+                inside = (lon2 >= box['lon_min'] - 1e-9) & (lon2 <= box['lon_max'] + 1e-9)
+            self.assertTrue(np.all(inside))
+
+    def test_indian_ocean_radius(self):
+        self._assert_contains_circle(15.0, 65.0, 1000.0)
+
+    def test_high_latitude_and_dateline(self):
+        self._assert_contains_circle(-55.0, 178.0, 500.0)
+        box = bounding_box(-55.0, 178.0, 500.0)
+        self.assertTrue(box['wraps_dateline'])
+
+    def test_pole_drops_longitude_filter(self):
+        box = bounding_box(88.0, 10.0, 500.0)
+        self.assertIsNone(box['lon_min'])
+
+class TestStatsCube(unittest.TestCase):
+    """Cube cells must roll up to the same statistics as the raw rows"""
+
+    def test_rollup_matches_raw_statistics(self):
+        rng = np.random.default_rng(0)
+        raw = pd.DataFrame({
+            'region': rng.choice(['Arabian Sea', 'Bay of Bengal'], 5000),
+            'month': rng.choice(pd.date_range('2024-01-01', periods=6, freq='MS'), 5000),
+            'depth_bin': rng.choice([0, 10, 50, 100], 5000),
+            'value': rng.normal(25, 3, 5000)
+        })
+        cells = raw.groupby(['region', 'month', 'depth_bin'])['value'].agg(
+            n='count', value_sum='sum', value_sum_sq=lambda v: (v ** 2).sum(),
+            value_min='min', value_max='max'
+        ).reset_index()
+
+        rolled = summarize_cells(cells, by=['region']).set_index('region')
+        expected = raw.groupby('region')['value'].agg(['count', 'mean', 'std', 'min', 'max'])
+
+        np.testing.assert_array_equal(rolled['count'], expected['count'])
+        np.testing.assert_allclose(rolled[['mean', 'std', 'min', 'max']],
+                                   expected[['mean', 'std', 'min', 'max']], rtol=1e-9)
+
+        overall = summarize_cells(cells).iloc[0]
+        self.assertEqual(overall['count'], 5000)
+        self.assertAlmostEqual(overall['std'], raw['value'].std(), places=9)
+
+
+class CountingStatistics(StatisticsService):
+    """Statistics service with the database reads replaced by counters"""
+
+    def __init__(self, url, ttl):
+        self.engine = type('Engine', (), {'url': url})()
+        self.stats_cube = self
+        self.ttl = ttl
+        self._key = url
+        self.computed = 0
+        self.watermark = 1
+
+    def is_ready(self):
+        return True
+
+    def _safe_version(self):
+        return (('dashboard_stats', self.watermark),)
+
+    def panel(self, name, summaries, cube):
+        if name == 'overall':
+            self.computed += 1
+            return pd.DataFrame({'total_records': [self.computed]})
+        if name == 'quality' and self.watermark < 0:
+            raise RuntimeError('query failed')
+        return pd.DataFrame({name: [1]})
+
+
+class TestStatisticsService(unittest.TestCase):
+    """Test dashboard statistics caching (no database required)"""
+
+    def test_quality_labels(self):
+        counts = pd.DataFrame({'temp_qc': [1, 2, 4, -1, 7], 'count': [50, 20, 5, 3, 2]})
+        labelled = _label_quality(counts)
+        self.assertEqual(labelled['quality'].tolist()[:2], ['Good (QC=1)', 'Probably Good (QC=2)'])
+        self.assertEqual(labelled.set_index('quality')['count']['Unknown'], 5)
+
+    def test_shared_cache_and_watermark(self):
+        first = CountingStatistics('test://stats-cache', ttl=0)
+        second = CountingStatistics('test://stats-cache', ttl=0)
+        first.invalidate()
+
+        stats = first.get_statistics()
+        stats['overall'].loc[0, 'total_records'] = -1    # callers get copies
+        self.assertEqual(second.get_statistics()['overall'].iloc[0, 0], 1)
+        self.assertEqual((first.computed, second.computed), (1, 0))
+
+        second.watermark = 2     # new rows folded in by another process
+        self.assertEqual(second.get_statistics()['overall'].iloc[0, 0], 1)
+        self.assertEqual(second.computed, 1)
+        first.invalidate()
+
+    def test_failed_panel_is_empty_and_not_cached(self):
+        service = CountingStatistics('test://stats-failure', ttl=300)
+        service.invalidate()
+        service.watermark = -1
+        panels = [name for name, _ in service.iter_statistics()]
+        self.assertEqual(sorted(panels), sorted(PANELS))
+        self.assertTrue(service.get_statistics()['quality'].empty)
+        self.assertEqual(service.computed, 2)
+        service.invalidate()
+
+
+class TestStatisticsSQL(unittest.TestCase):
+    """Smoke-check the summary SQL (compiled for PostgreSQL, not executed)"""
+
+    MAINTENANCE = ['TOTALS_UPSERT', 'QUALITY_UPSERT', 'FLOATS_UPSERT', 'CYCLES_INSERT']
+    FLOAT_COLUMNS = ('latitude', 'longitude', 'pressure', 'temperature', 'salinity',
+                     'dissolved_oxygen', 'chlorophyll', 'ph')
+
+    def statements(self):
+        for name in self.MAINTENANCE:
+            yield name, getattr(statistics_service, name), {'last_id', 'max_id', 'name'}
+        for group in ('SUMMARY_QUERIES', 'FULL_SCAN_QUERIES'):
+            for panel, sql in getattr(statistics_service, group).items():
+                yield f"{group}[{panel}]", sql, {'name', 'limit'}
+
+    def test_statements_compile_with_supplied_params(self):
+        for name, sql, supplied in self.statements():
+            with self.subTest(name):
+                compiled = text(sql).compile(dialect=postgresql.dialect())
+                self.assertLessEqual(set(compiled.params), supplied)
+
+    def test_insert_columns_match_models(self):
+        for name in self.MAINTENANCE:
+            sql = getattr(statistics_service, name)
+            match = re.search(r"INSERT INTO (\w+)\s*\(([^)]*)\)", sql)
+            table = models.Base.metadata.tables[f"public.{match[1]}"]
+            with self.subTest(name):
+                self.assertLessEqual({c.strip() for c in match[2].split(',')}, set(table.columns.keys()))
+
+    def test_float_aggregates_skip_nan(self):
+        """PostgreSQL counts NaN and lets it win MAX/SUM; every float aggregate must filter it"""
+        bare = re.compile(
+            rf"\b(COUNT|MIN|MAX|SUM|AVG)\(\s*({'|'.join(self.FLOAT_COLUMNS)})\s*\)(?!\s*FILTER)", re.IGNORECASE)
+        for name, sql, _ in self.statements():
+            if 'FROM argo_profiles' in sql:
+                with self.subTest(name):
+                    self.assertEqual(bare.findall(sql), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import unittest
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from rag_engine.query_cost_guard import QueryCostGuard, ALLOW, REWRITE, ROUTE, REJECT
+from rag_engine.cube_router import StatsCubeRouter, route_to_cube
+
+
+class FakePlannerConnection:
+    """Returns canned EXPLAIN (FORMAT JSON) plans based on the SQL text"""
+
+    def __init__(self, cost_for):
+        self.cost_for = cost_for
+        self.explained = []
+
+    def execute(self, statement):
+        sql = str(statement)
+        self.explained.append(sql)
+        rows, cost = self.cost_for(sql)
+        plan = [{'Plan': {'Node Type': 'Limit', 'Plan Rows': rows, 'Total Cost': cost}}]
+        return type('Result', (), {'scalar': lambda self: plan})()
+
+
+class TestQueryCostGuard(unittest.TestCase):
+    """Test EXPLAIN-based guard decisions"""
+
+    def setUp(self):
+        self.guard = QueryCostGuard(engine=None, max_cost=1000, max_rows=5000, reject_cost=50000)
+
+    def test_cheap_query_allowed(self):
+        conn = FakePlannerConnection(lambda sql: (100, 50.0))
+        decision = self.guard.evaluate(conn, "SELECT * FROM argo_profiles WHERE float_id = 'x' LIMIT 100")
+        self.assertEqual(decision.action, ALLOW)
+        self.assertEqual(decision.estimated_rows, 100)
+
+    def test_limit_tightened(self):
+        conn = FakePlannerConnection(lambda sql: (1000, 500.0) if sql.endswith('LIMIT 1000') else (10000, 5000.0))
+        decision = self.guard.evaluate(conn, "SELECT * FROM argo_profiles WHERE pressure < 10 LIMIT 10000;")
+        self.assertEqual(decision.action, REWRITE)
+        self.assertTrue(decision.sql.endswith('LIMIT 1000'))
+
+    def test_sampling_added(self):
+        conn = FakePlannerConnection(lambda sql: (1000, 2000.0) if 'TABLESAMPLE' in sql else (1000, 80000.0))
+        decision = self.guard.evaluate(conn, "SELECT * FROM argo_profiles a WHERE a.temperature > 30 ORDER BY a.temperature DESC LIMIT 500")
+        self.assertEqual(decision.action, REWRITE)
+        self.assertIn('FROM argo_profiles a TABLESAMPLE SYSTEM (10)', decision.sql)
+        self.assertTrue(decision.sampled)
+
+    def test_nothing_to_rewrite_allowed(self):
+        # LIMIT already tight and two FROM argo_profiles, so neither rewrite applies
+        sql = ("SELECT * FROM argo_profiles WHERE float_id IN "
+               "(SELECT float_id FROM argo_profiles WHERE pressure > 1900) LIMIT 100")
+        conn = FakePlannerConnection(lambda s: (100, 20000.0))
+        decision = self.guard.evaluate(conn, sql)
+        self.assertEqual(decision.action, ALLOW)
+        self.assertEqual(decision.sql, sql)
+        self.assertFalse(decision.sampled)
+
+    def test_expensive_aggregate_routed_or_rejected(self):
+        sql = "SELECT AVG(temperature) FROM argo_profiles GROUP BY float_id"
+        conn = FakePlannerConnection(lambda s: (1, 10.0) if 'summary' in s else (10000, 90000.0))
+        self.assertEqual(self.guard.evaluate(conn, sql).action, REJECT)
+
+        self.guard.register_router(lambda s, plan: "SELECT * FROM summary")
+        decision = self.guard.evaluate(conn, sql)
+        self.assertEqual(decision.action, ROUTE)
+        self.assertEqual(decision.sql, "SELECT * FROM summary")
+
+class TestStatsCubeRouter(unittest.TestCase):
+    """Test routing of aggregates to the stats cube"""
+
+    def test_region_average_routed(self):
+        routed = route_to_cube(
+            "SELECT ocean_region, AVG(temperature) AS avg_temp, COUNT(*) FROM argo_profiles "
+            "WHERE timestamp >= '2023-01-01' AND pressure < 200 "
+            "GROUP BY ocean_region ORDER BY avg_temp DESC LIMIT 5;"
+        )
+        self.assertIn("FROM stats_cube", routed)
+        self.assertIn("parameter IN ('pressure', 'temperature')", routed)
+        self.assertIn("month >= '2023-01-01' AND depth_bin < 200", routed)
+        self.assertIn("GROUP BY region", routed)
+        self.assertTrue(routed.endswith("ORDER BY avg_temp DESC\nLIMIT 5"))
+
+    def test_unsupported_shapes_not_routed(self):
+        for sql in [
+            "SELECT float_id, AVG(temperature) FROM argo_profiles GROUP BY float_id",
+            "SELECT ocean_region, AVG(temperature) FROM argo_profiles WHERE latitude > 5 GROUP BY ocean_region",
+            "SELECT ocean_region, COUNT(DISTINCT float_id) FROM argo_profiles GROUP BY ocean_region",
+            "SELECT AVG(temperature) FROM argo_profiles WHERE pressure < 150",
+            "SELECT ocean_region, AVG(temperature) FROM argo_profiles",
+        ]:
+            self.assertIsNone(route_to_cube(sql), sql)
+
+    def test_router_requires_built_cube(self):
+        cube = type('Cube', (), {'ready': False, 'is_ready': lambda self: self.ready})()
+        router = StatsCubeRouter(cube)
+        sql = "SELECT AVG(salinity) FROM argo_profiles"
+        self.assertIsNone(router(sql, {}))
+        cube.ready = True
+        self.assertIn("FROM stats_cube", router(sql, {}))
+
+    def test_routed_answer_carries_caveat(self):
+        cube = type('Cube', (), {'watermark': lambda self: 1200})()
+        caveat = StatsCubeRouter(cube).caveat(
+            "SELECT ocean_region, AVG(temperature), COUNT(*) FROM argo_profiles GROUP BY ocean_region")
+        self.assertIn("rows up to id 1,200", caveat)
+        self.assertIn("Temperature uses QC flags 1-3 only", caveat)
+        self.assertIn("COUNT(*) counts rows with a pressure value", caveat)
+        self.assertNotIn("QC", StatsCubeRouter(cube).caveat("SELECT AVG(ph) FROM argo_profiles"))
+
+
+if __name__ == '__main__':
+    unittest.main()
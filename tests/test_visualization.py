@@ -0,0 +1,247 @@
+import unittest
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import numpy as np
+import pandas as pd
+
+import folium
+
+from visualization.map_reduction import collapse_profiles, hover_text, reduce_for_map
+from visualization.leaflet_layers import PointLayer, point_payload
+from visualization.trace_builder import decimate, profile_traces
+from visualization.interpolation_engine import InterpolationEngine
+from visualization.binning import aggregate_2d, as_datetime64, bin_axis
+from streamlit_app.utils.figure_cache import FigureCache
+from streamlit_app.utils.result_profile import ResultProfiler
+
+
+def map_rows(n_profiles: int = 40, levels: int = 25) -> pd.DataFrame:
+    """Long-format rows: n_profiles on a line of positions, `levels` depths each"""
+    rng = np.random.default_rng(7)
+    lat = np.linspace(-20, 20, n_profiles)
+    lon = np.linspace(50, 100, n_profiles)
+    return pd.DataFrame({
+        'float_id': np.repeat(np.arange(n_profiles) // 4, levels).astype(str),
+        'cycle_number': np.repeat(np.arange(n_profiles) % 4, levels),
+        'latitude': np.repeat(lat, levels),
+        'longitude': np.repeat(lon, levels),
+        'timestamp': np.repeat(pd.date_range('2023-01-01', periods=n_profiles, freq='D'), levels),
+        'pressure': np.tile(np.linspace(5, 1000, levels), n_profiles)[::-1],
+        'temperature': rng.normal(20, 3, n_profiles * levels),
+    })
+
+
+class TestMapReduction(unittest.TestCase):
+    """Map point reduction before plotting"""
+
+    def test_levels_collapse_to_surface_point(self):
+        df = map_rows()
+        profiles = collapse_profiles(df)
+        self.assertEqual(len(profiles), 40)
+
+        first = df[(df['float_id'] == '0') & (df['cycle_number'] == 0)]
+        surface = first.loc[first['pressure'].idxmin(), 'temperature']
+        row = profiles[(profiles['float_id'] == '0') & (profiles['cycle_number'] == 0)].iloc[0]
+        self.assertAlmostEqual(row['temperature'], surface)
+        self.assertEqual(row['levels'], 25)
+        self.assertEqual(row['max_pressure'], 1000)
+
+    def test_binning_respects_point_budget(self):
+        points = reduce_for_map(map_rows(), max_points=10)
+        self.assertTrue(points.binned)
+        self.assertLessEqual(len(points.frame), 10)
+        self.assertEqual(points.frame['count'].sum(), 40)
+
+        unbinned = reduce_for_map(map_rows(), max_points=100)
+        self.assertFalse(unbinned.binned)
+        self.assertEqual(len(unbinned.frame), 40)
+
+    def test_hover_text(self):
+        points = pd.DataFrame({'latitude': [10.0, 11.0], 'longitude': [70.0, 71.0],
+                               'temperature': [25.5, np.nan]})
+        text = hover_text(points)
+        self.assertEqual(text[0], 'Lat: 10.00°N<br>Lon: 70.00°E<br>Temp: 25.50°C')
+        self.assertNotIn('Temp', text[1])
+
+
+class TestLeafletLayers(unittest.TestCase):
+    """Columnar payload for client-side Leaflet markers"""
+
+    def test_payload_and_render(self):
+        payload = point_payload(map_rows(n_profiles=8))
+        self.assertEqual(len(payload['lat']), 8)
+        self.assertEqual(set(payload['fields']), {'float_id', 'cycle_number', 'date', 'temperature',
+                                                  'max_pressure', 'levels'})
+        expected = [0 if t > 28 else 1 if t > 25 else 2 if t > 20 else 3 for t in payload['fields']['temperature']]
+        self.assertEqual(payload['color'], expected)
+
+        m = folium.Map(location=[0, 70])
+        layer = PointLayer(payload, cluster=True)
+        layer.add_to(m)
+        html = m.get_root().render()
+        self.assertIn(f"var {layer.get_name()}_data = ", html)
+        self.assertIn('L.markerClusterGroup({"chunkedLoading": true})', html)
+        self.assertNotIn('L.marker(', html)
+
+
+class TestTraceBuilder(unittest.TestCase):
+    """Merged WebGL profile traces"""
+
+    def test_few_profiles_get_own_traces(self):
+        traces = profile_traces(map_rows(n_profiles=3), x='temperature', max_traces=5)
+        self.assertEqual([t.name for t in traces], ['0 0', '0 1', '0 2'])
+        self.assertEqual(type(traces[0]).__name__, 'Scatter')
+        self.assertTrue(np.all(np.diff(traces[0].y) > 0))   # sorted by pressure
+
+    def test_many_profiles_merge_with_separators(self):
+        df = map_rows(n_profiles=60).sample(frac=1.0, random_state=1)
+        traces = profile_traces(df, x='temperature', max_traces=10)
+        self.assertEqual(len(traces), 1)
+        self.assertEqual(type(traces[0]).__name__, 'Scattergl')
+        y = np.asarray(traces[0].y, dtype='float64')
+        self.assertEqual(np.isnan(y).sum(), 59)
+        self.assertEqual((~np.isnan(y)).sum(), len(df))
+
+    def test_decimation_keeps_profile_ends(self):
+        segments = np.repeat(np.arange(4), 100)
+        keep = decimate(segments, max_points=100)
+        self.assertLessEqual(keep.sum(), 110)
+        starts = np.r_[0, np.flatnonzero(np.diff(segments)) + 1]
+        self.assertTrue(keep[starts].all() and keep[starts[1:] - 1].all() and keep[-1])
+
+
+class TestInterpolationEngine(unittest.TestCase):
+    """Test cached scattered-data gridding"""
+
+    def setUp(self):
+        rng = np.random.default_rng(2)
+        self.x = rng.uniform(60, 80, 500)
+        self.y = rng.uniform(0, 2000, 500)
+        self.engine = InterpolationEngine()
+
+    def test_linear_field_reproduced(self):
+        xs, ys, z = self.engine.regular_grid(self.x, self.y, 2 * self.x - self.y / 100, nx=20, ny=20)
+        xi, yi = np.meshgrid(xs, ys)
+        inside = ~np.isnan(z)
+        self.assertGreater(inside.mean(), 0.8)
+        np.testing.assert_allclose(z[inside], (2 * xi - yi / 100)[inside], atol=1e-9)
+
+    def test_triangulation_reused_across_parameters(self):
+        self.engine.regular_grid(self.x, self.y, self.x)
+        self.engine.regular_grid(self.x, self.y, self.y)
+        self.assertEqual(self.engine.stats, {'hits': 1, 'misses': 1})
+
+    def test_dense_points_binned(self):
+        engine = InterpolationEngine(max_points=400)
+        z = engine.regular_grid(self.x, self.y, self.x, nx=10, ny=10)[2]
+        points = next(iter(engine._points.values()))
+        self.assertTrue(points.binned)
+        self.assertLessEqual(len(points.nodes), 400)
+        self.assertTrue(np.isfinite(z).any())
+
+    def test_shared_engine_thread_safe(self):
+        """Concurrent sessions gridding through one engine share its caches safely"""
+        engine = InterpolationEngine(max_cached=2)
+        inputs = [(self.x + shift, self.y) for shift in range(4)] * 8
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            grids = list(pool.map(lambda xy: engine.regular_grid(xy[0], xy[1], xy[0], nx=10, ny=10)[2], inputs))
+        self.assertTrue(all(np.isfinite(z).any() for z in grids))
+        self.assertEqual(sum(engine.stats.values()), len(inputs))
+        self.assertLessEqual(len(engine._triangulations), 2)
+
+
+class TestBinning(unittest.TestCase):
+    """Test fixed-resolution 2D aggregation"""
+
+    def test_few_distinct_values_kept_exact(self):
+        times = as_datetime64(pd.Series(['2024-01-02', '2024-01-01', None, '2024-01-02']))
+        axis = bin_axis(times, bins=10)
+        self.assertIsNone(axis.edges)
+        self.assertEqual(axis.n, 2)
+        self.assertEqual(axis.codes.tolist(), [1, 0, -1, 1])
+
+    def test_cell_means_match_groupby(self):
+        rng = np.random.default_rng(3)
+        df = pd.DataFrame({'x': rng.uniform(0, 10, 5000), 'y': rng.uniform(0, 1, 5000),
+                           'v': rng.normal(size=5000)})
+        df.loc[::7, 'v'] = np.nan
+        x, y = bin_axis(df['x'].to_numpy(), 8), bin_axis(df['y'].to_numpy(), 4)
+        binned = aggregate_2d(x, y, {'v': df['v'].to_numpy()})
+        self.assertEqual(binned.count.shape, (4, 8))
+        self.assertEqual(binned.count.sum(), len(df))
+        expected = df.groupby([y.codes, x.codes])['v'].mean().unstack().to_numpy()
+        np.testing.assert_allclose(binned.mean('v'), expected)
+
+
+class TestFigureCache(unittest.TestCase):
+    """Test the rerun figure cache"""
+
+    def setUp(self):
+        self.df = map_rows(n_profiles=5, levels=4)
+        self.builds = 0
+
+    def build(self):
+        import plotly.graph_objects as go
+        self.builds += 1
+        return go.Figure(go.Scatter(x=self.df['temperature'], y=self.df['pressure']))
+
+    def test_hit_returns_independent_copy(self):
+        cache = FigureCache()
+        first = cache.figure('profile', self.df, self.build, parameter='temperature')
+        first.update_layout(title='changed')
+        second = cache.figure('profile', self.df.copy(), self.build, parameter='temperature')
+        self.assertEqual(self.builds, 1)
+        self.assertIsNone(second.layout.title.text)
+        cache.figure('profile', self.df, self.build, parameter='salinity')
+        self.assertEqual(self.builds, 2)
+
+    def test_in_place_edit_changes_key(self):
+        cache = FigureCache()
+        cache.figure('profile', self.df, self.build)
+        self.df['temperature'] = self.df['temperature'] + 1
+        cache.figure('profile', self.df, self.build)
+        self.assertEqual(self.builds, 2)
+
+    def test_lru_eviction(self):
+        cache = FigureCache(max_entries=2)
+        for kind in ('a', 'b', 'a', 'c', 'a'):
+            cache.figure(kind, self.df, self.build)
+        self.assertEqual(self.builds, 3)
+        self.assertEqual(cache.info()['evictions'], 1)
+
+
+class TestResultProfile(unittest.TestCase):
+    """Test query result profiling"""
+
+    def test_dashboard_panels(self):
+        df = map_rows(n_profiles=8, levels=5)
+        df.loc[:4, 'temperature'] = np.nan
+        stats = ResultProfiler().profile(df).dashboard_stats()
+
+        self.assertEqual(stats['overall']['unique_floats'], 2)
+        self.assertEqual(stats['overall']['earliest_date'], pd.Timestamp('2023-01-01'))
+        self.assertEqual(stats['regional']['record_count'].sum(), len(df))
+        self.assertEqual(stats['temporal']['measurements'].sum(), len(df))
+        self.assertEqual(stats['parameters'].iloc[0]['has_temperature'], len(df) - 5)
+        top = stats['top_floats'].set_index('float_id')
+        self.assertEqual(top.loc['0', 'measurements'], 20)
+        self.assertEqual(top.loc['0', 'cycles'], 4)
+
+    def test_memoized_by_content(self):
+        profiler = ResultProfiler()
+        df = map_rows(n_profiles=4, levels=3)
+        first = profiler.profile(df)
+        self.assertIs(profiler.profile(df.copy()), first)
+        temporal = first.dashboard_stats()['temporal']
+        temporal['month'] = None     # callers get copies
+        self.assertFalse(first.panels['temporal']['month'].isna().any())
+        df['temperature'] = df['temperature'] + 1
+        self.assertIsNot(profiler.profile(df), first)
+        self.assertEqual(profiler.stats, {'hits': 1, 'misses': 2})
+
+
+if __name__ == '__main__':
+    unittest.main()
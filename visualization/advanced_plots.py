@@ -9,7 +9,12 @@ from plotly.subplots import make_subplots
 import pandas as pd
 import numpy as np
 from typing import Optional, List, Dict
-from scipy.interpolate import griddata
+from advanced_analytics.profile_batch import profile_keys
+from advanced_analytics.standard_levels import standard_levels
+from visualization.binning import (DEPTH_BINS, TIME_BINS, TS_BINS, VALUE_BINS, BinAxis,
+                                   aggregate_2d, as_datetime64, bin_axis, bin_label)
+from visualization.interpolation_engine import interpolation_engine
+from visualization.trace_builder import MAX_TRACES, profile_traces
 
 
 class AdvancedOceanPlots:
@@ -39,32 +44,32 @@ class AdvancedOceanPlots:
         if df.empty or 'pressure' not in df.columns:
             return self._empty_figure(title or "Section Plot")
         
-        # Sort by latitude or longitude
-        if 'latitude' in df.columns:
-            df = df.sort_values('latitude')
-            distance = df['latitude'].values
-            x_label = 'Latitude (°N)'
+        # Profiles on standard levels: contour the (level x profile) matrix directly
+        axis = 'latitude' if 'latitude' in df.columns else 'longitude'
+        x_label = 'Latitude (°N)' if axis == 'latitude' else 'Longitude (°E)'
+        
+        if profile_keys(df) and axis in df.columns:
+            grid = standard_levels.grid(df, (parameter,))
+            order = np.argsort(grid.profiles[axis].to_numpy(dtype='float64'), kind='stable')
+            occupied = grid.occupied_levels(parameter)
+            x = grid.profiles[axis].to_numpy(dtype='float64')[order]
+            y = grid.levels[occupied]
+            z = grid.matrix(parameter)[order][:, occupied].T
         else:
-            df = df.sort_values('longitude')
-            distance = df['longitude'].values
-            x_label = 'Longitude (°E)'
-        
-        depth = df['pressure'].values
-        values = df[parameter].values
-        
-        # Create grid for interpolation
-        xi = np.linspace(distance.min(), distance.max(), 100)
-        yi = np.linspace(depth.min(), depth.max(), 100)
-        xi, yi = np.meshgrid(xi, yi)
-        
-        # Interpolate
-        zi = griddata((distance, depth), values, (xi, yi), method='linear')
+            # Unkeyed points: fall back to scattered-data gridding
+            # (triangulation cached, so switching parameter does not redo it)
+            x, y, z = interpolation_engine.regular_grid(
+                df[axis].to_numpy(dtype='float64'),
+                df['pressure'].to_numpy(dtype='float64'),
+                df[parameter].to_numpy(dtype='float64'),
+                nx=100, ny=100
+            )
         
         # Create contour plot
         fig = go.Figure(data=go.Contour(
-            x=xi[0],
-            y=yi[:, 0],
-            z=zi,
+            x=x,
+            y=y,
+            z=z,
             colorscale=self.color_scales.get(parameter, 'Viridis'),
             colorbar=dict(title=parameter.capitalize()),
             contours=dict(
@@ -91,26 +96,39 @@ class AdvancedOceanPlots:
         self,
         df: pd.DataFrame,
         parameter: str = 'temperature',
-        title: str = None
+        title: str = None,
+        time_bins: int = TIME_BINS,
+        depth_bins: int = DEPTH_BINS
     ) -> go.Figure:
         """
         Create Hovmöller diagram (time vs depth)
-        Shows temporal evolution of vertical structure
+        Shows temporal evolution of vertical structure on at most
+        time_bins x depth_bins cells (one column per time when fewer)
         """
         
         if df.empty or 'timestamp' not in df.columns or 'pressure' not in df.columns:
             return self._empty_figure(title or "Hovmöller Diagram")
         
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
-        df = df.sort_values('timestamp')
+        if profile_keys(df):
+            # Profiles on standard levels, averaged into time bins
+            grid = standard_levels.grid(df, (parameter,))
+            matrix = grid.matrix(parameter)
+            n_levels = len(grid.levels)
+            times = bin_axis(as_datetime64(grid.profiles['timestamp']), time_bins)
+            x = BinAxis(np.repeat(times.codes, n_levels), times.centers, times.edges)
+            y = BinAxis(np.tile(np.arange(n_levels), len(matrix)), grid.levels)
+            binned = aggregate_2d(x, y, {parameter: matrix.ravel()})
+        else:
+            # Raw rows averaged into (time, pressure) cells
+            x = bin_axis(as_datetime64(df['timestamp']), time_bins)
+            y = bin_axis(df['pressure'].to_numpy(dtype='float64'), depth_bins)
+            binned = aggregate_2d(x, y, {parameter: df[parameter].to_numpy(dtype='float64')})
         
-        # Pivot for heatmap
-        pivot = df.pivot_table(
-            values=parameter,
-            index='pressure',
-            columns='timestamp',
-            aggfunc='mean'
-        )
+        # Keep only depths / times that hold values
+        filled = binned.counts[parameter] > 0
+        rows, columns = filled.any(axis=1), filled.any(axis=0)
+        pivot = pd.DataFrame(binned.mean(parameter)[rows][:, columns],
+                             index=y.centers[rows], columns=x.centers[columns])
         
         fig = go.Figure(data=go.Heatmap(
             x=pivot.columns,
@@ -136,38 +154,45 @@ class AdvancedOceanPlots:
     def create_ts_density_plot(
         self,
         df: pd.DataFrame,
-        title: str = "T-S Diagram with Density Contours"
+        title: str = "T-S Diagram with Density Contours",
+        bins: int = TS_BINS
     ) -> go.Figure:
         """
         Create T-S diagram with density (sigma-theta) contours
-        Standard oceanographic analysis
+        Standard oceanographic analysis, drawn as a bins x bins T-S grid
         """
         
         if df.empty or 'temperature' not in df.columns or 'salinity' not in df.columns:
             return self._empty_figure(title)
         
-        # Calculate potential density (simplified)
-        # For production, use gsw (Gibbs SeaWater) library
-        df['density'] = 1000 + 0.7 * df['salinity'] - 0.2 * df['temperature']
+        # Salinity x temperature cells, coloured by mean pressure (or point count)
+        x = bin_axis(df['salinity'].to_numpy(dtype='float64'), bins, exact=False)
+        y = bin_axis(df['temperature'].to_numpy(dtype='float64'), bins, exact=False)
+        if x.edges is None or y.edges is None:
+            return self._empty_figure(title)
         
-        # Create scatter plot
-        fig = px.scatter(
-            df,
-            x='salinity',
-            y='temperature',
-            color='pressure',
-            color_continuous_scale='Viridis_r',
-            labels={
-                'salinity': 'Salinity (PSU)',
-                'temperature': 'Temperature (°C)',
-                'pressure': 'Pressure (dbar)'
-            },
-            title=title
-        )
+        has_pressure = 'pressure' in df.columns
+        binned = aggregate_2d(x, y, {'pressure': df['pressure'].to_numpy(dtype='float64')} if has_pressure else None)
+        if has_pressure:
+            z, colorbar, colorscale = binned.mean('pressure'), 'Pressure (dbar)', 'Viridis_r'
+        else:
+            z, colorbar, colorscale = np.where(binned.count > 0, binned.count, np.nan), 'Points', 'Viridis'
+        
+        fig = go.Figure(go.Heatmap(
+            x=x.centers,
+            y=y.centers,
+            z=z,
+            customdata=binned.count,
+            colorscale=colorscale,
+            colorbar=dict(title=colorbar),
+            hovertemplate=('Salinity: %{x:.2f} PSU<br>Temperature: %{y:.2f} °C<br>'
+                           + colorbar + ': %{z:.0f}<br>Points: %{customdata}<extra></extra>'),
+            name='Measurements'
+        ))
         
-        # Add density contours
-        sal_range = np.linspace(df['salinity'].min(), df['salinity'].max(), 50)
-        temp_range = np.linspace(df['temperature'].min(), df['temperature'].max(), 50)
+        # Add density contours (simplified; for production, use gsw)
+        sal_range = np.linspace(x.edges[0], x.edges[-1], 50)
+        temp_range = np.linspace(y.edges[0], y.edges[-1], 50)
         sal_grid, temp_grid = np.meshgrid(sal_range, temp_range)
         density_grid = 1000 + 0.7 * sal_grid - 0.2 * temp_grid
         
@@ -177,6 +202,7 @@ class AdvancedOceanPlots:
             z=density_grid,
             showscale=False,
             contours=dict(
+                coloring='none',
                 showlabels=True,
                 labelfont=dict(size=10, color='gray')
             ),
@@ -185,6 +211,11 @@ class AdvancedOceanPlots:
             name='Density (kg/m³)'
         ))
         
+        fig.update_layout(
+            title=title,
+            xaxis_title='Salinity (PSU)',
+            yaxis_title='Temperature (°C)'
+        )
         fig.update_layout(height=600)
         
         return fig
@@ -227,7 +258,8 @@ class AdvancedOceanPlots:
         df: pd.DataFrame,
         group_by: str = 'float_id',
         parameters: List[str] = ['temperature', 'salinity'],
-        title: str = "Multi-Profile Comparison"
+        title: str = "Multi-Profile Comparison",
+        max_traces: int = MAX_TRACES
     ) -> go.Figure:
         """
         Create multi-panel profile comparison
@@ -245,28 +277,23 @@ class AdvancedOceanPlots:
             shared_yaxes=True
         )
         
-        groups = df.groupby(group_by)
         colors = px.colors.qualitative.Set1
         
         for i, param in enumerate(parameters, 1):
             if param not in df.columns:
                 continue
             
-            for j, (name, group) in enumerate(groups):
-                group = group.sort_values('pressure')
-                
-                fig.add_trace(
-                    go.Scatter(
-                        x=group[param],
-                        y=group['pressure'],
-                        mode='lines',
-                        name=str(name),
-                        line=dict(color=colors[j % len(colors)]),
-                        showlegend=(i == 1)  # Only show legend for first subplot
-                    ),
-                    row=1,
-                    col=i
-                )
+            # One trace per group (profiles within a group split by NaN gaps)
+            for trace in profile_traces(
+                df,
+                x=param,
+                group_by=[group_by],
+                label=lambda key: str(key[0]),
+                colors=colors,
+                max_traces=max_traces,
+                showlegend=(i == 1)  # Only show legend for first subplot
+            ):
+                fig.add_trace(trace, row=1, col=i)
         
         fig.update_yaxes(title_text='Pressure (dbar)', autorange='reversed', row=1, col=1)
         
@@ -286,26 +313,32 @@ class AdvancedOceanPlots:
         df: pd.DataFrame,
         parameter: str = 'temperature',
         depth_bins: int = 20,
-        title: str = None
+        title: str = None,
+        value_bins: int = VALUE_BINS
     ) -> go.Figure:
         """
         Create histogram of parameter values by depth
+        (value_bins bars for each of depth_bins equal pressure ranges)
         """
         
         if df.empty or parameter not in df.columns or 'pressure' not in df.columns:
             return self._empty_figure(title or "Depth Histogram")
         
-        # Create depth bins
-        df['depth_bin'] = pd.cut(df['pressure'], bins=depth_bins)
+        # Counts per (depth range, value bin): one bar series per depth range
+        values = bin_axis(df[parameter].to_numpy(dtype='float64'), value_bins, exact=False)
+        depths = bin_axis(df['pressure'].to_numpy(dtype='float64'), depth_bins, exact=False)
+        if values.edges is None or depths.edges is None:
+            return self._empty_figure(title or "Depth Histogram")
+        binned = aggregate_2d(values, depths)
         
         fig = go.Figure()
         
-        for depth_bin in sorted(df['depth_bin'].unique()):
-            data = df[df['depth_bin'] == depth_bin][parameter]
-            
-            fig.add_trace(go.Histogram(
-                x=data,
-                name=str(depth_bin),
+        for i in np.flatnonzero(binned.count.sum(axis=1)):
+            fig.add_trace(go.Bar(
+                x=values.centers,
+                y=binned.count[i],
+                width=values.edges[1] - values.edges[0],
+                name=bin_label(depths.edges[i], depths.edges[i + 1], ' dbar'),
                 opacity=0.7
             ))
         
@@ -324,10 +357,12 @@ class AdvancedOceanPlots:
         df: pd.DataFrame,
         parameter: str = 'temperature',
         depth_level: float = 10.0,
-        title: str = None
+        title: str = None,
+        method: str = 'linear'
     ) -> go.Figure:
         """
         Create spatial interpolation at specific depth
+        (method: 'linear' or 'cubic', both on a cached triangulation)
         """
         
         if df.empty:
@@ -345,20 +380,13 @@ class AdvancedOceanPlots:
         values = depth_data[parameter].values
         
         # Grid interpolation
-        lat_grid = np.linspace(lat.min(), lat.max(), 50)
-        lon_grid = np.linspace(lon.min(), lon.max(), 50)
-        lon_grid, lat_grid = np.meshgrid(lon_grid, lat_grid)
-        
-        values_grid = griddata(
-            (lon, lat),
-            values,
-            (lon_grid, lat_grid),
-            method='cubic'
+        lon_axis, lat_axis, values_grid = interpolation_engine.regular_grid(
+            lon, lat, values, nx=50, ny=50, method=method
         )
         
         fig = go.Figure(data=go.Contour(
-            x=lon_grid[0],
-            y=lat_grid[:, 0],
+            x=lon_axis,
+            y=lat_axis,
             z=values_grid,
             colorscale=self.color_scales.get(parameter, 'Viridis'),
             colorbar=dict(title=parameter.capitalize()),
@@ -397,42 +425,67 @@ class AdvancedOceanPlots:
         if df.empty or parameter not in df.columns or 'pressure' not in df.columns:
             return self._empty_figure(title or "Anomaly Plot")
         
-        # Calculate baseline
-        if baseline == 'mean':
-            baseline_values = df.groupby('pressure')[parameter].mean()
-        elif baseline == 'median':
-            baseline_values = df.groupby('pressure')[parameter].median()
-        else:
+        if baseline not in ('mean', 'median'):
             return self._empty_figure("Invalid baseline")
         
-        # Calculate anomalies
-        df = df.copy()
-        df['baseline'] = df['pressure'].map(baseline_values)
-        df['anomaly'] = df[parameter] - df['baseline']
-        
         fig = go.Figure()
         
-        # Plot profiles colored by anomaly
-        if 'timestamp' in df.columns:
-            for timestamp, group in df.groupby('timestamp'):
+        if profile_keys(df):
+            # Baseline per standard level across profiles; one anomaly line per profile
+            grid = standard_levels.grid(df, (parameter,))
+            matrix = grid.matrix(parameter)
+            with np.errstate(all='ignore'):
+                reference = np.nanmedian(matrix, axis=0) if baseline == 'median' else grid.mean_profile(parameter)
+            anomaly = matrix - reference
+            labels = grid.profiles['timestamp'] if 'timestamp' in grid.profiles.columns else grid.profiles['float_id']
+            
+            names = labels.astype(str).tolist()
+            long = pd.DataFrame({
+                'profile': np.repeat(np.arange(grid.n_profiles), len(grid.levels)),
+                'pressure': np.tile(grid.levels, grid.n_profiles),
+                'anomaly': anomaly.ravel()
+            })
+            for trace in profile_traces(
+                long,
+                x='anomaly',
+                group_by=['profile'],
+                label=lambda key: names[key[0]],
+                hovertemplate='Anomaly: %{x:.2f}<br>Depth: %{y:.0f}m'
+            ):
+                fig.add_trace(trace)
+        else:
+            # Calculate baseline
+            if baseline == 'mean':
+                baseline_values = df.groupby('pressure')[parameter].mean()
+            else:
+                baseline_values = df.groupby('pressure')[parameter].median()
+            
+            # Calculate anomalies
+            df = df.copy()
+            df['baseline'] = df['pressure'].map(baseline_values)
+            df['anomaly'] = df[parameter] - df['baseline']
+            
+            # Plot profiles colored by anomaly
+            if 'timestamp' in df.columns:
+                for timestamp, group in df.groupby('timestamp'):
+                    fig.add_trace(go.Scatter(
+                        x=group['anomaly'],
+                        y=group['pressure'],
+                        mode='lines',
+                        name=str(timestamp),
+                        hovertemplate='Anomaly: %{x:.2f}<br>Depth: %{y:.0f}m'
+                    ))
+            else:
                 fig.add_trace(go.Scatter(
-                    x=group['anomaly'],
-                    y=group['pressure'],
-                    mode='lines',
-                    name=str(timestamp),
-                    hovertemplate='Anomaly: %{x:.2f}<br>Depth: %{y:.0f}m'
+                    x=df['anomaly'],
+                    y=df['pressure'],
+                    mode='markers',
+                    marker=dict(
+                        color=df['anomaly'],
+                        colorscale='RdBu_r',
+                        colorbar=dict(title='Anomaly')
+                    )
                 ))
-        else:
-            fig.add_trace(go.Scatter(
-                x=df['anomaly'],
-                y=df['pressure'],
-                mode='markers',
-                marker=dict(
-                    color=df['anomaly'],
-                    colorscale='RdBu_r',
-                    colorbar=dict(title='Anomaly')
-                )
-            ))
         
         # Add zero line
         fig.add_vline(x=0, line_dash="dash", line_color="gray")
@@ -0,0 +1,127 @@
+"""
+Fixed-resolution 2D binning for heatmap-style plots
+
+Hovmöller, T-S and depth-histogram plots used to pivot, scatter or loop
+over every input row. Here each axis is reduced to bin codes once and all
+aggregates are np.bincount calls over the flattened (y, x) cell index, so
+a figure holds an (ny, nx) matrix whatever the input row count.
+
+An axis with no more distinct values than requested bins keeps the exact
+values as categories (one column per timestamp, as the pivots did);
+otherwise values fall into equal-width bins.
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+TIME_BINS = 120          # Hovmöller time columns
+DEPTH_BINS = 60          # pressure rows when not on standard levels
+TS_BINS = 100            # T-S grid cells per axis
+VALUE_BINS = 50          # histogram bars per depth range
+
+
+@dataclass
+class BinAxis:
+    """Bin code per value (-1 = missing) and one label per bin"""
+    codes: np.ndarray
+    centers: np.ndarray
+    edges: Optional[np.ndarray] = None     # None for exact-value categories
+
+    @property
+    def n(self) -> int:
+        return len(self.centers)
+
+
+@dataclass
+class Binned2D:
+    """Per-cell counts and sums on a (y, x) grid"""
+    x: BinAxis
+    y: BinAxis
+    count: np.ndarray                                   # rows per cell
+    sums: Dict[str, np.ndarray] = field(default_factory=dict)
+    counts: Dict[str, np.ndarray] = field(default_factory=dict)   # finite values per cell
+
+    def mean(self, name: str) -> np.ndarray:
+        """Cell means of a value column (NaN for cells without values)"""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(self.counts[name] > 0, self.sums[name] / self.counts[name], np.nan)
+
+
+def bin_axis(values: np.ndarray, bins: int, exact: bool = True) -> BinAxis:
+    """
+    Codes for one axis (numeric or datetime64).
+
+    Args:
+        values: Axis values (NaN / NaT are missing)
+        bins: Maximum number of bins
+        exact: Keep distinct values as bins when there are at most `bins`
+    """
+    values = np.asarray(values)
+    is_time = np.issubdtype(values.dtype, np.datetime64)
+    if is_time:
+        values = values.astype('datetime64[ns]')
+        valid = ~np.isnat(values)
+        numeric = values.view('int64').astype('float64')
+    else:
+        numeric = values.astype('float64')
+        valid = np.isfinite(numeric)
+
+    codes = np.full(len(numeric), -1, dtype=np.int64)
+    if not valid.any():
+        return BinAxis(codes, values[:0])
+
+    distinct, inverse = np.unique(numeric[valid], return_inverse=True)
+    if exact and len(distinct) <= bins:
+        codes[valid] = inverse
+        centers = distinct
+        edges = None
+    else:
+        lo, hi = distinct[0], distinct[-1]
+        edges = np.linspace(lo, hi, bins + 1)
+        width = (hi - lo) / bins or 1.0     # a single distinct value fills bin 0
+        codes[valid] = np.clip(((numeric[valid] - lo) / width).astype(np.int64), 0, bins - 1)
+        centers = (edges[:-1] + edges[1:]) / 2
+
+    if is_time:
+        centers = centers.astype('int64').view('datetime64[ns]')
+        edges = edges.astype('int64').view('datetime64[ns]') if edges is not None else None
+    return BinAxis(codes, centers, edges)
+
+
+def aggregate_2d(x: BinAxis, y: BinAxis, values: Optional[Dict[str, np.ndarray]] = None) -> Binned2D:
+    """
+    Count rows and sum value columns per (y, x) cell.
+
+    Args:
+        x, y: Axes over the same rows
+        values: Value columns to sum (NaN skipped; counted separately)
+    """
+    inside = (x.codes >= 0) & (y.codes >= 0)
+    cells = y.codes[inside] * x.n + x.codes[inside]
+    size = x.n * y.n
+    shape = (y.n, x.n)
+
+    binned = Binned2D(x, y, np.bincount(cells, minlength=size).reshape(shape))
+    for name, column in (values or {}).items():
+        column = np.asarray(column, dtype='float64')[inside]
+        finite = np.isfinite(column)
+        binned.sums[name] = np.bincount(cells, weights=np.where(finite, column, 0.0),
+                                        minlength=size).reshape(shape)
+        binned.counts[name] = np.bincount(cells, weights=finite, minlength=size).reshape(shape)
+    return binned
+
+
+def as_datetime64(values: pd.Series) -> np.ndarray:
+    """Naive datetime64[ns] array (timezones converted to UTC, bad values NaT)"""
+    times = pd.to_datetime(values, errors='coerce')
+    if getattr(times.dt, 'tz', None) is not None:
+        times = times.dt.tz_convert(None)
+    return times.to_numpy(dtype='datetime64[ns]')
+
+
+def bin_label(lower: float, upper: float, unit: str = '', decimals: int = 0) -> str:
+    """Readable range label, e.g. '0-100 dbar'"""
+    return f"{lower:.{decimals}f}-{upper:.{decimals}f}{unit}"
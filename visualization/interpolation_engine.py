@@ -0,0 +1,220 @@
+"""
+Scattered-data gridding with cached triangulations
+
+griddata() re-triangulates its input on every call, so switching the
+parameter of a section or map redid the Delaunay step each time. Here the
+expensive parts are keyed by the point coordinates and reused:
+
+1. Points -> nodes: duplicate positions merge (values averaged); dense
+   inputs are pre-binned onto at most max_points cells
+2. Nodes -> Delaunay triangulation (in unit-box coordinates so that
+   degrees and dbar get comparable weight)
+3. Triangulation + target grid -> simplex and barycentric weights
+
+Interpolating a parameter is then a gather over cached weights (linear),
+or a CloughTocher2DInterpolator on the cached triangulation (cubic).
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy.interpolate import CloughTocher2DInterpolator
+from scipy.spatial import Delaunay, QhullError
+
+MAX_POINTS = 20000      # triangulation nodes before pre-binning
+GRID_SIZE = 100         # default target grid (per axis)
+
+_MISSING = object()
+
+
+@dataclass
+class PointSet:
+    """Input rows mapped onto triangulation nodes"""
+    inverse: np.ndarray     # node index per (finite) input row
+    nodes: np.ndarray       # (m, 2) node coordinates (centroid of merged rows)
+    origin: np.ndarray      # unit-box transform: (coords - origin) / span
+    span: np.ndarray
+    binned: bool
+
+    def scale(self, coords: np.ndarray) -> np.ndarray:
+        return (coords - self.origin) / self.span
+
+
+class InterpolationEngine:
+    """Grids scattered values, caching triangulations by point-set hash"""
+
+    def __init__(self, max_points: int = MAX_POINTS, max_cached: int = 16):
+        self.max_points = max_points
+        self.max_cached = max_cached
+        self._points: 'OrderedDict[str, PointSet]' = OrderedDict()
+        self._triangulations: 'OrderedDict[Tuple, Optional[Delaunay]]' = OrderedDict()
+        self._weights: 'OrderedDict[Tuple, Tuple]' = OrderedDict()
+        self._lock = threading.Lock()     # shared by all sessions' script threads
+        self.stats = {'hits': 0, 'misses': 0}
+
+    def interpolate(self, x: np.ndarray, y: np.ndarray, values: np.ndarray,
+                    xi: np.ndarray, yi: np.ndarray, method: str = 'linear') -> np.ndarray:
+        """
+        Values at the query points (xi, yi), NaN outside the convex hull.
+
+        Args:
+            x, y: Point coordinates (rows with NaN coordinates are ignored)
+            values: Value per point (NaN values are ignored)
+            xi, yi: Query coordinates (any matching shapes, e.g. a meshgrid)
+            method: 'linear' or 'cubic'
+
+        Returns:
+            Array shaped like xi
+        """
+        x, y, values = (np.asarray(a, dtype='float64').ravel() for a in (x, y, values))
+        finite = np.isfinite(x) & np.isfinite(y)
+        x, y, values = x[finite], y[finite], values[finite]
+        shape = np.shape(xi)
+        out = np.full(shape, np.nan)
+        if len(x) < 3:
+            return out
+
+        point_key = _digest(x, y)
+        points = self._point_set(point_key, x, y)
+        node_values = _node_means(points.inverse, values, len(points.nodes))
+        valid = np.isfinite(node_values)
+        tri_key = (point_key, _digest(valid) if not valid.all() else None)
+        tri = self._triangulation(tri_key, points, valid)
+        if tri is None:
+            return out
+
+        query = points.scale(np.column_stack([np.ravel(xi), np.ravel(yi)]).astype('float64'))
+        node_values = node_values[valid]
+        if method == 'cubic':
+            return CloughTocher2DInterpolator(tri, node_values)(query).reshape(shape)
+
+        vertices, weights, inside = self._barycentric((tri_key, _digest(query)), tri, query)
+        result = np.full(len(query), np.nan)
+        result[inside] = np.einsum('ij,ij->i', node_values[vertices], weights)
+        return result.reshape(shape)
+
+    def regular_grid(self, x: np.ndarray, y: np.ndarray, values: np.ndarray,
+                     nx: int = GRID_SIZE, ny: int = GRID_SIZE,
+                     method: str = 'linear') -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Interpolate onto an (ny, nx) grid spanning the finite points.
+
+        Returns:
+            (x axis, y axis, z) ready for go.Contour
+        """
+        x = np.asarray(x, dtype='float64')
+        y = np.asarray(y, dtype='float64')
+        finite = np.isfinite(x) & np.isfinite(y)
+        if not finite.any():
+            return np.array([]), np.array([]), np.empty((0, 0))
+        xs = np.linspace(x[finite].min(), x[finite].max(), nx)
+        ys = np.linspace(y[finite].min(), y[finite].max(), ny)
+        xi, yi = np.meshgrid(xs, ys)
+        return xs, ys, self.interpolate(x, y, values, xi, yi, method=method)
+
+    def clear(self):
+        with self._lock:
+            self._points.clear()
+            self._triangulations.clear()
+            self._weights.clear()
+
+    def _point_set(self, key: str, x: np.ndarray, y: np.ndarray) -> PointSet:
+        points = self._lookup(self._points, key)
+        if points is _MISSING:
+            points = _build_point_set(x, y, self.max_points)
+            self._store(self._points, key, points)
+        return points
+
+    def _triangulation(self, key: Tuple, points: PointSet, valid: np.ndarray) -> Optional[Delaunay]:
+        tri = self._lookup(self._triangulations, key, count=True)
+        if tri is not _MISSING:
+            return tri
+
+        nodes = points.scale(points.nodes[valid])
+        try:
+            tri = Delaunay(nodes) if len(nodes) >= 3 else None
+        except QhullError:
+            tri = None      # collinear / degenerate point set
+        self._store(self._triangulations, key, tri)
+        return tri
+
+    def _barycentric(self, key: Tuple, tri: Delaunay, query: np.ndarray):
+        """Vertices and weights of the enclosing simplex per query point"""
+        cached = self._lookup(self._weights, key)
+        if cached is not _MISSING:
+            return cached
+
+        simplex = tri.find_simplex(query)
+        inside = simplex >= 0
+        transform = tri.transform[simplex[inside]]
+        bary = np.einsum('ijk,ik->ij', transform[:, :2], query[inside] - transform[:, 2])
+        weights = np.column_stack([bary, 1 - bary.sum(axis=1)])
+        cached = (tri.simplices[simplex[inside]], weights, inside)
+        self._store(self._weights, key, cached)
+        return cached
+
+    def _lookup(self, cache: OrderedDict, key, count: bool = False):
+        """Cached value (marked most recent), or _MISSING"""
+        with self._lock:
+            value = cache.get(key, _MISSING)
+            if value is not _MISSING:
+                cache.move_to_end(key)
+            if count:
+                self.stats['hits' if value is not _MISSING else 'misses'] += 1
+            return value
+
+    def _store(self, cache: OrderedDict, key, value):
+        with self._lock:
+            cache[key] = value
+            cache.move_to_end(key)
+            while len(cache) > self.max_cached:
+                cache.popitem(last=False)
+
+
+def _build_point_set(x: np.ndarray, y: np.ndarray, max_points: int) -> PointSet:
+    """Merge duplicate positions; bin onto a sqrt(max_points)^2 grid when still too dense"""
+    inverse, uniques = pd.factorize(pd.MultiIndex.from_arrays([x, y]))
+    n_nodes = len(uniques)
+    origin = np.array([x.min(), y.min()])
+    span = np.array([x.max(), y.max()]) - origin
+    span[span == 0] = 1.0
+
+    binned = n_nodes > max_points
+    if binned:
+        bins = int(np.sqrt(max_points))
+        cells = np.clip(((np.column_stack([x, y]) - origin) / span * bins).astype(np.int64), 0, bins - 1)
+        inverse, _ = pd.factorize(cells[:, 0] * bins + cells[:, 1])
+        n_nodes = int(inverse.max()) + 1
+
+    counts = np.bincount(inverse, minlength=n_nodes)
+    nodes = np.column_stack([
+        np.bincount(inverse, weights=x, minlength=n_nodes) / counts,
+        np.bincount(inverse, weights=y, minlength=n_nodes) / counts,
+    ])
+    return PointSet(inverse, nodes, origin, span, binned)
+
+
+def _node_means(inverse: np.ndarray, values: np.ndarray, n_nodes: int) -> np.ndarray:
+    """Mean of the finite values merged into each node (NaN when none)"""
+    finite = np.isfinite(values)
+    sums = np.bincount(inverse, weights=np.where(finite, values, 0.0), minlength=n_nodes)
+    counts = np.bincount(inverse, weights=finite.astype('float64'), minlength=n_nodes)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(counts > 0, sums / counts, np.nan)
+
+
+def _digest(*arrays: np.ndarray) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    for array in arrays:
+        h.update(np.ascontiguousarray(array).tobytes())
+        h.update(str(array.shape).encode())
+    return h.hexdigest()
+
+
+# Shared engine (triangulations survive Streamlit reruns within the process)
+interpolation_engine = InterpolationEngine()
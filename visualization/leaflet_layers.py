@@ -0,0 +1,222 @@
+"""
+Folium layers fed by a single columnar payload
+
+Instead of one folium.Marker (with its own rendered popup HTML) per row,
+points are serialized once as column arrays and markers are created in the
+browser: circle markers on a shared canvas renderer, optionally grouped by
+Leaflet.markercluster, with popups and tooltips built only when opened.
+"""
+
+import json
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from branca.element import Element
+from folium.plugins import HeatMap, MarkerCluster
+
+try:
+    from folium.template import Template    # folium >= 0.17
+except ImportError:
+    from jinja2 import Template
+
+from visualization.map_reduction import collapse_profiles
+
+# Marker colour by near-surface temperature (upper bounds exclusive), as before
+TEMPERATURE_COLORS: List[Tuple[float, str]] = [(28, 'red'), (25, 'orange'), (20, 'green')]
+DEFAULT_COLOR = 'blue'
+
+# Popup rows: payload key, label, unit, decimals
+POPUP_FIELDS = [
+    ('float_id', 'Float ID', '', None),
+    ('cycle_number', 'Cycle', '', None),
+    ('date', '📅 Date', '', None),
+    ('temperature', '🌡️ Temp', '°C', 2),
+    ('salinity', '💧 Salinity', ' PSU', 2),
+    ('max_pressure', '🌊 Depth', ' dbar', 0),
+    ('levels', 'Levels', '', None),
+]
+
+
+def point_payload(df: pd.DataFrame, collapse: bool = True) -> Dict:
+    """
+    Column arrays for the browser: lat, lon, colour index into palette and
+    popup fields. Depth levels collapse to one point per profile first.
+    """
+    points = collapse_profiles(df) if collapse else df.dropna(subset=['latitude', 'longitude'])
+    palette = [color for _, color in TEMPERATURE_COLORS] + [DEFAULT_COLOR]
+
+    if 'temperature' in points.columns:
+        temperature = pd.to_numeric(points['temperature'], errors='coerce').to_numpy(dtype='float64')
+        color = np.select([temperature > bound for bound, _ in TEMPERATURE_COLORS],
+                          np.arange(len(TEMPERATURE_COLORS)), default=len(palette) - 1)
+    else:
+        color = np.full(len(points), len(palette) - 1)
+
+    fields = {}
+    if 'timestamp' in points.columns:
+        points = points.assign(date=pd.to_datetime(points['timestamp'], errors='coerce').dt.strftime('%Y-%m-%d'))
+    for key, _, _, decimals in POPUP_FIELDS:
+        if key not in points.columns:
+            continue
+        column = points[key]
+        if decimals is not None:
+            values = pd.to_numeric(column, errors='coerce').round(decimals)
+            fields[key] = values.astype(object).where(values.notna(), None).tolist()
+        else:
+            fields[key] = column.astype(str).astype(object).where(column.notna(), None).tolist()
+
+    return {
+        'lat': points['latitude'].to_numpy(dtype='float64').round(4).tolist(),
+        'lon': points['longitude'].to_numpy(dtype='float64').round(4).tolist(),
+        'color': color.astype(int).tolist(),
+        'palette': palette,
+        'fields': fields,
+        'labels': [[key, label, unit, decimals] for key, label, unit, decimals in POPUP_FIELDS if key in fields],
+    }
+
+
+class RawPayloadMixin:
+    """
+    Writes self.payload into the page as its own script (var <name>_data),
+    so branca does not re-parse megabytes of data as a template.
+    """
+
+    @property
+    def payload_json(self) -> str:
+        """Compact JSON, safe inside a <script> block"""
+        return json.dumps(self.payload, separators=(',', ':')).replace('</', '<\\/')
+
+    def render(self, **kwargs):
+        self.get_root().script.add_child(
+            _RawScript(f"var {self.get_name()}_data = {self.payload_json};"),
+            name=f"{self.get_name()}_data"
+        )
+        super().render(**kwargs)
+
+
+class PointLayer(RawPayloadMixin, MarkerCluster):
+    """
+    Canvas circle markers built client-side from a point_payload.
+
+    Args:
+        payload: Output of point_payload
+        cluster: Group markers with Leaflet.markercluster
+        radius: Circle marker radius (px)
+        name: Layer name in the layer control
+        **kwargs: Leaflet.markercluster options (camelCase)
+    """
+
+    _template = Template(
+        """
+        {% macro script(this, kwargs) %}
+            var {{ this.get_name() }} = (function(){
+                var data = {{ this.get_name() }}_data;
+                var renderer = L.canvas({padding: 0.5});
+                {%- if this.cluster %}
+                var group = L.markerClusterGroup({{ this.cluster_options|tojson }});
+                {%- else %}
+                var group = L.featureGroup();
+                {%- endif %}
+
+                function popup(i) {
+                    var html = "<div style='font-family: Arial; font-size: 12px;'>"
+                        + "<b>🌊 ARGO Float Data</b><br><hr>"
+                        + "<b>📍 Location:</b><br>"
+                        + "&nbsp;&nbsp;Lat: " + data.lat[i].toFixed(4) + "°N<br>"
+                        + "&nbsp;&nbsp;Lon: " + data.lon[i].toFixed(4) + "°E<br>";
+                    data.labels.forEach(function(spec) {
+                        var value = data.fields[spec[0]][i];
+                        if (value === null) { return; }
+                        if (spec[3] !== null) { value = value.toFixed(spec[3]); }
+                        html += "<b>" + spec[1] + ":</b> " + value + spec[2] + "<br>";
+                    });
+                    return html + "</div>";
+                }
+                function tooltip(i) {
+                    var ids = data.fields.float_id;
+                    return "Float: " + (ids && ids[i] !== null ? ids[i] : "Unknown");
+                }
+
+                var markers = new Array(data.lat.length);
+                for (var i = 0; i < data.lat.length; i++) {
+                    var marker = L.circleMarker([data.lat[i], data.lon[i]], {
+                        renderer: renderer,
+                        radius: {{ this.radius }},
+                        color: data.palette[data.color[i]],
+                        weight: 1,
+                        fillOpacity: 0.8
+                    });
+                    marker.bindPopup(popup.bind(null, i), {maxWidth: 300});
+                    marker.bindTooltip(tooltip.bind(null, i));
+                    markers[i] = marker;
+                }
+                {%- if this.cluster %}
+                group.addLayers(markers);
+                {%- else %}
+                markers.forEach(function(marker) { group.addLayer(marker); });
+                {%- endif %}
+
+                group.addTo({{ this._parent.get_name() }});
+                return group;
+            })();
+        {% endmacro %}"""
+    )
+
+    def __init__(self, payload: Dict, cluster: bool = True, radius: int = 6,
+                 name: Optional[str] = None, **kwargs):
+        super().__init__(name=name)
+        self._name = 'PointLayer'
+        self.payload = payload
+        self.cluster = cluster
+        self.radius = radius
+        # markercluster options (camelCase); chunked insertion keeps the page responsive
+        self.cluster_options = {'chunkedLoading': True, **kwargs}
+
+
+class _RawScript(Element):
+    """Script text inserted verbatim (no template compilation)"""
+
+    def __init__(self, script: str):
+        super().__init__()
+        self.script = script
+
+    def render(self, **kwargs) -> str:
+        return self.script
+
+
+class HeatLayer(RawPayloadMixin, HeatMap):
+    """
+    Leaflet.heat layer over [lat, lon, weight] rows (e.g. heatmap_points).
+    kwargs are Leaflet.heat options (radius, blur, maxZoom, gradient, ...).
+    """
+
+    _template = Template(
+        """
+        {% macro script(this, kwargs) %}
+            var {{ this.get_name() }} = L.heatLayer(
+                {{ this.get_name() }}_data,
+                {{ this.heat_options|tojson }}
+            );
+            {{ this.get_name() }}.addTo({{ this._parent.get_name() }});
+        {% endmacro %}"""
+    )
+
+    def __init__(self, points: np.ndarray, name: Optional[str] = None, **kwargs):
+        super().__init__([], name=name)
+        self._name = 'HeatLayer'
+        self.payload = np.round(np.asarray(points, dtype='float64'), 4).tolist()
+        self.heat_options = {'minOpacity': 0.5, 'maxZoom': 18, 'radius': 25, 'blur': 15, **kwargs}
+
+
+def heatmap_points(df: pd.DataFrame) -> np.ndarray:
+    """[lat, lon, weight] per profile, weighted by its measurement count"""
+    points = collapse_profiles(df)
+    if points.empty:
+        return np.empty((0, 3))
+    weights = points['levels'].to_numpy(dtype='float64')
+    return np.column_stack([
+        points['latitude'].to_numpy(dtype='float64'),
+        points['longitude'].to_numpy(dtype='float64'),
+        weights / weights.max()
+    ])
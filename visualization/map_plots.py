@@ -1,22 +1,29 @@
 import plotly.graph_objects as go
 import plotly.express as px
+import numpy as np
 import pandas as pd
 from typing import Optional, List
+from visualization.map_reduction import MAX_MAP_POINTS, MapPoints, reduce_for_map, hover_text
 
 class MapVisualizer:
     """
     Create interactive geographic visualizations.
     Uses Plotly for rich, zoomable maps.
+    Rows are reduced (one point per profile, grid-binned when dense)
+    before plotting, see visualization/map_reduction.py.
     """
     
     def __init__(self):
         self.default_mapbox_style = "open-street-map"
+        self.last_reduction: Optional[MapPoints] = None
     
     def create_float_trajectory_map(
         self,
         df: pd.DataFrame,
         color_by: str = 'temperature',
-        title: str = "ARGO Float Locations"
+        title: str = "ARGO Float Locations",
+        zoom: Optional[float] = None,
+        max_points: int = MAX_MAP_POINTS
     ) -> go.Figure:
         """
         Create interactive map showing float locations colored by parameter.
@@ -25,6 +32,8 @@ class MapVisualizer:
             df: DataFrame with latitude, longitude, and parameter columns
             color_by: Column name to color points by
             title: Map title
+            zoom: Map zoom used to size bins (default: fit the data)
+            max_points: Most markers to draw
             
         Returns:
             Plotly Figure object
@@ -45,53 +54,36 @@ class MapVisualizer:
                 # No numeric column available, create a simple map without coloring
                 return self._create_simple_location_map(df, title)
         
-        # Build hover_data dictionary with only available columns
-        hover_data = {
-            'latitude': ':.2f',
-            'longitude': ':.2f'
-        }
+        points = self._reduce(df, zoom, max_points)
+        frame = points.frame
+        color_col = self._reduced_column(color_by, frame)
+        if color_col is None:
+            return self._create_simple_location_map(df, title)
         
-        # Add color_by column to hover_data if it's numeric
-        if color_by in df.columns and pd.api.types.is_numeric_dtype(df[color_by]):
-            hover_data[color_by] = ':.2f'
-        
-        # Add other commonly useful columns if they exist
-        optional_cols = ['float_id', 'cycle_number', 'pressure', 'salinity', 'dissolved_oxygen']
-        for col in optional_cols:
-            if col in df.columns and col != color_by:
-                if pd.api.types.is_numeric_dtype(df[col]):
-                    hover_data[col] = ':.2f'
-        
-        # Add timestamp separately (don't format it)
-        if 'timestamp' in df.columns and 'timestamp' != color_by:
-            hover_data['timestamp'] = True
-        
-        # Create scatter mapbox
-        fig = px.scatter_mapbox(
-            df,
-            lat='latitude',
-            lon='longitude',
-            color=color_by,
-            size=[10] * len(df),  # Fixed size for visibility
-            hover_data=hover_data,
-            color_continuous_scale='Viridis',
-            title=title,
-            zoom=3
-        )
-        
-        # Update layout
-        fig.update_layout(
-            mapbox_style=self.default_mapbox_style,
-            height=600,
-            margin={"r": 0, "t": 40, "l": 0, "b": 0}
-        )
+        fig = go.Figure(go.Scattermapbox(
+            lat=frame['latitude'],
+            lon=frame['longitude'],
+            mode='markers',
+            marker=dict(
+                size=self._marker_sizes(frame),
+                color=frame[color_col],
+                colorscale='Viridis',
+                showscale=True,
+                colorbar=dict(title=color_by)
+            ),
+            text=frame['hover_text'],
+            hoverinfo='text',
+            name=color_by
+        ))
         
+        self._update_map_layout(fig, points, title)
         return fig
     
     def create_density_heatmap(
         self,
         df: pd.DataFrame,
-        title: str = "ARGO Float Density"
+        title: str = "ARGO Float Density",
+        max_points: int = 4 * MAX_MAP_POINTS
     ) -> go.Figure:
         """
         Create heatmap showing concentration of measurements.
@@ -104,50 +96,42 @@ class MapVisualizer:
         if 'latitude' not in df.columns or 'longitude' not in df.columns:
             return self._create_empty_map(title, "Geographic data (latitude/longitude) required for heatmap")
         
+        # Weight each point by the measurements it stands for
+        points = self._reduce(df, None, max_points)
+        frame = points.frame
+        weights = frame['levels'] if 'levels' in frame.columns else frame['count']
+        
         fig = go.Figure(go.Densitymapbox(
-            lat=df['latitude'],
-            lon=df['longitude'],
+            lat=frame['latitude'],
+            lon=frame['longitude'],
+            z=weights,
             radius=20,
             colorscale='Hot',
             showscale=True,
             hoverinfo='none'
         ))
         
-        fig.update_layout(
-            mapbox_style=self.default_mapbox_style,
-            mapbox=dict(
-                center=dict(
-                    lat=df['latitude'].mean(),
-                    lon=df['longitude'].mean()
-                ),
-                zoom=3
-            ),
-            title=title,
-            height=600,
-            margin={"r": 0, "t": 40, "l": 0, "b": 0}
-        )
-        
+        self._update_map_layout(fig, points, title)
         return fig
     
     def create_time_animated_map(
         self,
         df: pd.DataFrame,
         time_column: str = 'timestamp',
-        title: str = "ARGO Float Trajectories Over Time"
+        title: str = "ARGO Float Trajectories Over Time",
+        max_points: int = MAX_MAP_POINTS
     ) -> go.Figure:
         """
         Create animated map showing float movements over time.
         Great for visualizing temporal patterns.
+        max_points applies per frame.
         """
         if df.empty or time_column not in df.columns:
             return self._create_empty_map(title)
         
-        # Convert timestamp to datetime
-        df[time_column] = pd.to_datetime(df[time_column])
-        df = df.sort_values(time_column)
-        
-        # Create time bins (monthly)
-        df['time_period'] = df[time_column].dt.to_period('M').astype(str)
+        # Monthly frames (on a copy; the caller's frame is left untouched)
+        times = pd.to_datetime(df[time_column])
+        df = df.assign(**{time_column: times, 'time_period': times.dt.to_period('M').astype(str)})
         
         # Find a suitable color column
         color_col = None
@@ -159,44 +143,35 @@ class MapVisualizer:
             if numeric_cols:
                 color_col = numeric_cols[0]
         
-        # Build hover_data with available columns
-        hover_data = {'latitude': ':.2f', 'longitude': ':.2f'}
-        optional_cols = ['temperature', 'salinity', 'pressure', 'float_id', 'cycle_number', 'dissolved_oxygen']
-        for col in optional_cols:
-            if col in df.columns:
-                if pd.api.types.is_numeric_dtype(df[col]):
-                    hover_data[col] = ':.2f'
+        points = self._reduce(df, None, max_points, group_by='time_period')
+        if points.frame.empty:
+            # e.g. no row with both latitude and longitude
+            return self._create_empty_map(title)
+        frame = points.frame.sort_values('time_period', kind='stable')
+        frame = frame.assign(marker_size=self._marker_sizes(frame))
+        color_col = self._reduced_column(color_col, frame) if color_col else None
         
-        # Add timestamp separately
-        if 'timestamp' in df.columns:
-            hover_data['timestamp'] = True
+        fig = px.scatter_mapbox(
+            frame,
+            lat='latitude',
+            lon='longitude',
+            animation_frame='time_period',
+            color=color_col,
+            size='marker_size',
+            size_max=int(frame['marker_size'].max()),
+            hover_name='hover_text',
+            color_continuous_scale='RdYlBu_r',
+            title=title,
+            zoom=points.zoom,
+            center=points.center
+        )
         
-        # Create map
-        if color_col:
-            fig = px.scatter_mapbox(
-                df,
-                lat='latitude',
-                lon='longitude',
-                animation_frame='time_period',
-                color=color_col,
-                size=[10] * len(df),
-                hover_data=hover_data,
-                color_continuous_scale='RdYlBu_r',
-                title=title,
-                zoom=3
-            )
-        else:
-            # No color column available
-            fig = px.scatter_mapbox(
-                df,
-                lat='latitude',
-                lon='longitude',
-                animation_frame='time_period',
-                size=[10] * len(df),
-                hover_data=hover_data,
-                title=title,
-                zoom=3
-            )
+        # Show the prepared hover text only (in every animation frame)
+        hover = '%{hovertext}<extra></extra>'
+        fig.update_traces(hovertemplate=hover)
+        for animation_frame in fig.frames:
+            for trace in animation_frame.data:
+                trace.hovertemplate = hover
         
         fig.update_layout(
             mapbox_style=self.default_mapbox_style,
@@ -211,56 +186,51 @@ class MapVisualizer:
         Create a simple map showing locations without color coding.
         Used when no numeric columns are available for coloring.
         """
-        # Build hover_data dictionary with available columns
-        hover_data = {
-            'latitude': ':.2f',
-            'longitude': ':.2f'
-        }
-        
-        # Add other available columns, properly checking types
-        for col in df.columns:
-            if col not in ['latitude', 'longitude', 'id']:
-                if pd.api.types.is_numeric_dtype(df[col]):
-                    hover_data[col] = ':.2f'
-                elif col != 'timestamp':  # Don't format timestamp
-                    hover_data[col] = True
+        points = self._reduce(df, None, MAX_MAP_POINTS)
+        frame = points.frame
         
-        # Add timestamp separately
-        if 'timestamp' in df.columns:
-            hover_data['timestamp'] = True
-        
-        # Create scatter mapbox without color
-        fig = px.scatter_mapbox(
-            df,
-            lat='latitude',
-            lon='longitude',
-            size=[10] * len(df),
-            hover_data=hover_data,
-            title=title,
-            zoom=3
-        )
+        fig = go.Figure(go.Scattermapbox(
+            lat=frame['latitude'],
+            lon=frame['longitude'],
+            mode='markers',
+            marker=dict(size=self._marker_sizes(frame)),
+            text=frame['hover_text'],
+            hoverinfo='text'
+        ))
         
-        # Update layout
+        self._update_map_layout(fig, points, title)
+        return fig
+    
+    def _reduce(self, df: pd.DataFrame, zoom: Optional[float], max_points: int,
+                group_by: Optional[str] = None) -> MapPoints:
+        """Reduce rows for plotting and remember the reduction for captions"""
+        points = reduce_for_map(df, zoom=zoom, max_points=max_points, group_by=group_by)
+        self.last_reduction = points
+        return points
+    
+    def _reduced_column(self, column: str, frame: pd.DataFrame) -> Optional[str]:
+        """Column holding a parameter after reduction (pressure becomes profile max depth)"""
+        if column == 'pressure' and 'max_pressure' in frame.columns:
+            return 'max_pressure'
+        return column if column in frame.columns and pd.api.types.is_numeric_dtype(frame[column]) else None
+    
+    def _marker_sizes(self, frame: pd.DataFrame) -> np.ndarray:
+        """Fixed size for single profiles, growing with log(count) for bins"""
+        counts = frame['count'].to_numpy(dtype='float64') if 'count' in frame.columns else np.ones(len(frame))
+        return np.clip(10 + 4 * np.log10(np.maximum(counts, 1)), 10, 24)
+    
+    def _update_map_layout(self, fig: go.Figure, points: MapPoints, title: str):
         fig.update_layout(
             mapbox_style=self.default_mapbox_style,
+            mapbox=dict(center=points.center, zoom=points.zoom),
+            title=title,
             height=600,
             margin={"r": 0, "t": 40, "l": 0, "b": 0}
         )
-        
-        return fig
     
     def _create_hover_text(self, df: pd.DataFrame) -> List[str]:
         """Create informative hover text for each point"""
-        hover_texts = []
-        for _, row in df.iterrows():
-            text = f"Lat: {row['latitude']:.2f}°N<br>"
-            text += f"Lon: {row['longitude']:.2f}°E<br>"
-            if 'temperature' in row:
-                text += f"Temp: {row['temperature']:.2f}°C<br>"
-            if 'salinity' in row:
-                text += f"Salinity: {row['salinity']:.2f} PSU"
-            hover_texts.append(text)
-        return hover_texts
+        return hover_text(df).tolist()
     
     def _create_empty_map(self, title: str, message: str = "No data to display") -> go.Figure:
         """Create empty map with message"""
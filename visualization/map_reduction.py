@@ -0,0 +1,222 @@
+"""
+Map data reduction
+
+Result sets arrive in long format (one row per depth level), but a map
+only needs one marker per location. Before plotting:
+
+1. Levels collapse to one point per (float_id, cycle_number) profile
+   (near-surface value by default)
+2. If more points remain than the map can usefully show, they are binned
+   on a lat/lon grid sized for the zoom level (a few pixels per cell);
+   each cell keeps its centroid, point count and mean values
+3. Hover text is built with vectorized string operations
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from advanced_analytics.profile_batch import profile_keys
+
+MAX_MAP_POINTS = 5000        # markers sent to the browser
+CELL_PIXELS = 8              # grid cell edge at the target zoom (screen pixels)
+TILE_PIXELS = 256            # web-mercator tile width
+
+VALUE_COLUMNS = ['temperature', 'salinity', 'pressure', 'dissolved_oxygen', 'chlorophyll', 'ph']
+
+HOVER_FIELDS = [
+    # column, label, unit
+    ('temperature', 'Temp', '°C'),
+    ('salinity', 'Salinity', ' PSU'),
+    ('dissolved_oxygen', 'Oxygen', ' µmol/kg'),
+    ('chlorophyll', 'Chl-a', ' mg/m³'),
+    ('max_pressure', 'Max depth', ' dbar'),
+]
+
+
+@dataclass
+class MapPoints:
+    """Reduced points ready for plotting"""
+    frame: pd.DataFrame
+    source_rows: int
+    profiles: int
+    binned: bool = False
+    cell_degrees: Optional[float] = None
+    center: Dict[str, float] = field(default_factory=lambda: {'lat': 0.0, 'lon': 70.0})
+    zoom: float = 3
+
+    @property
+    def summary(self) -> str:
+        text = f"{len(self.frame):,} map points from {self.source_rows:,} rows ({self.profiles:,} profiles)"
+        if self.binned:
+            text += f", binned at {self.cell_degrees:.2f}°"
+        return text
+
+
+def collapse_profiles(df: pd.DataFrame, value_columns: Sequence[str] = VALUE_COLUMNS,
+                      how: str = 'surface', extra: Sequence[str] = ()) -> pd.DataFrame:
+    """
+    One row per profile: location and time of the profile, near-surface
+    (how='surface') or mean (how='mean') values, level count and max pressure.
+    Without float_id/cycle_number, rows sharing a position and time collapse.
+    """
+    keys = profile_keys(df)
+    if not keys:
+        keys = [c for c in ('latitude', 'longitude', 'timestamp') if c in df.columns]
+
+    work = df.dropna(subset=['latitude', 'longitude'])
+    if work.empty:
+        return work.iloc[0:0]
+
+    values = [c for c in value_columns if c in work.columns and c != 'pressure']
+    carry = [c for c in ('latitude', 'longitude', 'timestamp', 'ocean_region', *extra)
+             if c in work.columns and c not in keys]
+
+    if how == 'surface' and 'pressure' in work.columns:
+        work = work.sort_values('pressure', kind='stable', na_position='last')
+    grouped = work.groupby(keys, sort=False, dropna=False)
+
+    if how == 'mean':
+        profile = grouped[carry].first() if carry else grouped.size().to_frame('_drop')
+        if values:
+            profile = profile.join(grouped[values].mean())
+    else:
+        # first() skips NaN, so each value is the shallowest valid measurement
+        profile = grouped[carry + values].first() if carry + values else grouped.size().to_frame('_drop')
+
+    profile = profile.drop(columns='_drop', errors='ignore')
+    profile['levels'] = grouped.size()
+    if 'pressure' in work.columns:
+        profile['max_pressure'] = grouped['pressure'].max()
+    return profile.reset_index()
+
+
+def grid_bin(points: pd.DataFrame, cell_degrees: float,
+             value_columns: Sequence[str] = VALUE_COLUMNS) -> pd.DataFrame:
+    """
+    Aggregate points into lat/lon cells: centroid position, point count,
+    distinct floats and mean values per occupied cell.
+    """
+    lat = points['latitude'].to_numpy(dtype='float64')
+    lon = points['longitude'].to_numpy(dtype='float64')
+    cell = pd.MultiIndex.from_arrays([
+        np.floor(lat / cell_degrees).astype(np.int64),
+        np.floor(lon / cell_degrees).astype(np.int64)
+    ], names=['_cell_lat', '_cell_lon'])
+
+    weights = points['count'] if 'count' in points.columns else pd.Series(1, index=points.index)
+    frame = points.assign(count=weights.to_numpy())
+    frame.index = cell
+    grouped = frame.groupby(level=[0, 1], sort=False)
+
+    values = [c for c in list(value_columns) + ['max_pressure'] if c in frame.columns]
+    binned = grouped[['latitude', 'longitude'] + values].mean()
+    binned['count'] = grouped['count'].sum()
+    if 'levels' in frame.columns:
+        binned['levels'] = grouped['levels'].sum()
+    if 'float_id' in frame.columns:
+        binned['float_count'] = grouped['float_id'].nunique()
+        binned['float_id'] = grouped['float_id'].first()
+    if 'timestamp' in frame.columns:
+        binned['timestamp'] = grouped['timestamp'].max()
+    return binned.reset_index(drop=True)
+
+
+def zoom_for_extent(lat: np.ndarray, lon: np.ndarray) -> Tuple[Dict[str, float], float]:
+    """Center and mapbox zoom that fit the points"""
+    if len(lat) == 0:
+        return {'lat': 0.0, 'lon': 70.0}, 2
+    lat_span = float(np.nanmax(lat) - np.nanmin(lat))
+    lon_span = float(np.nanmax(lon) - np.nanmin(lon))
+    span = max(lat_span * 2, lon_span, 0.5)   # map panes are roughly twice as wide as tall
+    zoom = float(np.clip(np.log2(360 / span), 1, 10))
+    center = {'lat': float(np.nanmean([np.nanmin(lat), np.nanmax(lat)])),
+              'lon': float(np.nanmean([np.nanmin(lon), np.nanmax(lon)]))}
+    return center, zoom
+
+
+def cell_size_for_zoom(zoom: float, cell_pixels: int = CELL_PIXELS) -> float:
+    """Degrees of longitude covered by cell_pixels at a mapbox zoom level"""
+    return 360.0 / (TILE_PIXELS * 2 ** zoom) * cell_pixels
+
+
+def reduce_for_map(df: pd.DataFrame, zoom: Optional[float] = None,
+                   max_points: int = MAX_MAP_POINTS, how: str = 'surface',
+                   group_by: Optional[str] = None) -> MapPoints:
+    """
+    Collapse levels to profiles and grid-bin when too many points remain.
+
+    Args:
+        df: Long-format rows with latitude/longitude
+        zoom: Target mapbox zoom (default: fit the data extent)
+        max_points: Marker budget (per group_by value when given)
+        how: 'surface' or 'mean' value per profile
+        group_by: Column kept through binning (e.g. an animation frame)
+
+    Returns:
+        MapPoints with latitude, longitude, values, count and hover_text
+    """
+    extra = [group_by] if group_by else []
+    profiles = collapse_profiles(df, how=how, extra=extra)
+    center, auto_zoom = zoom_for_extent(profiles['latitude'].to_numpy(), profiles['longitude'].to_numpy())
+    zoom = auto_zoom if zoom is None else zoom
+
+    points = profiles.assign(count=1)
+    largest = int(points.groupby(group_by).size().max()) if group_by and not points.empty else len(points)
+    cell = None
+    if largest > max_points:
+        cell = cell_size_for_zoom(zoom)
+        while True:
+            points = _bin(profiles, cell, group_by)
+            largest = int(points.groupby(group_by).size().max()) if group_by else len(points)
+            if largest <= max_points:
+                break
+            cell *= 2
+
+    points['hover_text'] = hover_text(points)
+    return MapPoints(points, source_rows=len(df), profiles=len(profiles),
+                     binned=cell is not None, cell_degrees=cell, center=center, zoom=zoom)
+
+
+def _bin(profiles: pd.DataFrame, cell: float, group_by: Optional[str]) -> pd.DataFrame:
+    if not group_by:
+        return grid_bin(profiles, cell)
+    frames = [grid_bin(part, cell).assign(**{group_by: key})
+              for key, part in profiles.groupby(group_by, sort=True)]
+    return pd.concat(frames, ignore_index=True) if frames else profiles.iloc[0:0]
+
+
+def hover_text(points: pd.DataFrame) -> pd.Series:
+    """Hover label per point, built column-wise"""
+    if points.empty:
+        return pd.Series([], index=points.index, dtype=object)
+
+    text = ('Lat: ' + _fmt(points['latitude']) + '°N<br>Lon: ' + _fmt(points['longitude']) + '°E')
+    if 'count' in points.columns and (points['count'] > 1).any():
+        many = points['count'] > 1
+        profiles = 'Profiles: ' + points['count'].astype(str)
+        if 'float_count' in points.columns:
+            profiles += ' (' + points['float_count'].astype(str) + ' floats)'
+        text = text.where(~many, text + '<br>' + profiles)
+    if 'float_id' in points.columns:
+        single = points['count'] <= 1 if 'count' in points.columns else pd.Series(True, index=points.index)
+        label = '<br>Float: ' + points['float_id'].astype(str)
+        if 'cycle_number' in points.columns:
+            label += ' / cycle ' + points['cycle_number'].astype('Int64').astype(str)
+        text = text.where(~single, text + label)
+    if 'timestamp' in points.columns:
+        dates = pd.to_datetime(points['timestamp'], errors='coerce').dt.strftime('%Y-%m-%d')
+        text = text.where(dates.isna(), text + '<br>Date: ' + dates.fillna(''))
+    for column, label, unit in HOVER_FIELDS:
+        if column in points.columns:
+            values = pd.to_numeric(points[column], errors='coerce')
+            text = text.where(values.isna(), text + f'<br>{label}: ' + _fmt(values) + unit)
+    return text
+
+
+def _fmt(values: pd.Series, decimals: int = 2) -> pd.Series:
+    """Fixed-decimal strings without per-row Python formatting"""
+    array = pd.to_numeric(values, errors='coerce').to_numpy(dtype='float64')
+    return pd.Series(np.char.mod(f'%.{decimals}f', array), index=values.index)
@@ -2,6 +2,7 @@ import plotly.graph_objects as go
 import plotly.express as px
 import pandas as pd
 from typing import List, Optional
+from visualization.trace_builder import MAX_TRACES, profile_traces
 
 class ProfilePlotter:
     """
@@ -13,7 +14,8 @@ class ProfilePlotter:
         self,
         df: pd.DataFrame,
         float_ids: Optional[List[str]] = None,
-        title: str = "Temperature-Depth Profile"
+        title: str = "Temperature-Depth Profile",
+        max_traces: int = MAX_TRACES
     ) -> go.Figure:
         """
         Create classic T-S diagram (Temperature vs Depth).
@@ -23,38 +25,26 @@ class ProfilePlotter:
             df: DataFrame with pressure and temperature columns
             float_ids: Specific float IDs to plot
             title: Plot title
+            max_traces: Above this many profiles, draw them as one merged trace
         """
         fig = go.Figure()
         
         if df.empty:
             return self._empty_figure(title)
         
-        # Group by float_id and cycle_number
-        if 'float_id' in df.columns and 'cycle_number' in df.columns:
-            groups = df.groupby(['float_id', 'cycle_number'])
-            
-            for (fid, cycle), group in groups:
-                if float_ids and fid not in float_ids:
-                    continue
-                
-                group = group.sort_values('pressure')
-                fig.add_trace(go.Scatter(
-                    x=group['temperature'],
-                    y=group['pressure'],
-                    mode='lines+markers',
-                    name=f"Float {fid} Cycle {cycle}",
-                    hovertemplate='Temp: %{x:.2f}°C<br>Depth: %{y:.1f}m<extra></extra>'
-                ))
-        else:
-            # Single profile
-            df = df.sort_values('pressure')
-            fig.add_trace(go.Scatter(
-                x=df['temperature'],
-                y=df['pressure'],
-                mode='lines+markers',
-                name='Profile',
-                hovertemplate='Temp: %{x:.2f}°C<br>Depth: %{y:.1f}m<extra></extra>'
-            ))
+        if float_ids and 'float_id' in df.columns:
+            df = df[df['float_id'].isin(float_ids)]
+        
+        # One line per (float_id, cycle_number); many profiles share a WebGL trace
+        for trace in profile_traces(
+            df,
+            x='temperature',
+            label=lambda key: "Float " + " Cycle ".join(map(str, key)),
+            mode='lines+markers',
+            hovertemplate='Temp: %{x:.2f}°C<br>Depth: %{y:.1f}m<extra></extra>',
+            max_traces=max_traces
+        ):
+            fig.add_trace(trace)
         
         # Invert y-axis (depth increases downward)
         fig.update_yaxes(autorange='reversed', title='Pressure (dbar)')
@@ -155,7 +145,8 @@ class ProfilePlotter:
         self,
         df: pd.DataFrame,
         group_by: str = 'timestamp',
-        title: str = "Profile Comparison"
+        title: str = "Profile Comparison",
+        max_traces: int = MAX_TRACES
     ) -> go.Figure:
         """
         Compare multiple profiles side-by-side.
@@ -166,19 +157,17 @@ class ProfilePlotter:
         
         fig = go.Figure()
         
-        # Group data
+        # Group data (one line per profile inside each group)
         if group_by in df.columns:
-            groups = df.groupby(group_by)
-            
-            for name, group in groups:
-                group = group.sort_values('pressure')
-                fig.add_trace(go.Scatter(
-                    x=group['temperature'],
-                    y=group['pressure'],
-                    mode='lines',
-                    name=str(name),
-                    hovertemplate='Temp: %{x:.2f}°C<br>Depth: %{y:.1f}m<extra></extra>'
-                ))
+            for trace in profile_traces(
+                df,
+                x='temperature',
+                group_by=[group_by],
+                label=lambda key: str(key[0]),
+                hovertemplate='Temp: %{x:.2f}°C<br>Depth: %{y:.1f}m<extra></extra>',
+                max_traces=max_traces
+            ):
+                fig.add_trace(trace)
         
         fig.update_yaxes(autorange='reversed', title='Pressure (dbar)')
         fig.update_xaxes(title='Temperature (°C)')
@@ -0,0 +1,141 @@
+"""
+Profile line traces that scale with point count, not profile count
+
+Profile plots used to add one go.Scatter per (float_id, cycle_number).
+Here rows are sorted once and split into line segments (one per profile)
+joined with NaN separators, so a trace can hold any number of profiles:
+
+- up to max_traces legend groups: one trace per group (as before)
+- more groups: a single merged trace for all of them
+- more than max_points points: every k-th level kept per profile
+  (first and last level always kept)
+- WebGL (Scattergl) once the figure holds more than WEBGL_POINTS points
+"""
+
+from typing import Callable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from advanced_analytics.profile_batch import profile_keys
+
+WEBGL_POINTS = 1000       # SVG is fine below this, WebGL above
+MAX_TRACES = 25           # legend groups drawn as separate traces
+MAX_POINTS = 200000       # points per figure before decimation
+MERGED_COLOR = 'rgba(31, 119, 180, 0.45)'
+
+
+def decimate(segments: np.ndarray, max_points: int) -> np.ndarray:
+    """
+    Mask keeping every k-th point of each segment (segments sorted,
+    contiguous) so that roughly max_points remain; ends are kept.
+    """
+    n = len(segments)
+    if n <= max_points:
+        return np.ones(n, dtype=bool)
+    step = int(np.ceil(n / max_points))
+    starts = np.r_[True, segments[1:] != segments[:-1]]
+    ends = np.r_[segments[1:] != segments[:-1], True]
+    first = np.flatnonzero(starts)
+    position = np.arange(n) - np.repeat(first, np.diff(np.r_[first, n]))
+    return (position % step == 0) | ends
+
+
+def with_separators(values: np.ndarray, segments: np.ndarray) -> np.ndarray:
+    """Insert NaN between consecutive segments (breaks the line in Plotly)"""
+    breaks = np.flatnonzero(segments[1:] != segments[:-1]) + 1
+    return np.insert(values.astype('float64'), breaks, np.nan)
+
+
+def profile_traces(
+    df: pd.DataFrame,
+    x: str,
+    y: str = 'pressure',
+    group_by: Optional[Sequence[str]] = None,
+    label: Callable[[tuple], str] = lambda key: ' '.join(map(str, key)),
+    mode: str = 'lines',
+    hovertemplate: Optional[str] = None,
+    colors: Optional[Sequence[str]] = None,
+    max_traces: int = MAX_TRACES,
+    max_points: int = MAX_POINTS,
+    webgl: Optional[bool] = None,
+    **trace_kwargs
+) -> List[go.Scatter]:
+    """
+    Line traces for many profiles.
+
+    Args:
+        df: Long-format rows
+        x, y: Columns plotted (y is sorted within each profile)
+        group_by: Legend grouping (default: the profile keys)
+        label: Legend name from a group key tuple
+        mode, hovertemplate, **trace_kwargs: Passed to every trace
+        colors: Cycled per group trace (merged traces use MERGED_COLOR)
+        max_traces: More groups than this are merged into one trace
+        max_points: Decimation budget for the whole figure
+        webgl: Force Scattergl on/off (default: by point count)
+
+    Returns:
+        List of go.Scatter / go.Scattergl traces
+    """
+    keys = profile_keys(df)
+    group_by = list(group_by) if group_by else keys
+    work = df.dropna(subset=[x, y])
+    if work.empty:
+        return []
+
+    # Group (legend) and segment (one line per profile within a group) codes
+    group_codes = (work.groupby(group_by, sort=True, dropna=False).ngroup().to_numpy()
+                   if group_by else np.zeros(len(work), dtype=np.int64))
+    segment_keys = list(dict.fromkeys(group_by + keys))
+    segment_codes = (work.groupby(segment_keys, sort=True, dropna=False).ngroup().to_numpy()
+                     if segment_keys else np.zeros(len(work), dtype=np.int64))
+
+    order = np.lexsort((work[y].to_numpy(dtype='float64'), segment_codes, group_codes))
+    group_codes, segment_codes = group_codes[order], segment_codes[order]
+    xs = work[x].to_numpy(dtype='float64')[order]
+    ys = work[y].to_numpy(dtype='float64')[order]
+
+    keep = decimate(segment_codes, max_points)
+    group_codes, segment_codes, xs, ys = group_codes[keep], segment_codes[keep], xs[keep], ys[keep]
+
+    use_gl = len(xs) > WEBGL_POINTS if webgl is None else webgl
+    trace_type = go.Scattergl if use_gl else go.Scatter
+    common = dict(mode=mode, hovertemplate=hovertemplate, **trace_kwargs)
+    n_groups = int(group_codes.max()) + 1
+
+    if n_groups > max_traces:
+        n_segments = len(np.unique(segment_codes))
+        return [trace_type(
+            x=with_separators(xs, segment_codes),
+            y=with_separators(ys, segment_codes),
+            name=f"{n_segments} profiles",
+            line=dict(color=MERGED_COLOR, width=1),
+            marker=dict(color=MERGED_COLOR, size=3),
+            **common
+        )]
+
+    names = _group_labels(work, group_by, label)
+    bounds = np.flatnonzero(group_codes[1:] != group_codes[:-1]) + 1
+    traces = []
+    for gx, gy, gs, gc in zip(np.split(xs, bounds), np.split(ys, bounds),
+                              np.split(segment_codes, bounds), np.split(group_codes, bounds)):
+        style = dict(line=dict(color=colors[int(gc[0]) % len(colors)])) if colors else {}
+        traces.append(trace_type(
+            x=with_separators(gx, gs),
+            y=with_separators(gy, gs),
+            name=names[int(gc[0])] if names else 'Profile',
+            **style,
+            **common
+        ))
+    return traces
+
+
+def _group_labels(work: pd.DataFrame, group_by: List[str], label: Callable[[tuple], str]) -> List[str]:
+    """Legend label per group code (codes follow sorted group keys)"""
+    if not group_by:
+        return []
+    first = work.groupby(group_by, sort=True, dropna=False).size().index
+    keys = first if isinstance(first, pd.MultiIndex) else [(value,) for value in first]
+    return [label(tuple(key)) for key in keys]